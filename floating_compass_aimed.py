@@ -0,0 +1,308 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_aimed.py
+import math
+
+import numpy as np
+
+from qgis.PyQt.QtCore import QSettings
+from qgis.core import QgsRectangle, QgsUnitTypes
+
+from . import floating_compass_geometry as cgeom
+from .floating_compass_layer_index import (
+    CanvasLayerTransforms,
+    LayerWatch,
+    layer_index,
+    saved_layer,
+)
+from .floating_compass_nearest import format_distance
+
+
+class FloatingCompassAimedSectors:
+    """
+    Reverse-bearing query: sectors of a point layer within radius_m
+    of the active compass center whose beam (azimuth ± beamwidth / 2)
+    contains the bearing from the sector to the center, sorted by
+    angular error. Drawn by the overlay as rays into the center.
+
+    Candidates come from the shared layer index (bounding box of the
+    radius); site positions and azimuth / beamwidth values are cached
+    per feature, so the NumPy batch test is cheap enough to rerun on
+    every center drag event.
+    """
+
+    SETTINGS_GROUP = "FloatingCompass"
+    DEFAULT_RADIUS_M = 5000.0
+    DEFAULT_BEAMWIDTH = 65.0
+    MAX_RESULTS = 20
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.layer = None
+        self.azimuth_field = None
+        self.beamwidth_field = None
+        self.label_field = None
+        self.radius_m = self.DEFAULT_RADIUS_M
+        self.results = []
+
+        self._index = None
+        self._xy = {}           # fid → (x, y) layer CRS
+        self._xforms = CanvasLayerTransforms(tool.canvas)
+        self._watch = LayerWatch(lambda: self.set_layer(None))
+
+        tool.canvas.destinationCrsChanged.connect(self.refresh)
+
+    # =====================
+    # LAYER
+    # =====================
+    def set_layer(self, layer, azimuth_field=None, beamwidth_field=None,
+                  label_field=None, radius_m=None):
+        """
+        Use point layer as sector layer (None = off). azimuth_field is
+        guessed ("azimuth", "azi", …) when not given.
+        """
+        if self._index is not None:
+            try:
+                self._index.ready.disconnect(self._on_index_changed)
+                self._index.changed.disconnect(self._on_index_changed)
+            except (TypeError, RuntimeError):
+                pass
+
+        self.layer = layer
+        self._index = None
+        self._xy = {}
+        self.results = []
+        self._watch.watch(None)
+
+        if radius_m is not None:
+            self.radius_m = max(1.0, float(radius_m))
+
+        if layer is None:
+            self.azimuth_field = self.beamwidth_field = self.label_field = None
+        else:
+            names = {f.name().lower(): f.name() for f in layer.fields()}
+            self.azimuth_field = azimuth_field or next(
+                (names[n] for n in ("azimuth", "azi", "az", "bearing") if n in names),
+                None,
+            )
+            if self.azimuth_field is None:
+                self.layer = None
+                raise ValueError(f"{layer.name()}: no azimuth field")
+            self.beamwidth_field = beamwidth_field or next(
+                (names[n] for n in ("beamwidth", "hbw", "bw", "beam") if n in names),
+                None,
+            )
+            self.label_field = label_field or layer.displayField() or None
+
+            self._index = layer_index(layer)
+            self._index.ready.connect(self._on_index_changed)
+            self._index.changed.connect(self._on_index_changed)
+            self._watch.watch(layer)
+
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        s.setValue("aimed_layer_id", layer.id() if self.layer else "")
+        s.setValue("aimed_azimuth_field", self.azimuth_field or "")
+        s.setValue("aimed_beamwidth_field", self.beamwidth_field or "")
+        s.setValue("aimed_label_field", self.label_field or "")
+        s.setValue("aimed_radius_m", self.radius_m)
+        s.endGroup()
+
+        self.refresh()
+
+    def restore(self):
+        """Re-select the saved sector layer if it is in the project."""
+        if self.layer is not None:
+            return
+
+        layer = saved_layer("aimed_layer_id")
+        if layer is None:
+            return
+
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        az = s.value("aimed_azimuth_field", "") or None
+        bw = s.value("aimed_beamwidth_field", "") or None
+        label = s.value("aimed_label_field", "") or None
+        radius = s.value("aimed_radius_m", self.DEFAULT_RADIUS_M, float)
+        s.endGroup()
+        try:
+            self.set_layer(layer, az, bw, label, radius)
+        except ValueError:
+            pass
+
+    def set_radius(self, radius_m):
+        self.radius_m = max(1.0, float(radius_m))
+        QSettings().setValue("FloatingCompass/aimed_radius_m", self.radius_m)
+        self.refresh()
+
+    def _on_index_changed(self):
+        self._xy = {}
+        self.refresh()
+
+    @property
+    def enabled(self):
+        return self.layer is not None
+
+    # =====================
+    # QUERY
+    # =====================
+    def _search_rect(self, x, y):
+        """Layer-CRS box around (x, y) covering radius_m."""
+        crs = self.layer.crs()
+        r = self.radius_m
+        if crs.isGeographic():
+            dy = r / cgeom.M_PER_DEG_LAT
+            dx = r / (cgeom.M_PER_DEG_LON_EQ * max(0.01, math.cos(math.radians(y))))
+        else:
+            dx = dy = r * QgsUnitTypes.fromUnitToUnitFactor(
+                QgsUnitTypes.DistanceMeters, crs.mapUnits()
+            )
+        return QgsRectangle(x - dx, y - dy, x + dx, y + dy)
+
+    def _candidates(self, fids):
+        """(fids, x, y, azimuth, beamwidth) arrays; rows without azimuth dropped."""
+        idx = self._index
+        keep, xs, ys, az, bw = [], [], [], [], []
+        for fid in fids:
+            xy = self._xy.get(fid)
+            if xy is None:
+                geom = idx.geometry(fid)
+                if geom is None or geom.isNull():
+                    continue
+                p = geom.centroid().asPoint()
+                xy = self._xy[fid] = (p.x(), p.y())
+
+            a = _number(idx.value(fid, self.azimuth_field))
+            if a is None:
+                continue
+            b = (
+                _number(idx.value(fid, self.beamwidth_field))
+                if self.beamwidth_field else None
+            )
+            keep.append(fid)
+            xs.append(xy[0])
+            ys.append(xy[1])
+            az.append(a)
+            bw.append(b or self.DEFAULT_BEAMWIDTH)
+
+        return (
+            keep,
+            np.array(xs, dtype=float),
+            np.array(ys, dtype=float),
+            np.array(az, dtype=float),
+            np.array(bw, dtype=float),
+        )
+
+    def query(self, center_map):
+        """
+        Sectors aimed at center_map (QgsPointXY, canvas CRS) as dicts:
+        fid, label, point (canvas CRS), azimuth, beamwidth, bearing
+        (sector → center), error (signed deg), distance_m. Sorted by
+        |error|.
+        """
+        if self._index is None or not self._index.is_ready:
+            return []
+
+        to_layer, to_canvas = self._xforms.get(self.layer)
+        try:
+            c = to_layer.transform(center_map)
+        except Exception:
+            return []
+
+        fids, xs, ys, az, bw = self._candidates(
+            self._index.intersects(self._search_rect(c.x(), c.y()))
+        )
+        if not fids:
+            return []
+
+        crs = self.layer.crs()
+        if crs.isGeographic():
+            b = cgeom.geodesic_bearings(xs, ys, c.x(), c.y())
+            d = cgeom.geodesic_distances(xs, ys, c.x(), c.y())
+        else:
+            b = cgeom.bearings(xs, ys, c.x(), c.y())
+            d = cgeom.distances(xs, ys, c.x(), c.y()) * QgsUnitTypes.fromUnitToUnitFactor(
+                crs.mapUnits(), QgsUnitTypes.DistanceMeters
+            )
+
+        err = cgeom.angle_diffs(b, az)
+        hit = np.nonzero(cgeom.in_sector(b, az, bw) & (d <= self.radius_m))[0]
+        hit = hit[np.argsort(np.abs(err[hit]), kind="stable")][: self.MAX_RESULTS]
+
+        out = []
+        for i in hit:
+            fid = fids[i]
+            label = None
+            if self.label_field:
+                label = self._index.value(fid, self.label_field)
+            try:
+                pt = to_canvas.transform(xs[i], ys[i])
+            except Exception:
+                continue
+            out.append({
+                "fid": fid,
+                "label": "" if label is None else str(label),
+                "point": pt,
+                "azimuth": float(az[i]) % 360.0,
+                "beamwidth": float(bw[i]),
+                "bearing": float(b[i]),
+                "error": float(err[i]),
+                "distance_m": float(d[i]),
+            })
+        return out
+
+    def refresh(self):
+        """Re-query for the active compass center and repaint."""
+        t = self.tool
+        c = t.center
+
+        if not self.enabled or c is None:
+            if self.results:
+                self.results = []
+                t._request_update(geometry=True)
+            return
+
+        center_map = t.canvas.getCoordinateTransform().toMapCoordinates(
+            int(round(c.x())), int(round(c.y()))
+        )
+        self.results = self.query(center_map)
+        t._request_update(geometry=True)
+
+    def ray_text(self, res):
+        label = f"{res['label']}  " if res["label"] else ""
+        return (
+            f"{label}{res['azimuth']:.0f}° ({res['error']:+.1f}°)  "
+            f"{format_distance(res['distance_m'])}"
+        )
+
+    def points_px(self):
+        """(result, QPointF pixel position) for the current results."""
+        from qgis.PyQt.QtCore import QPointF
+
+        to_px = self.tool.canvas.getCoordinateTransform()
+        out = []
+        for res in self.results:
+            p = to_px.transform(res["point"])
+            out.append((res, QPointF(p.x(), p.y())))
+        return out
+
+
+def _number(value):
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if v != v else v
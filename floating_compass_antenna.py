@@ -0,0 +1,239 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_antenna.py
+#
+# Horizontal antenna patterns from MSI / Planet files (.msi, .pln,
+# .txt). Each file is parsed and resampled once (cached per path,
+# forget() re-reads it); the overlay draws a unit QPainterPath that
+# is only translated / rotated / scaled per arm.
+#
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+
+# attenuation at which the drawn pattern reaches the center
+PATTERN_FLOOR_DB = 30.0
+
+# vertices of the resampled horizontal pattern (one per degree)
+PATTERN_VERTICES = 360
+
+# dBd → dBi
+DBD_TO_DBI = 2.15
+
+
+class AntennaPatternError(ValueError):
+    pass
+
+
+# =====================
+# PARSING
+# =====================
+def parse_msi(path):
+    """
+    Parse an MSI / Planet pattern file into a dict: name, frequency_mhz,
+    gain_dbi, tilt, horizontal / vertical as (angles, attenuation_db)
+    arrays (attenuation ≥ 0, relative to the main lobe).
+    """
+    header = {}
+    sections = {"HORIZONTAL": [], "VERTICAL": []}
+    current = None
+    remaining = 0
+
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        for raw in fh:
+            line = raw.strip()
+            if not line:
+                continue
+            parts = line.replace(",", " ").split()
+
+            if remaining > 0:
+                try:
+                    sections[current].append((float(parts[0]), float(parts[1])))
+                    remaining -= 1
+                    continue
+                except (ValueError, IndexError):
+                    remaining = 0  # short section: fall through to keywords
+
+            key = parts[0].upper()
+            value = line[len(parts[0]):].strip()
+
+            if key in sections:
+                current = key
+                try:
+                    remaining = int(float(parts[1])) if len(parts) > 1 else 360
+                except ValueError:
+                    remaining = 360
+            else:
+                header[key] = value
+
+    if not sections["HORIZONTAL"]:
+        raise AntennaPatternError(f"no HORIZONTAL section in {path}")
+
+    return {
+        "name": header.get("NAME") or os.path.splitext(os.path.basename(path))[0],
+        "frequency_mhz": _number(header.get("FREQUENCY")),
+        "gain_dbi": _gain_dbi(header.get("GAIN")),
+        "tilt": header.get("TILT") or header.get("ELECTRICAL_TILT") or "",
+        "horizontal": _section(sections["HORIZONTAL"]),
+        "vertical": _section(sections["VERTICAL"]) if sections["VERTICAL"] else None,
+    }
+
+
+def _number(text):
+    if not text:
+        return None
+    try:
+        return float(text.split()[0])
+    except (ValueError, IndexError):
+        return None
+
+
+def _gain_dbi(text):
+    gain = _number(text)
+    if gain is None:
+        return None
+    if "DBD" in text.upper():
+        gain += DBD_TO_DBI
+    return gain
+
+
+def _section(rows):
+    arr = np.asarray(rows, dtype=float)
+    return arr[:, 0] % 360.0, arr[:, 1]
+
+
+def resample(angles, attenuation, n=PATTERN_VERTICES):
+    """Attenuation (dB) at n evenly spaced azimuths 0 … 360·(n-1)/n."""
+    order = np.argsort(angles)
+    grid = np.arange(n) * (360.0 / n)
+    return np.interp(
+        grid, np.asarray(angles)[order], np.asarray(attenuation)[order],
+        period=360.0,
+    )
+
+
+def pattern_radii(attenuation, floor_db=PATTERN_FLOOR_DB):
+    """Relative radius 0‥1 (linear in dB) for drawing."""
+    return np.clip(1.0 - np.asarray(attenuation) / floor_db, 0.0, 1.0)
+
+
+def pattern_gain(pattern, relative_deg):
+    """
+    Gain (dBi) at azimuths relative to boresight, from the resampled
+    horizontal pattern (nearest degree step).
+    """
+    att = pattern["attenuation"]
+    n = len(att)
+    idx = np.rint(np.mod(relative_deg, 360.0) * n / 360.0).astype(np.int64) % n
+    return (pattern["gain_dbi"] or 0.0) - att[idx]
+
+
+# =====================
+# CACHES
+# =====================
+_PATTERNS = OrderedDict()   # path → pattern dict
+_PATHS = OrderedDict()      # (path, floor) → unit QPainterPath
+_FAILED = {}                # path → error text (logged once)
+CACHE_MAX = 64
+
+
+def _remember(cache, key, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > CACHE_MAX:
+        cache.popitem(last=False)
+    return value
+
+
+def load_pattern(path):
+    """
+    Parsed + resampled pattern of path (cached), or None when the
+    file is missing / invalid. Adds "attenuation" (PATTERN_VERTICES
+    values, 0° = boresight) to the parsed dict.
+    """
+    key = os.path.abspath(path)
+    pattern = _PATTERNS.get(key)
+    if pattern is not None:
+        _PATTERNS.move_to_end(key)
+        return pattern
+    if key in _FAILED:
+        return None
+
+    try:
+        pattern = parse_msi(key)
+    except (OSError, ValueError) as e:
+        _FAILED[key] = str(e)
+        _log(f"Antenna pattern {key}: {e}")
+        return None
+
+    att = resample(*pattern["horizontal"])
+    pattern["attenuation"] = att - att.min()   # 0 dB at the main lobe
+    return _remember(_PATTERNS, key, pattern)
+
+
+def unit_path(path, floor_db=PATTERN_FLOOR_DB):
+    """
+    Closed QPainterPath of the horizontal pattern around (0, 0) with
+    boresight pointing up (screen north) and main-lobe radius 1.
+    Built once per file; the overlay only transforms it.
+    """
+    key = (os.path.abspath(path), floor_db)
+    qpath = _PATHS.get(key)
+    if qpath is not None:
+        _PATHS.move_to_end(key)
+        return qpath
+
+    pattern = load_pattern(path)
+    if pattern is None:
+        return None
+
+    from qgis.PyQt.QtCore import QPointF
+    from qgis.PyQt.QtGui import QPainterPath, QPolygonF
+
+    from . import floating_compass_geometry as cgeom
+
+    att = pattern["attenuation"]
+    az = np.arange(len(att)) * (360.0 / len(att))
+    pts = cgeom.screen_endpoints(0.0, 0.0, az, pattern_radii(att, floor_db))
+
+    qpath = QPainterPath()
+    qpath.addPolygon(QPolygonF([QPointF(x, y) for x, y in pts]))
+    qpath.closeSubpath()
+    return _remember(_PATHS, key, qpath)
+
+
+def forget(path):
+    """Drop path from the caches (file changed on disk)."""
+    key = os.path.abspath(path)
+    _PATTERNS.pop(key, None)
+    _FAILED.pop(key, None)
+    for k in [k for k in _PATHS if k[0] == key]:
+        del _PATHS[k]
+
+
+def clear_caches():
+    _PATTERNS.clear()
+    _PATHS.clear()
+    _FAILED.clear()
+
+
+def _log(msg):
+    try:
+        from qgis.core import Qgis, QgsMessageLog
+        QgsMessageLog.logMessage(msg, "Floating Compass", Qgis.Warning)
+    except Exception:
+        print(f"[FloatingCompass] {msg}")
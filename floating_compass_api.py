@@ -0,0 +1,647 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_api.py
+from qgis.PyQt.QtCore import QPointF
+
+
+class FloatingCompassApi:
+    """
+    Scripting API for the QGIS Python console.
+
+    Reach it through the running tool, e.g.:
+
+        from qgis.utils import plugins
+        tool = plugins["FloatingCompass"].tool
+        api = tool.api
+
+        api.set_center_map(106.8272, -6.1754)
+        api.set_arms([0, 120, 240])
+        api.snapshot()
+
+    Several compasses can be open at once; every call acts on the
+    active one (add_compass() makes the new one active).
+
+    Bulk updates: wrap calls in tool.batch() (or api.batch()).
+    Repaints and QSettings writes are suppressed inside the batch
+    and flushed once on exit:
+
+        with api.batch():
+            for x, y, azimuths in sites:
+                api.set_center_map(x, y)
+                api.set_arms(azimuths)
+
+    Arm entries for set_arms() / set_arm() accept:
+        angle   : azimuth in degrees
+        radius  : arm length in px
+        enabled : bool
+        color   : anything QColor() accepts ("#FF0000", QColor, ...)
+        label   : arm label text
+    """
+
+    def __init__(self, tool):
+        self.tool = tool
+
+    # =====================
+    # BATCH
+    # =====================
+    def batch(self):
+        """Same as tool.batch()."""
+        return self.tool.batch()
+
+    # =====================
+    # CENTER
+    # =====================
+    def set_center_px(self, x, y):
+        """Place / move the compass center in canvas pixels."""
+        t = self.tool
+        pos = QPointF(float(x), float(y))
+        t.project_state.ensure_loaded()
+
+        if t.center is None:
+            t._place_compass(pos)
+            return
+
+        t.center = pos
+        t._request_update(geometry=True)
+
+    def set_center_map(self, x, y, crs=None):
+        """
+        Place / move the compass center at map coordinate (x, y).
+        crs: QgsCoordinateReferenceSystem or authid of (x, y);
+             default = canvas CRS.
+        """
+        from qgis.core import QgsPointXY
+
+        pt = self._to_canvas_crs(QgsPointXY(float(x), float(y)), crs)
+        px = self.tool.canvas.getCoordinateTransform().transform(pt)
+        self.set_center_px(px.x(), px.y())
+
+    def center_map(self):
+        """Compass center as (x, y) in canvas CRS, or None."""
+        c = self.tool.center
+        if c is None:
+            return None
+
+        pt = self.tool.canvas.getCoordinateTransform().toMapCoordinates(
+            int(round(c.x())), int(round(c.y()))
+        )
+        return (pt.x(), pt.y())
+
+    def add_compass(self, x, y, crs=None, arms=None):
+        """
+        Add another compass at map coordinate (x, y); it becomes the
+        active one (all other api calls act on the active compass).
+        arms: optional, same format as set_arms().
+        """
+        from qgis.core import QgsPointXY
+
+        pt = self._to_canvas_crs(QgsPointXY(float(x), float(y)), crs)
+        px = self.tool.canvas.getCoordinateTransform().transform(pt)
+
+        self.tool.project_state.ensure_loaded()
+        with self.tool.batch():
+            self.tool.add_instance(QPointF(px.x(), px.y()))
+            if arms is not None:
+                self.set_arms(arms)
+
+    def remove_compass(self):
+        """Remove the active compass."""
+        self.tool.remove_instance()
+
+    def compass_count(self):
+        return len(self.tool.instances)
+
+    def clear(self):
+        """Remove all compasses (same as ESC, without switching tool)."""
+        t = self.tool
+        if t.center is None:
+            return
+
+        t.remove_all_instances()
+        t.overlay.setVisible(False)
+        t.project_state.mark_dirty()
+        t._request_update()
+
+    # =====================
+    # ARMS
+    # =====================
+    def set_arm(self, index, angle=None, radius=None, enabled=None,
+                color=None, label=None):
+        """Update a single arm (0..5). None = keep current value."""
+        t = self.tool
+        t._init_arms_if_needed()
+
+        arm = t.arms[index]
+        geometry = False
+
+        if angle is not None:
+            arm["angle_deg"] = float(angle) % 360
+
+        if radius is not None:
+            arm["radius_px"] = t.clamp(
+                int(radius), t.arm_radius_min, t.arm_radius_max
+            )
+            geometry = True
+
+        if enabled is not None:
+            arm["enabled"] = bool(enabled)
+            geometry = True
+
+        if color is not None:
+            from qgis.PyQt.QtGui import QColor
+            arm["color"] = QColor(color)
+
+        if label is not None:
+            t.arm_labels[index] = str(label).strip() or t.arm_labels[index]
+
+        if index < 2:
+            t.arm_a_angle = t.arms[0]["angle_deg"]
+            t.arm_b_angle = t.arms[1]["angle_deg"]
+
+        if radius is not None or angle is not None:
+            # ground-locked arms take the new length (as after a drag)
+            t.ground.sync_from_pixels(t.instances.active)
+
+        t._persist_arms([index])
+        t._request_update(geometry=geometry)
+
+    def set_arms(self, arms):
+        """
+        Set all arms at once.
+
+        arms: list of angles (float) or dicts with keys
+              angle / radius / enabled / color / label.
+        Listed arms are enabled (unless enabled=False is given),
+        arms beyond the list are disabled.
+        """
+        t = self.tool
+        t._init_arms_if_needed()
+
+        if len(arms) > len(t.arms):
+            raise ValueError(
+                f"At most {len(t.arms)} arms supported, got {len(arms)}"
+            )
+
+        with t.batch():
+            for idx in range(len(t.arms)):
+                if idx >= len(arms):
+                    if t.arms[idx].get("enabled"):
+                        self.set_arm(idx, enabled=False)
+                    continue
+
+                spec = arms[idx]
+                if not isinstance(spec, dict):
+                    spec = {"angle": spec}
+
+                self.set_arm(
+                    idx,
+                    angle=spec.get("angle"),
+                    radius=spec.get("radius"),
+                    enabled=spec.get("enabled", True),
+                    color=spec.get("color"),
+                    label=spec.get("label"),
+                )
+
+    def set_ring_radius(self, radius):
+        t = self.tool
+        t.ring_radius = t.clamp(
+            int(radius), t.ring_radius_min, t.ring_radius_max
+        )
+        t._persist_ring()
+        t._request_update(geometry=True)
+
+    # =====================
+    # SETTINGS
+    # =====================
+    def apply(self, settings):
+        """
+        Apply a (partial) settings dict, same keys as the settings
+        dialog / JSON export. Returns the set of changed keys.
+        """
+        return self.tool.apply_settings(settings)
+
+    # =====================
+    # PROFILES
+    # =====================
+    def profiles(self, tag=None):
+        """Profile names (optionally only those tagged tag)."""
+        return self.tool.profiles.names(tag)
+
+    def save_profile(self, name, tags=()):
+        self.tool.save_profile(name, tags)
+
+    def apply_profile(self, name):
+        """Switch profile; returns the set of changed keys."""
+        return self.tool.apply_profile(name)
+
+    # =====================
+    # MEASUREMENT LOG
+    # =====================
+    def set_site(self, name):
+        """Site name stored with every recorded measurement."""
+        self.tool.site_name = str(name or "").strip()
+
+    def record_measurement(self):
+        """
+        Queue the active compass for the GeoPackage measurement log
+        (written in the background). Returns the record dict.
+        """
+        return self.tool.record_measurement()
+
+    def set_measurement_path(self, path):
+        """Switch the measurement log to another .gpkg file."""
+        from qgis.PyQt.QtCore import QSettings
+        from .floating_compass_measurements import (
+            FloatingCompassMeasurementLog,
+        )
+
+        self.tool.measurements.close()
+        self.tool.measurements = FloatingCompassMeasurementLog(str(path))
+        QSettings().setValue("FloatingCompass/measurement_gpkg", str(path))
+
+    # =====================
+    # NEAREST SITES
+    # =====================
+    def set_site_layer(self, layer, label_field=None, k=5):
+        """
+        Show ghost rays to the k nearest features of point layer
+        (QgsVectorLayer or layer id); None switches them off.
+        """
+        if isinstance(layer, str):
+            from qgis.core import QgsProject
+            layer = QgsProject.instance().mapLayer(layer)
+        self.tool.nearest.set_layer(layer, label_field, k)
+
+    def set_hover_layer(self, layer, label_field=None, tolerance_px=None):
+        """
+        Status bar readout (bearing / distance from the compass) of
+        the layer feature under the cursor; None switches it off.
+        """
+        if isinstance(layer, str):
+            from qgis.core import QgsProject
+            layer = QgsProject.instance().mapLayer(layer)
+        self.tool.hover_readout.set_layer(layer, label_field, tolerance_px)
+
+    def set_sweep_layer(self, layer):
+        """
+        Highlight features of layer crossed by an arm while it is
+        rotated or resized; None switches it off.
+        """
+        if isinstance(layer, str):
+            from qgis.core import QgsProject
+            layer = QgsProject.instance().mapLayer(layer)
+        self.tool.sweep.set_layer(layer)
+
+    def set_arm_pattern(self, arm_index, path):
+        """
+        Draw the horizontal pattern of an MSI / Planet file around
+        arm arm_index of the active compass (None = off).
+        Returns False if the file cannot be read.
+        """
+        return self.tool.set_arm_pattern(arm_index, path)
+
+    def set_arm_beamwidth(self, arm_index, beamwidth):
+        """
+        Beamwidth (deg) of arm arm_index of the active compass, used by
+        the sector separation check (None = default beamwidth).
+        """
+        t = self.tool
+        inst = t.instances.active
+        if inst is None or not 0 <= arm_index < len(inst.arms or []):
+            return False
+        arm = inst.arms[arm_index]
+        if beamwidth:
+            arm["beamwidth"] = float(beamwidth)
+        else:
+            arm.pop("beamwidth", None)
+        t.project_state.mark_dirty()
+        t._request_update()
+        return True
+
+    def set_arm_length(self, arm_index, value, unit=None):
+        """
+        Ground length of arm arm_index of the active compass in unit
+        ("m" / "km", default: the length unit setting); the pixel
+        length follows the map scale. None / 0 = pixel length.
+        """
+        t = self.tool
+        inst = t.instances.active
+        if inst is None or not 0 <= arm_index < len(inst.arms or []):
+            return False
+        t.ground.set_arm_length(inst, arm_index, value, unit)
+        return True
+
+    def set_ring_distance(self, value, unit=None):
+        """Ring radius of the active compass as ground distance (None / 0 = pixels)."""
+        inst = self.tool.instances.active
+        if inst is None:
+            return False
+        self.tool.ground.set_ring_distance(inst, value, unit)
+        return True
+
+    def lock_ground_lengths(self):
+        """Lock the current ring and arm lengths of the active compass to ground distance."""
+        inst = self.tool.instances.active
+        return inst is not None and self.tool.ground.lock(inst)
+
+    def unlock_ground_lengths(self):
+        """Back to pixel lengths for the active compass."""
+        inst = self.tool.instances.active
+        if inst is not None:
+            self.tool.ground.unlock(inst)
+
+    def set_length_unit(self, unit):
+        """Unit of length readouts and prompts: "m" or "km"."""
+        self.tool.ground.set_unit(unit)
+
+    def add_to_layout(self, layout, azimuth_fields=None, size_mm=60.0):
+        """
+        Add the active compass to a print layout (name or layout) as a
+        vector layout item. With an atlas, azimuth_fields (list or
+        "azi_1,azi_2,azi_3", or one field holding "0;120;240") drive
+        the arms per atlas feature. Returns the item.
+        """
+        from qgis.core import QgsProject
+        from .floating_compass_layout import add_to_layout
+
+        if isinstance(layout, str):
+            name = layout
+            layout = QgsProject.instance().layoutManager().layoutByName(name)
+            if layout is None:
+                raise ValueError(f"no print layout named {name!r}")
+        return add_to_layout(self.tool, layout, azimuth_fields, size_mm)
+
+    def set_range_rings(self, enabled=None, distances=None, unit=None):
+        """
+        Show / configure the concentric range rings: distances as a
+        list or "250, 500, 1000", unit "m", "km" or "px".
+        """
+        self.tool.range_rings.configure(enabled, distances, unit)
+
+    def range_rings(self):
+        """Range rings of the active compass: [(radius_px, label)]."""
+        inst = self.tool.instances.active
+        if inst is None:
+            return []
+        return list(self.tool.range_rings.radii(inst))
+
+    def set_separation(self, enabled=None, min_separation_deg=None,
+                       beamwidth_deg=None):
+        """Show / configure the sector separation arcs."""
+        self.tool.separation.configure(enabled, min_separation_deg, beamwidth_deg)
+
+    def separation(self):
+        """
+        Gaps between neighbouring enabled arms of the active compass,
+        clockwise from north: dicts with arm, next_arm, start,
+        separation, overlap (deg) and state (ok / overlap / too close).
+        """
+        inst = self.tool.instances.active
+        return [] if inst is None else self.tool.separation.result(inst)
+
+    def set_path_loss(self, model=None, **params):
+        """
+        Graded arms with predicted received level: model "fspl",
+        "hata" or "off"; other keys: environment, freq_mhz,
+        tx_power_dbm, tx_height_m, rx_height_m, sector_gain_dbi,
+        sector_beamwidth.
+        """
+        if model is not None:
+            params["model"] = model
+        self.tool.pathloss.configure(**params)
+
+    def follow_gnss(self, source, speed=1.0, rotate=True, keep_visible=True):
+        """
+        Let the active compass follow an NMEA feed: "tcp:host:port",
+        "serial:/dev/ttyUSB0:4800" or a log file path (replayed at
+        speed × real time; 0 = as fast as possible). rotate turns
+        the arms with the HDT / course heading.
+        """
+        self.tool.gnss.start(source, speed, rotate, keep_visible)
+
+    def stop_gnss(self):
+        self.tool.gnss.stop()
+
+    def set_dem(self, layer, band=1, freq_mhz=None, tx_height_m=None,
+                rx_height_m=None):
+        """
+        Terrain profile of the selected arm from raster layer band
+        (antenna heights above ground, frequency for the Fresnel
+        zone); None switches it off.
+        """
+        if isinstance(layer, str):
+            from qgis.core import QgsProject
+            layer = QgsProject.instance().mapLayer(layer)
+        self.tool.terrain.set_dem(layer, band, freq_mhz, tx_height_m, rx_height_m)
+
+    def terrain_profile(self, arm_index=0):
+        """
+        Terrain profile along arm arm_index of the active compass as
+        a dict of plain lists (distance_m, elevation, los, fresnel_m,
+        clearance_m), plus length_m and clear. None without a DEM.
+        """
+        t = self.tool
+        inst = t.instances.active
+        if not t.terrain.enabled or inst is None or inst.center is None:
+            return None
+        if arm_index >= len(inst.arms or []):
+            return None
+
+        p = t.terrain.compute(inst, inst.arms[arm_index])
+        if p is None:
+            return None
+        return {
+            "arm_id": p["arm_id"],
+            "azimuth": p["azimuth"],
+            "length_m": p["length_m"],
+            "clear": p["clear"],
+            "distance_m": p["distance_m"].tolist(),
+            "elevation": p["elevation"].tolist(),
+            "los": p["los"].tolist(),
+            "fresnel_m": p["fresnel_m"].tolist(),
+            "clearance_m": p["clearance_m"].tolist(),
+        }
+
+    def import_drive_test(self, path, x_field=None, y_field=None,
+                          value_field=None, cell_field=None,
+                          crs="EPSG:4326", delimiter=None):
+        """
+        Stream a drive-test export (CSV / TEMS / NEMO text) into the
+        sample store in the background. Fields default to common
+        export names (Longitude, Latitude, RSRP, PCI, …). Returns the
+        column mapping used.
+        """
+        return self.tool.drivetest.import_file(
+            path,
+            {"x": x_field, "y": y_field, "value": value_field, "cell": cell_field},
+            crs,
+            delimiter,
+        )
+
+    def clear_drive_test(self):
+        self.tool.drivetest.clear()
+
+    def drive_test_offsets(self):
+        """
+        Angle of arrival of all drive-test samples against the active
+        compass: per enabled arm a dict with azimuth, count (samples
+        nearest to that arm), median_offset and within_15 (share of
+        samples within ±15°). None without samples.
+        """
+        result = self.tool.drivetest.analyze()
+        return None if result is None else result["arms"]
+
+    def check_swapped_sectors(self, layer, site_field=None, sector_field=None,
+                              azimuth_field=None, **params):
+        """
+        Compare each sector's azimuth (point layer at the sites) with
+        the dominant bearing of the drive-test samples it served.
+        Runs in background tasks; read swap_results() afterwards.
+        params: min_samples, misalign_deg, swap_margin_deg, window_deg.
+        Returns the number of sites queued.
+        """
+        if isinstance(layer, str):
+            from qgis.core import QgsProject
+            layer = QgsProject.instance().mapLayer(layer)
+        return self.tool.swaps.run(
+            layer, site_field, sector_field, azimuth_field, **params
+        )
+
+    def swap_results(self, flagged_only=False):
+        """
+        Last sector check: list of dicts (site, sector, azimuth,
+        measured, deviation, samples, share, status, swapped_with,
+        confidence). status is ok / misaligned / swapped / no data.
+        """
+        rows = self.tool.swaps.rows
+        if flagged_only:
+            rows = [r for r in rows if r["status"] in ("swapped", "misaligned")]
+        return [
+            {k: v for k, v in r.items() if k not in ("x", "y")} for r in rows
+        ]
+
+    def open_swap_site(self, site):
+        """Add a compass at site with arms at the measured sector bearings."""
+        self.tool.swaps.open_site(site)
+
+    def set_aimed_layer(self, layer, azimuth_field=None, beamwidth_field=None,
+                        label_field=None, radius_m=None):
+        """
+        Sector point layer for the "sectors aimed here" query (None =
+        off); fields are guessed when not given, beamwidth defaults
+        to 65°.
+        """
+        if isinstance(layer, str):
+            from qgis.core import QgsProject
+            layer = QgsProject.instance().mapLayer(layer)
+        self.tool.aimed.set_layer(
+            layer, azimuth_field, beamwidth_field, label_field, radius_m
+        )
+
+    def aimed_sectors(self):
+        """
+        Sectors within the radius whose beam contains the bearing to
+        the active compass center, best aimed first: dicts with label,
+        azimuth, beamwidth, bearing (sector → center), error (deg),
+        distance_m and x / y (canvas CRS).
+        """
+        return [
+            {
+                "label": r["label"],
+                "azimuth": r["azimuth"],
+                "beamwidth": r["beamwidth"],
+                "bearing": r["bearing"],
+                "error": r["error"],
+                "distance_m": r["distance_m"],
+                "x": r["point"].x(),
+                "y": r["point"].y(),
+            }
+            for r in self.tool.aimed.results
+        ]
+
+    def nearest_sites(self, k=None):
+        """
+        Nearest sites of the active compass: list of dicts with
+        label, bearing (deg), distance_m, x / y (canvas CRS).
+        Empty until the site index has been built.
+        """
+        t = self.tool
+        if t.center is None:
+            return []
+
+        c = t.canvas.getCoordinateTransform().toMapCoordinates(
+            int(round(t.center.x())), int(round(t.center.y()))
+        )
+        return [
+            {
+                "label": r["label"],
+                "bearing": r["bearing"],
+                "distance_m": r["distance_m"],
+                "x": r["point"].x(),
+                "y": r["point"].y(),
+            }
+            for r in t.nearest.query(c, k)
+        ]
+
+    # =====================
+    # SNAPSHOT
+    # =====================
+    def snapshot(self):
+        """Plain-python copy of the current compass state."""
+        t = self.tool
+        t._init_arms_if_needed()
+
+        c = t.center
+        return {
+            "center_px": None if c is None else (c.x(), c.y()),
+            "center_map": self.center_map(),
+            "ring_radius": t.ring_radius,
+            "mode": t.mode,
+            "multi_sector_count": t.multi_sector_count,
+            "arms": [
+                {
+                    "id": arm["id"],
+                    "angle": float(arm["angle_deg"]),
+                    "radius": arm.get("radius_px"),
+                    "enabled": bool(arm.get("enabled")),
+                    "color": arm["color"].name() if arm.get("color") else None,
+                    "label": t.arm_label(idx, arm),
+                }
+                for idx, arm in enumerate(t.arms)
+            ],
+        }
+
+    # =====================
+    # Helpers
+    # =====================
+    def _to_canvas_crs(self, pt, crs):
+        if crs is None:
+            return pt
+
+        from qgis.core import (
+            QgsCoordinateReferenceSystem,
+            QgsCoordinateTransform,
+            QgsProject,
+        )
+
+        if isinstance(crs, str):
+            crs = QgsCoordinateReferenceSystem(crs)
+
+        dest = self.tool.canvas.mapSettings().destinationCrs()
+        if crs == dest:
+            return pt
+
+        xform = QgsCoordinateTransform(crs, dest, QgsProject.instance())
+        return xform.transform(pt)
@@ -0,0 +1,712 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_benchmark.py
+#
+# Benchmarks, run from the QGIS Python console:
+#
+#   from qgis.utils import plugins
+#   from FloatingCompass import floating_compass_benchmark as fcb
+#   fcb.bench_instances(plugins["FloatingCompass"].tool, count=50)
+#   fcb.bench_range_rings(plugins["FloatingCompass"].tool)
+#   fcb.bench_layout_item(plugins["FloatingCompass"].tool, sites=1000)
+#
+# Geometry microbenchmarks need NumPy only (no QGIS):
+#
+#   python -c "import floating_compass_benchmark as b; b.bench_geometry()"
+#   python -c "import floating_compass_benchmark as b; b.bench_path_loss()"
+#   python -c "import floating_compass_benchmark as b; b.bench_nmea()"
+#   python -c "import floating_compass_benchmark as b; b.bench_swaps()"
+#   python -c "import floating_compass_benchmark as b; b.bench_separation()"
+#
+# Qt / QGIS are therefore imported inside the functions that use them.
+#
+import math
+from time import perf_counter
+
+
+# =====================
+# Helpers
+# =====================
+def _paint_frames(overlay, frames, width, height):
+    """Average ms per full overlay paint into an offscreen image."""
+    from qgis.PyQt.QtCore import Qt
+    from qgis.PyQt.QtGui import QImage, QPainter
+
+    img = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+
+    # warm-up (fills dial / glyph caches)
+    img.fill(Qt.transparent)
+    p = QPainter(img)
+    overlay.paint(p, None, None)
+    p.end()
+
+    t0 = perf_counter()
+    for _ in range(frames):
+        img.fill(Qt.transparent)
+        p = QPainter(img)
+        overlay.paint(p, None, None)
+        p.end()
+    return (perf_counter() - t0) * 1000.0 / frames
+
+
+def _grid_instances(tool, count, width, height):
+    """Manager with count compasses spread on a grid over the canvas."""
+    from qgis.PyQt.QtCore import QPointF
+    from .floating_compass_instances import CompassInstanceManager, copy_arms
+
+    tool._init_arms_if_needed()
+    template = tool.arms
+
+    mgr = CompassInstanceManager()
+    cols = max(1, int(math.ceil(math.sqrt(count))))
+    rows = max(1, int(math.ceil(count / cols)))
+
+    for i in range(count):
+        cx = (i % cols + 0.5) * width / cols
+        cy = (i // cols + 0.5) * height / rows
+        arms = copy_arms(template)
+        for j, arm in enumerate(arms):
+            arm["angle_deg"] = (arm["angle_deg"] + i * 7) % 360
+            arm["enabled"] = j < 3
+        mgr.add(QPointF(cx, cy), tool.ring_radius, arms)
+    return mgr
+
+
+def _cache_sizes(cache):
+    return {
+        "dial_cache": len(cache._dial),
+        "glyph_cache": len(cache._glyphs),
+    }
+
+
+# =====================
+# Multiple instances
+# =====================
+def bench_instances(tool, count=50, frames=60):
+    """
+    Paint cost of 1 vs count compass instances sharing one
+    render cache. Tool state is restored afterwards.
+    """
+    size = tool.canvas.size()
+    width, height = max(size.width(), 800), max(size.height(), 600)
+
+    saved = tool.instances
+    saved_hover = tool.hover_instance
+    tool.hover_instance = None
+    try:
+        tool.instances = _grid_instances(tool, 1, width, height)
+        ms_one = _paint_frames(tool.overlay, frames, width, height)
+
+        tool.instances = _grid_instances(tool, count, width, height)
+        ms_n = _paint_frames(tool.overlay, frames, width, height)
+        caches = _cache_sizes(tool.render_cache)
+    finally:
+        tool.instances = saved
+        tool.hover_instance = saved_hover
+        tool.overlay.prepareGeometryChange()
+        tool.overlay.update()
+
+    result = {
+        "instances": count,
+        "frames": frames,
+        "ms_per_frame_1": round(ms_one, 3),
+        "ms_per_frame_n": round(ms_n, 3),
+        "ms_per_instance": round(ms_n / count, 3),
+    }
+    result.update(caches)
+    print(
+        f"[FloatingCompass] {count} instances: {ms_n:.2f} ms/frame "
+        f"(1 instance: {ms_one:.2f} ms, "
+        f"dial cache {caches['dial_cache']}, "
+        f"glyph cache {caches['glyph_cache']})"
+    )
+    return result
+
+
+# =====================
+# Range rings while dragging
+# =====================
+def _drag_frames(overlay, arm, frames, width, height):
+    """Average ms per paint, arm rotated 1° before each frame."""
+    from qgis.PyQt.QtCore import Qt
+    from qgis.PyQt.QtGui import QImage, QPainter
+
+    img = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    start = arm["angle_deg"]
+
+    t0 = perf_counter()
+    for i in range(frames):
+        arm["angle_deg"] = (start + i) % 360
+        img.fill(Qt.transparent)
+        p = QPainter(img)
+        overlay.paint(p, None, None)
+        p.end()
+    ms = (perf_counter() - t0) * 1000.0 / frames
+
+    arm["angle_deg"] = start
+    return ms
+
+
+def bench_range_rings(tool, frames=120, distances=(250, 500, 1000, 2000),
+                      unit="m"):
+    """
+    Paint cost per frame while the first arm of the active compass
+    is dragged, without and with range rings. Range ring settings
+    are restored afterwards.
+    """
+    inst = tool.instances.active
+    if inst is None or not inst.arms:
+        print("[FloatingCompass] range rings: no compass")
+        return None
+
+    size = tool.canvas.size()
+    width, height = max(size.width(), 800), max(size.height(), 600)
+    rings = tool.range_rings
+    saved = dict(rings.params)
+    arm = inst.arms[0]
+
+    try:
+        rings.configure(enabled=False)
+        _paint_frames(tool.overlay, 1, width, height)      # warm-up
+        ms_off = _drag_frames(tool.overlay, arm, frames, width, height)
+
+        rings.configure(enabled=True, distances=distances, unit=unit)
+        _paint_frames(tool.overlay, 1, width, height)
+        ms_on = _drag_frames(tool.overlay, arm, frames, width, height)
+        shown = len(rings.radii(inst))
+        paths = len(tool.render_cache._rings)
+    finally:
+        rings.configure(**saved)
+        tool.overlay.update()
+
+    result = {
+        "frames": frames,
+        "rings": shown,
+        "ms_per_frame_off": round(ms_off, 3),
+        "ms_per_frame_on": round(ms_on, 3),
+        "ms_rings": round(ms_on - ms_off, 3),
+        "ring_paths_cached": paths,
+    }
+    print(
+        f"[FloatingCompass] arm drag: {ms_off:.2f} ms/frame, "
+        f"with {shown} range rings {ms_on:.2f} ms/frame "
+        f"({paths} cached ring paths)"
+    )
+    return result
+
+
+# =====================
+# Print layout item (atlas-like)
+# =====================
+def bench_layout_item(tool, sites=1000, distinct=50, size_mm=60.0, seed=1):
+    """
+    Vector render time of the layout compass item per atlas page:
+    sites pages whose three azimuths come from distinct different
+    sets (sites sharing azimuths reuse the cached arm paths), drawn
+    into a QPicture at 300 dpi.
+    """
+    import random
+    from qgis.PyQt.QtGui import QPainter, QPicture
+    from qgis.core import (
+        QgsLayoutItemRenderContext, QgsLayoutSize, QgsPrintLayout, QgsProject,
+        QgsRenderContext,
+    )
+    from .floating_compass_layout import FloatingCompassLayoutItem, snapshot
+
+    layout = QgsPrintLayout(QgsProject.instance())
+    layout.initializeDefaults()
+    item = FloatingCompassLayoutItem(layout, tool)
+    item.attemptResize(QgsLayoutSize(size_mm, size_mm))
+
+    rnd = random.Random(seed)
+    sets = []
+    for _ in range(distinct):
+        base = rnd.uniform(0, 120)
+        sets.append([round(base + k * 120 + rnd.uniform(-10, 10)) % 360 for k in range(3)])
+
+    state = snapshot(tool)
+    ring = state["ring"]
+
+    def render(pages):
+        t0 = perf_counter()
+        for i in range(pages):
+            state["arms"] = [[a, ring, 1, None] for a in sets[i % distinct]]
+            item.state = state
+            pic = QPicture()
+            p = QPainter(pic)
+            rc = QgsRenderContext.fromQPainter(p)
+            rc.setScaleFactor(300 / 25.4)
+            item.draw(QgsLayoutItemRenderContext(rc))
+            p.end()
+        return (perf_counter() - t0) * 1000.0 / pages
+
+    ms_cold = render(distinct)          # every arm set built once
+    ms_warm = render(sites)
+
+    result = {
+        "sites": sites,
+        "distinct_azimuth_sets": distinct,
+        "ms_per_page_cold": round(ms_cold, 3),
+        "ms_per_page": round(ms_warm, 3),
+        "paths_cached": len(item._paths),
+    }
+    print(
+        f"[FloatingCompass] layout item: {ms_warm:.3f} ms/page over {sites} "
+        f"pages (first build {ms_cold:.3f} ms/page, "
+        f"{result['paths_cached']} cached paths)"
+    )
+    return result
+
+
+# =====================
+# Geometry core (no QGIS)
+# =====================
+def _best_ms(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = perf_counter()
+        fn()
+        dt = (perf_counter() - t0) * 1000.0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def bench_geometry(n=100000, repeat=5, seed=1):
+    """
+    Scalar loop vs NumPy variant of the hot geometry functions over
+    n random inputs (best of repeat, ms). Importable without QGIS.
+    """
+    import numpy as np
+
+    try:
+        from . import floating_compass_geometry as cgeom
+    except ImportError:
+        import floating_compass_geometry as cgeom
+
+    rng = np.random.default_rng(seed)
+    x0, y0, x1, y1 = rng.uniform(-1000.0, 1000.0, (4, n))
+    ang = rng.uniform(0.0, 360.0, n)
+    rad = rng.uniform(10.0, 500.0, n)
+    bw = rng.choice([33.0, 65.0, 90.0], n)
+
+    lx0, ly0, lx1, ly1 = x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()
+    lang, lrad, lbw = ang.tolist(), rad.tolist(), bw.tolist()
+    idx = range(n)
+
+    def scalar_in_wedge():
+        for i in idx:
+            b = cgeom.bearing(lx0[i], ly0[i], lx1[i], ly1[i])
+            abs(cgeom.angle_diff(b, lang[i])) <= lbw[i] / 2 and (
+                cgeom.distance(lx0[i], ly0[i], lx1[i], ly1[i]) <= lrad[i]
+            )
+
+    cases = {
+        "bearing": (
+            lambda: [cgeom.bearing(lx0[i], ly0[i], lx1[i], ly1[i]) for i in idx],
+            lambda: cgeom.bearings(x0, y0, x1, y1),
+        ),
+        "endpoint": (
+            lambda: [cgeom.endpoint(lx0[i], ly0[i], lang[i], lrad[i]) for i in idx],
+            lambda: cgeom.endpoints(x0, y0, ang, rad),
+        ),
+        "angle_diff": (
+            lambda: [cgeom.angle_diff(lang[i], lbw[i]) for i in idx],
+            lambda: cgeom.angle_diffs(ang, bw),
+        ),
+        "point_segment": (
+            lambda: [
+                cgeom.point_segment_distance(
+                    lx1[i], ly1[i], lx0[i], ly0[i], 0.0, 0.0
+                )
+                for i in idx
+            ],
+            lambda: cgeom.point_segment_distances(x1, y1, x0, y0, 0.0, 0.0),
+        ),
+        "in_wedge": (
+            scalar_in_wedge,
+            lambda: cgeom.in_wedges(x1, y1, x0, y0, ang, bw, rad),
+        ),
+        "wedge_rings": (
+            None,
+            lambda: cgeom.wedges(x0, y0, ang, bw, rad, 24),
+        ),
+    }
+
+    result = {"n": n}
+    for name, (scalar, vector) in cases.items():
+        ms_v = _best_ms(vector, repeat)
+        ms_s = _best_ms(scalar, max(1, repeat // 2)) if scalar else None
+        result[name] = {
+            "scalar_ms": None if ms_s is None else round(ms_s, 3),
+            "numpy_ms": round(ms_v, 3),
+        }
+        speedup = f" (x{ms_s / ms_v:.0f})" if ms_s and ms_v else ""
+        scalar_txt = f"{ms_s:9.2f} ms" if ms_s is not None else "        -   "
+        print(
+            f"[FloatingCompass] {name:14s} n={n}: scalar {scalar_txt}"
+            f"  numpy {ms_v:8.2f} ms{speedup}"
+        )
+    return result
+
+
+def bench_path_loss(arms=6, samples=2000, repeat=20, seed=1):
+    """
+    One vectorized received-level evaluation for arms × samples
+    (best of repeat, ms): free space, Okumura-Hata, and Hata with
+    knife-edge diffraction over a synthetic terrain profile.
+    Importable without QGIS.
+    """
+    import numpy as np
+
+    try:
+        from . import floating_compass_geometry as cgeom
+    except ImportError:
+        import floating_compass_geometry as cgeom
+
+    rng = np.random.default_rng(seed)
+    angles = np.arange(arms) * (360.0 / arms)
+    lengths = rng.uniform(2000.0, 15000.0, arms)
+    d = lengths[:, None] * np.linspace(0.0, 1.0, samples)[None, :]
+    z = 50.0 + np.cumsum(rng.normal(0.0, 2.0, (arms, samples)), axis=1)
+
+    def gains():
+        off = angles[:, None] - angles[None, :]
+        return cgeom.sector_gains(off).max(axis=1)
+
+    cases = {
+        "fspl": lambda: cgeom.signal_levels(46.0, gains(), d, 1800.0, "fspl"),
+        "hata": lambda: cgeom.signal_levels(46.0, gains(), d, 1800.0, "hata"),
+        "hata+terrain": lambda: cgeom.signal_levels(
+            46.0, gains(), d, 1800.0, "hata",
+            extra_loss_db=cgeom.terrain_diffraction_db(d, z, 30.0, 1.5, 1800.0),
+        ),
+    }
+
+    result = {"arms": arms, "samples": samples}
+    for name, fn in cases.items():
+        ms = _best_ms(fn, repeat)
+        result[name] = round(ms, 3)
+        print(
+            f"[FloatingCompass] path loss {name:13s} {arms}x{samples}: "
+            f"{ms:.3f} ms ({arms * samples / ms / 1000.0:.1f} M samples/s)"
+        )
+    return result
+
+
+def _synthetic_nmea(path, seconds, lat=-6.175, lon=106.827):
+    """Write a 1 Hz RMC + GGA + HDT log of a vehicle driving east."""
+    def line(body):
+        ck = 0
+        for ch in body:
+            ck ^= ord(ch)
+        return f"${body}*{ck:02X}\n"
+
+    def ddm(value, width):
+        v = abs(value)
+        deg = int(v)
+        return f"{deg:0{width}d}{(v - deg) * 60.0:07.4f}"
+
+    with open(path, "w") as fh:
+        for i in range(seconds):
+            t = f"{(i // 3600) % 24:02d}{(i // 60) % 60:02d}{i % 60:02d}.00"
+            x = lon + i * 0.0001
+            la = ddm(lat, 2) + (",S" if lat < 0 else ",N")
+            lo = ddm(x, 3) + (",W" if x < 0 else ",E")
+            fh.write(line(f"GPRMC,{t},A,{la},{lo},20.0,90.0,191026,,"))
+            fh.write(line(f"GPGGA,{t},{la},{lo},1,10,0.8,12.0,M,0,M,,"))
+            fh.write(line(f"GPHDT,{90.0 + (i % 10) - 5:.1f},T"))
+
+
+def bench_nmea(path=None, speed=0.0, seconds=20000):
+    """
+    NMEA reader throughput (sentences/s) on a log file, or on a
+    synthetic 1 Hz log of seconds fixes. With speed > 0 the log is
+    replayed at speed × real time and the wall time is compared to
+    the expected one. Importable without QGIS.
+    """
+    import os
+    import tempfile
+
+    try:
+        from .floating_compass_gnss import NmeaReader
+    except ImportError:
+        from floating_compass_gnss import NmeaReader
+
+    tmp = None
+    if path is None:
+        fd, tmp = tempfile.mkstemp(suffix=".nmea")
+        os.close(fd)
+        _synthetic_nmea(tmp, seconds)
+        path = tmp
+
+    try:
+        reader = NmeaReader("file:" + path, speed)
+        t0 = perf_counter()
+        reader.run()                  # synchronously, same code path
+        wall = perf_counter() - t0
+        updates = reader.latest()[0]
+    finally:
+        if tmp:
+            os.remove(tmp)
+
+    result = {
+        "sentences": reader.sentences,
+        "parsed": reader.parsed,
+        "filter_updates": updates,
+        "wall_s": round(wall, 3),
+        "sentences_per_s": round(reader.sentences / wall) if wall else None,
+        "error": reader.error,
+    }
+    print(
+        f"[FloatingCompass] nmea {reader.sentences} sentences in {wall:.3f} s"
+        f" ({result['sentences_per_s']}/s, speed {speed or 'max'})"
+    )
+    return result
+
+
+def bench_swaps(sites=2000, sectors=3, samples=400, workers=None,
+                swap_rate=0.05, seed=1):
+    """
+    Swapped-sector check over synthetic sites (sectors at 0/120/240,
+    swap_rate of them with two feeders swapped): wall time inline vs.
+    process pool, and detection recall. Importable without QGIS.
+    """
+    import numpy as np
+
+    try:
+        from . import floating_compass_swaps as swaps
+    except ImportError:
+        import floating_compass_swaps as swaps
+
+    rng = np.random.default_rng(seed)
+    az = np.arange(sectors) * (360.0 / sectors)
+    data, truth = [], set()
+    for s in range(sites):
+        served = az.copy()
+        if rng.random() < swap_rate:
+            served[[0, 1]] = served[[1, 0]]
+            truth.add(str(s))
+        data.append({
+            "site": str(s), "x": 0.0, "y": 0.0,
+            "sectors": [f"{s}_{i}" for i in range(sectors)],
+            "azimuths": list(az),
+            # main lobe ± 20° plus 15 % scattered samples
+            "bearings": [
+                np.concatenate([
+                    rng.normal(b, 20.0, int(samples * 0.85)),
+                    rng.uniform(0.0, 360.0, samples - int(samples * 0.85)),
+                ]) % 360.0
+                for b in served
+            ],
+        })
+
+    result = {"sites": sites, "sectors": sectors, "samples": samples}
+    for name, n in (("inline", 1), ("pool", workers)):
+        t0 = perf_counter()
+        rows = swaps.detect_swaps(data, workers=n)
+        wall = perf_counter() - t0
+        result[f"{name}_s"] = round(wall, 3)
+
+    found = {r["site"] for r in rows if r["status"] == swaps.SWAPPED}
+    result["recall"] = round(len(found & truth) / max(1, len(truth)), 3)
+    result["false_flags"] = len(found - truth)
+    print(
+        f"[FloatingCompass] swaps {sites} sites: inline {result['inline_s']} s,"
+        f" pool {result['pool_s']} s, recall {result['recall']},"
+        f" false flags {result['false_flags']}"
+    )
+    return result
+
+
+def bench_separation(sites=100000, sectors=(2, 6), repeat=5, seed=1):
+    """
+    Sector separation / overlap for sites with a random number of
+    sectors (NaN-padded table): one vectorized sorted sweep over all
+    sites vs. a per-site Python loop (best of repeat, ms).
+    Importable without QGIS.
+    """
+    import numpy as np
+
+    try:
+        from . import floating_compass_geometry as cgeom
+    except ImportError:
+        import floating_compass_geometry as cgeom
+
+    rng = np.random.default_rng(seed)
+    lo, hi = sectors
+    count = rng.integers(lo, hi + 1, sites)
+    az = rng.uniform(0.0, 360.0, (sites, hi))
+    az[np.arange(hi)[None, :] >= count[:, None]] = np.nan
+    bw = np.full_like(az, 65.0)
+
+    def per_site():
+        for s in range(min(sites, 5000)):
+            row = np.sort(az[s, :count[s]])
+            np.diff(np.append(row, row[0] + 360.0))
+
+    vec_ms = _best_ms(lambda: cgeom.sector_separations(az, bw), repeat)
+    loop_ms = _best_ms(per_site, 1) * sites / min(sites, 5000)
+
+    result = {
+        "sites": sites,
+        "vectorized_ms": round(vec_ms, 3),
+        "per_site_loop_ms": round(loop_ms, 1),
+    }
+    print(
+        f"[FloatingCompass] separation {sites} sites: vectorized "
+        f"{vec_ms:.1f} ms, per-site loop ~{loop_ms:.0f} ms"
+    )
+    return result
+
+
+# =====================
+# Nearest sites
+# =====================
+def bench_nearest(tool, queries=1000, seed=1):
+    """
+    Average nearest-site query time (ms) at random canvas positions,
+    using the site layer chosen in the tool (index must be ready).
+    """
+    import random
+
+    nearest = tool.nearest
+    if nearest.layer is None or nearest._index is None or not nearest._index.is_ready:
+        print("[FloatingCompass] nearest: no site layer / index not ready")
+        return None
+
+    ext = tool.canvas.extent()
+    rnd = random.Random(seed)
+
+    from qgis.core import QgsPointXY
+    points = [
+        QgsPointXY(
+            rnd.uniform(ext.xMinimum(), ext.xMaximum()),
+            rnd.uniform(ext.yMinimum(), ext.yMaximum()),
+        )
+        for _ in range(queries)
+    ]
+
+    nearest.query(points[0])      # warm-up (transforms, label cache)
+    t0 = perf_counter()
+    for p in points:
+        nearest.query(p)
+    ms = (perf_counter() - t0) * 1000.0 / queries
+
+    result = {
+        "layer": nearest.layer.name(),
+        "k": nearest.k,
+        "queries": queries,
+        "ms_per_query": round(ms, 4),
+    }
+    print(
+        f"[FloatingCompass] nearest {nearest.k} of '{result['layer']}': "
+        f"{ms:.4f} ms/query"
+    )
+    return result
+
+
+def bench_aimed(tool, queries=500, seed=1):
+    """
+    Average "sectors aimed here" query time (ms) at random canvas
+    positions, using the sector layer chosen in the tool.
+    """
+    import random
+
+    aimed = tool.aimed
+    if aimed.layer is None or aimed._index is None or not aimed._index.is_ready:
+        print("[FloatingCompass] aimed: no sector layer / index not ready")
+        return None
+
+    ext = tool.canvas.extent()
+    rnd = random.Random(seed)
+
+    from qgis.core import QgsPointXY
+    points = [
+        QgsPointXY(
+            rnd.uniform(ext.xMinimum(), ext.xMaximum()),
+            rnd.uniform(ext.yMinimum(), ext.yMaximum()),
+        )
+        for _ in range(queries)
+    ]
+
+    aimed.query(points[0])        # warm-up (transforms, value caches)
+    hits = 0
+    t0 = perf_counter()
+    for p in points:
+        hits += len(aimed.query(p))
+    ms = (perf_counter() - t0) * 1000.0 / queries
+
+    result = {
+        "layer": aimed.layer.name(),
+        "radius_m": aimed.radius_m,
+        "queries": queries,
+        "mean_hits": round(hits / queries, 2),
+        "ms_per_query": round(ms, 4),
+    }
+    print(
+        f"[FloatingCompass] aimed sectors in '{result['layer']}' "
+        f"({aimed.radius_m:.0f} m): {ms:.4f} ms/query, "
+        f"{result['mean_hits']} hits"
+    )
+    return result
+
+
+def bench_terrain(tool, steps=360, samples=None):
+    """
+    Terrain profile sampling rate along the active compass' first arm
+    while it is rotated through steps angles: cold (empty tile cache)
+    and warm (second sweep, served from the LRU cache).
+    """
+    terrain = tool.terrain
+    inst = tool.instances.active
+    if not terrain.enabled or inst is None or inst.center is None or not inst.arms:
+        print("[FloatingCompass] terrain: no DEM / no compass")
+        return None
+
+    arm = dict(inst.arms[0])
+    arm["enabled"] = True
+    n = samples or terrain.MAX_SAMPLES
+
+    def sweep():
+        done = 0
+        t0 = perf_counter()
+        for i in range(steps):
+            arm["angle_deg"] = i * 360.0 / steps
+            p = terrain.compute(inst, arm, samples=n)
+            if p is not None:
+                done += len(p["distance_m"])
+        return done, perf_counter() - t0
+
+    terrain.cache.clear()
+    cold_n, cold_s = sweep()
+    misses = terrain.cache.misses
+    warm_n, warm_s = sweep()
+
+    result = {
+        "dem": terrain.dem.name(),
+        "steps": steps,
+        "samples_per_profile": n,
+        "cold_samples_per_s": round(cold_n / cold_s) if cold_s else None,
+        "warm_samples_per_s": round(warm_n / warm_s) if warm_s else None,
+        "tile_reads": misses,
+        "tiles_cached": len(terrain.cache),
+    }
+    print(
+        f"[FloatingCompass] terrain '{result['dem']}': "
+        f"cold {result['cold_samples_per_s']} samples/s, "
+        f"warm {result['warm_samples_per_s']} samples/s, "
+        f"{misses} tile reads"
+    )
+    return result
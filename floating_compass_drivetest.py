@@ -0,0 +1,264 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_drivetest.py
+#
+# Drive-test samples (TEMS / NEMO / generic CSV exports) in a
+# columnar NumPy store: read in chunks, never as QgsFeatures.
+#
+# Qt-free; the import task and the canvas point cloud live in
+# floating_compass_drivetest_cloud.py.
+#
+import csv
+
+import numpy as np
+
+try:
+    from . import floating_compass_geometry as cgeom
+except ImportError:
+    import floating_compass_geometry as cgeom
+
+
+CHUNK_ROWS = 200000
+
+# header names tried (case-insensitive) when columns are not given
+COLUMN_GUESSES = {
+    "x": ("longitude", "lon", "long", "all-longitude", "gps longitude", "x"),
+    "y": ("latitude", "lat", "all-latitude", "gps latitude", "y"),
+    "value": (
+        "rsrp", "serving rsrp", "all-rsrp", "rscp", "rxlev", "rsrp (dbm)",
+        "ss-rsrp", "level",
+    ),
+    "cell": (
+        "cell", "cellid", "cell id", "cell_id", "cell name", "serving cell",
+        "eci", "nci", "pci", "serving pci", "all-serving cell identity",
+    ),
+}
+
+
+# =====================
+# READING
+# =====================
+def sniff_format(path):
+    """(delimiter, header list) of a delimited text export."""
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as fh:
+        head = fh.readline()
+        sample = head + "".join(fh.readline() for _ in range(5))
+
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        delimiter = "\t" if "\t" in head else ","
+
+    header = next(csv.reader([head], delimiter=delimiter))
+    return delimiter, [h.strip() for h in header]
+
+
+def guess_columns(header):
+    """Column name per role (x, y, value, cell) from COLUMN_GUESSES."""
+    lower = {h.lower(): h for h in header}
+    out = {}
+    for role, names in COLUMN_GUESSES.items():
+        for name in names:
+            if name in lower:
+                out[role] = lower[name]
+                break
+    return out
+
+
+def _floats(values):
+    arr = np.asarray(values)
+    try:
+        return arr.astype(float)
+    except ValueError:
+        out = np.empty(len(values))
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+def read_chunks(path, columns, delimiter=None, chunk_rows=CHUNK_ROWS):
+    """
+    Yield dicts role → ndarray (x, y float; value float; cell str)
+    of up to chunk_rows rows. columns: role → header name (x and y
+    required). Uses pandas when installed, the csv module otherwise.
+    """
+    if delimiter is None:
+        delimiter, _ = sniff_format(path)
+    wanted = {role: name for role, name in columns.items() if name}
+
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+
+    if pd is not None:
+        dtypes = {wanted["cell"]: str} if "cell" in wanted else None
+        reader = pd.read_csv(
+            path, sep=delimiter, usecols=list(set(wanted.values())),
+            chunksize=chunk_rows, dtype=dtypes, skipinitialspace=True,
+            on_bad_lines="skip",
+        )
+        for frame in reader:
+            chunk = {}
+            for role, name in wanted.items():
+                col = frame[name]
+                if role == "cell":
+                    chunk[role] = col.fillna("").astype(str).to_numpy()
+                else:
+                    chunk[role] = pd.to_numeric(col, errors="coerce").to_numpy(float)
+            yield chunk
+        return
+
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as fh:
+        reader = csv.reader(fh, delimiter=delimiter)
+        header = [h.strip() for h in next(reader)]
+        idx = {role: header.index(name) for role, name in wanted.items()}
+        width = max(idx.values()) + 1
+
+        buf = {role: [] for role in idx}
+        for row in reader:
+            if len(row) < width:
+                continue
+            for role, i in idx.items():
+                buf[role].append(row[i])
+            if len(buf["x"]) >= chunk_rows:
+                yield _chunk(buf)
+                buf = {role: [] for role in idx}
+        if buf["x"]:
+            yield _chunk(buf)
+
+
+def _chunk(buf):
+    return {
+        role: np.asarray(values, dtype=object).astype(str) if role == "cell"
+        else _floats(values)
+        for role, values in buf.items()
+    }
+
+
+class DriveTestStore:
+    """
+    Columnar sample store: x, y (source CRS), value (float, NaN if
+    absent) and cell (int codes into self.cells).
+
+    append() is O(chunk); columns are concatenated lazily on first
+    access after new chunks arrived.
+    """
+
+    def __init__(self, crs_authid="EPSG:4326", geographic=True):
+        self.crs_authid = crs_authid
+        self.geographic = geographic
+        self.cells = []
+        self._cell_codes = {}
+        self._parts = []
+        self._cols = None
+        self.version = 0
+
+    def __len__(self):
+        if self._cols is not None:
+            return len(self._cols["x"])
+        return sum(len(p["x"]) for p in self._parts)
+
+    def append(self, chunk):
+        x, y = chunk["x"], chunk["y"]
+        ok = np.isfinite(x) & np.isfinite(y)
+        n = int(ok.sum())
+        if not n:
+            return 0
+
+        part = {
+            "x": x[ok],
+            "y": y[ok],
+            "value": chunk["value"][ok] if "value" in chunk else np.full(n, np.nan),
+            "cell": self._encode(chunk["cell"][ok]) if "cell" in chunk
+            else np.full(n, -1, dtype=np.int32),
+        }
+
+        if self._cols is not None:
+            self._parts = [self._cols]
+            self._cols = None
+        self._parts.append(part)
+        self.version += 1
+        return n
+
+    def _encode(self, names):
+        uniq, inverse = np.unique(names, return_inverse=True)
+        lut = np.empty(len(uniq), dtype=np.int32)
+        for i, name in enumerate(uniq):
+            code = self._cell_codes.get(name)
+            if code is None:
+                code = len(self.cells)
+                self._cell_codes[name] = code
+                self.cells.append(name)
+            lut[i] = code
+        return lut[inverse]
+
+    def cell_code(self, name):
+        return self._cell_codes.get(str(name), -1)
+
+    @property
+    def columns(self):
+        if self._cols is None:
+            if not self._parts:
+                return {
+                    "x": np.empty(0), "y": np.empty(0), "value": np.empty(0),
+                    "cell": np.empty(0, dtype=np.int32),
+                }
+            self._cols = {
+                k: np.concatenate([p[k] for p in self._parts])
+                for k in ("x", "y", "value", "cell")
+            }
+            self._parts = []
+        return self._cols
+
+    def clear(self):
+        self.cells = []
+        self._cell_codes = {}
+        self._parts = []
+        self._cols = None
+        self.version += 1
+
+    # =====================
+    # ANGLE OF ARRIVAL
+    # =====================
+    def bearings_from(self, cx, cy, x=None, y=None):
+        """Bearing (deg) of samples from center (cx, cy), store CRS."""
+        cols = self.columns
+        x = cols["x"] if x is None else x
+        y = cols["y"] if y is None else y
+        if self.geographic:
+            return cgeom.geodesic_bearings(cx, cy, x, y)
+        return cgeom.bearings(cx, cy, x, y)
+
+
+def arm_offsets(bearing_deg, arm_azimuths):
+    """
+    (nearest arm index, signed offset deg) of each bearing to the
+    nearest of arm_azimuths; (-1, NaN) when there are no arms.
+    """
+    b = np.asarray(bearing_deg, dtype=float)
+    az = np.asarray(arm_azimuths, dtype=float)
+    if not az.size:
+        return np.full(b.shape, -1), np.full(b.shape, np.nan)
+
+    diffs = cgeom.angle_diffs(b[..., None], az)
+    nearest = np.abs(diffs).argmin(axis=-1)
+    offset = np.take_along_axis(diffs, nearest[..., None], axis=-1)[..., 0]
+    return nearest, offset
+
+
@@ -0,0 +1,437 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_drivetest_cloud.py
+import os
+
+import numpy as np
+
+from qgis.PyQt.QtCore import QObject, QPointF, QRectF, Qt, pyqtSignal
+from qgis.PyQt.QtGui import QColor, QPen, QPolygonF
+from qgis.core import (
+    QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsPointXY,
+    QgsProject,
+    QgsTask,
+)
+from qgis.gui import QgsMapCanvasItem
+
+from .floating_compass_drivetest import (
+    DriveTestStore,
+    arm_offsets,
+    guess_columns,
+    read_chunks,
+    sniff_format,
+)
+
+
+class _Signals(QObject):
+    chunk = pyqtSignal(object)
+
+
+class DriveTestImportTask(QgsTask):
+    """
+    Reads chunks in the background; each chunk is handed to the GUI
+    thread (queued signal) and appended there, so the cloud fills in
+    while the file is still being read.
+    """
+
+    def __init__(self, path, columns, delimiter=None):
+        super().__init__(
+            f"Floating Compass: importing {os.path.basename(path)}",
+            QgsTask.CanCancel,
+        )
+        self.path = path
+        self.columns = columns
+        self.delimiter = delimiter
+        self.signals = _Signals()
+        self.rows = 0
+        self.error = None
+
+    def run(self):
+        size = max(1, os.path.getsize(self.path))
+        done = 0
+        try:
+            for chunk in read_chunks(self.path, self.columns, self.delimiter):
+                if self.isCanceled():
+                    return False
+                self.rows += len(chunk["x"])
+                self.signals.chunk.emit(chunk)
+
+                # progress from rows read, assuming ~uniform row length
+                done = min(99.0, max(done, 100.0 * self.rows * self._row_bytes() / size))
+                self.setProgress(done)
+        except Exception as e:
+            self.error = str(e)
+            return False
+        return True
+
+    def _row_bytes(self):
+        if not hasattr(self, "_rb"):
+            with open(self.path, "rb") as fh:
+                head = fh.read(1 << 16)
+            self._rb = max(1.0, len(head) / max(1, head.count(b"\n")))
+        return self._rb
+
+
+class DriveTestCloudItem(QgsMapCanvasItem):
+    """Decimated drive-test samples, one point per bin color."""
+
+    def __init__(self, canvas, owner):
+        super().__init__(canvas)
+        self.owner = owner
+        self.setZValue(900)     # below the compass overlay
+
+        self._pens = []
+        for _, rgb in owner.OFFSET_COLORS:
+            pen = QPen(QColor(*rgb, 200), owner.POINT_PX)
+            pen.setCapStyle(Qt.RoundCap)
+            self._pens.append(pen)
+        self._plain = QPen(QColor(90, 90, 200, 180), owner.POINT_PX)
+        self._plain.setCapStyle(Qt.RoundCap)
+
+    def boundingRect(self):
+        c = self.owner.tool.canvas
+        return QRectF(0, 0, c.width(), c.height())
+
+    def paint(self, painter, option, widget):
+        if not self.owner.enabled:
+            return
+        for pen, polygon in self.owner.polygons():
+            painter.setPen(pen if pen is not None else self._plain)
+            painter.drawPoints(polygon)
+
+
+class FloatingCompassDriveTest:
+    """
+    Drive-test samples against the compass arms.
+
+    Import runs as a QgsTask into a columnar DriveTestStore. The
+    canvas shows a decimated cloud (visible extent only, one sample
+    per DECIMATE_PX cell) colored by the offset between each sample's
+    bearing from the active compass and the nearest enabled arm.
+    Decimation is cached on store version + extent, colors on the
+    compass state, so dragging only recomputes the bearings of the
+    drawn points.
+    """
+
+    DECIMATE_PX = 3
+    MAX_DRAW = 60000
+    POINT_PX = 3
+
+    # |offset| upper bound (deg) → color
+    OFFSET_COLORS = (
+        (15.0, (40, 180, 80)),
+        (45.0, (240, 200, 40)),
+        (90.0, (240, 120, 30)),
+        (180.0, (210, 40, 40)),
+    )
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.store = DriveTestStore()
+        self.path = None
+        self.task = None
+        self.item = None
+
+        self._cloud = None      # (key, px, py, store index)
+        self._polys = None      # (key, [(pen, QPolygonF)])
+
+    @property
+    def enabled(self):
+        return len(self.store) > 0
+
+    # =====================
+    # IMPORT
+    # =====================
+    def import_file(self, path, columns=None, crs="EPSG:4326", delimiter=None):
+        """Start a background import; returns the column mapping used."""
+        sniffed, header = sniff_format(path)
+        delimiter = delimiter or sniffed
+        cols = guess_columns(header)
+        cols.update({k: v for k, v in (columns or {}).items() if v})
+        if "x" not in cols or "y" not in cols:
+            raise ValueError(
+                f"no coordinate columns in {os.path.basename(path)} "
+                f"(header: {', '.join(header[:12])})"
+            )
+
+        src = QgsCoordinateReferenceSystem(crs)
+        if not src.isValid():
+            raise ValueError(f"invalid CRS: {crs}")
+
+        self.cancel()
+        self.store = DriveTestStore(src.authid() or crs, src.isGeographic())
+        self.path = path
+        self._invalidate()
+
+        task = DriveTestImportTask(path, cols, delimiter)
+        task.signals.chunk.connect(self._on_chunk)
+        task.taskCompleted.connect(lambda: self._on_done(task))
+        task.taskTerminated.connect(lambda: self._on_done(task))
+        self.task = task
+        QgsApplication.taskManager().addTask(task)
+
+        if self.item is None:
+            self.item = DriveTestCloudItem(self.tool.canvas, self)
+        return cols
+
+    def cancel(self):
+        if self.task is not None:
+            try:
+                self.task.cancel()
+            except RuntimeError:
+                pass    # already deleted by the task manager
+            self.task = None
+
+    def _on_chunk(self, chunk):
+        self.store.append(chunk)
+        self._invalidate()
+        self.refresh()
+
+    def _on_done(self, task):
+        if self.task is task:
+            self.task = None
+        if task.error:
+            msg = f"Drive test import failed: {task.error}"
+        else:
+            msg = (
+                f"Drive test: {len(self.store)} samples, "
+                f"{len(self.store.cells)} cells"
+            )
+        self.tool.iface.statusBarIface().showMessage(msg, 4000)
+
+    def clear(self):
+        self.cancel()
+        self.store.clear()
+        self.path = None
+        self._invalidate()
+        self.unload()
+
+    def unload(self):
+        self.cancel()
+        if self.item is not None:
+            self.tool.canvas.scene().removeItem(self.item)
+            self.item = None
+
+    def refresh(self):
+        if self.item is not None:
+            self.item.update()
+
+    def _invalidate(self):
+        self._cloud = None
+        self._polys = None
+
+    # =====================
+    # DECIMATED CLOUD
+    # =====================
+    def _to_store(self):
+        return QgsCoordinateTransform(
+            self.tool.canvas.mapSettings().destinationCrs(),
+            QgsCoordinateReferenceSystem(self.store.crs_authid),
+            QgsProject.instance().transformContext(),
+        )
+
+    def cloud(self):
+        """(px, py, store index) of the decimated visible samples."""
+        canvas = self.tool.canvas
+        ext = canvas.extent()
+        key = (
+            self.store.version, ext.toString(6), canvas.width(), canvas.height(),
+            canvas.mapSettings().destinationCrs().authid(), canvas.rotation(),
+        )
+        if self._cloud is not None and self._cloud[0] == key:
+            return self._cloud[1:]
+
+        empty = (np.empty(0), np.empty(0), np.empty(0, dtype=np.int64))
+        cols = self.store.columns
+        try:
+            box = self._to_store().transformBoundingBox(ext)
+        except Exception:
+            box = None
+        if box is None or not len(cols["x"]):
+            self._cloud = (key,) + empty
+            return empty
+
+        x, y = cols["x"], cols["y"]
+        idx = np.nonzero(
+            (x >= box.xMinimum()) & (x <= box.xMaximum())
+            & (y >= box.yMinimum()) & (y <= box.yMaximum())
+        )[0]
+
+        # first sample per DECIMATE_PX cell (cell size in store units)
+        w, h = max(1, canvas.width()), max(1, canvas.height())
+        cw = box.width() * self.DECIMATE_PX / w
+        ch = box.height() * self.DECIMATE_PX / h
+        if len(idx) and cw > 0 and ch > 0:
+            gx = ((x[idx] - box.xMinimum()) / cw).astype(np.int64)
+            gy = ((y[idx] - box.yMinimum()) / ch).astype(np.int64)
+            _, first = np.unique(gy * (w + 1) + gx, return_index=True)
+            idx = idx[np.sort(first)]
+        if len(idx) > self.MAX_DRAW:
+            idx = idx[:: int(np.ceil(len(idx) / self.MAX_DRAW))]
+
+        px, py = self._to_pixels(x[idx], y[idx], box)
+        self._cloud = (key, px, py, idx)
+        return px, py, idx
+
+    def _to_pixels(self, x, y, box, grid=9):
+        """
+        Store CRS → canvas pixels, bilinear over a grid × grid mesh of
+        exactly transformed control points (only grid² transforms).
+        """
+        xform = self._to_store()
+        to_px = self.tool.canvas.getCoordinateTransform()
+
+        gx = np.linspace(box.xMinimum(), box.xMaximum(), grid)
+        gy = np.linspace(box.yMinimum(), box.yMaximum(), grid)
+        mesh_x = np.full((grid, grid), np.nan)
+        mesh_y = np.full((grid, grid), np.nan)
+        for j, yy in enumerate(gy):
+            for i, xx in enumerate(gx):
+                try:
+                    p = xform.transform(
+                        QgsPointXY(xx, yy), QgsCoordinateTransform.ReverseTransform
+                    )
+                except Exception:
+                    continue
+                s = to_px.transform(p)
+                mesh_x[j, i], mesh_y[j, i] = s.x(), s.y()
+
+        fx = (x - box.xMinimum()) / max(box.width(), 1e-12) * (grid - 1)
+        fy = (y - box.yMinimum()) / max(box.height(), 1e-12) * (grid - 1)
+        i0 = np.clip(np.floor(fx).astype(np.int64), 0, grid - 2)
+        j0 = np.clip(np.floor(fy).astype(np.int64), 0, grid - 2)
+        tx, ty = fx - i0, fy - j0
+
+        def bilinear(m):
+            top = m[j0, i0] * (1 - tx) + m[j0, i0 + 1] * tx
+            bottom = m[j0 + 1, i0] * (1 - tx) + m[j0 + 1, i0 + 1] * tx
+            return top * (1 - ty) + bottom * ty
+
+        return bilinear(mesh_x), bilinear(mesh_y)
+
+    # =====================
+    # OFFSETS VS. ARMS
+    # =====================
+    def center_in_store(self, inst):
+        c = inst.center
+        pt = self.tool.canvas.getCoordinateTransform().toMapCoordinates(
+            int(round(c.x())), int(round(c.y()))
+        )
+        p = self._to_store().transform(pt)
+        return p.x(), p.y()
+
+    @staticmethod
+    def arm_azimuths(inst):
+        return [
+            float(a.get("angle_deg", 0.0)) % 360.0
+            for a in inst.arms or [] if a.get("enabled")
+        ]
+
+    def polygons(self):
+        """[(pen index or None, QPolygonF)] of the cloud for painting."""
+        px, py, idx = self.cloud()
+        inst = self.tool.instances.active
+        azimuths = (
+            self.arm_azimuths(inst)
+            if inst is not None and inst.center is not None else None
+        )
+        key = (
+            self._cloud[0],
+            None if azimuths is None
+            else (round(inst.center.x(), 1), round(inst.center.y(), 1), tuple(azimuths)),
+        )
+        if self._polys is not None and self._polys[0] == key:
+            return self._polys[1]
+
+        pens = self.item._pens if self.item is not None else None
+        out = []
+        finite = np.isfinite(px) & np.isfinite(py)
+        if azimuths and len(idx):
+            cols = self.store.columns
+            cx, cy = self.center_in_store(inst)
+            bearing = self.store.bearings_from(cx, cy, cols["x"][idx], cols["y"][idx])
+            _, offset = arm_offsets(bearing, azimuths)
+
+            bounds = np.array([lim for lim, _ in self.OFFSET_COLORS])
+            bins = np.minimum(
+                np.searchsorted(bounds, np.abs(np.nan_to_num(offset, nan=180.0))),
+                len(bounds) - 1,
+            )
+            for b in range(len(bounds)):
+                sel = (bins == b) & finite
+                if sel.any():
+                    out.append((pens[b], _polygon(px[sel], py[sel])))
+        elif len(idx):
+            out.append((None, _polygon(px[finite], py[finite])))
+
+        self._polys = (key, out)
+        return out
+
+    def analyze(self, inst=None):
+        """
+        Angle of arrival of every sample against inst (default the
+        active compass): bearing, nearest_arm and offset arrays plus a
+        per-arm summary (count, median offset, share within 15°).
+        """
+        inst = inst or self.tool.instances.active
+        if inst is None or inst.center is None or not self.enabled:
+            return None
+
+        cx, cy = self.center_in_store(inst)
+        bearing = self.store.bearings_from(cx, cy)
+        azimuths = self.arm_azimuths(inst)
+        nearest, offset = arm_offsets(bearing, azimuths)
+
+        arms = []
+        for i, az in enumerate(azimuths):
+            off = offset[nearest == i]
+            arms.append({
+                "azimuth": az,
+                "count": int(off.size),
+                "median_offset": float(np.median(off)) if off.size else None,
+                "within_15": float(np.mean(np.abs(off) <= 15.0)) if off.size else None,
+            })
+        return {
+            "bearing": bearing,
+            "nearest_arm": nearest,
+            "offset": offset,
+            "arms": arms,
+        }
+
+
+def _polygon(px, py):
+    """
+    QPolygonF of the points, written straight into its buffer (no
+    QPointF object per point); QPointF is two doubles.
+    """
+    n = len(px)
+    poly = QPolygonF()
+    if not n:
+        return poly
+
+    poly.fill(QPointF(), n)
+    try:
+        buf = poly.data()
+        buf.setsize(16 * n)
+        xy = np.frombuffer(buf, dtype=np.float64).reshape(n, 2)
+    except (AttributeError, TypeError, ValueError):
+        # binding without a writable buffer: one QPointF per point
+        return QPolygonF([QPointF(float(a), float(b)) for a, b in zip(px, py)])
+    xy[:, 0] = px
+    xy[:, 1] = py
+    return poly
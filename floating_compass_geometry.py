@@ -0,0 +1,615 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_geometry.py
+#
+# Compass geometry without Qt / QGIS imports, shared by the overlay,
+# the map tool, the processing algorithms and the benchmarks.
+#
+# Conventions:
+#   azimuth  : degrees clockwise from north (grid north for planar
+#              coordinates), any range (normalized internally)
+#   x / y    : easting / northing (map units); screen pixels (y down)
+#              are passed with y negated
+#
+# Scalar functions use math only; array variants (plural names)
+# take anything np.asarray accepts and broadcast.
+#
+import math
+
+import numpy as np
+
+
+# mean metres per degree latitude (WGS84, good enough for sector sketches)
+M_PER_DEG_LAT = 110574.0
+M_PER_DEG_LON_EQ = 111320.0
+
+# mean earth radius (IUGG), for spherical bearings / distances
+EARTH_RADIUS_M = 6371008.8
+
+
+# =====================
+# SCALAR
+# =====================
+def _wrap(a):
+    """a % 360 in [0, 360); a tiny negative a would round to 360.0."""
+    r = a % 360.0
+    return r - 360.0 if r >= 360.0 else r
+
+
+def bearing(x0, y0, x1, y1):
+    """Azimuth [0, 360) from (x0, y0) to (x1, y1)."""
+    return _wrap(math.degrees(math.atan2(x1 - x0, y1 - y0)))
+
+
+def distance(x0, y0, x1, y1):
+    return math.hypot(x1 - x0, y1 - y0)
+
+
+def angle_diff(a, b):
+    """Signed difference a - b, wrapped to (-180, 180]."""
+    return 180.0 - _wrap(180.0 - (a - b))
+
+
+def snap(angle, step):
+    """Angle rounded to the nearest multiple of step (step <= 0: as is)."""
+    if step <= 0:
+        return angle
+    return round(angle / step) * step
+
+
+def endpoint(x, y, angle, radius):
+    """Point at azimuth angle, distance radius from (x, y)."""
+    rad = math.radians(angle)
+    return x + radius * math.sin(rad), y + radius * math.cos(rad)
+
+
+def screen_endpoint(x, y, angle, radius):
+    """endpoint() for pixel coordinates (y down)."""
+    rad = math.radians(angle)
+    return x + radius * math.sin(rad), y - radius * math.cos(rad)
+
+
+def arc_span(a_start, a_end):
+    """Clockwise sweep [0, 360) from azimuth a_start to a_end."""
+    return _wrap(a_end - a_start)
+
+
+def mid_angle(a_start, a_end, min_span=0.0):
+    """Azimuth halfway along the clockwise sweep a_start → a_end."""
+    return _wrap(a_start + max(arc_span(a_start, a_end), min_span) / 2.0)
+
+
+def point_segment_distance(px, py, ax, ay, bx, by):
+    """Distance from (px, py) to segment (ax, ay) – (bx, by)."""
+    dx, dy = bx - ax, by - ay
+    len2 = dx * dx + dy * dy
+    if len2 == 0:
+        return math.hypot(px - ax, py - ay)
+
+    t = ((px - ax) * dx + (py - ay) * dy) / len2
+    t = max(0.0, min(1.0, t))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+# =====================
+# ARRAYS
+# =====================
+def _wraps(a):
+    """_wrap() for arrays."""
+    r = np.mod(a, 360.0)
+    return r - 360.0 * (r >= 360.0)
+
+
+def bearings(x0, y0, x1, y1):
+    """Planar azimuths [0, 360) from (x0, y0) to (x1, y1), broadcast."""
+    dx = np.subtract(x1, x0, dtype=float)
+    dy = np.subtract(y1, y0, dtype=float)
+    return _wraps(np.degrees(np.arctan2(dx, dy)))
+
+
+def distances(x0, y0, x1, y1):
+    dx = np.subtract(x1, x0, dtype=float)
+    dy = np.subtract(y1, y0, dtype=float)
+    return np.hypot(dx, dy)
+
+
+def geodesic_bearings(lon0, lat0, lon1, lat1):
+    """Initial great-circle azimuths [0, 360) on a sphere, degrees in."""
+    p0 = np.radians(lat0)
+    p1 = np.radians(lat1)
+    dl = np.radians(np.subtract(lon1, lon0, dtype=float))
+
+    y = np.sin(dl) * np.cos(p1)
+    x = np.cos(p0) * np.sin(p1) - np.sin(p0) * np.cos(p1) * np.cos(dl)
+    return _wraps(np.degrees(np.arctan2(y, x)))
+
+
+def geodesic_distances(lon0, lat0, lon1, lat1):
+    """Haversine distances in metres, degrees in."""
+    p0 = np.radians(lat0)
+    p1 = np.radians(lat1)
+    dp = p1 - p0
+    dl = np.radians(np.subtract(lon1, lon0, dtype=float))
+
+    h = np.sin(dp / 2.0) ** 2 + np.cos(p0) * np.cos(p1) * np.sin(dl / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def angle_diffs(a, b):
+    """Signed differences a - b, wrapped to (-180, 180]."""
+    return 180.0 - _wraps(180.0 - np.subtract(a, b, dtype=float))
+
+
+def in_sector(bearing_deg, azimuth, beamwidth):
+    """True where bearing lies within azimuth ± beamwidth / 2."""
+    half = np.asarray(beamwidth, dtype=float) / 2.0
+    return (np.abs(angle_diffs(bearing_deg, azimuth)) <= half) | (half >= 180.0)
+
+
+def in_wedges(px, py, cx, cy, azimuth, beamwidth, radius):
+    """
+    True where point (px, py) lies inside the planar wedge at
+    (cx, cy): within azimuth ± beamwidth / 2 and radius.
+    """
+    b = bearings(cx, cy, px, py)
+    d = distances(cx, cy, px, py)
+    return in_sector(b, azimuth, beamwidth) & (d <= radius)
+
+
+def arc_spans(a_start, a_end):
+    return _wraps(np.subtract(a_end, a_start, dtype=float))
+
+
+def endpoints(x, y, angles, radii):
+    """Arm endpoints (n, 2) for azimuths / lengths, broadcast."""
+    rad = np.radians(angles)
+    return np.stack(
+        np.broadcast_arrays(
+            np.add(x, np.multiply(radii, np.sin(rad))),
+            np.add(y, np.multiply(radii, np.cos(rad))),
+        ),
+        axis=-1,
+    )
+
+
+def screen_endpoints(x, y, angles, radii):
+    """endpoints() for pixel coordinates (y down)."""
+    rad = np.radians(angles)
+    return np.stack(
+        np.broadcast_arrays(
+            np.add(x, np.multiply(radii, np.sin(rad))),
+            np.subtract(y, np.multiply(radii, np.cos(rad))),
+        ),
+        axis=-1,
+    )
+
+
+def point_segment_distances(px, py, ax, ay, bx, by):
+    """Distances from points to segments, broadcast."""
+    dx = np.subtract(bx, ax, dtype=float)
+    dy = np.subtract(by, ay, dtype=float)
+    len2 = dx * dx + dy * dy
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = ((np.subtract(px, ax) * dx) + (np.subtract(py, ay) * dy)) / len2
+    t = np.clip(np.nan_to_num(t, nan=0.0), 0.0, 1.0)
+
+    return np.hypot(
+        np.subtract(px, np.add(ax, t * dx)),
+        np.subtract(py, np.add(ay, t * dy)),
+    )
+
+
+def segments_intersect(ax, ay, bx, by, cx, cy, dx, dy):
+    """
+    True where segment (a, b) intersects segment (c, d), broadcast.
+    Touching and collinear-overlapping segments count as hits.
+    """
+    ax, ay, bx, by = (np.asarray(v, dtype=float) for v in (ax, ay, bx, by))
+    cx, cy, dx, dy = (np.asarray(v, dtype=float) for v in (cx, cy, dx, dy))
+
+    def orient(px, py, qx, qy, rx, ry):
+        return np.sign((qx - px) * (ry - py) - (qy - py) * (rx - px))
+
+    o1 = orient(ax, ay, bx, by, cx, cy)
+    o2 = orient(ax, ay, bx, by, dx, dy)
+    o3 = orient(cx, cy, dx, dy, ax, ay)
+    o4 = orient(cx, cy, dx, dy, bx, by)
+
+    proper = (o1 != o2) & (o3 != o4)
+
+    def on_seg(px, py, qx, qy, rx, ry):
+        # r on segment p-q, given collinear
+        return (
+            (np.minimum(px, qx) <= rx) & (rx <= np.maximum(px, qx))
+            & (np.minimum(py, qy) <= ry) & (ry <= np.maximum(py, qy))
+        )
+
+    touch = (
+        ((o1 == 0) & on_seg(ax, ay, bx, by, cx, cy))
+        | ((o2 == 0) & on_seg(ax, ay, bx, by, dx, dy))
+        | ((o3 == 0) & on_seg(cx, cy, dx, dy, ax, ay))
+        | ((o4 == 0) & on_seg(cx, cy, dx, dy, bx, by))
+    )
+    return proper | touch
+
+
+# =====================
+# ARC TEMPLATES
+# =====================
+_TEMPLATE_CACHE = {}
+
+
+def arc_template(beamwidth_deg, segments):
+    """
+    Unit arc vertices (segments + 1, 2) spanning beamwidth_deg,
+    centred on azimuth 0 (north). Cached per (beamwidth, segments).
+    """
+    key = (float(beamwidth_deg), int(segments))
+    tpl = _TEMPLATE_CACHE.get(key)
+    if tpl is None:
+        half = np.radians(key[0]) / 2.0
+        a = np.linspace(-half, half, key[1] + 1)
+        tpl = np.column_stack((np.sin(a), np.cos(a)))
+        tpl.setflags(write=False)
+        if len(_TEMPLATE_CACHE) > 256:
+            _TEMPLATE_CACHE.clear()
+        _TEMPLATE_CACHE[key] = tpl
+    return tpl
+
+
+def wedge_offsets(azimuth, beamwidth, radius, segments=24):
+    """
+    Closed wedge rings relative to the site, shape (n, segments + 3, 2):
+    [apex, arc..., apex]. Templates are built once per distinct
+    beamwidth, then rotated by azimuth and scaled by radius.
+    """
+    azimuth = np.asarray(azimuth, dtype=float).ravel()
+    n = azimuth.size
+    beamwidth = np.broadcast_to(np.asarray(beamwidth, dtype=float), (n,))
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), (n,))
+
+    # omni (>= 360°) → full circle, first vertex closes the arc
+    beamwidth = np.clip(beamwidth, 0.0, 360.0)
+
+    uniq, inv = np.unique(beamwidth, return_inverse=True)
+    templates = np.stack([arc_template(bw, segments) for bw in uniq])
+    arc = templates[inv]                                # (n, k, 2)
+
+    # rotate clockwise by azimuth: unit (sin, cos) frame
+    a = np.radians(azimuth)
+    cos_a = np.cos(a)[:, None]
+    sin_a = np.sin(a)[:, None]
+    tx, ty = arc[..., 0], arc[..., 1]
+    rx = tx * cos_a + ty * sin_a
+    ry = -tx * sin_a + ty * cos_a
+
+    rings = np.zeros((n, segments + 3, 2))
+    rings[:, 1:-1, 0] = rx * radius[:, None]
+    rings[:, 1:-1, 1] = ry * radius[:, None]
+    return rings
+
+
+def wedges(x, y, azimuth, beamwidth, radius, segments=24, geographic=False):
+    """
+    Absolute wedge rings (n, segments + 3, 2).
+
+    radius is in map units, or in metres when geographic=True
+    (x / y = lon / lat; local equirectangular scaling per site).
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+
+    rings = wedge_offsets(azimuth, beamwidth, radius, segments)
+
+    if geographic:
+        coslat = np.cos(np.radians(y))
+        coslat = np.where(np.abs(coslat) < 1e-6, 1e-6, coslat)
+        rings[..., 0] /= (M_PER_DEG_LON_EQ * coslat)[:, None]
+        rings[..., 1] /= M_PER_DEG_LAT
+
+    rings[..., 0] += x[:, None]
+    rings[..., 1] += y[:, None]
+    return rings
+
+
+# =====================
+# WKB
+# =====================
+_WKB_POLYGON = 3
+
+
+def polygons_wkb(rings):
+    """
+    Single-ring polygons (n, m, 2) → list of n little-endian WKB
+    byte strings, built with one structured-array copy.
+    """
+    rings = np.asarray(rings, dtype="<f8")
+    n, m = rings.shape[:2]
+
+    rec = np.empty(
+        n,
+        dtype=np.dtype([
+            ("order", "u1"),
+            ("type", "<u4"),
+            ("rings", "<u4"),
+            ("points", "<u4"),
+            ("xy", "<f8", (m, 2)),
+        ]),
+    )
+    rec["order"] = 1
+    rec["type"] = _WKB_POLYGON
+    rec["rings"] = 1
+    rec["points"] = m
+    rec["xy"] = rings
+
+    size = rec.dtype.itemsize
+    buf = rec.tobytes()
+    return [buf[i:i + size] for i in range(0, n * size, size)]
+
+
+# =====================
+# LINE OF SIGHT
+# =====================
+SPEED_OF_LIGHT = 299792458.0
+
+# effective earth radius factor for standard refraction
+K_FACTOR = 4.0 / 3.0
+
+
+def fresnel_radii(d1, d2, freq_mhz, zone=1):
+    """Fresnel zone radius (m) at d1 / d2 metres from the two ends."""
+    d1 = np.asarray(d1, dtype=float)
+    d2 = np.asarray(d2, dtype=float)
+    wavelength = SPEED_OF_LIGHT / (float(freq_mhz) * 1e6)
+    total = d1 + d2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.sqrt(zone * wavelength * d1 * d2 / total)
+    return np.nan_to_num(r, nan=0.0)
+
+
+def earth_bulges(d1, d2, k=K_FACTOR):
+    """Earth curvature bulge (m) at d1 / d2 metres from the two ends."""
+    return (
+        np.asarray(d1, dtype=float) * np.asarray(d2, dtype=float)
+        / (2.0 * k * EARTH_RADIUS_M)
+    )
+
+
+def los_clearance(distances_m, elevations, tx_height, rx_height,
+                  freq_mhz, k=K_FACTOR):
+    """
+    Line of sight over a terrain profile (distance from the first
+    sample, ground elevation; NaN = no data).
+
+    Returns (los, radius, clearance): LOS height, first Fresnel
+    radius and LOS height above terrain + earth bulge, all in metres.
+    Clearance below 0.6 × radius is the usual obstruction criterion.
+    """
+    d = np.asarray(distances_m, dtype=float)
+    z = np.asarray(elevations, dtype=float)
+
+    total = d[-1] if len(d) else 0.0
+    z0 = (z[0] if len(z) else 0.0) + tx_height
+    z1 = (z[-1] if len(z) else 0.0) + rx_height
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = d / total if total > 0 else np.zeros_like(d)
+    los = z0 + (z1 - z0) * t
+
+    d2 = total - d
+    radius = fresnel_radii(d, d2, freq_mhz)
+    clearance = los - (z + earth_bulges(d, d2, k))
+    return los, radius, clearance
+
+
+# =====================
+# PATH LOSS
+# =====================
+def fspl_db(d_m, freq_mhz):
+    """Free-space path loss (dB); distances below 1 m are clipped."""
+    d_km = np.maximum(np.asarray(d_m, dtype=float), 1.0) / 1000.0
+    return 32.44 + 20.0 * np.log10(d_km) + 20.0 * math.log10(float(freq_mhz))
+
+
+def hata_db(d_m, freq_mhz, base_height_m, mobile_height_m, environment="urban"):
+    """
+    Okumura-Hata path loss (dB), COST-231 extension above 1500 MHz,
+    medium-city mobile correction. environment: urban / suburban /
+    open. Never less than free space (short ranges).
+    """
+    f = float(freq_mhz)
+    log_f = math.log10(f)
+    log_hb = math.log10(max(float(base_height_m), 1.0))
+    hm = max(float(mobile_height_m), 1.0)
+
+    a_hm = (1.1 * log_f - 0.7) * hm - (1.56 * log_f - 0.8)
+    d_km = np.maximum(np.asarray(d_m, dtype=float) / 1000.0, 0.02)
+    slope = (44.9 - 6.55 * log_hb) * np.log10(d_km)
+
+    if f <= 1500.0:
+        loss = 69.55 + 26.16 * log_f - 13.82 * log_hb - a_hm + slope
+    else:
+        loss = 46.3 + 33.9 * log_f - 13.82 * log_hb - a_hm + slope
+
+    if environment == "suburban":
+        loss = loss - 2.0 * math.log10(f / 28.0) ** 2 - 5.4
+    elif environment == "open":
+        loss = loss - 4.78 * log_f ** 2 + 18.33 * log_f - 40.94
+
+    return np.maximum(loss, fspl_db(d_m, f))
+
+
+def sector_gains(off_boresight_deg, gain_dbi=17.0, beamwidth=65.0, front_back_db=25.0):
+    """Parabolic sector antenna pattern (3GPP TR 36.814 style), dBi."""
+    phi = angle_diffs(off_boresight_deg, 0.0)
+    return gain_dbi - np.minimum(12.0 * (phi / beamwidth) ** 2, front_back_db)
+
+
+def knife_edge_db(v):
+    """Single knife-edge diffraction loss J(v) (ITU-R P.526), dB."""
+    v = np.asarray(v, dtype=float)
+    with np.errstate(invalid="ignore"):
+        loss = 6.9 + 20.0 * np.log10(
+            np.sqrt((v - 0.1) ** 2 + 1.0) + v - 0.1
+        )
+    return np.where(v > -0.78, loss, 0.0)
+
+
+def terrain_diffraction_db(d_m, elevations, tx_height, rx_height,
+                           freq_mhz, k=K_FACTOR):
+    """
+    Diffraction loss (dB) at every profile sample, for profiles
+    along the last axis (d_m[..., 0] = 0 at the transmitter).
+
+    The dominant obstacle before each sample is the one with the
+    highest elevation angle seen from the transmitter (running
+    maximum, earth curvature included); its height above the
+    tx → sample ray gives the knife-edge parameter v. O(samples).
+    """
+    d = np.asarray(d_m, dtype=float)
+    z = np.asarray(elevations, dtype=float)
+    d, z = np.broadcast_arrays(d, z)
+    n = d.shape[-1]
+
+    drop = d * d / (2.0 * k * EARTH_RADIUS_M)
+    z_tx = z[..., :1] + tx_height
+    with np.errstate(invalid="ignore", divide="ignore"):
+        angle = (z - drop - z_tx) / d
+        rx_angle = (z + rx_height - drop - z_tx) / d
+
+    # obstacle strictly before each sample (the transmitter excluded):
+    # prev[..., i] is the angle of sample i - 1
+    prev = np.full(d.shape, -np.inf)
+    prev[..., 2:] = angle[..., 1:-1]
+    run = np.maximum.accumulate(prev, axis=-1)
+    idx = np.arange(n)
+    pos = np.maximum.accumulate(np.where(prev >= run, idx, 0), axis=-1)
+    d_obs = np.take_along_axis(d, np.maximum(pos - 1, 0), axis=-1)
+    d_rest = d - d_obs
+
+    valid = np.isfinite(run) & (d_obs > 0) & (d_rest > 0)
+    wavelength = SPEED_OF_LIGHT / (float(freq_mhz) * 1e6)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        h = (run - rx_angle) * d_obs
+        v = h * np.sqrt(2.0 * d / (wavelength * d_obs * d_rest))
+    return np.where(valid, knife_edge_db(np.where(valid, v, -1.0)), 0.0)
+
+
+def signal_levels(tx_power_dbm, gains_dbi, d_m, freq_mhz, model="fspl",
+                  base_height_m=30.0, mobile_height_m=1.5,
+                  environment="urban", extra_loss_db=None):
+    """
+    Received level (dBm) for arms × samples: tx_power + gain (per arm,
+    shape (arms,)) − path loss(d_m (arms, samples)) − extra_loss_db.
+    """
+    d = np.asarray(d_m, dtype=float)
+    if model == "hata":
+        loss = hata_db(d, freq_mhz, base_height_m, mobile_height_m, environment)
+    else:
+        loss = fspl_db(d, freq_mhz)
+
+    level = tx_power_dbm + np.asarray(gains_dbi, dtype=float)[..., None] - loss
+    if extra_loss_db is not None:
+        level = level - extra_loss_db
+    return level
+
+
+# =====================
+# BEARING STATISTICS
+# =====================
+def circular_mean(angles, weights=None):
+    """
+    (mean direction [0, 360), resultant length 0..1) of azimuths;
+    (NaN, 0) for no angles.
+    """
+    a = np.radians(np.asarray(angles, dtype=float))
+    if not a.size:
+        return float("nan"), 0.0
+    w = np.ones_like(a) if weights is None else np.asarray(weights, dtype=float)
+    total = w.sum()
+    if total <= 0:
+        return float("nan"), 0.0
+    s = (w * np.sin(a)).sum() / total
+    c = (w * np.cos(a)).sum() / total
+    return _wrap(float(np.degrees(np.arctan2(s, c)))), float(np.hypot(s, c))
+
+
+def dominant_bearing(bearing_deg, bin_deg=5.0, window_deg=30.0):
+    """
+    Direction of the densest bearing lobe: peak of the circular
+    histogram smoothed over ± window_deg, refined by the circular mean
+    of the samples within ± window_deg of it.
+
+    Returns (bearing, share of samples within the window); robust to
+    back-lobe / reflection samples that bias a plain circular mean.
+    """
+    b = np.asarray(bearing_deg, dtype=float)
+    b = b[np.isfinite(b)] % 360.0
+    if not b.size:
+        return float("nan"), 0.0
+
+    nbins = max(1, int(round(360.0 / bin_deg)))
+    width = 360.0 / nbins
+    hist = np.bincount((b // width).astype(np.int64) % nbins, minlength=nbins)
+
+    k = int(window_deg // width)
+    padded = np.concatenate([hist[-k:], hist, hist[:k]]) if k else hist
+    smooth = np.convolve(padded, np.ones(2 * k + 1), mode="valid")
+    peak = (np.argmax(smooth) + 0.5) * width
+
+    near = np.abs(angle_diffs(b, peak)) <= window_deg
+    mean, _ = circular_mean(b[near])
+    return mean, float(near.mean())
+
+
+# =====================
+# SECTOR SEPARATION
+# =====================
+def sector_separations(azimuths, beamwidths):
+    """
+    Clockwise separation from each sector to the next one and their
+    beam overlap, for (sites, k) azimuth / beamwidth arrays (NaN pads
+    sites with fewer sectors). One sort per row, then a single
+    vectorized neighbour pass.
+
+    Returns (order, separation, overlap), each (sites, k) in sorted
+    order: order[s, j] is the input column of the j-th sector
+    clockwise from north; separation / overlap (≥ 0) refer to the gap
+    from that sector to the next one. NaN for padding; a lone sector
+    is separated from itself by 360.
+    """
+    az = np.asarray(azimuths, dtype=float)
+    az = (az if az.ndim == 2 else az[None, :]) % 360.0
+    bw = np.broadcast_to(np.asarray(beamwidths, dtype=float), az.shape)
+
+    order = np.argsort(az, axis=1)          # NaN sorts last
+    s_az = np.take_along_axis(az, order, axis=1)
+    s_bw = np.take_along_axis(bw, order, axis=1)
+
+    n = np.isfinite(az).sum(axis=1)[:, None]
+    j = np.arange(az.shape[1])[None, :]
+    nxt = np.where(j + 1 < n, j + 1, 0)
+
+    sep = (np.take_along_axis(s_az, nxt, axis=1) - s_az) % 360.0
+    sep = np.where(n == 1, 360.0, sep)
+    overlap = (s_bw + np.take_along_axis(s_bw, nxt, axis=1)) / 2.0 - sep
+
+    used = j < n
+    return (
+        order,
+        np.where(used, sep, np.nan),
+        np.where(used, np.maximum(overlap, 0.0), np.nan),
+    )
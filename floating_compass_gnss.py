@@ -0,0 +1,549 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_gnss.py
+#
+# GNSS follow mode: the compass center tracks an NMEA 0183 feed
+# (serial receiver, TCP stream or a recorded log replayed at N×).
+#
+# Parsing, filtering and the reader thread are Qt-free; only
+# FloatingCompassGnssFollow touches the canvas (GUI thread).
+#
+import math
+import threading
+import time
+
+
+# =====================
+# NMEA PARSING
+# =====================
+def nmea_checksum_ok(line):
+    """True if line has no checksum or a matching one."""
+    star = line.rfind("*")
+    if star < 0:
+        return True
+    body = line[1:star] if line.startswith(("$", "!")) else line[:star]
+    calc = 0
+    for ch in body:
+        calc ^= ord(ch)
+    try:
+        return calc == int(line[star + 1:star + 3], 16)
+    except ValueError:
+        return False
+
+
+def nmea_time(text):
+    """hhmmss(.ss) → seconds of day, or None."""
+    if not text or len(text) < 6:
+        return None
+    try:
+        return int(text[0:2]) * 3600 + int(text[2:4]) * 60 + float(text[4:])
+    except ValueError:
+        return None
+
+
+def _coord(value, hemi):
+    if not value:
+        return None
+    try:
+        dot = value.index(".") if "." in value else len(value)
+        deg = float(value[: dot - 2])
+        minutes = float(value[dot - 2:])
+    except ValueError:
+        return None
+    out = deg + minutes / 60.0
+    return -out if hemi in ("S", "W") else out
+
+
+def _float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_nmea(line):
+    """
+    One NMEA sentence → dict with "type" (GGA / RMC / HDT / VTG) and
+    the fields used for following, or None (other / invalid).
+    """
+    line = line.strip()
+    if not line.startswith("$") or not nmea_checksum_ok(line):
+        return None
+
+    star = line.find("*")
+    fields = (line[1:star] if star > 0 else line[1:]).split(",")
+    kind = fields[0][-3:]
+
+    if kind == "GGA" and len(fields) >= 7:
+        try:
+            quality = int(fields[6] or 0)
+        except ValueError:
+            return None
+        if quality == 0:
+            return None
+        return {
+            "type": "GGA",
+            "time": nmea_time(fields[1]),
+            "lat": _coord(fields[2], fields[3]),
+            "lon": _coord(fields[4], fields[5]),
+            "quality": quality,
+        }
+
+    if kind == "RMC" and len(fields) >= 9:
+        if fields[2] != "A":
+            return None
+        return {
+            "type": "RMC",
+            "time": nmea_time(fields[1]),
+            "lat": _coord(fields[3], fields[4]),
+            "lon": _coord(fields[5], fields[6]),
+            "speed_kn": _float(fields[7]),
+            "course": _float(fields[8]),
+        }
+
+    if kind == "HDT" and len(fields) >= 2:
+        heading = _float(fields[1])
+        return None if heading is None else {"type": "HDT", "heading": heading}
+
+    if kind == "VTG" and len(fields) >= 2:
+        course = _float(fields[1])
+        return None if course is None else {"type": "VTG", "course": course}
+
+    return None
+
+
+# =====================
+# LOW-PASS FILTER
+# =====================
+class GnssFilter:
+    """
+    Exponential smoothing of position and heading.
+
+    Heading is smoothed on the unit circle (no 359° → 0° jumps);
+    true heading (HDT) wins over course over ground (RMC / VTG),
+    which is ignored below MIN_COURSE_SPEED_KN. Position jumps
+    larger than RESET_M restart the filter.
+    """
+
+    RESET_M = 500.0
+    MIN_COURSE_SPEED_KN = 1.0
+    HDT_TIMEOUT_S = 3.0
+
+    def __init__(self, alpha_position=0.35, alpha_heading=0.3):
+        self.alpha_position = alpha_position
+        self.alpha_heading = alpha_heading
+        self.lat = None
+        self.lon = None
+        self.heading = None
+        self.time = None
+        self._hx = self._hy = None
+        self._last_hdt = None
+        self._speed_kn = None
+
+    def update(self, msg, now=None):
+        """Feed one parsed sentence; True if the state changed."""
+        kind = msg["type"]
+        now = time.monotonic() if now is None else now
+
+        if kind in ("GGA", "RMC"):
+            if kind == "RMC":
+                self._speed_kn = msg.get("speed_kn")
+            changed = self._position(msg)
+            if kind == "RMC" and self._use_course(now):
+                changed = self._heading(msg.get("course")) or changed
+            return changed
+
+        if kind == "HDT":
+            self._last_hdt = now
+            return self._heading(msg["heading"])
+
+        if kind == "VTG" and self._use_course(now):
+            return self._heading(msg["course"])
+        return False
+
+    def _use_course(self, now):
+        if self._last_hdt is not None and now - self._last_hdt < self.HDT_TIMEOUT_S:
+            return False
+        return (self._speed_kn or 0.0) >= self.MIN_COURSE_SPEED_KN
+
+    def _position(self, msg):
+        lat, lon = msg.get("lat"), msg.get("lon")
+        if lat is None or lon is None:
+            return False
+        if msg.get("time") is not None:
+            self.time = msg["time"]
+
+        if self.lat is None or self._jump_m(lat, lon) > self.RESET_M:
+            self.lat, self.lon = lat, lon
+            return True
+
+        a = self.alpha_position
+        self.lat += a * (lat - self.lat)
+        self.lon += a * (lon - self.lon)
+        return True
+
+    def _jump_m(self, lat, lon):
+        dy = (lat - self.lat) * 110574.0
+        dx = (lon - self.lon) * 111320.0 * math.cos(math.radians(lat))
+        return math.hypot(dx, dy)
+
+    def _heading(self, deg):
+        if deg is None:
+            return False
+        rad = math.radians(deg)
+        x, y = math.sin(rad), math.cos(rad)
+        if self._hx is None:
+            self._hx, self._hy = x, y
+        else:
+            a = self.alpha_heading
+            self._hx += a * (x - self._hx)
+            self._hy += a * (y - self._hy)
+        self.heading = math.degrees(math.atan2(self._hx, self._hy)) % 360.0
+        return True
+
+    def state(self):
+        return {
+            "lat": self.lat,
+            "lon": self.lon,
+            "heading": self.heading,
+            "time": self.time,
+        }
+
+
+# =====================
+# SOURCES
+# =====================
+def open_source(source, halt=None):
+    """
+    Line iterator for a source string:
+      file:/path/log.nmea  (or a plain existing path)
+      tcp:host:port
+      serial:/dev/ttyUSB0[:baud]   (needs pyserial)
+    Returns (iterator, close callable, is_file). Live sources poll
+    halt (threading.Event) while waiting for data.
+    """
+    import os
+
+    halt = halt or threading.Event()
+
+    if source.startswith("tcp:"):
+        import socket
+
+        _, host, port = source.split(":", 2)
+        sock = socket.create_connection((host, int(port)), timeout=5.0)
+        sock.settimeout(1.0)
+        return _socket_lines(sock, halt), sock.close, False
+
+    if source.startswith("serial:"):
+        try:
+            import serial
+        except ImportError:
+            raise RuntimeError("serial GNSS input needs the pyserial package")
+
+        parts = source.split(":")
+        baud = int(parts[2]) if len(parts) > 2 and parts[2] else 4800
+        port = serial.Serial(parts[1], baud, timeout=1.0)
+
+        def lines():
+            while port.is_open and not halt.is_set():
+                raw = port.readline()
+                if raw:
+                    yield raw.decode("ascii", errors="replace")
+
+        return lines(), port.close, False
+
+    path = source[5:] if source.startswith("file:") else source
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+    fh = open(path, "r", encoding="ascii", errors="replace")
+    return iter(fh), fh.close, True
+
+
+def _socket_lines(sock, halt, bufsize=4096):
+    """
+    Lines of a socket with a timeout, read with recv() into an own
+    buffer: a makefile() reader refuses further reads after the
+    first timeout, which would end the stream on any 1 s gap.
+    """
+    import socket
+
+    buf = b""
+    while not halt.is_set():
+        try:
+            chunk = sock.recv(bufsize)
+        except socket.timeout:
+            continue
+        except OSError:
+            return
+        if not chunk:
+            break
+
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for raw in lines:
+            yield raw.decode("ascii", errors="replace") + "\n"
+
+    if buf and not halt.is_set():
+        yield buf.decode("ascii", errors="replace")
+
+
+class NmeaReader(threading.Thread):
+    """
+    Worker thread: reads a source, parses and filters sentences and
+    keeps only the latest filtered state (coalescing). The GUI side
+    polls latest() at its own capped rate.
+
+    speed: replay factor for files (1 = real time from the sentence
+    timestamps, 10 = ten times faster, 0 = as fast as possible).
+    Live sources ignore it.
+    """
+
+    def __init__(self, source, speed=1.0, gnss_filter=None):
+        super().__init__(name="FloatingCompassNmea", daemon=True)
+        self.source = source
+        self.speed = float(speed or 0.0)
+        self.filter = gnss_filter or GnssFilter()
+
+        self.sentences = 0
+        self.parsed = 0
+        self.error = None
+        self.finished = False
+
+        self._lock = threading.Lock()
+        self._halt = threading.Event()
+        self._state = None
+        self._seq = 0
+
+    def stop(self):
+        self._halt.set()
+
+    @property
+    def stopped(self):
+        return self._halt.is_set()
+
+    def latest(self):
+        """(seq, state dict) of the newest filtered fix."""
+        with self._lock:
+            return self._seq, self._state
+
+    def run(self):
+        try:
+            lines, close, is_file = open_source(self.source, self._halt)
+        except Exception as e:
+            self.error = str(e)
+            self.finished = True
+            return
+
+        pace = is_file and self.speed > 0
+        t0 = wall0 = None
+        prev = None
+
+        try:
+            for line in lines:
+                if self._halt.is_set():
+                    break
+                self.sentences += 1
+
+                msg = parse_nmea(line)
+                if msg is None:
+                    continue
+                self.parsed += 1
+
+                if pace and msg.get("time") is not None:
+                    t = msg["time"]
+                    if prev is not None and t < prev - 43200:
+                        t0 -= 86400.0          # past midnight
+                    prev = t
+                    if t0 is None:
+                        t0, wall0 = t, time.monotonic()
+                    delay = wall0 + (t - t0) / self.speed - time.monotonic()
+                    if delay > 0 and self._halt.wait(delay):
+                        break
+
+                if self.filter.update(msg):
+                    state = self.filter.state()
+                    with self._lock:
+                        self._state = state
+                        self._seq += 1
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            try:
+                close()
+            except Exception:
+                pass
+            self.finished = True
+
+
+# =====================
+# FOLLOW MODE (GUI THREAD)
+# =====================
+class FloatingCompassGnssFollow:
+    """
+    Moves the active compass to the latest GNSS fix, at most MAX_HZ
+    times per second (intermediate fixes are coalesced by the reader).
+    With rotate=True the arms keep their offsets relative to the
+    heading they had when following started.
+    """
+
+    MAX_HZ = 10
+    EDGE_MARGIN_PX = 40
+
+    def __init__(self, tool):
+        from qgis.PyQt.QtCore import QTimer
+
+        self.tool = tool
+        self.reader = None
+        self.rotate = True
+        self.keep_visible = True
+        self.state = None
+        self.applied = 0
+
+        self._seq = 0
+        self._uid = None
+        self._base_angles = None
+        self._base_heading = None
+        self._xform = None
+        self._xform_key = None
+
+        self._timer = QTimer()
+        self._timer.setInterval(int(1000 / self.MAX_HZ))
+        self._timer.timeout.connect(self._poll)
+
+    @property
+    def active(self):
+        return self.reader is not None
+
+    def start(self, source, speed=1.0, rotate=True, keep_visible=True):
+        self.stop()
+
+        self.rotate = bool(rotate)
+        self.keep_visible = bool(keep_visible)
+        self.applied = 0
+        self._seq = 0
+        active = self.tool.instances.active
+        self._uid = active.uid if active is not None else None
+        self._base_angles = None
+        self._base_heading = None
+
+        self.reader = NmeaReader(source, speed)
+        self.reader.start()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+        if self.reader is not None:
+            self.reader.stop()
+            self.reader = None
+
+    def follows(self, inst):
+        """True if inst is the compass driven by the feed."""
+        return self.active and inst is not None and inst.uid == self._uid
+
+    def _poll(self):
+        reader = self.reader
+        if reader is None:
+            return
+
+        seq, state = reader.latest()
+        if seq != self._seq and state is not None:
+            self._seq = seq
+            self.state = state
+            self._apply(state)
+
+        if reader.finished:
+            self._timer.stop()
+            self.reader = None
+            self._report(reader)
+
+    def _report(self, reader):
+        msg = (
+            f"GNSS feed ended: {reader.error}" if reader.error
+            else f"GNSS feed ended ({reader.parsed} fixes, {self.applied} updates)"
+        )
+        try:
+            self.tool.iface.statusBarIface().showMessage(msg, 4000)
+        except Exception:
+            pass
+
+    def _to_canvas(self):
+        from qgis.core import (
+            QgsCoordinateReferenceSystem,
+            QgsCoordinateTransform,
+            QgsProject,
+        )
+
+        crs = self.tool.canvas.mapSettings().destinationCrs()
+        key = crs.authid() or crs.toWkt()
+        if key != self._xform_key:
+            self._xform = QgsCoordinateTransform(
+                QgsCoordinateReferenceSystem("EPSG:4326"), crs,
+                QgsProject.instance().transformContext(),
+            )
+            self._xform_key = key
+        return self._xform
+
+    def _apply(self, state):
+        from qgis.PyQt.QtCore import QPointF
+        from qgis.core import QgsPointXY
+
+        t = self.tool
+        canvas = t.canvas
+        try:
+            pt = self._to_canvas().transform(QgsPointXY(state["lon"], state["lat"]))
+        except Exception:
+            return
+
+        px = canvas.getCoordinateTransform().transform(pt)
+        w, h = canvas.width(), canvas.height()
+        m = self.EDGE_MARGIN_PX
+        if self.keep_visible and not (m <= px.x() <= w - m and m <= px.y() <= h - m):
+            canvas.setCenter(pt)
+            canvas.refresh()
+            px = canvas.getCoordinateTransform().transform(pt)
+
+        pos = QPointF(px.x(), px.y())
+        t.project_state.ensure_loaded()
+
+        inst = t.instances.get(self._uid) if self._uid is not None else None
+        with t.batch():
+            if inst is None:
+                if t.center is None:
+                    t._place_compass(pos)
+                inst = t.instances.active
+                self._uid = inst.uid
+                self._base_angles = None
+            inst.center = pos
+            self._rotate_arms(inst, state.get("heading"))
+            t._request_update(geometry=True)
+
+        t.nearest.refresh()
+        t.aimed.refresh()
+        t.terrain.schedule()
+        self.applied += 1
+
+    def _rotate_arms(self, inst, heading):
+        if not self.rotate or heading is None:
+            return
+
+        arms = inst.arms or []
+        if self._base_angles is None:
+            self._base_angles = [float(a.get("angle_deg", 0.0)) for a in arms]
+            self._base_heading = heading
+            return
+
+        delta = heading - self._base_heading
+        for arm, base in zip(arms, self._base_angles):
+            arm["angle_deg"] = (base + delta) % 360.0
@@ -0,0 +1,307 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_ground.py
+import math
+
+from qgis.PyQt.QtCore import QSettings
+
+from .floating_compass_layer_index import canvas_distance_area
+
+
+def format_length(m, unit="m"):
+    if m is None:
+        return ""
+    if unit == "km" or m >= 10000:
+        return f"{m / 1000.0:.2f} km"
+    return f"{m:.0f} m"
+
+
+class FloatingCompassGroundLengths:
+    """
+    Arm lengths ("length_m" per arm) and ring radius (inst.ring_m)
+    locked to ground distance.
+
+    Pixel radii are derived from the ground metric at each compass
+    center (ellipsoidal, QgsDistanceArea), measured once along screen
+    x, y and the diagonal: on a geographic CRS a pixel covers less
+    ground east-west than north-south, so every arm takes the factor
+    along its own azimuth (the ring the mean over all directions).
+    The metric is recomputed only on scale / rotation / CRS change,
+    or when a compass is placed or locked. A pixel radius is only
+    written, and the overlay geometry only refreshed, when the
+    rounded value actually changes; the dial pixmap cache is keyed
+    on that integer radius, so an unchanged ring keeps its dial.
+    """
+
+    SETTINGS_GROUP = "FloatingCompass"
+    UNITS = ("m", "km")
+
+    # sane pixel bounds for ground-locked radii (pixel min / max
+    # settings do not apply: they would break the ground length)
+    MIN_PX = 4
+    MAX_PX = 4000
+
+    # measuring baseline around the center (px)
+    PROBE_PX = 100
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.unit = QSettings().value(
+            f"{self.SETTINGS_GROUP}/length_unit", "m"
+        )
+        if self.unit not in self.UNITS:
+            self.unit = "m"
+
+        self._mpp = {}          # instance uid → (gxx, gxy, gyy) metric
+        self._arm_px = {}       # (uid, arm index) → last locked pixel radius
+
+        canvas = tool.canvas
+        canvas.scaleChanged.connect(self.on_scale_changed)
+        canvas.rotationChanged.connect(self.on_scale_changed)
+        canvas.destinationCrsChanged.connect(self._on_crs_changed)
+
+    def unload(self):
+        canvas = self.tool.canvas
+        for signal, slot in (
+            (canvas.scaleChanged, self.on_scale_changed),
+            (canvas.rotationChanged, self.on_scale_changed),
+            (canvas.destinationCrsChanged, self._on_crs_changed),
+        ):
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass
+
+    def set_unit(self, unit):
+        if unit not in self.UNITS:
+            raise ValueError(f"unit must be one of {self.UNITS}")
+        self.unit = unit
+        QSettings().setValue(f"{self.SETTINGS_GROUP}/length_unit", unit)
+        self.tool._request_update()
+
+    def to_meters(self, value, unit=None):
+        return float(value) * (1000.0 if (unit or self.unit) == "km" else 1.0)
+
+    # =====================
+    # SCALE FACTOR
+    # =====================
+    def meters_per_pixel(self, inst, azimuth=None):
+        """
+        Ground metres per screen pixel at inst's center along azimuth
+        (true, deg); None → mean over all directions (ring).
+        """
+        g = self._mpp.get(inst.uid)
+        if g is None:
+            g = self._measure(inst)
+            if g is None:
+                return None
+            self._mpp[inst.uid] = g
+
+        gxx, gxy, gyy = g
+        if azimuth is None:
+            return math.sqrt((gxx + gyy) / 2.0)
+
+        # pixel direction of the azimuth (y down)
+        rad = math.radians(self.tool.view.screen_angle(azimuth))
+        u, v = math.sin(rad), -math.cos(rad)
+        m2 = gxx * u * u + 2.0 * gxy * u * v + gyy * v * v
+        return math.sqrt(m2) if m2 > 0 else None
+
+    def _measure(self, inst):
+        """
+        Metric (gxx, gxy, gyy) in squared metres per squared pixel:
+        a pixel step (u, v) covers sqrt(gxx u² + 2 gxy uv + gyy v²).
+        """
+        c = inst.center
+        if c is None:
+            return None
+        to_map = self.tool.canvas.getCoordinateTransform()
+        x, y = int(round(c.x())), int(round(c.y()))
+        h = self.PROBE_PX // 2
+
+        da = canvas_distance_area(self.tool.canvas)
+
+        def step(dx, dy):
+            a = to_map.toMapCoordinates(x - dx, y - dy)
+            b = to_map.toMapCoordinates(x + dx, y + dy)
+            m = da.measureLine(a, b)
+            return (m * m) / (4.0 * (dx * dx + dy * dy))
+
+        try:
+            gxx, gyy, gdd = step(h, 0), step(0, h), step(h, h)
+        except Exception:
+            return None
+        if gxx <= 0 or gyy <= 0:
+            return None
+        # diagonal (1, 1) / √2: gdd = (gxx + 2 gxy + gyy) / 2
+        return gxx, gdd - (gxx + gyy) / 2.0, gyy
+
+    def is_locked(self, inst):
+        return inst.ring_m is not None or any(
+            a.get("length_m") for a in inst.arms or []
+        )
+
+    # =====================
+    # METRES → PIXELS
+    # =====================
+    def apply(self, inst):
+        """Pixel radii of inst from its ground lengths; True if any changed."""
+        if not self.is_locked(inst):
+            return False
+        mpp = self.meters_per_pixel(inst)
+        if not mpp:
+            return False
+
+        changed = False
+        if inst.ring_m is not None:
+            px = self._px(inst.ring_m, mpp)
+            if px != inst.ring_radius:
+                inst.ring_radius = px
+                changed = True
+
+        for idx, arm in enumerate(inst.arms or []):
+            m = arm.get("length_m")
+            if not m:
+                continue
+            arm_mpp = self.meters_per_pixel(inst, arm["angle_deg"])
+            if not arm_mpp:
+                continue
+            px = self._px(m, arm_mpp)
+            self._arm_px[(inst.uid, idx)] = px
+            if px != arm.get("radius_px"):
+                arm["radius_px"] = px
+                changed = True
+        return changed
+
+    def _px(self, meters, mpp):
+        return int(min(self.MAX_PX, max(self.MIN_PX, round(meters / mpp))))
+
+    def refresh(self, instances=None):
+        """Re-apply ground lengths (all compasses by default)."""
+        t = self.tool
+        changed = False
+        for inst in instances or list(t.instances):
+            changed = self.apply(inst) or changed
+
+        if changed:
+            active = t.instances.active
+            if active is not None:
+                t._ring_radius = active.ring_radius
+            t._request_update(geometry=True)
+        return changed
+
+    def on_scale_changed(self, *args):
+        self._mpp = {}
+        self.refresh()
+
+    def _on_crs_changed(self):
+        self._mpp = {}
+        self.refresh()
+
+    def forget(self, inst_uid=None):
+        if inst_uid is None:
+            self._mpp = {}
+            self._arm_px = {}
+        else:
+            self._mpp.pop(inst_uid, None)
+            for key in [k for k in self._arm_px if k[0] == inst_uid]:
+                del self._arm_px[key]
+
+    # =====================
+    # PIXELS → METRES
+    # =====================
+    def sync_from_pixels(self, inst):
+        """
+        After a drag / undo: locked lengths take the new pixel radii
+        (the factor is re-measured, the center may have moved). An
+        arm whose pixel length did not change was only rotated: it
+        keeps its ground length and its pixels follow the azimuth.
+        """
+        if inst is None:
+            return
+        self._mpp.pop(inst.uid, None)
+        if not self.is_locked(inst):
+            return
+        mpp = self.meters_per_pixel(inst)
+        if not mpp:
+            return
+
+        if inst.ring_m is not None:
+            inst.ring_m = inst.ring_radius * mpp
+        for idx, arm in enumerate(inst.arms or []):
+            if not arm.get("length_m"):
+                continue
+            px = arm.get("radius_px") or inst.ring_radius
+            if px != self._arm_px.get((inst.uid, idx)):
+                arm["length_m"] = self._arm_meters(inst, arm)
+        self.apply(inst)
+
+    def lock(self, inst, ring=True, arms=True):
+        """Lock the current pixel lengths of inst to ground distance."""
+        self._mpp.pop(inst.uid, None)
+        mpp = self.meters_per_pixel(inst)
+        if not mpp:
+            return False
+
+        if ring:
+            inst.ring_m = inst.ring_radius * mpp
+        if arms:
+            for idx, arm in enumerate(inst.arms or []):
+                if arm.get("enabled"):
+                    arm["length_m"] = self._arm_meters(inst, arm)
+                    self._arm_px[(inst.uid, idx)] = (
+                        arm.get("radius_px") or inst.ring_radius
+                    )
+        self.tool.project_state.mark_dirty()
+        self.tool._request_update()
+        return True
+
+    def _arm_meters(self, inst, arm):
+        px = arm.get("radius_px") or inst.ring_radius
+        return px * (
+            self.meters_per_pixel(inst, arm["angle_deg"])
+            or self.meters_per_pixel(inst)
+        )
+
+    def unlock(self, inst):
+        """Back to pixel lengths (current radii are kept)."""
+        inst.ring_m = None
+        for arm in inst.arms or []:
+            arm.pop("length_m", None)
+        self.tool.project_state.mark_dirty()
+        self.tool._request_update()
+
+    def set_arm_length(self, inst, arm_index, value, unit=None):
+        """Arm length in unit (default self.unit); None / 0 unlocks it."""
+        arm = inst.arms[arm_index]
+        if value:
+            arm["length_m"] = self.to_meters(value, unit)
+        else:
+            arm.pop("length_m", None)
+        self._commit(inst)
+
+    def set_ring_distance(self, inst, value, unit=None):
+        """Ring radius in unit (default self.unit); None / 0 unlocks it."""
+        inst.ring_m = self.to_meters(value, unit) if value else None
+        self._commit(inst)
+
+    def _commit(self, inst):
+        t = self.tool
+        t.overlay.prepareGeometryChange()
+        self.apply(inst)
+        if inst is t.instances.active:
+            t._ring_radius = inst.ring_radius
+        t.project_state.mark_dirty()
+        t._request_update(geometry=True)
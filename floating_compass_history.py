@@ -0,0 +1,140 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_history.py
+from collections import deque
+
+
+# delta kinds
+CENTER = "c"    # (x, y)
+RING = "r"      # ring radius px
+ANGLE = "a"     # arm angle deg
+RADIUS = "l"    # arm length px
+ENABLED = "e"   # arm enabled
+
+
+def capture(inst):
+    """Compact geometry state of a compass instance (tuples only)."""
+    return (
+        (inst.center.x(), inst.center.y()),
+        inst.ring_radius,
+        tuple(
+            (
+                float(arm.get("angle_deg", 0.0)),
+                arm.get("radius_px"),
+                bool(arm.get("enabled")),
+            )
+            for arm in inst.arms
+        ),
+    )
+
+
+def diff(before, after):
+    """Delta records (kind, arm index, old, new) between two captures."""
+    deltas = []
+
+    if before[0] != after[0]:
+        deltas.append((CENTER, -1, before[0], after[0]))
+    if before[1] != after[1]:
+        deltas.append((RING, -1, before[1], after[1]))
+
+    for idx, (old, new) in enumerate(zip(before[2], after[2])):
+        if old[0] != new[0]:
+            deltas.append((ANGLE, idx, old[0], new[0]))
+        if old[1] != new[1]:
+            deltas.append((RADIUS, idx, old[1], new[1]))
+        if old[2] != new[2]:
+            deltas.append((ENABLED, idx, old[2], new[2]))
+
+    return tuple(deltas)
+
+
+class CompassHistory:
+    """
+    Undo / redo of compass geometry.
+
+    Each entry is (instance uid, delta records) for one interaction
+    (press → release), kept in bounded ring buffers so memory stays
+    flat over a long session.
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self._undo = deque(maxlen=max_entries)
+        self._redo = deque(maxlen=max_entries)
+
+    def __len__(self):
+        return len(self._undo)
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def record(self, uid, before, after):
+        """Store the delta between two captures; no-op if unchanged."""
+        deltas = diff(before, after)
+        if not deltas:
+            return False
+
+        self._undo.append((uid, deltas))
+        self._redo.clear()
+        return True
+
+    def undo(self, resolve):
+        """
+        Revert the last entry. resolve(uid) → instance or None.
+        Returns the instance changed, or None.
+        """
+        return self._step(self._undo, self._redo, resolve, old=True)
+
+    def redo(self, resolve):
+        return self._step(self._redo, self._undo, resolve, old=False)
+
+    def _step(self, source, target, resolve, old):
+        while source:
+            uid, deltas = source.pop()
+            inst = resolve(uid)
+            if inst is None:
+                # compass was removed → entry is meaningless
+                continue
+
+            self._apply(inst, deltas, old)
+            target.append((uid, deltas))
+            return inst
+        return None
+
+    @staticmethod
+    def _apply(inst, deltas, old):
+        from qgis.PyQt.QtCore import QPointF
+
+        for kind, idx, v_old, v_new in deltas:
+            v = v_old if old else v_new
+
+            if kind == CENTER:
+                inst.center = QPointF(v[0], v[1])
+            elif kind == RING:
+                inst.ring_radius = v
+            elif kind == ANGLE:
+                inst.arms[idx]["angle_deg"] = v
+            elif kind == RADIUS:
+                inst.arms[idx]["radius_px"] = v
+            elif kind == ENABLED:
+                inst.arms[idx]["enabled"] = v
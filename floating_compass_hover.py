@@ -0,0 +1,223 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_hover.py
+import math
+
+from qgis.PyQt.QtCore import QSettings, QTimer
+from qgis.core import QgsGeometry, QgsRectangle, QgsWkbTypes
+
+from .floating_compass_layer_index import (
+    CanvasLayerTransforms,
+    LayerWatch,
+    canvas_distance_area,
+    layer_index,
+    saved_layer,
+)
+from .floating_compass_nearest import format_distance
+
+
+def _box_distance(rect, pt):
+    """Distance from QgsPointXY pt to QgsRectangle rect (0 inside)."""
+    dx = max(rect.xMinimum() - pt.x(), 0.0, pt.x() - rect.xMaximum())
+    dy = max(rect.yMinimum() - pt.y(), 0.0, pt.y() - rect.yMaximum())
+    return math.hypot(dx, dy)
+
+
+class FloatingCompassHoverReadout:
+    """
+    Bearing / distance from the active compass center to the feature
+    under the cursor, for one chosen layer (status bar).
+
+    Mouse moves only store the latest position; the lookup runs at
+    most once per frame (FRAME_MS) against the shared layer index:
+    bbox candidates within TOLERANCE_PX, then exact distance on the
+    stored geometries. No provider request per mouse event. In a
+    dense spot only the MAX_CANDIDATES boxes closest to the cursor
+    are measured.
+    """
+
+    SETTINGS_GROUP = "FloatingCompass"
+    FRAME_MS = 16
+    TOLERANCE_PX = 6
+    MAX_CANDIDATES = 256
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.layer = None
+        self.label_field = None
+        self.tolerance_px = self.TOLERANCE_PX
+        self.text = ""
+        self.result = None
+
+        self._index = None
+        self._pos = None
+        self._xforms = CanvasLayerTransforms(tool.canvas)
+        self._watch = LayerWatch(lambda: self.set_layer(None))
+
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._lookup)
+
+    # =====================
+    # LAYER
+    # =====================
+    def set_layer(self, layer, label_field=None, tolerance_px=None):
+        """Read out features of vector layer (None = off)."""
+        self.layer = layer
+        self._index = layer_index(layer) if layer is not None else None
+        self.label_field = (
+            (label_field or layer.displayField() or None) if layer else None
+        )
+        if tolerance_px is not None:
+            self.tolerance_px = max(1, int(tolerance_px))
+
+        self.text = ""
+        self.result = None
+        self._watch.watch(layer)
+
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        s.setValue("hover_layer_id", layer.id() if layer else "")
+        s.setValue("hover_label_field", self.label_field or "")
+        s.endGroup()
+
+    def restore(self):
+        if self.layer is not None:
+            return
+
+        layer = saved_layer("hover_layer_id")
+        if layer is not None:
+            field = QSettings().value(
+                f"{self.SETTINGS_GROUP}/hover_label_field", ""
+            ) or None
+            self.set_layer(layer, field)
+
+    @property
+    def enabled(self):
+        return self.layer is not None
+
+    # =====================
+    # THROTTLED LOOKUP
+    # =====================
+    def schedule(self, pos):
+        """Remember pos (QPointF, px); look up at most once per frame."""
+        if not self.enabled:
+            return
+        self._pos = pos
+        if not self._timer.isActive():
+            self._timer.start(self.FRAME_MS)
+
+    def stop(self):
+        self._timer.stop()
+        self._pos = None
+
+    def _lookup(self):
+        t = self.tool
+        pos, self._pos = self._pos, None
+        if pos is None or t.center is None or self._index is None:
+            return
+        if not self._index.is_ready:
+            self._show("indexing…")
+            return
+
+        res = self.feature_at(pos)
+        self.result = res
+        if res is None:
+            self._show("")
+            return
+
+        label = f" {res['label']}" if res["label"] else ""
+        self._show(
+            f"{self.layer.name()}{label}: {res['bearing']:.1f}°  "
+            f"{format_distance(res['distance_m'])} from compass"
+        )
+
+    def _show(self, text):
+        self.text = text
+        t = self.tool
+        if t.active_handle != t.HANDLE_NONE or t.hover_handle != t.HANDLE_NONE:
+            return
+        try:
+            t.iface.mainWindow().statusBar().showMessage(text)
+        except Exception:
+            pass
+
+    def feature_at(self, pos):
+        """
+        Nearest feature within tolerance of pixel pos, as dict:
+        fid, label, point (canvas CRS), bearing, distance_m. Or None.
+        """
+        t = self.tool
+        to_px = t.canvas.getCoordinateTransform()
+        cursor = to_px.toMapCoordinates(int(round(pos.x())), int(round(pos.y())))
+        tol = self.tolerance_px * t.canvas.mapUnitsPerPixel()
+
+        to_layer, to_canvas = self._xforms.get(self.layer)
+        try:
+            rect = to_layer.transformBoundingBox(QgsRectangle(
+                cursor.x() - tol, cursor.y() - tol,
+                cursor.x() + tol, cursor.y() + tol,
+            ))
+            cursor_l = to_layer.transform(cursor)
+        except Exception:
+            return None
+
+        tol_l = max(rect.width(), rect.height()) / 2.0
+        probe = QgsGeometry.fromPointXY(cursor_l)
+
+        candidates = []
+        for fid in self._index.intersects(rect):
+            geom = self._index.geometry(fid)
+            if geom is not None and not geom.isNull():
+                candidates.append((fid, geom))
+        if len(candidates) > self.MAX_CANDIDATES:
+            candidates.sort(
+                key=lambda c: _box_distance(c[1].boundingBox(), cursor_l)
+            )
+            del candidates[self.MAX_CANDIDATES:]
+
+        best_fid, best_geom, best_d = None, None, None
+        for fid, geom in candidates:
+            d = geom.distance(probe)
+            if d <= tol_l and (best_d is None or d < best_d):
+                best_fid, best_geom, best_d = fid, geom, d
+
+        if best_fid is None:
+            return None
+
+        gtype = QgsWkbTypes.geometryType(best_geom.wkbType())
+        if gtype == QgsWkbTypes.PointGeometry:
+            target = best_geom.vertexAt(0)
+        elif gtype == QgsWkbTypes.LineGeometry:
+            target = best_geom.nearestPoint(probe).asPoint()
+        else:
+            target = best_geom.centroid().asPoint()
+        target = to_canvas.transform(target.x(), target.y())
+
+        c = t.center
+        center = to_px.toMapCoordinates(int(round(c.x())), int(round(c.y())))
+        da = canvas_distance_area(t.canvas)
+
+        label = None
+        if self.label_field:
+            label = self._index.value(best_fid, self.label_field)
+
+        return {
+            "fid": best_fid,
+            "label": "" if label is None else str(label),
+            "point": target,
+            "bearing": math.degrees(da.bearing(center, target)) % 360.0,
+            "distance_m": da.measureLine(center, target),
+        }
@@ -0,0 +1,118 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_instances.py
+import itertools
+
+
+def copy_arms(arms):
+    """Copy an arm model list (QColor copied, not shared)."""
+    from qgis.PyQt.QtGui import QColor
+
+    out = []
+    for arm in arms:
+        a = dict(arm)
+        if a.get("color") is not None:
+            a["color"] = QColor(a["color"])
+        out.append(a)
+    return out
+
+
+class CompassInstance:
+    """
+    Lightweight per-compass model.
+
+    Only geometry lives here (center, ring, arms). Style, labels and
+    render caches are shared by all instances through the tool.
+    ring_m locks the ring radius to a ground distance (metres).
+    """
+
+    __slots__ = ("uid", "center", "ring_radius", "arms", "ring_m")
+
+    def __init__(self, uid, center, ring_radius, arms, ring_m=None):
+        self.uid = uid
+        self.center = center
+        self.ring_radius = ring_radius
+        self.arms = arms
+        self.ring_m = ring_m
+
+
+class CompassInstanceManager:
+    """
+    Ordered set of compass instances.
+
+    Order is z-order: the last instance is drawn on top and wins
+    hit-testing. The active instance is the one the tool edits.
+    """
+
+    def __init__(self):
+        self._items = []
+        self._active = None
+        self._uids = itertools.count(1)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def active(self):
+        return self._active
+
+    def instances(self):
+        return list(self._items)
+
+    def get(self, uid):
+        """Instance with uid, or None (e.g. removed)."""
+        for inst in self._items:
+            if inst.uid == uid:
+                return inst
+        return None
+
+    def add(self, center, ring_radius, arms, ring_m=None):
+        inst = CompassInstance(
+            next(self._uids), center, ring_radius, arms, ring_m
+        )
+        self._items.append(inst)
+        self._active = inst
+        return inst
+
+    def remove(self, inst):
+        if inst in self._items:
+            self._items.remove(inst)
+
+        if self._active is inst:
+            self._active = self._items[-1] if self._items else None
+
+    def clear(self):
+        self._items = []
+        self._active = None
+
+    def activate(self, inst):
+        """Make inst active and raise it to the top."""
+        if inst is None or inst not in self._items:
+            return
+
+        if self._items[-1] is not inst:
+            self._items.remove(inst)
+            self._items.append(inst)
+        self._active = inst
+
+    def hit_test(self, pos, hit_fn):
+        """Topmost instance for which hit_fn(inst, pos) is truthy."""
+        for inst in reversed(self._items):
+            if hit_fn(inst, pos):
+                return inst
+        return None
@@ -0,0 +1,383 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_layer_index.py
+import weakref
+
+from qgis.PyQt.QtCore import QObject, QSettings, pyqtSignal
+from qgis.core import (
+    QgsApplication,
+    QgsCoordinateTransform,
+    QgsDistanceArea,
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsProject,
+    QgsSpatialIndex,
+    QgsTask,
+    QgsVectorLayerFeatureSource,
+)
+
+
+class FloatingCompassLayerIndex(QObject):
+    """
+    Cached spatial index of one vector layer, shared by all compass
+    features that look up layer features (nearest sites, hover
+    readout, ray sweep, reverse bearing).
+
+    - built once in a background QgsTask from a feature source
+      snapshot; geometries are stored in the index (layer CRS)
+    - kept current incrementally from layer edit signals (added /
+      deleted / geometry changed), no full rebuild on edits
+    - rebuilt only when the layer reloads its data source or an
+      edit session is rolled back
+    - attribute values are fetched on demand and cached per field
+
+    Get the shared instance with layer_index(layer).
+    """
+
+    ready = pyqtSignal()
+    changed = pyqtSignal()
+
+    def __init__(self, layer):
+        super().__init__()
+        self.layer = layer
+        self.layer_id = layer.id()
+
+        self._index = None
+        self._task = None
+        self._building = False
+        self._stale = False
+        self._values = {}     # field → {fid: value}
+
+        layer.featureAdded.connect(self._on_added)
+        layer.featureDeleted.connect(self._on_deleted)
+        layer.geometryChanged.connect(self._on_geometry_changed)
+        layer.attributeValueChanged.connect(self._on_attribute_changed)
+        layer.dataSourceChanged.connect(self.rebuild)
+        layer.afterRollBack.connect(self.rebuild)
+        layer.dataChanged.connect(self._on_data_changed)
+        layer.willBeDeleted.connect(self._on_will_be_deleted)
+
+        self.rebuild()
+
+    # =====================
+    # BUILD (BACKGROUND)
+    # =====================
+    @property
+    def is_ready(self):
+        return self._index is not None
+
+    def rebuild(self):
+        if self._building:
+            self._stale = True
+            return
+
+        self._building = True
+        self._stale = False
+        self._values = {}
+
+        source = QgsVectorLayerFeatureSource(self.layer)
+        self._task = QgsTask.fromFunction(
+            f"Floating Compass: indexing {self.layer.name()}",
+            self._build,
+            source,
+            on_finished=self._on_built,
+        )
+        QgsApplication.taskManager().addTask(self._task)
+
+    @staticmethod
+    def _build(task, source):
+        request = QgsFeatureRequest().setNoAttributes()
+        index = QgsSpatialIndex(QgsSpatialIndex.FlagStoredFeatureGeometries)
+
+        total = source.featureCount() or 0
+        for n, feat in enumerate(source.getFeatures(request)):
+            if task.isCanceled():
+                return None
+            if feat.hasGeometry():
+                index.addFeature(feat)
+            if total and n % 5000 == 0:
+                task.setProgress(100.0 * n / total)
+        return index
+
+    def _on_built(self, exception, index=None):
+        self._building = False
+        self._task = None
+
+        if self._stale:
+            self.rebuild()
+            return
+
+        if exception is None and index is not None:
+            self._index = index
+            self.ready.emit()
+
+    # =====================
+    # INCREMENTAL UPDATES
+    # =====================
+    def _feature(self, fid):
+        req = QgsFeatureRequest(fid).setNoAttributes()
+        return next(self.layer.getFeatures(req), None)
+
+    def _stored(self, fid):
+        """Feature with the geometry held by the index (for removal)."""
+        geom = self._index.geometry(fid)
+        if geom is None or geom.isNull():
+            return None
+        f = QgsFeature(fid)
+        f.setGeometry(geom)
+        return f
+
+    def _on_added(self, fid):
+        if self._building:
+            self._stale = True
+            return
+        if self._index is None:
+            return
+
+        feat = self._feature(fid)
+        if feat is not None and feat.hasGeometry():
+            self._index.addFeature(feat)
+            self.changed.emit()
+
+    def _on_deleted(self, fid):
+        if self._building:
+            self._stale = True
+            return
+        if self._index is None:
+            return
+
+        old = self._stored(fid)
+        if old is not None:
+            self._index.deleteFeature(old)
+        for values in self._values.values():
+            values.pop(fid, None)
+        self.changed.emit()
+
+    def _on_geometry_changed(self, fid, geom):
+        if self._building:
+            self._stale = True
+            return
+        if self._index is None:
+            return
+
+        old = self._stored(fid)
+        if old is not None:
+            self._index.deleteFeature(old)
+        if geom is not None and not geom.isNull():
+            f = QgsFeature(fid)
+            f.setGeometry(geom)
+            self._index.addFeature(f)
+        self.changed.emit()
+
+    def _on_attribute_changed(self, fid, idx, value):
+        fields = self.layer.fields()
+        if 0 <= idx < fields.count():
+            self._values.get(fields.at(idx).name(), {}).pop(fid, None)
+
+    def _on_data_changed(self):
+        # edit buffer rollback / provider reload: values may be stale
+        self._values = {}
+
+    def _on_will_be_deleted(self):
+        release_index(self.layer_id)
+
+    def detach(self):
+        if self._task is not None:
+            self._task.cancel()
+        try:
+            self.layer.featureAdded.disconnect(self._on_added)
+            self.layer.featureDeleted.disconnect(self._on_deleted)
+            self.layer.geometryChanged.disconnect(self._on_geometry_changed)
+            self.layer.attributeValueChanged.disconnect(
+                self._on_attribute_changed
+            )
+            self.layer.dataSourceChanged.disconnect(self.rebuild)
+            self.layer.afterRollBack.disconnect(self.rebuild)
+            self.layer.dataChanged.disconnect(self._on_data_changed)
+            self.layer.willBeDeleted.disconnect(self._on_will_be_deleted)
+        except (TypeError, RuntimeError):
+            pass
+        self._index = None
+
+    # =====================
+    # QUERIES (layer CRS)
+    # =====================
+    def nearest(self, point, k=1, max_distance=0.0):
+        """Feature ids of the k nearest features to QgsPointXY point."""
+        if self._index is None:
+            return []
+        return self._index.nearestNeighbor(point, k, max_distance)
+
+    def intersects(self, rect):
+        """Feature ids whose bounding box intersects QgsRectangle rect."""
+        if self._index is None:
+            return []
+        return self._index.intersects(rect)
+
+    def geometry(self, fid):
+        """Stored geometry of fid (layer CRS), or None."""
+        if self._index is None:
+            return None
+        return self._index.geometry(fid)
+
+    def value(self, fid, field):
+        """Attribute value of fid (cached per field)."""
+        values = self._values.setdefault(field, {})
+        if fid in values:
+            return values[fid]
+
+        idx = self.layer.fields().lookupField(field)
+        if idx < 0:
+            return None
+
+        req = (
+            QgsFeatureRequest(fid)
+            .setFlags(QgsFeatureRequest.NoGeometry)
+            .setSubsetOfAttributes([idx])
+        )
+        feat = next(self.layer.getFeatures(req), None)
+        values[fid] = feat.attributes()[idx] if feat is not None else None
+        return values[fid]
+
+
+# =====================
+# SHARED REGISTRY
+# =====================
+_INDEXES = {}
+
+
+def layer_index(layer):
+    """Shared FloatingCompassLayerIndex of layer (created on first use)."""
+    idx = _INDEXES.get(layer.id())
+    if idx is None:
+        idx = FloatingCompassLayerIndex(layer)
+        _INDEXES[layer.id()] = idx
+    return idx
+
+
+def release_index(layer_id):
+    idx = _INDEXES.pop(layer_id, None)
+    if idx is not None:
+        idx.detach()
+
+
+def release_all():
+    for lid in list(_INDEXES):
+        release_index(lid)
+    for watch in list(_WATCHES):
+        watch.release()
+    _DISTANCE_AREAS.clear()
+
+
+# =====================
+# SHARED CANVAS / LAYER HELPERS
+# =====================
+_DISTANCE_AREAS = {}
+_WATCHES = weakref.WeakSet()
+
+
+def canvas_distance_area(canvas):
+    """
+    Ellipsoidal QgsDistanceArea for the canvas CRS and the project
+    ellipsoid; shared, and only rebuilt when either changes.
+    """
+    project = QgsProject.instance()
+    crs = canvas.mapSettings().destinationCrs()
+    ellipsoid = project.ellipsoid() or "WGS84"
+    key = (crs.authid() or crs.toWkt(), ellipsoid)
+
+    da = _DISTANCE_AREAS.get(key)
+    if da is None:
+        da = QgsDistanceArea()
+        da.setSourceCrs(crs, project.transformContext())
+        da.setEllipsoid(ellipsoid)
+        _DISTANCE_AREAS[key] = da
+    return da
+
+
+def saved_layer(key):
+    """Project layer whose id is saved under FloatingCompass/key, or None."""
+    layer_id = QSettings().value(f"FloatingCompass/{key}", "")
+    return QgsProject.instance().mapLayer(layer_id) if layer_id else None
+
+
+class CanvasLayerTransforms:
+    """
+    Canvas CRS ↔ layer CRS transforms, cached and rebuilt only when
+    the canvas CRS or the layer (or its CRS) changes.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._key = None
+        self._pair = (None, None)
+
+    def get(self, layer):
+        """(canvas → layer, layer → canvas) of layer."""
+        canvas_crs = self.canvas.mapSettings().destinationCrs()
+        layer_crs = layer.crs()
+        key = (
+            canvas_crs.authid() or canvas_crs.toWkt(),
+            layer.id(),
+            layer_crs.authid() or layer_crs.toWkt(),
+        )
+        if key != self._key:
+            ctx = QgsProject.instance().transformContext()
+            self._pair = (
+                QgsCoordinateTransform(canvas_crs, layer_crs, ctx),
+                QgsCoordinateTransform(layer_crs, canvas_crs, ctx),
+            )
+            self._key = key
+        return self._pair
+
+
+class LayerWatch:
+    """
+    The one layer a feature works on: on_deleted() runs when it is
+    removed from the project, on_changed() (optional) when it reloads
+    its data source. watch() moves the connections to the new layer
+    instead of adding more, so switching layers leaves no slots
+    behind on the old one; release_all() releases every watch.
+    """
+
+    def __init__(self, on_deleted, on_changed=None):
+        self.layer = None
+        self._on_deleted = on_deleted
+        self._on_changed = on_changed
+
+    def watch(self, layer):
+        self.release()
+        self.layer = layer
+        if layer is None:
+            return
+        layer.willBeDeleted.connect(self._deleted)
+        if self._on_changed is not None:
+            layer.dataSourceChanged.connect(self._on_changed)
+        _WATCHES.add(self)
+
+    def release(self):
+        layer, self.layer = self.layer, None
+        if layer is None:
+            return
+        try:
+            layer.willBeDeleted.disconnect(self._deleted)
+            if self._on_changed is not None:
+                layer.dataSourceChanged.disconnect(self._on_changed)
+        except (TypeError, RuntimeError):
+            pass
+
+    def _deleted(self):
+        self.release()
+        self._on_deleted()
@@ -0,0 +1,513 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_layout.py
+import json
+import os
+from collections import OrderedDict
+
+from qgis.PyQt.QtCore import QPointF, QRectF, Qt
+from qgis.PyQt.QtGui import (
+    QColor, QFont, QFontMetricsF, QIcon, QPainter, QPainterPath, QPen,
+    QPolygonF,
+)
+from qgis.core import (
+    QgsApplication,
+    QgsLayoutItem,
+    QgsLayoutItemAbstractMetadata,
+    QgsLayoutItemRegistry,
+    QgsLayoutPoint,
+    QgsLayoutSize,
+    QgsUnitTypes,
+)
+
+from . import floating_compass_geometry as cgeom
+
+
+ITEM_TYPE = QgsLayoutItemRegistry.PluginItem + 2601
+
+# room for arm labels outside the longest arm (virtual px)
+LABEL_MARGIN = 40
+
+
+def snapshot(tool, inst=None):
+    """
+    Plain (JSON-able) copy of a compass for a layout item: ring
+    radius, mode, arm labels and arms [angle, radius, enabled, color].
+    """
+    inst = inst or tool.instances.active
+    ring = inst.ring_radius if inst is not None else tool.ring_radius
+    arms = inst.arms if inst is not None else tool.arms
+    return {
+        "ring": int(ring or 200),
+        "mode": getattr(tool, "mode", "NORMAL"),
+        "labels": [tool.arm_label(idx, a) for idx, a in enumerate(arms or [])],
+        "arms": [
+            [
+                round(float(a.get("angle_deg", 0.0)), 2),
+                int(a.get("radius_px") or ring or 200),
+                1 if a.get("enabled") else 0,
+                a["color"].name() if a.get("color") is not None else None,
+            ]
+            for a in arms or []
+        ],
+    }
+
+
+def _azimuths(values):
+    """Field values → azimuth list ("0;120;240" splits into three)."""
+    out = []
+    for v in values:
+        if v is None:
+            out.append(None)
+            continue
+        parts = str(v).replace(",", ";").split(";") if isinstance(v, str) else [v]
+        for p in parts:
+            try:
+                a = float(p)
+            except (TypeError, ValueError):
+                out.append(None)
+                continue
+            out.append(None if a != a else a % 360.0)
+    return out
+
+
+def _text_path(text, font, x, y):
+    """Vector text with its baseline starting at (x, y)."""
+    path = QPainterPath()
+    path.addText(QPointF(x, y), font, text)
+    return path
+
+
+class FloatingCompassLayoutItem(QgsLayoutItem):
+    """
+    The compass as a print layout item, drawn as vector paths (no
+    cached pixmaps), so PDF / SVG output is sharp at any DPI.
+
+    Geometry is built in the overlay's pixel units around (0, 0) with
+    the geometry core and the overlay's text placement, then scaled
+    into the item. Colors and pens come from the overlay style
+    snapshot. Dial paths (keyed on the dial settings) and arm / label
+    paths (keyed on the arm angles) are cached per item, so an atlas
+    export over many sites with similar azimuths mostly reuses them.
+
+    azimuth_fields: with an atlas, arm angles are read from these
+    fields of the current feature (one field per arm, or a single
+    field holding "0;120;240"); arms without a value are hidden.
+    """
+
+    PATH_CACHE_MAX = 64
+
+    def __init__(self, layout, tool=None):
+        super().__init__(layout)
+        self.tool = tool
+        self.state = snapshot(tool) if tool is not None else {
+            "ring": 200, "mode": "NORMAL", "labels": [], "arms": []
+        }
+        self.azimuth_fields = []
+        self.show_azimuths = True
+        self._paths = OrderedDict()
+
+        self.setBackgroundEnabled(False)
+        self.setFrameEnabled(False)
+
+    # =====================
+    # ITEM
+    # =====================
+    def type(self):
+        return ITEM_TYPE
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), "icon", "compass.svg"))
+
+    def displayName(self):
+        return self.id() or "Floating Compass"
+
+    def set_state(self, state):
+        """Replace the compass drawn (see snapshot())."""
+        self.state = state
+        self._paths.clear()
+        self.update()
+
+    def set_azimuth_fields(self, fields):
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(",")]
+        self.azimuth_fields = [f for f in fields or [] if f]
+        self.update()
+
+    def refresh(self):
+        # atlas feature changed: arms may follow it
+        super().refresh()
+        self.update()
+
+    # =====================
+    # PERSISTENCE
+    # =====================
+    def writePropertiesToElement(self, element, document, context):
+        element.setAttribute("compassState", json.dumps(self.state, separators=(",", ":")))
+        element.setAttribute("azimuthFields", ",".join(self.azimuth_fields))
+        element.setAttribute("showAzimuths", "1" if self.show_azimuths else "0")
+        return True
+
+    def readPropertiesFromElement(self, element, document, context):
+        try:
+            self.state = json.loads(element.attribute("compassState", "")) or self.state
+        except ValueError:
+            pass
+        self.azimuth_fields = [
+            f for f in element.attribute("azimuthFields", "").split(",") if f
+        ]
+        self.show_azimuths = element.attribute("showAzimuths", "1") == "1"
+        self._paths.clear()
+        return True
+
+    # =====================
+    # ARMS (SNAPSHOT / ATLAS)
+    # =====================
+    def arms(self):
+        """[(angle, radius, color, label)] of the enabled arms to draw."""
+        state = self.state
+        recs = state.get("arms") or []
+        labels = state.get("labels") or []
+        ring = state.get("ring", 200)
+
+        angles = None
+        if self.azimuth_fields:
+            feature = self.layout().reportContext().feature()
+            if feature.isValid():
+                names = feature.fields().names()
+                angles = _azimuths(
+                    feature[f] if f in names else None for f in self.azimuth_fields
+                )
+
+        out = []
+        count = len(angles) if angles is not None else len(recs)
+        for i in range(count):
+            rec = recs[i] if i < len(recs) else [0.0, ring, 1, None]
+            if angles is not None:
+                angle = angles[i]
+                if angle is None:
+                    continue
+            else:
+                if not rec[2]:
+                    continue
+                angle = float(rec[0])
+            out.append((
+                angle,
+                int(rec[1] or ring),
+                rec[3] or (self.tool.color_ring.name() if self.tool else "#ffffff"),
+                labels[i] if i < len(labels) else "",
+            ))
+        return out
+
+    # =====================
+    # PATHS (CACHED PER ITEM)
+    # =====================
+    def _remember(self, key, value):
+        self._paths[key] = value
+        while len(self._paths) > self.PATH_CACHE_MAX:
+            self._paths.popitem(last=False)
+        return value
+
+    def _dial_key(self, ring):
+        t = self.tool
+        return (
+            "dial", ring,
+            t.ring_tick_step_deg, t.ring_major_tick_deg, t.ring_label_step_deg,
+            getattr(t, "label_font_size", 9),
+            t.show_cardinal, t.cardinal_font_size, t.cardinal_offset_px,
+            t.show_north_triangle, t.north_triangle_size_px,
+        )
+
+    def dial_paths(self, ring):
+        """{minor, major, labels, cardinals, north} paths around (0, 0)."""
+        key = self._dial_key(ring)
+        hit = self._paths.get(key)
+        if hit is not None:
+            self._paths.move_to_end(key)
+            return hit
+
+        t = self.tool
+        step = max(1, t.ring_tick_step_deg)
+        major = max(1, t.ring_major_tick_deg)
+        label_step = max(1, t.ring_label_step_deg)
+
+        paths = {
+            "minor": QPainterPath(),
+            "major": QPainterPath(),
+            "labels": QPainterPath(),
+            "cardinals": QPainterPath(),
+            "north": QPainterPath(),
+        }
+
+        label_font = QFont("Arial", getattr(t, "label_font_size", 9), QFont.Bold)
+        for deg in range(0, 360, step):
+            is_major = deg % major == 0
+            tick_len = 14 if is_major else 8
+            x1, y1 = cgeom.screen_endpoint(0.0, 0.0, deg, ring - tick_len)
+            x2, y2 = cgeom.screen_endpoint(0.0, 0.0, deg, ring)
+            target = paths["major" if is_major else "minor"]
+            target.moveTo(x1, y1)
+            target.lineTo(x2, y2)
+
+            if deg % label_step == 0:
+                x, y = cgeom.screen_endpoint(0.0, 0.0, deg, ring - 26)
+                paths["labels"].addPath(
+                    _text_path(str(deg), label_font, x - 10, y + 5)
+                )
+
+        if t.show_cardinal:
+            font = QFont("Arial", t.cardinal_font_size, QFont.Bold)
+            fm = QFontMetricsF(font)
+            r = ring - t.cardinal_offset_px
+            for text, deg in (("N", 0), ("E", 90), ("S", 180), ("W", 270)):
+                x, y = cgeom.screen_endpoint(0.0, 0.0, deg, r)
+                br = fm.boundingRect(text)
+                w, h = br.width(), br.height()
+                paths["cardinals"].addPath(_text_path(text, font, x - w / 2, y + h / 2))
+
+                if text == "N" and t.show_north_triangle:
+                    size = t.north_triangle_size_px * 2.0
+                    by = y - h / 2 + 1
+                    dx = size * 0.70
+                    paths["north"].addPolygon(QPolygonF([
+                        QPointF(x, by - size * 0.95),
+                        QPointF(x + dx, by + size * 0.45),
+                        QPointF(x, by + size * 0.05),
+                        QPointF(x - dx, by + size * 0.45),
+                    ]))
+                    paths["north"].closeSubpath()
+
+        return self._remember(key, paths)
+
+    def arm_paths(self, arms, font, angle_font):
+        """
+        ([(end, color, label path)], arc) for arms; arc is None or
+        (rect, start, span, text path) in NORMAL mode.
+        """
+        t = self.tool
+        mode = self.state.get("mode", "NORMAL")
+        key = ("arms", mode, self.show_azimuths, tuple(arms), font.key(), angle_font.key())
+        hit = self._paths.get(key)
+        if hit is not None:
+            self._paths.move_to_end(key)
+            return hit
+
+        endpoint_r = getattr(t, "arm_endpoint_radius_px", 4)
+        arm_w = getattr(t, "arm_line_width", 5)
+        fm = QFontMetricsF(font)
+
+        out = []
+        for angle, radius, color, label in arms:
+            end = QPointF(*cgeom.screen_endpoint(0.0, 0.0, angle, radius))
+
+            text = label
+            if self.show_azimuths:
+                text = f"{label} {angle:.0f}°" if label else f"{angle:.0f}°"
+            path = QPainterPath()
+            if text:
+                # same radial placement + directional anchor as the overlay
+                lx, ly = cgeom.screen_endpoint(
+                    0.0, 0.0, angle, radius + endpoint_r + arm_w + 8
+                )
+                br = fm.boundingRect(text)
+                w, h = br.width(), br.height()
+                a = angle % 360
+                ox = 0 if 45 <= a < 135 else (w if 225 <= a < 315 else w / 2)
+                path = _text_path(text, font, lx - ox, ly + h / 2)
+            out.append((end, QColor(color), path))
+
+        arc = None
+        if mode == "NORMAL" and len(arms) >= 2:
+            a0, a1 = arms[0][0], arms[1][0]
+            span = cgeom.arc_span(a0 % 360, a1)
+            if span > 0.5:
+                dist = getattr(t, "angle_text_distance_px", 20)
+                mx, my = cgeom.screen_endpoint(
+                    0.0, 0.0, cgeom.mid_angle(a0, a1, min_span=1), dist
+                )
+                arc = (
+                    QRectF(-20, -20, 40, 40),
+                    a0 % 360,
+                    span,
+                    _text_path(f"{(a1 - a0) % 360:.1f}°", angle_font, mx, my),
+                )
+
+        return self._remember(key, (out, arc))
+
+    # =====================
+    # DRAW
+    # =====================
+    def draw(self, context):
+        t = self.tool
+        if t is None:
+            return
+
+        rc = context.renderContext()
+        painter = rc.painter()
+        st = t.render_cache.style(True)
+
+        ring = int(self.state.get("ring", 200))
+        arms = self.arms()
+        extent = max([ring] + [r for _, r, _, _ in arms]) + LABEL_MARGIN
+
+        # item size in painter units (dots) → overlay pixel units
+        w = self.rect().width() * rc.scaleFactor()
+        h = self.rect().height() * rc.scaleFactor()
+        k = min(w, h) / (2.0 * extent)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(w / 2.0, h / 2.0)
+        painter.scale(k, k)
+        painter.setBrush(Qt.NoBrush)
+
+        # ring glow
+        painter.setPen(st["glow_pen"])
+        painter.drawEllipse(QPointF(0, 0), ring, ring)
+
+        # arms + labels
+        label_font, angle_font = st["label_font"], st["angle_font"]
+        arm_items, arc = self.arm_paths(arms, label_font, angle_font)
+        arm_w = getattr(t, "arm_line_width", 5)
+        ep = getattr(t, "arm_endpoint_radius_px", 0)
+        if ep <= 0:
+            ep = max(3, arm_w - 1)
+
+        for end, color, _ in arm_items:
+            col = QColor(color)
+            col.setAlpha(st["base_alpha"])
+            pen = QPen(col, arm_w)
+            pen.setCapStyle(Qt.RoundCap)
+            painter.setPen(pen)
+            painter.drawLine(QPointF(0, 0), end)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(col)
+            painter.drawEllipse(end, ep, ep)
+            painter.setBrush(Qt.NoBrush)
+
+        for _, _, path in arm_items:
+            self._draw_text(painter, path, st["text_col"], st)
+
+        # arc between the first two arms (NORMAL)
+        if arc is not None and getattr(t, "show_arc", True):
+            rect, start, span, text = arc
+            painter.setPen(st["arc_pen"])
+            painter.drawArc(rect, int((90 - start) * 16), int(-span * 16))
+            self._draw_text(painter, text, st["text_col"], st)
+
+        # ring + dial (vector, not the overlay's dial pixmap)
+        painter.setPen(st["ring_pens"][False])
+        painter.drawEllipse(QPointF(0, 0), ring, ring)
+
+        dial = self.dial_paths(ring)
+        ring_col = st["ring_col"]
+        ring_w = st["ring_w"]
+        for part, width in (("minor", 1), ("major", ring_w)):
+            pen = QPen(ring_col, width)
+            pen.setCapStyle(Qt.RoundCap)
+            painter.strokePath(dial[part], pen)
+        self._draw_text(painter, dial["labels"], ring_col, st)
+
+        cardinal_col = QColor(t.color_ring)
+        cardinal_col.setAlpha(225)
+        self._draw_text(painter, dial["cardinals"], cardinal_col, st)
+        if not dial["north"].isEmpty():
+            painter.setPen(QPen(QColor("#000000"), 1))
+            painter.setBrush(QColor("#E31B23"))
+            painter.drawPath(dial["north"])
+
+        # center dot
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(ring_col)
+        dot = getattr(t, "center_dot_radius_px", 6)
+        painter.drawEllipse(QPointF(0, 0), dot, dot)
+
+        painter.restore()
+
+    def _draw_text(self, painter, path, fill_col, st):
+        """Shadow + outline + fill, as the overlay glyphs, but vector."""
+        if path.isEmpty():
+            return
+        t = self.tool
+        if getattr(t, "shadow_enabled", True) and st["shadow_col"].alpha() > 0:
+            painter.fillPath(path.translated(1.5, 1.5), st["shadow_col"])
+        if getattr(t, "outline_enabled", True) and st["outline_col"].alpha() > 0:
+            pen = QPen(st["outline_col"], 2)
+            pen.setJoinStyle(Qt.RoundJoin)
+            painter.strokePath(path, pen)
+        painter.fillPath(path, fill_col)
+
+
+class FloatingCompassLayoutItemMetadata(QgsLayoutItemAbstractMetadata):
+    """Lets saved layouts recreate the item (type ITEM_TYPE)."""
+
+    def __init__(self, tool):
+        super().__init__(ITEM_TYPE, "Floating Compass")
+        self.tool = tool
+
+    def createItem(self, layout):
+        return FloatingCompassLayoutItem(layout, self.tool)
+
+
+_METADATA = None
+
+
+def register(tool):
+    """
+    Register the item type. After a plugin reload the type may still
+    be registered (no removeLayoutItemType before QGIS 3.38): the
+    existing metadata is then pointed at the new tool.
+    """
+    global _METADATA
+    if _METADATA is None:
+        registry = QgsApplication.layoutItemRegistry()
+        meta = FloatingCompassLayoutItemMetadata(tool)
+        if registry.addLayoutItemType(meta):
+            _METADATA = meta
+            return
+        _METADATA = registry.itemMetadata(ITEM_TYPE)
+        if _METADATA is None:
+            return
+    _METADATA.tool = tool
+
+
+def unregister():
+    """Remove the item type where supported, else drop the tool."""
+    global _METADATA
+    if _METADATA is None:
+        return
+    meta, _METADATA = _METADATA, None
+    meta.tool = None
+
+    remove = getattr(
+        QgsApplication.layoutItemRegistry(), "removeLayoutItemType", None
+    )
+    if remove is not None:
+        try:
+            remove(ITEM_TYPE)
+        except TypeError:
+            remove(meta)
+
+
+def add_to_layout(tool, layout, azimuth_fields=None, size_mm=60.0):
+    """New compass item (current compass) in layout, top-left corner."""
+    item = FloatingCompassLayoutItem(layout, tool)
+    item.set_azimuth_fields(azimuth_fields)
+    layout.addLayoutItem(item)
+    item.attemptResize(
+        QgsLayoutSize(size_mm, size_mm, QgsUnitTypes.LayoutMillimeters)
+    )
+    item.attemptMove(QgsLayoutPoint(10, 10, QgsUnitTypes.LayoutMillimeters))
+    return item
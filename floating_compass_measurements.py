@@ -0,0 +1,320 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_measurements.py
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+
+_STOP = object()
+
+
+def measurement_record(tool, inst=None):
+    """
+    Plain-python measurement of a compass instance (default: active),
+    built on the GUI thread. Coordinates in EPSG:4326.
+
+        {"ts", "site", "mode", "crs", "lon", "lat",
+         "arms": [(id, label, azimuth, radius_px, length_m,
+                   end_lon, end_lat), ...]}
+    """
+    from qgis.core import (
+        QgsCoordinateReferenceSystem,
+        QgsCoordinateTransform,
+        QgsDistanceArea,
+        QgsProject,
+    )
+
+    inst = inst or tool.instances.active
+    if inst is None:
+        return None
+
+    project = QgsProject.instance()
+    crs = tool.canvas.mapSettings().destinationCrs()
+    wgs84 = QgsCoordinateReferenceSystem("EPSG:4326")
+    xform = QgsCoordinateTransform(crs, wgs84, project)
+    to_map = tool.canvas.getCoordinateTransform()
+
+    da = QgsDistanceArea()
+    da.setSourceCrs(crs, project.transformContext())
+    da.setEllipsoid(project.ellipsoid() or "WGS84")
+
+    def map_point(p):
+        return to_map.toMapCoordinates(int(round(p.x())), int(round(p.y())))
+
+    c_map = map_point(inst.center)
+    c_geo = xform.transform(c_map)
+
+    arms = []
+    for idx, arm in enumerate(inst.arms):
+        if not arm.get("enabled"):
+            continue
+
+        radius = arm.get("radius_px") or inst.ring_radius
+        end_map = map_point(
+            tool._endpoint_at(inst.center, arm["angle_deg"], radius)
+        )
+        end_geo = xform.transform(end_map)
+
+        arms.append((
+            arm["id"],
+            tool.arm_label(idx, arm),
+            round(float(arm["angle_deg"]) % 360, 2),
+            int(radius),
+            round(da.measureLine(c_map, end_map), 2),
+            end_geo.x(),
+            end_geo.y(),
+        ))
+
+    return {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "site": tool.site_name,
+        "mode": tool.mode,
+        "crs": crs.authid(),
+        "lon": c_geo.x(),
+        "lat": c_geo.y(),
+        "arms": arms,
+    }
+
+
+class FloatingCompassMeasurementLog:
+    """
+    Append-only measurement log in a GeoPackage (EPSG:4326):
+
+        measurements      Point       one row per recorded compass
+        measurement_arms  LineString  center → arm end, per enabled arm
+                                      (meas_fid = measurements fid)
+
+    record() only queues the record. A background thread writes
+    queued records with OGR, one transaction per batch (up to
+    BATCH_MAX records or FLUSH_S seconds), so recording never waits
+    for disk I/O on the GUI thread.
+    """
+
+    FILE_NAME = "floating_compass_measurements.gpkg"
+    POINT_LAYER = "measurements"
+    ARM_LAYER = "measurement_arms"
+
+    BATCH_MAX = 200
+    FLUSH_S = 0.5
+
+    POINT_FIELDS = (
+        ("ts", "str"),
+        ("site", "str"),
+        ("mode", "str"),
+        ("canvas_crs", "str"),
+        ("n_arms", "int"),
+    )
+    ARM_FIELDS = (
+        ("meas_fid", "int64"),
+        ("ts", "str"),
+        ("site", "str"),
+        ("arm", "str"),
+        ("label", "str"),
+        ("azimuth", "real"),
+        ("radius_px", "int"),
+        ("length_m", "real"),
+    )
+
+    def __init__(self, path=None):
+        self.path = path or self.default_path()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.last_error = None
+
+    @classmethod
+    def default_path(cls):
+        from qgis.core import QgsApplication
+        from qgis.PyQt.QtCore import QSettings
+
+        path = QSettings().value("FloatingCompass/measurement_gpkg", "")
+        if path:
+            return str(path)
+        return os.path.join(QgsApplication.qgisSettingsDirPath(), cls.FILE_NAME)
+
+    # =====================
+    # PUBLIC
+    # =====================
+    def record(self, rec):
+        """Queue one record (see measurement_record())."""
+        if rec is None:
+            return
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="FloatingCompassMeasurementLog",
+                    daemon=True,
+                )
+                self._thread.start()
+        self._queue.put(rec)
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def close(self, timeout=5.0):
+        """Write remaining records and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    # =====================
+    # WRITER THREAD
+    # =====================
+    def _run(self):
+        ds = None
+        try:
+            while True:
+                rec = self._queue.get()
+                if rec is _STOP:
+                    return
+
+                batch, stop = self._collect(rec)
+                if ds is None:
+                    ds = self._open()
+                self._write(ds, batch)
+
+                if stop:
+                    return
+        except Exception as e:
+            self._log(f"Measurement log stopped: {e}")
+        finally:
+            ds = None
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.FLUSH_S
+
+        while len(batch) < self.BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                rec = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if rec is _STOP:
+                return batch, True
+            batch.append(rec)
+
+        return batch, False
+
+    def _open(self):
+        from osgeo import ogr, osr
+
+        if os.path.exists(self.path):
+            ds = ogr.Open(self.path, 1)
+        else:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            ds = ogr.GetDriverByName("GPKG").CreateDataSource(self.path)
+        if ds is None:
+            raise RuntimeError(f"cannot open {self.path}")
+
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(4326)
+        srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+
+        self._ensure_layer(ds, self.POINT_LAYER, ogr.wkbPoint, srs,
+                           self.POINT_FIELDS)
+        self._ensure_layer(ds, self.ARM_LAYER, ogr.wkbLineString, srs,
+                           self.ARM_FIELDS)
+        return ds
+
+    @staticmethod
+    def _ensure_layer(ds, name, geom_type, srs, fields):
+        from osgeo import ogr
+
+        lyr = ds.GetLayerByName(name)
+        if lyr is not None:
+            return lyr
+
+        types = {
+            "str": ogr.OFTString,
+            "int": ogr.OFTInteger,
+            "int64": ogr.OFTInteger64,
+            "real": ogr.OFTReal,
+        }
+        lyr = ds.CreateLayer(name, srs, geom_type)
+        for fname, ftype in fields:
+            lyr.CreateField(ogr.FieldDefn(fname, types[ftype]))
+        return lyr
+
+    def _write(self, ds, batch):
+        from osgeo import ogr
+
+        pts = ds.GetLayerByName(self.POINT_LAYER)
+        lines = ds.GetLayerByName(self.ARM_LAYER)
+        pts_defn = pts.GetLayerDefn()
+        lines_defn = lines.GetLayerDefn()
+
+        ds.StartTransaction()
+        try:
+            for rec in batch:
+                f = ogr.Feature(pts_defn)
+                f.SetField("ts", rec["ts"])
+                f.SetField("site", rec.get("site") or "")
+                f.SetField("mode", rec.get("mode") or "")
+                f.SetField("canvas_crs", rec.get("crs") or "")
+                f.SetField("n_arms", len(rec["arms"]))
+
+                g = ogr.Geometry(ogr.wkbPoint)
+                g.AddPoint_2D(rec["lon"], rec["lat"])
+                f.SetGeometry(g)
+                if pts.CreateFeature(f) != 0:
+                    raise RuntimeError("point feature not created")
+                fid = f.GetFID()
+
+                for aid, label, az, radius, length, ex, ey in rec["arms"]:
+                    lf = ogr.Feature(lines_defn)
+                    lf.SetField("meas_fid", fid)
+                    lf.SetField("ts", rec["ts"])
+                    lf.SetField("site", rec.get("site") or "")
+                    lf.SetField("arm", aid)
+                    lf.SetField("label", label)
+                    lf.SetField("azimuth", az)
+                    lf.SetField("radius_px", radius)
+                    lf.SetField("length_m", length)
+
+                    lg = ogr.Geometry(ogr.wkbLineString)
+                    lg.AddPoint_2D(rec["lon"], rec["lat"])
+                    lg.AddPoint_2D(ex, ey)
+                    lf.SetGeometry(lg)
+                    if lines.CreateFeature(lf) != 0:
+                        raise RuntimeError("arm feature not created")
+
+            ds.CommitTransaction()
+            self.written += len(batch)
+        except Exception as e:
+            ds.RollbackTransaction()
+            self.last_error = str(e)
+            self._log(f"Measurement batch of {len(batch)} not written: {e}")
+
+    @staticmethod
+    def _log(msg):
+        try:
+            from qgis.core import Qgis, QgsMessageLog
+            QgsMessageLog.logMessage(msg, "Floating Compass", Qgis.Warning)
+        except Exception:
+            pass
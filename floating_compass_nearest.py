@@ -0,0 +1,189 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_nearest.py
+import math
+
+from qgis.PyQt.QtCore import QSettings
+
+from .floating_compass_layer_index import (
+    CanvasLayerTransforms,
+    LayerWatch,
+    canvas_distance_area,
+    layer_index,
+    saved_layer,
+)
+
+
+def format_distance(m):
+    if m is None:
+        return ""
+    if m < 1000:
+        return f"{m:.0f} m"
+    return f"{m / 1000.0:.2f} km"
+
+
+class FloatingCompassNearestSites:
+    """
+    K nearest sites of a chosen point layer, seen from the active
+    compass center: label, bearing (ellipsoidal, degrees) and
+    distance (metres). Drawn by the overlay as ghost rays.
+
+    Lookup goes through the shared layer index (nearestNeighbor on
+    stored geometries), so refresh() is cheap enough to run on
+    every center drag event.
+    """
+
+    SETTINGS_GROUP = "FloatingCompass"
+    DEFAULT_K = 5
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.layer = None
+        self.label_field = None
+        self.k = self.DEFAULT_K
+        self.results = []
+
+        self._index = None
+        self._xforms = CanvasLayerTransforms(tool.canvas)
+        self._watch = LayerWatch(lambda: self.set_layer(None))
+
+        tool.canvas.destinationCrsChanged.connect(self.refresh)
+
+    # =====================
+    # LAYER
+    # =====================
+    def set_layer(self, layer, label_field=None, k=None):
+        """Use point layer as site layer (None = off)."""
+        if self._index is not None:
+            try:
+                self._index.ready.disconnect(self.refresh)
+                self._index.changed.disconnect(self.refresh)
+            except (TypeError, RuntimeError):
+                pass
+
+        self.layer = layer
+        self._index = None
+        self.results = []
+        self._watch.watch(layer)
+
+        if k is not None:
+            self.k = max(1, int(k))
+
+        if layer is None:
+            self.label_field = None
+        else:
+            self.label_field = label_field or layer.displayField() or None
+            self._index = layer_index(layer)
+            self._index.ready.connect(self.refresh)
+            self._index.changed.connect(self.refresh)
+
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        s.setValue("nearest_layer_id", layer.id() if layer else "")
+        s.setValue("nearest_label_field", self.label_field or "")
+        s.setValue("nearest_k", self.k)
+        s.endGroup()
+
+        self.refresh()
+
+    def restore(self):
+        """Re-select the saved site layer if it is in the project."""
+        if self.layer is not None:
+            return
+
+        layer = saved_layer("nearest_layer_id")
+        if layer is None:
+            return
+
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        field = s.value("nearest_label_field", "") or None
+        k = s.value("nearest_k", self.DEFAULT_K, int)
+        s.endGroup()
+        self.set_layer(layer, field, k)
+
+    @property
+    def enabled(self):
+        return self.layer is not None
+
+    # =====================
+    # QUERY
+    # =====================
+    def query(self, center_map, k=None):
+        """
+        K nearest sites to center_map (QgsPointXY, canvas CRS) as
+        dicts: fid, label, point (canvas CRS), bearing, distance_m.
+        """
+        if self._index is None or not self._index.is_ready:
+            return []
+
+        to_layer, to_canvas = self._xforms.get(self.layer)
+        try:
+            fids = self._index.nearest(to_layer.transform(center_map), k or self.k)
+        except Exception:
+            return []
+
+        da = canvas_distance_area(self.tool.canvas)
+        out = []
+        for fid in fids[: k or self.k]:
+            geom = self._index.geometry(fid)
+            if geom is None or geom.isNull():
+                continue
+
+            pt = to_canvas.transform(geom.centroid().asPoint())
+            label = None
+            if self.label_field:
+                label = self._index.value(fid, self.label_field)
+
+            out.append({
+                "fid": fid,
+                "label": "" if label is None else str(label),
+                "point": pt,
+                "bearing": math.degrees(da.bearing(center_map, pt)) % 360.0,
+                "distance_m": da.measureLine(center_map, pt),
+            })
+        return out
+
+    def refresh(self):
+        """Re-query for the active compass center and repaint."""
+        t = self.tool
+        c = t.center
+
+        if not self.enabled or c is None:
+            if self.results:
+                self.results = []
+                t._request_update(geometry=True)
+            return
+
+        center_map = t.canvas.getCoordinateTransform().toMapCoordinates(
+            int(round(c.x())), int(round(c.y()))
+        )
+        self.results = self.query(center_map)
+        t._request_update(geometry=True)
+
+    def ray_text(self, res):
+        label = f"{res['label']}  " if res["label"] else ""
+        return f"{label}{res['bearing']:.1f}°  {format_distance(res['distance_m'])}"
+
+    def points_px(self):
+        """(result, QPointF pixel position) for the current results."""
+        from qgis.PyQt.QtCore import QPointF
+
+        to_px = self.tool.canvas.getCoordinateTransform()
+        out = []
+        for res in self.results:
+            p = to_px.transform(res["point"])
+            out.append((res, QPointF(p.x(), p.y())))
+        return out
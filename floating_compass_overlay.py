@@ -13,18 +13,293 @@
 # ============================================================
 
 from qgis.gui import QgsMapCanvasItem
-from qgis.PyQt.QtGui import QPen, QColor, QFont, QBrush, QPainter
+from qgis.PyQt.QtGui import (
+    QPen, QColor, QFont, QBrush, QPainter, QPainterPath, QPixmap,
+    QLinearGradient
+)
 from qgis.PyQt.QtCore import QPointF, QRectF, Qt
-import math
+from collections import OrderedDict
+
+from . import floating_compass_geometry as cgeom
+from . import floating_compass_antenna as antenna
+from .floating_compass_ground import format_length
+
+
+class FloatingCompassRenderCache:
+    """
+    Render caches shared by the overlay.
+
+    Parts (invalidated independently by tool.apply_settings):
+    - style    : colors / pens / fonts snapshot
+    - dial     : pre-rendered ticks + degree labels + cardinals
+    - geometry : bounding padding + range ring paths
+    - text     : text metrics + pre-rendered label glyphs
+    """
+
+    STYLE = "style"
+    DIAL = "dial"
+    GEOMETRY = "geometry"
+    TEXT = "text"
+    ALL = frozenset((STYLE, DIAL, GEOMETRY, TEXT))
+
+    DIAL_CACHE_MAX = 8
+    RINGS_CACHE_MAX = 16
+    TEXT_CACHE_MAX = 512
+
+    def __init__(self, tool):
+        self.tool = tool
+        self._style = {}
+        self._dial = OrderedDict()
+        self._padding = None
+        self._rings = OrderedDict()
+        self._text_size = {}
+        self._glyphs = OrderedDict()
+
+    # =================================================
+    def invalidate(self, parts=None):
+        parts = self.ALL if parts is None else parts
+
+        if self.STYLE in parts:
+            self._style.clear()
+        if self.DIAL in parts:
+            self._dial.clear()
+        if self.GEOMETRY in parts:
+            self._padding = None
+            self._rings.clear()
+        if self.TEXT in parts:
+            self._text_size.clear()
+            self._glyphs.clear()
+
+    # =================================================
+    # STYLE SNAPSHOT
+    # =================================================
+    def style(self, active):
+        st = self._style.get(active)
+        if st is None:
+            st = self._build_style(active)
+            self._style[active] = st
+        return st
+
+    def _build_style(self, active):
+        t = self.tool
+        base_alpha = 220 if active else 120
+
+        ring_col = QColor(t.color_ring)
+        ring_col.setAlpha(base_alpha)
+
+        text_col = QColor(t.color_text)
+        text_col.setAlpha(255 if active else 160)
+
+        outline_col = QColor(t.color_outline)
+        shadow_col = QColor(t.color_shadow)
+        shadow_col.setAlpha(t.text_shadow_alpha)
+
+        ring_w = getattr(t, "ring_line_width", 3)
+
+        glow = QColor(ring_col)
+        glow.setAlpha(t.ring_glow_alpha)
+        glow_pen = QPen(glow, ring_w + 4)
+        glow_pen.setCapStyle(Qt.RoundCap)
+        glow_pen.setJoinStyle(Qt.RoundJoin)
+
+        ring_pens = {}
+        for hover in (False, True):
+            pen = QPen(ring_col, ring_w + 2 if hover else ring_w)
+            pen.setCapStyle(Qt.RoundCap)
+            pen.setJoinStyle(Qt.RoundJoin)
+            ring_pens[hover] = pen
+
+        arc_col = QColor(t.color_arc)
+        arc_col.setAlpha(130 if active else 90)
+        arc_w = getattr(t, "arc_line_width", 0)
+        if arc_w <= 0:
+            arc_w = max(2, ring_w - 1)
+        arc_pen = QPen(arc_col, arc_w)
+        arc_pen.setCapStyle(Qt.RoundCap)
+
+        cross_col = QColor(getattr(t, "crosshair_color", ring_col))
+        cross_col.setAlpha(ring_col.alpha())
+        cross_pen = QPen(cross_col, max(1, getattr(t, "crosshair_thickness", 1)))
+        cross_pen.setCapStyle(Qt.RoundCap)
+
+        range_col = QColor(ring_col)
+        range_col.setAlpha(base_alpha // 2)
+        range_pen = QPen(range_col, 1, Qt.DashLine)
+        range_pen.setCosmetic(True)
+
+        return {
+            "active": active,
+            "base_alpha": base_alpha,
+            "ring_col": ring_col,
+            "text_col": text_col,
+            "outline_col": outline_col,
+            "shadow_col": shadow_col,
+            "ring_w": ring_w,
+            "glow_pen": glow_pen,
+            "ring_pens": ring_pens,
+            "arc_pen": arc_pen,
+            "cross_col": cross_col,
+            "cross_pen": cross_pen,
+            "range_pen": range_pen,
+            "label_font": QFont(
+                "Arial", getattr(t, "label_font_size", 10), QFont.Bold
+            ),
+            "angle_font": QFont(
+                "Arial", getattr(t, "angle_font_size", 10), QFont.Bold
+            ),
+            "range_font": QFont(
+                "Arial", max(6, getattr(t, "label_font_size", 10) - 2)
+            ),
+        }
+
+    # =================================================
+    # DIAL (TICKS + LABELS + CARDINALS)
+    # =================================================
+    def dial(self, overlay, radius, active, dpr, rotation=0.0):
+        key = (int(radius), active, dpr, round(rotation, 1))
+        pix = self._dial.get(key)
+        if pix is not None:
+            self._dial.move_to_end(key)
+            return pix
+
+        st = self.style(active)
+        half = int(radius) + st["ring_w"] * 2 + 8
+        size = half * 2
+
+        pix = QPixmap(int(size * dpr), int(size * dpr))
+        pix.setDevicePixelRatio(dpr)
+        pix.fill(Qt.transparent)
+
+        p = QPainter(pix)
+        p.setRenderHint(QPainter.Antialiasing)
+        # rotated canvas: the dial turns with north
+        p.translate(half, half)
+        p.rotate(rotation)
+        c = QPointF(0, 0)
+        overlay.draw_degree_ticks(p, c, radius, st["ring_col"])
+        overlay.draw_cardinal_directions(p, c, radius)
+        p.end()
+
+        self._dial[key] = pix
+        while len(self._dial) > self.DIAL_CACHE_MAX:
+            self._dial.popitem(last=False)
+        return pix
+
+    # =================================================
+    # RANGE RINGS (ONE PATH PER RADIUS SET)
+    # =================================================
+    def range_rings(self, radii):
+        """Concentric circles of radii (px) around the origin."""
+        key = tuple(radii)
+        path = self._rings.get(key)
+        if path is not None:
+            self._rings.move_to_end(key)
+            return path
+
+        path = QPainterPath()
+        for r in key:
+            path.addEllipse(QPointF(0, 0), r, r)
+
+        self._rings[key] = path
+        while len(self._rings) > self.RINGS_CACHE_MAX:
+            self._rings.popitem(last=False)
+        return path
+
+    # =================================================
+    # TEXT (METRICS + GLYPHS)
+    # =================================================
+    def text_size(self, text, font):
+        key = (text, font.key())
+        wh = self._text_size.get(key)
+        if wh is None:
+            from qgis.PyQt.QtGui import QFontMetrics
+            br = QFontMetrics(font).boundingRect(text)
+            wh = (br.width(), br.height())
+            self._text_size[key] = wh
+        return wh
+
+    def glyph(self, text, font, fill_col, outline_col, shadow_col,
+              outline_enabled, shadow_enabled, dpr):
+        """
+        Pre-rendered shadow + outline + fill text.
+        Returns (pixmap, baseline offset).
+        """
+        key = (
+            text, font.key(),
+            fill_col.rgba(), outline_col.rgba(), shadow_col.rgba(),
+            outline_enabled, shadow_enabled, dpr
+        )
+        hit = self._glyphs.get(key)
+        if hit is not None:
+            self._glyphs.move_to_end(key)
+            return hit
+
+        from qgis.PyQt.QtGui import QFontMetrics
+        fm = QFontMetrics(font)
+        pad = 3
+        w = fm.horizontalAdvance(text) + pad * 2
+        h = fm.ascent() + fm.descent() + pad * 2
+
+        pix = QPixmap(int(w * dpr), int(h * dpr))
+        pix.setDevicePixelRatio(dpr)
+        pix.fill(Qt.transparent)
+
+        p = QPainter(pix)
+        p.setRenderHint(QPainter.Antialiasing)
+        p.setRenderHint(QPainter.TextAntialiasing)
+        p.setFont(font)
+        base = QPointF(pad, pad + fm.ascent())
+
+        if shadow_enabled and shadow_col.alpha() > 0:
+            p.setPen(shadow_col)
+            p.drawText(base + QPointF(1.5, 1.5), text)
+
+        if outline_enabled and outline_col.alpha() > 0:
+            p.setPen(outline_col)
+            for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                p.drawText(base + QPointF(dx, dy), text)
+
+        if fill_col.alpha() > 0:
+            p.setPen(fill_col)
+            p.drawText(base, text)
+        p.end()
+
+        hit = (pix, base)
+        self._glyphs[key] = hit
+        while len(self._glyphs) > self.TEXT_CACHE_MAX:
+            self._glyphs.popitem(last=False)
+        return hit
+
+    # =================================================
+    # GEOMETRY
+    # =================================================
+    def padding(self):
+        if self._padding is None:
+            # - label text
+            # - shadow
+            # - tick
+            # - glow
+            self._padding = (
+                60  # label + shadow
+                + self.tool.ring_glow_alpha // 2
+                + 20
+            )
+        return self._padding
 
 
 class FloatingCompassOverlay(QgsMapCanvasItem):
 
-    def __init__(self, canvas, tool):
+    def __init__(self, canvas, tool, cache=None, view=None):
         super().__init__(canvas)
         self.tool = tool
+        self.cache = cache or FloatingCompassRenderCache(tool)
+        # view: rotation + center placement of the canvas drawn on;
+        # None = the tool's own (main) canvas
+        self.mirror = view is not None
+        self.view = view or tool.view
         self.setZValue(1000)
         self.setVisible(False)
+        self._sep_pens = {}     # separation state → QPen
 
     # =================================================
     def paint(self, painter, option, widget):
@@ -32,12 +307,38 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
             return
 
         painter.setRenderHint(QPainter.Antialiasing)
-        c = self.tool.center
+
+        active = self.tool.canvas.mapTool() == self.tool
+
+        # =====================
+        # STYLE SNAPSHOT (CACHED, SHARED BY ALL INSTANCES)
+        # =====================
+        st = self.cache.style(active)
+        dpr = self._device_pixel_ratio(painter)
+
+        # ghost rays below the compasses (main canvas only)
+        if not self.mirror:
+            self.paint_nearest(painter, st)
+            self.paint_aimed(painter, st)
+
+        # bottom → top (active instance is last)
+        for inst in self.tool.instances:
+            self.paint_instance(painter, inst, st, dpr)
+
+        # terrain profile chart on top
+        if not self.mirror:
+            self.paint_terrain(painter, st)
+
+    def paint_instance(self, painter, inst, st, dpr):
+        c = self.view.center(inst)
+        if c is None:
+            return
+        screen_angle = self.view.screen_angle
 
         # =====================
         # SAFE STATES
         # =====================
-        arms = getattr(self.tool, "arms", [])
+        arms = inst.arms or []
         arm_labels = getattr(self.tool, "arm_labels", ["A", "B", "C", "D", "E", "F"])
 
         show_arms = getattr(self.tool, "show_arms", True)
@@ -45,114 +346,117 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
         show_angle_text = getattr(self.tool, "show_angle_text", True)
         mode = getattr(self.tool, "mode", "NORMAL")
 
-        # interaction flag (robust)
-        is_interacting = bool(
-            getattr(self.tool, "_is_interacting", False)
-            or getattr(self.tool, "active_handle", self.tool.HANDLE_NONE)
-               != self.tool.HANDLE_NONE
+        active = st["active"]
+        hover_handle = (
+            self.tool.hover_handle
+            if getattr(self.tool, "hover_instance", None) is inst
+            else self.tool.HANDLE_NONE
         )
 
-        active = self.tool.canvas.mapTool() == self.tool
-        base_alpha = 220 if active else 120
+        base_alpha = st["base_alpha"]
+        ring_col = st["ring_col"]
+        text_col = st["text_col"]
+        outline_col = st["outline_col"]
+        shadow_col = st["shadow_col"]
+        label_font = st["label_font"]
+        angle_font = st["angle_font"]
 
-        # =====================
-        # COLORS
-        # =====================
-        ring_col = QColor(self.tool.color_ring)
-        ring_col.setAlpha(base_alpha)
-
-        text_col = QColor(self.tool.color_text)
-        text_col.setAlpha(255 if active else 160)
-
-        outline_col = QColor(self.tool.color_outline)
-        shadow_col = QColor(self.tool.color_shadow)
-        shadow_col.setAlpha(self.tool.text_shadow_alpha)
-
-        r = self.tool.ring_radius
-        ring_w = getattr(self.tool, "ring_line_width", 3)
-
-        # =====================
-        # FONTS (ADVANCE VISUAL FIX)
-        # =====================
-        label_font_size = getattr(self.tool, "label_font_size", 10)
-        angle_font_size = getattr(self.tool, "angle_font_size", 10)
-
-        label_font = QFont("Arial", label_font_size, QFont.Bold)
-        angle_font = QFont("Arial", angle_font_size, QFont.Bold)
+        r = inst.ring_radius
 
         # =====================
         # RING GLOW
         # =====================
-        glow = QColor(ring_col)
-        glow.setAlpha(self.tool.ring_glow_alpha)
-
         painter.setBrush(Qt.NoBrush)
-        glow_pen = QPen(glow, ring_w + 4)
-        glow_pen.setCapStyle(Qt.RoundCap)
-        glow_pen.setJoinStyle(Qt.RoundJoin)
-        painter.setPen(glow_pen)
+        painter.setPen(st["glow_pen"])
         painter.drawEllipse(c, r, r)
 
+        # =====================
+        # RANGE RINGS (CACHED PATH)
+        # =====================
+        range_rings = getattr(self.tool, "range_rings", None)
+        if range_rings is not None and range_rings.enabled:
+            self.paint_range_rings(painter, c, inst, range_rings, st)
+
         # =====================
         # ARMS
         # =====================
         if show_arms and arms:
+            endpoint_r = getattr(self.tool, "arm_endpoint_radius_px", 4)
+            arm_w = getattr(self.tool, "arm_line_width", 5)
+            gap = 8  # gap visual dari endpoint dot
+
+            # predicted levels (memoized per compass geometry)
+            pathloss = getattr(self.tool, "pathloss", None)
+            levels = (
+                pathloss.result(inst)
+                if pathloss is not None and pathloss.enabled else None
+            )
+
             for idx, arm in enumerate(arms):
                 if not arm.get("enabled"):
                     continue
 
-                ang = float(arm.get("angle_deg", 0.0))
+                # screen angle (arm angles are azimuths)
+                ang = screen_angle(float(arm.get("angle_deg", 0.0)))
                 radius = arm.get("radius_px") or r
 
                 col = arm.get("color") or ring_col
                 arm_col = QColor(col)
                 arm_col.setAlpha(base_alpha)
 
-                self.draw_arm(painter, ang, radius, arm_col)
-                
-                
+                if arm.get("pattern_file"):
+                    self.draw_pattern(painter, arm["pattern_file"], ang, radius, arm_col, c)
+
+                brush = None
+                level = levels.get(idx) if levels else None
+                if level is not None:
+                    brush, arm_col = self.level_brush(
+                        c, ang, radius, level[0], base_alpha
+                    )
+
+                self.draw_arm(painter, ang, radius, arm_col, c, hover_handle, brush)
+
+                if level is not None:
+                    ex, ey = cgeom.screen_endpoint(c.x(), c.y(), ang, radius)
+                    self.draw_shadow_text(
+                        painter,
+                        QPointF(ex + 10, ey + 16),
+                        f"{level[1]:.0f} dBm",
+                        label_font,
+                        text_col,
+                        outline_col,
+                        shadow_col
+                    )
+
+                # ground length (below the dBm readout)
+                if arm.get("length_m"):
+                    ex, ey = cgeom.screen_endpoint(c.x(), c.y(), ang, radius)
+                    self.draw_shadow_text(
+                        painter,
+                        QPointF(ex + 10, ey + 30),
+                        format_length(arm["length_m"], self.tool.ground.unit),
+                        label_font,
+                        text_col,
+                        outline_col,
+                        shadow_col
+                    )
+
                 # LABEL (RADIAL POSITION + DIRECTIONAL ANCHOR)
-                if (
-                    show_angle_text
-                    # allow label during interaction
-                    # and not is_interacting
-                    and idx < len(arm_labels)
-                ):
-                    label = arm_labels[idx]
+                if show_angle_text and idx < len(arm_labels):
+                    # a per-arm label (e.g. a swap check status) wins
+                    label = arm.get("label") or arm_labels[idx]
                     if label:
-                        rad = math.radians(ang)
-
-                        # =====================
-                        # RADIAL DIRECTION
-                        # =====================
-                        dx = math.sin(rad)
-                        dy = -math.cos(rad)
-
-                        # =====================
-                        # DISTANCE SETUP
-                        # =====================
-                        endpoint_r = getattr(self.tool, "arm_endpoint_radius_px", 4)
-                        arm_w = getattr(self.tool, "arm_line_width", 5)
-                        gap = 8  # gap visual dari endpoint dot
-
                         label_dist = radius + endpoint_r + arm_w + gap
 
                         # Base radial point
-                        lx = c.x() + label_dist * dx
-                        ly = c.y() + label_dist * dy
-
-                        # =====================
-                        # TEXT METRICS
-                        # =====================
-                        fm = painter.fontMetrics()
-                        br = fm.boundingRect(label)
-                        w = br.width()
-                        h = br.height()
-
-                        # =====================
+                        lx, ly = cgeom.screen_endpoint(
+                            c.x(), c.y(), ang, label_dist
+                        )
+
+                        # TEXT METRICS (CACHED)
+                        w, h = self.cache.text_size(label, label_font)
+
                         # DIRECTIONAL ANCHOR
-                        # =====================
-                        # Normalize angle to [0, 360)
                         a = ang % 360
 
                         # Default: center
@@ -170,13 +474,9 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
                         # Top / Bottom keep centered
                         # (315–360, 0–45, 135–225)
 
-                        # Apply anchor offset
-                        tx = lx - ox
-                        ty = ly - oy
-
                         self.draw_shadow_text(
                             painter,
-                            QPointF(tx, ty),
+                            QPointF(lx - ox, ly - oy),
                             label,
                             label_font,
                             text_col,
@@ -184,6 +484,12 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
                             shadow_col
                         )
 
+        # =====================
+        # SECTOR SEPARATION (ARCS OUTSIDE THE RING)
+        # =====================
+        separation = getattr(self.tool, "separation", None)
+        if show_arms and separation is not None and separation.enabled:
+            self.paint_separation(painter, c, inst, separation, st)
 
         # =====================
         # ARC (NORMAL ONLY)
@@ -196,8 +502,9 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
             and arms[0].get("enabled")
             and arms[1].get("enabled")
         ):
-            a_start = arms[0]["angle_deg"] % 360
-            span = (arms[1]["angle_deg"] - a_start) % 360
+            # span from the raw azimuths, only the start is rotated
+            span = cgeom.arc_span(arms[0]["angle_deg"], arms[1]["angle_deg"])
+            a_start = screen_angle(arms[0]["angle_deg"]) % 360
 
             if span > 0.5:
                 arc_radius = 20
@@ -208,18 +515,8 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
                     arc_radius * 2
                 )
 
-                arc_col = QColor(self.tool.color_arc)
-                arc_col.setAlpha(130 if active else 90)
-
                 painter.setBrush(Qt.NoBrush)
-                arc_w = getattr(self.tool, "arc_line_width", 0)
-                if arc_w <= 0:
-                    arc_w = max(2, ring_w - 1)
-
-                arc_pen = QPen(arc_col, arc_w)
-
-                arc_pen.setCapStyle(Qt.RoundCap)
-                painter.setPen(arc_pen)
+                painter.setPen(st["arc_pen"])
                 painter.drawArc(
                     arc_rect,
                     int((90 - a_start) * 16),
@@ -227,32 +524,23 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
                 )
 
         # =====================
-        # RING + TICKS
+        # RING + DIAL (CACHED)
         # =====================
-        rw = ring_w + 2 if self.tool.hover_handle == self.tool.HANDLE_ROTATE_BOTH else ring_w
-        ring_pen = QPen(ring_col, rw)
-        ring_pen.setCapStyle(Qt.RoundCap)
-        ring_pen.setJoinStyle(Qt.RoundJoin)
-
+        hover = hover_handle == self.tool.HANDLE_ROTATE_BOTH
         painter.setBrush(Qt.NoBrush)  # anti fill
-        painter.setPen(ring_pen)
+        painter.setPen(st["ring_pens"][hover])
         painter.drawEllipse(c, r, r)
 
-        self.draw_degree_ticks(painter, c, r, ring_col)
-        
-        # =====================
-        # CARDINAL DIRECTIONS
-        # =====================
-        self.draw_cardinal_directions(painter, c, r)
-   
+        dial = self.cache.dial(self, r, active, dpr, self.view.rotation)
+        half = dial.width() / dpr / 2
+        painter.drawPixmap(QPointF(c.x() - half, c.y() - half), dial)
+
         # =====================
         # ANGLE TEXT (NORMAL ONLY)
         # =====================
         if (
             show_arms
             and show_angle_text
-            # allow angle text during interaction
-            # and not is_interacting
             and mode == "NORMAL"
             and len(arms) >= 2
             and arms[0].get("enabled")
@@ -262,8 +550,8 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
 
             text_pos = self.compute_angle_text_pos(
                 c,
-                arms[0]["angle_deg"],
-                arms[1]["angle_deg"]
+                screen_angle(arms[0]["angle_deg"]),
+                screen_angle(arms[1]["angle_deg"])
             )
 
             self.draw_shadow_text(
@@ -290,25 +578,18 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
         show_crosshair = getattr(self.tool, "show_crosshair", True)
         style = getattr(self.tool, "crosshair_style", "plus")
         size = getattr(self.tool, "crosshair_size_px", 20)
-        thickness = getattr(self.tool, "crosshair_thickness", 1)
-        col = getattr(self.tool, "crosshair_color", ring_col)
 
         if show_crosshair and style != "none":
-            cross_col = QColor(col)
-            cross_col.setAlpha(ring_col.alpha())
-
             if style == "dot":
                 # small dot only (independent from center dot)
                 r = max(2, int(size / 4))
                 painter.setPen(Qt.NoPen)
-                painter.setBrush(QBrush(cross_col))
+                painter.setBrush(QBrush(st["cross_col"]))
                 painter.drawEllipse(c, r, r)
 
             elif style == "plus":
                 half = int(size)
-                pen = QPen(cross_col, max(1, thickness))
-                pen.setCapStyle(Qt.RoundCap)
-                painter.setPen(pen)
+                painter.setPen(st["cross_pen"])
 
                 painter.drawLine(
                     c + QPointF(-half, 0),
@@ -319,7 +600,203 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
                     c + QPointF(0, half)
                 )
 
+    def paint_range_rings(self, painter, c, inst, range_rings, st):
+        rings = range_rings.radii(inst)
+        if not rings:
+            return
+
+        path = self.cache.range_rings(px for px, _ in rings)
+        painter.save()
+        painter.translate(c)
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(st["range_pen"])
+        painter.drawPath(path)
+        painter.restore()
+
+        for px, label in rings:
+            x, y = cgeom.screen_endpoint(c.x(), c.y(), range_rings.LABEL_DEG, px)
+            self.draw_shadow_text(
+                painter,
+                QPointF(x + 3, y - 3),
+                label,
+                st["range_font"],
+                st["text_col"],
+                st["outline_col"],
+                st["shadow_col"]
+            )
+
+    def paint_separation(self, painter, c, inst, separation, st):
+        gaps = separation.result(inst)
+        if not gaps:
+            return
+
+        rot = self.view.rotation
+        rr = inst.ring_radius + 7
+        rect = QRectF(c.x() - rr, c.y() - rr, rr * 2, rr * 2)
+        painter.setBrush(Qt.NoBrush)
+
+        for gap in gaps:
+            pen = self._separation_pen(gap["state"], separation)
+            painter.setPen(pen)
+            # 1° inset at both ends keeps neighbouring arcs apart
+            span = max(0.0, gap["separation"] - 2.0)
+            painter.drawArc(
+                rect,
+                int((90 - gap["start"] - rot - 1.0) * 16),
+                int(-span * 16),
+            )
+
+            if gap["state"] != separation.OK:
+                mid = gap["start"] + rot + gap["separation"] / 2.0
+                tx, ty = cgeom.screen_endpoint(c.x(), c.y(), mid, rr + 14)
+                text = f"{gap['separation']:.0f}°"
+                w, h = self.cache.text_size(text, st["angle_font"])
+                self.draw_shadow_text(
+                    painter,
+                    QPointF(tx - w / 2, ty + h / 3),
+                    text,
+                    st["angle_font"],
+                    pen.color(),
+                    st["outline_col"],
+                    st["shadow_col"],
+                )
+
+    def _separation_pen(self, state, separation):
+        pen = self._sep_pens.get(state)
+        if pen is None:
+            pen = QPen(QColor(*separation.COLORS[state], 220), 4)
+            pen.setCapStyle(Qt.FlatCap)
+            self._sep_pens[state] = pen
+        return pen
+
+    # =================================================
+    # SECTORS AIMED AT THE CENTER (RAYS INTO THE CENTER)
+    # =================================================
+    def paint_aimed(self, painter, st):
+        aimed = getattr(self.tool, "aimed", None)
+        c = self.tool.center
+        if aimed is None or not aimed.results or c is None:
+            return
+
+        painter.save()
+        painter.setBrush(Qt.NoBrush)
+        for res, p in aimed.points_px():
+            # closer to boresight → more opaque
+            half = max(1.0, res["beamwidth"] / 2.0)
+            col = QColor(st["ring_col"])
+            col.setAlpha(int(90 + 140 * max(0.0, 1.0 - abs(res["error"]) / half)))
+            pen = QPen(col, 2.0)
+            pen.setCapStyle(Qt.RoundCap)
+            painter.setPen(pen)
+            painter.drawLine(p, c)
+            painter.drawEllipse(p, 3, 3)
 
+            self.draw_shadow_text(
+                painter,
+                QPointF(p.x() + 6, p.y() - 6),
+                aimed.ray_text(res),
+                st["label_font"],
+                st["text_col"],
+                st["outline_col"],
+                st["shadow_col"],
+            )
+        painter.restore()
+
+    # =================================================
+    # NEAREST SITES (GHOST RAYS)
+    # =================================================
+    def paint_nearest(self, painter, st):
+        nearest = getattr(self.tool, "nearest", None)
+        c = self.tool.center
+        if nearest is None or not nearest.results or c is None:
+            return
+
+        rays = nearest.points_px()
+
+        col = QColor(st["ring_col"])
+        col.setAlpha(110)
+        pen = QPen(col, 1.5, Qt.DashLine)
+        pen.setCapStyle(Qt.RoundCap)
+
+        painter.save()
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        for _, p in rays:
+            painter.drawLine(c, p)
+            painter.drawEllipse(p, 4, 4)
+        painter.restore()
+
+        for res, p in rays:
+            self.draw_shadow_text(
+                painter,
+                p + QPointF(7, -7),
+                nearest.ray_text(res),
+                st["label_font"],
+                st["text_col"],
+                st["outline_col"],
+                st["shadow_col"]
+            )
+
+    # =================================================
+    # TERRAIN PROFILE (MINI CHART BESIDE THE ARM LABEL)
+    # =================================================
+    def paint_terrain(self, painter, st):
+        terrain = getattr(self.tool, "terrain", None)
+        target = terrain.chart_target() if terrain is not None else None
+        if target is None:
+            return
+
+        inst, arm, profile = target
+        polys = terrain.chart_polygons()
+        x, y = terrain.chart_origin(inst, arm)
+        w, h = terrain.CHART_W, terrain.CHART_H
+
+        painter.save()
+        painter.translate(x, y)
+
+        bg = QColor(st["shadow_col"])
+        bg.setAlpha(150)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QBrush(bg))
+        painter.drawRoundedRect(QRectF(-4, -4, w + 8, h + 22), 4, 4)
+
+        painter.setPen(QPen(QColor(150, 120, 80), 1))
+        painter.setBrush(QBrush(QColor(150, 120, 80, 150)))
+        painter.drawPolygon(polys["terrain"])
+
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(QPen(QColor(120, 200, 255, 200), 1, Qt.DashLine))
+        painter.drawPolyline(polys["fresnel"])
+
+        los_col = QColor(220, 40, 40) if not profile["clear"] else QColor(60, 200, 90)
+        painter.setPen(QPen(los_col, 1.5))
+        painter.drawPolyline(polys["los"])
+
+        if polys["flagged"]:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QBrush(QColor(220, 40, 40)))
+            for p in polys["flagged"]:
+                painter.drawEllipse(p, 1.5, 1.5)
+
+        painter.restore()
+
+        status = "LOS clear" if profile["clear"] else "Fresnel obstructed"
+        self.draw_shadow_text(
+            painter,
+            QPointF(x, y + h + 14),
+            f"{status}  {profile['length_m'] / 1000.0:.2f} km",
+            st["label_font"],
+            st["text_col"],
+            st["outline_col"],
+            st["shadow_col"]
+        )
+
+    @staticmethod
+    def _device_pixel_ratio(painter):
+        try:
+            return float(painter.device().devicePixelRatioF())
+        except Exception:
+            return 1.0
 
     # =================================================
     def draw_shadow_text(
@@ -335,7 +812,7 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
         """
         Optimized shadow + outline text renderer.
         - No feature removed
-        - Performance-safe
+        - Performance-safe (glyphs cached in render cache)
         - Advance Visual friendly
         """
 
@@ -353,46 +830,26 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
         ):
             return
 
-        painter.save()
-        painter.setFont(font)
-
-        # =====================
-        # SHADOW (WITH SETTINGS)
-        # =====================
         shadow_enabled = getattr(self.tool, "shadow_enabled", True)
-        if shadow_enabled and shadow_col.alpha() > 0:
-            painter.setPen(shadow_col)
-            painter.setBrush(Qt.NoBrush)
-            painter.drawText(pos + QPointF(1.5, 1.5), text)  # Keep fixed offset
-
-        # =====================
-        # OUTLINE (WITH SETTINGS)
-        # =====================
         outline_enabled = getattr(self.tool, "outline_enabled", True)
-        if outline_enabled and outline_col.alpha() > 0:
-            painter.setPen(outline_col)
-            painter.setBrush(Qt.NoBrush)
-            
-            # tetap pakai 4 arah (fitur lama TIDAK dihapus)
-            for dx, dy in (
-                (-1, 0),
-                (1, 0),
-                (0, -1),
-                (0, 1),
-            ):
-                painter.drawText(pos + QPointF(dx, dy), text)
 
         # =====================
-        # MAIN TEXT (ALWAYS DRAW IF FILL COLOR HAS ALPHA)
+        # GLYPH CACHE
         # =====================
-        if fill_col.alpha() > 0:
-            painter.setPen(fill_col)
-            painter.setBrush(Qt.NoBrush)
-            painter.drawText(pos, text)
-        
-        painter.restore()
-    
-       
+        # shadow + outline + fill are rendered once per
+        # (text, font, colors) and blitted afterwards
+        pix, base = self.cache.glyph(
+            text,
+            font,
+            fill_col,
+            outline_col,
+            shadow_col,
+            outline_enabled,
+            shadow_enabled,
+            self._device_pixel_ratio(painter)
+        )
+        painter.drawPixmap(pos - base, pix)
+
     # =================================================
     # CARDINAL DIRECTIONS (STEP 3)
     # =================================================
@@ -404,7 +861,6 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
 
         from qgis.PyQt.QtGui import QFont, QColor, QPolygonF
         from qgis.PyQt.QtCore import QPointF
-        import math
 
         col = QColor(t.color_ring)
         col.setAlpha(225)
@@ -424,9 +880,7 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
         r = radius - t.cardinal_offset_px
 
         for text, deg in items:
-            rad = math.radians(deg)
-            x = center.x() + r * math.sin(rad)
-            y = center.y() - r * math.cos(rad)
+            x, y = cgeom.screen_endpoint(center.x(), center.y(), deg, r)
 
             painter.setFont(font)
             w = painter.fontMetrics().boundingRect(text).width()
@@ -482,38 +936,39 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
 
 
     def compute_angle_text_pos(self, center, arm_a_angle, arm_b_angle):
-        span = (arm_b_angle - arm_a_angle) % 360
-        if span < 1:
-            span = 1
-
-        mid_angle = (arm_a_angle + span / 2) % 360
-        rad = math.radians(mid_angle)
-
+        mid = cgeom.mid_angle(arm_a_angle, arm_b_angle, min_span=1)
         dist = getattr(self.tool, "angle_text_distance_px", 20)
 
-        x = center.x() + dist * math.sin(rad)
-        y = center.y() - dist * math.cos(rad)
-        return QPointF(x, y)
+        return QPointF(*cgeom.screen_endpoint(center.x(), center.y(), mid, dist))
 
 
-    def draw_arm(self, painter, angle, radius, color):
-        rad = math.radians(angle)
-        c = self.tool.center
-        end = QPointF(
-            c.x() + radius * math.sin(rad),
-            c.y() - radius * math.cos(rad)
-        )
-        
+    def level_brush(self, center, angle, radius, stops, alpha):
+        """Gradient brush center → arm end from level stops, end color."""
+        ex, ey = cgeom.screen_endpoint(center.x(), center.y(), angle, radius)
+        grad = QLinearGradient(center, QPointF(ex, ey))
+        col = None
+        for t, stop_col in stops:
+            col = QColor(stop_col)
+            col.setAlpha(alpha)
+            grad.setColorAt(t, col)
+        return QBrush(grad), col
+
+    def draw_arm(self, painter, angle, radius, color, center=None,
+                 hover_handle=None, brush=None):
+        c = self.tool.center if center is None else center
+        if hover_handle is None:
+            hover_handle = self.tool.hover_handle
+        end = QPointF(*cgeom.screen_endpoint(c.x(), c.y(), angle, radius))
 
         arm_w = getattr(self.tool, "arm_line_width", 5)
-        w = arm_w + 2 if self.tool.hover_handle in (
+        w = arm_w + 2 if hover_handle in (
             self.tool.HANDLE_ARM_A_ROTATE,
             self.tool.HANDLE_ARM_B_ROTATE,
             self.tool.HANDLE_ARM_A_RESIZE,
             self.tool.HANDLE_ARM_B_RESIZE
         ) else arm_w
 
-        pen = QPen(color, w)
+        pen = QPen(brush if brush is not None else QBrush(color), w)
         pen.setCapStyle(Qt.RoundCap)
         pen.setJoinStyle(Qt.RoundJoin)
         painter.setPen(pen)
@@ -527,6 +982,26 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
         painter.setBrush(QBrush(color))
         painter.drawEllipse(end, ep, ep)
 
+    def draw_pattern(self, painter, pattern_file, angle, radius, color, center):
+        """Antenna pattern of arm: cached unit path, transformed only."""
+        path = antenna.unit_path(pattern_file)
+        if path is None:
+            return
+
+        pen = QPen(color, 1.5)
+        pen.setCosmetic(True)   # width not scaled with the path
+        fill = QColor(color)
+        fill.setAlpha(min(60, color.alpha()))
+
+        painter.save()
+        painter.translate(center)
+        painter.rotate(angle)   # clockwise on screen = azimuth
+        painter.scale(radius, radius)
+        painter.setPen(pen)
+        painter.setBrush(QBrush(fill))
+        painter.drawPath(path)
+        painter.restore()
+
     def draw_degree_ticks(self, painter, center, radius, ring_col):
         step = getattr(self.tool, "ring_tick_step_deg", 5)
         major = getattr(self.tool, "ring_major_tick_deg", 10)
@@ -534,13 +1009,12 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
         ring_w = getattr(self.tool, "ring_line_width", 3)
 
         for deg in range(0, 360, step):
-            rad = math.radians(deg)
             tick_len = 14 if deg % major == 0 else 8
 
-            x1 = center.x() + (radius - tick_len) * math.sin(rad)
-            y1 = center.y() - (radius - tick_len) * math.cos(rad)
-            x2 = center.x() + radius * math.sin(rad)
-            y2 = center.y() - radius * math.cos(rad)
+            x1, y1 = cgeom.screen_endpoint(
+                center.x(), center.y(), deg, radius - tick_len
+            )
+            x2, y2 = cgeom.screen_endpoint(center.x(), center.y(), deg, radius)
 
             pen = QPen(ring_col, ring_w if deg % major == 0 else 1)
             pen.setCapStyle(Qt.RoundCap)
@@ -551,11 +1025,7 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
                 self.draw_label(painter, center, radius, deg, ring_col)
 
     def draw_label(self, painter, center, radius, deg, ring_col):
-        rad = math.radians(deg)
-        rr = radius - 26
-
-        x = center.x() + rr * math.sin(rad)
-        y = center.y() - rr * math.cos(rad)
+        x, y = cgeom.screen_endpoint(center.x(), center.y(), deg, radius - 26)
 
         font_sz = getattr(self.tool, "label_font_size", 9)
         self.draw_shadow_text(
@@ -572,39 +1042,70 @@ class FloatingCompassOverlay(QgsMapCanvasItem):
         if self.tool.center is None:
             return QRectF()
 
-        c = self.tool.center
+        # =====================
+        # PADDING AMAN (CACHED)
+        # =====================
+        padding = self.cache.padding()
+
+        rect = QRectF()
+        for inst in self.tool.instances:
+            rect = rect.united(self.instance_rect(inst, padding))
+        if self.mirror:
+            return rect
+
+        # ghost rays + their labels
+        nearest = getattr(self.tool, "nearest", None)
+        if nearest is not None and nearest.results:
+            for _, p in nearest.points_px():
+                rect = rect.united(QRectF(p.x() - 10, p.y() - 40, 260, 50))
+
+        # aimed-sector rays + their labels
+        aimed = getattr(self.tool, "aimed", None)
+        if aimed is not None and aimed.results:
+            for _, p in aimed.points_px():
+                rect = rect.united(QRectF(p.x() - 10, p.y() - 40, 300, 50))
+
+        # terrain chart + status line
+        terrain = getattr(self.tool, "terrain", None)
+        target = terrain.chart_target() if terrain is not None else None
+        if target is not None:
+            x, y = terrain.chart_origin(target[0], target[1])
+            rect = rect.united(QRectF(
+                x - 8, y - 8, terrain.CHART_W + 100, terrain.CHART_H + 40
+            ))
+        return rect
+
+    def instance_rect(self, inst, padding):
+        c = self.view.center(inst)
+        if c is None:
+            return QRectF()
 
         # =====================
         # HITUNG RADIUS TERJAUH
         # =====================
-        max_radius = self.tool.ring_radius
+        max_radius = inst.ring_radius
 
-        for arm in getattr(self.tool, "arms", []):
+        for arm in inst.arms or []:
             if not arm.get("enabled"):
                 continue
             r = arm.get("radius_px", 0)
             if r and r > max_radius:
                 max_radius = r
 
-        # =====================
-        # PADDING AMAN
-        # =====================
-        # - label text
-        # - shadow
-        # - tick
-        # - glow
-        padding = (
-            60  # label + shadow
-            + self.tool.ring_glow_alpha // 2
-            + 20
-        )
+        range_rings = getattr(self.tool, "range_rings", None)
+        if range_rings is not None:
+            max_radius = max(max_radius, range_rings.max_radius(inst))
 
         R = max_radius + padding
 
+        # level readouts beside the arm ends
+        pathloss = getattr(self.tool, "pathloss", None)
+        if pathloss is not None and pathloss.enabled:
+            R += 40
+
         return QRectF(
             c.x() - R,
             c.y() - R,
             R * 2,
             R * 2
         )
-
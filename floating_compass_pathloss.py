@@ -0,0 +1,294 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_pathloss.py
+import numpy as np
+
+from qgis.PyQt.QtCore import QSettings
+from . import floating_compass_geometry as cgeom
+from . import floating_compass_antenna as antenna
+from .floating_compass_layer_index import canvas_distance_area
+
+
+# received level (dBm) → color ramp used for the graded arms
+LEVEL_RAMP = (
+    (-115.0, (200, 30, 30)),
+    (-105.0, (240, 130, 30)),
+    (-95.0, (240, 220, 40)),
+    (-80.0, (120, 210, 60)),
+    (-65.0, (30, 170, 80)),
+)
+
+
+def level_colors(levels):
+    """(n, 3) uint8 RGB for received levels (dBm) along LEVEL_RAMP."""
+    stops = np.array([s[0] for s in LEVEL_RAMP])
+    rgb = np.array([s[1] for s in LEVEL_RAMP], dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    return np.stack(
+        [np.interp(levels, stops, rgb[:, i]) for i in range(3)], axis=-1
+    ).astype(np.uint8)
+
+
+class FloatingCompassPathLoss:
+    """
+    Predicted received level along every enabled arm of a compass:
+    free space or Okumura-Hata, plus best-server antenna gain (each
+    arm's pattern evaluated at every arm azimuth; MSI pattern when
+    the arm has one, parabolic sector otherwise) and, when a DEM is
+    set for the terrain profile, knife-edge diffraction from the
+    tile-cached elevations.
+
+    One NumPy evaluation covers all arms × samples; results are
+    memoized on the compass geometry, so repaints without movement
+    cost nothing.
+    """
+
+    SETTINGS_GROUP = "FloatingCompass"
+    MODELS = ("off", "fspl", "hata")
+    ENVIRONMENTS = ("urban", "suburban", "open")
+
+    DRAW_SAMPLES = 128
+    GRADIENT_STOPS = 16
+
+    DEFAULTS = {
+        "model": "off",
+        "environment": "urban",
+        "freq_mhz": 1800.0,
+        "tx_power_dbm": 46.0,
+        "tx_height_m": 30.0,
+        "rx_height_m": 1.5,
+        "sector_gain_dbi": 17.0,
+        "sector_beamwidth": 65.0,
+    }
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.params = dict(self.DEFAULTS)
+        self._memo = {}
+        self._load()
+
+        tool.canvas.destinationCrsChanged.connect(self._on_crs_changed)
+
+    # =====================
+    # PARAMETERS
+    # =====================
+    def _load(self):
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        for key, default in self.DEFAULTS.items():
+            value = s.value(f"pathloss_{key}", default)
+            self.params[key] = (
+                str(value) if isinstance(default, str) else float(value)
+            )
+        s.endGroup()
+
+        if self.params["model"] not in self.MODELS:
+            self.params["model"] = "off"
+
+    def configure(self, **params):
+        """Update model parameters (keys of DEFAULTS); saved in QSettings."""
+        unknown = set(params) - set(self.DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown path loss parameters: {sorted(unknown)}")
+        if params.get("model", "off") not in self.MODELS:
+            raise ValueError(f"model must be one of {self.MODELS}")
+        if params.get("environment", "urban") not in self.ENVIRONMENTS:
+            raise ValueError(f"environment must be one of {self.ENVIRONMENTS}")
+
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        for key, value in params.items():
+            if value is None:
+                continue
+            default = self.DEFAULTS[key]
+            self.params[key] = str(value) if isinstance(default, str) else float(value)
+            s.setValue(f"pathloss_{key}", self.params[key])
+        s.endGroup()
+
+        self._memo = {}
+        self.tool._request_update(geometry=True)
+
+    @property
+    def enabled(self):
+        return self.params["model"] != "off"
+
+    def _on_crs_changed(self):
+        self._memo = {}
+
+    # =====================
+    # GAINS
+    # =====================
+    def arm_gains(self, angles, pattern_files):
+        """
+        Best-server gain (dBi) along each arm: max over all arms'
+        antennas of their gain at that arm's azimuth.
+        """
+        p = self.params
+        angles = np.asarray(angles, dtype=float)
+        off = angles[:, None] - angles[None, :]       # [at arm i, antenna j]
+
+        gains = cgeom.sector_gains(
+            off, p["sector_gain_dbi"], p["sector_beamwidth"]
+        )
+        for j, path in enumerate(pattern_files):
+            pattern = antenna.load_pattern(path) if path else None
+            if pattern is not None:
+                if pattern["gain_dbi"] is None:
+                    pattern = dict(pattern, gain_dbi=p["sector_gain_dbi"])
+                gains[:, j] = antenna.pattern_gain(pattern, off[:, j])
+        return gains.max(axis=1)
+
+    # =====================
+    # EVALUATION
+    # =====================
+    def evaluate(self, center_map, end_maps, angles, pattern_files,
+                 samples=None):
+        """
+        Received levels (arms, samples) in dBm and the sample
+        distances (arms, samples) in metres, for arms from center_map
+        to end_maps (QgsPointXY, canvas CRS).
+        """
+        p = self.params
+        n = samples or self.DRAW_SAMPLES
+        da = canvas_distance_area(self.tool.canvas)
+
+        lengths = np.array([da.measureLine(center_map, e) for e in end_maps])
+        t = np.linspace(0.0, 1.0, n)
+        d = lengths[:, None] * t[None, :]
+
+        extra = self._diffraction(center_map, end_maps, d, t)
+        gains = self.arm_gains(angles, pattern_files)
+
+        levels = cgeom.signal_levels(
+            p["tx_power_dbm"], gains, d, p["freq_mhz"], p["model"],
+            p["tx_height_m"], p["rx_height_m"], p["environment"], extra,
+        )
+        return levels, d
+
+    def _diffraction(self, center_map, end_maps, d, t):
+        """Knife-edge loss from the terrain tile cache, or None."""
+        terrain = getattr(self.tool, "terrain", None)
+        if terrain is None or not terrain.enabled or terrain.cache is None:
+            return None
+
+        try:
+            xform = terrain._transform()
+            c = xform.transform(center_map)
+            ends = [xform.transform(e) for e in end_maps]
+        except Exception:
+            return None
+
+        ex = np.array([e.x() for e in ends])[:, None]
+        ey = np.array([e.y() for e in ends])[:, None]
+        xs = c.x() + (ex - c.x()) * t[None, :]
+        ys = c.y() + (ey - c.y()) * t[None, :]
+
+        z = terrain.cache.sample(xs, ys)
+        valid = ~np.isnan(z)
+        if not valid.any():
+            return None
+
+        # gaps: nearest valid sample along the same arm
+        for i in np.nonzero(~valid.all(axis=1))[0]:
+            if valid[i].any():
+                z[i] = np.interp(d[i], d[i][valid[i]], z[i][valid[i]])
+            else:
+                z[i] = 0.0
+
+        p = self.params
+        return cgeom.terrain_diffraction_db(
+            d, z, p["tx_height_m"], p["rx_height_m"], p["freq_mhz"]
+        )
+
+    def result(self, inst):
+        """
+        Memoized levels of inst for drawing: dict arm index →
+        (gradient stops [(t, QColor)], endpoint level dBm).
+        """
+        if not self.enabled or inst.center is None:
+            return None
+
+        c = inst.center
+        active = [
+            (i, arm) for i, arm in enumerate(inst.arms or [])
+            if arm.get("enabled")
+        ]
+        if not active:
+            return None
+
+        canvas = self.tool.canvas
+        key = (
+            round(c.x(), 1), round(c.y(), 1),
+            tuple(
+                (i, round(float(a.get("angle_deg", 0.0)), 2),
+                 a.get("radius_px") or inst.ring_radius, a.get("pattern_file"))
+                for i, a in active
+            ),
+            canvas.mapUnitsPerPixel(), canvas.center().x(), canvas.center().y(),
+            canvas.rotation(),
+            self._terrain_key(),
+        )
+        memo = self._memo.get(inst.uid)
+        if memo is not None and memo[0] == key:
+            return memo[1]
+
+        to_map = canvas.getCoordinateTransform()
+        center_map = to_map.toMapCoordinates(int(round(c.x())), int(round(c.y())))
+        angles, ends, files = [], [], []
+        for _, arm in active:
+            ang = float(arm.get("angle_deg", 0.0))
+            end = self.tool._endpoint_at(
+                c, ang, arm.get("radius_px") or inst.ring_radius
+            )
+            angles.append(ang)
+            ends.append(
+                to_map.toMapCoordinates(int(round(end.x())), int(round(end.y())))
+            )
+            files.append(arm.get("pattern_file"))
+
+        levels, _ = self.evaluate(center_map, ends, angles, files)
+        out = self._stops(active, levels)
+
+        self._memo[inst.uid] = (key, out)
+        return out
+
+    def _stops(self, active, levels):
+        from qgis.PyQt.QtGui import QColor
+
+        n = levels.shape[1]
+        pick = np.linspace(0, n - 1, self.GRADIENT_STOPS).round().astype(int)
+        t = pick / float(n - 1)
+        rgb = level_colors(levels[:, pick])
+
+        out = {}
+        for row, (i, _) in enumerate(active):
+            stops = [
+                (float(t[k]), QColor(*map(int, rgb[row, k])))
+                for k in range(len(pick))
+            ]
+            out[i] = (stops, float(levels[row, -1]))
+        return out
+
+    def _terrain_key(self):
+        terrain = getattr(self.tool, "terrain", None)
+        if terrain is None or not terrain.enabled:
+            return None
+        return terrain.dem.id(), terrain.band
+
+    def forget(self, inst_uid=None):
+        if inst_uid is None:
+            self._memo = {}
+        else:
+            self._memo.pop(inst_uid, None)
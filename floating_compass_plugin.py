@@ -17,19 +17,31 @@ import os
 from qgis.PyQt.QtWidgets import QAction
 from qgis.PyQt.QtGui import QIcon
 
-from .floating_compass_tool import FloatingCompassMapTool
-from .floating_compass_about_dialog import FloatingCompassAboutDialog
+from qgis.core import QgsApplication
+
+from .floating_compass_processing import FloatingCompassProvider
 
 
 class FloatingCompassPlugin:
 
     def __init__(self, iface):
+        # iface is None under qgis_process (processing only)
         self.iface = iface
-        self.canvas = iface.mapCanvas()
+        self.canvas = iface.mapCanvas() if iface is not None else None
         self.action = None
         self.tool = None
+        self.provider = None
+
+    def initProcessing(self):
+        self.provider = FloatingCompassProvider()
+        QgsApplication.processingRegistry().addProvider(self.provider)
 
     def initGui(self):
+        from .floating_compass_tool import FloatingCompassMapTool
+        from .floating_compass_layout import register as register_layout_item
+
+        self.initProcessing()
+
         # ---- ICON PATH ----
         plugin_dir = os.path.dirname(__file__)
         icon_path = os.path.join(plugin_dir, "icon", "compass.svg")
@@ -73,6 +85,9 @@ class FloatingCompassPlugin:
         # =========================
         self.tool = FloatingCompassMapTool(self.iface)
 
+        # print layout item type (saved layouts recreate it)
+        register_layout_item(self.tool)
+
         # =========================
         # PASS ACTION REFERENCE TO TOOL
         # =========================
@@ -80,11 +95,20 @@ class FloatingCompassPlugin:
 
     
     def show_about_dialog(self):
+        from .floating_compass_about_dialog import FloatingCompassAboutDialog
+
         dlg = FloatingCompassAboutDialog(self.iface.mainWindow())
         dlg.exec_()
 
 
     def unload(self):
+        # =========================
+        # REMOVE PROCESSING PROVIDER
+        # =========================
+        if self.provider:
+            QgsApplication.processingRegistry().removeProvider(self.provider)
+            self.provider = None
+
         # =========================
         # REMOVE MAIN TOOL ACTION
         # =========================
@@ -110,20 +134,55 @@ class FloatingCompassPlugin:
         # CLEAN MAP TOOL & OVERLAY
         # =========================
         if self.tool:
-            try:
-                if self.canvas.mapTool() == self.tool:
-                    self.canvas.unsetMapTool(self.tool)
+            tool = self.tool
+            canvas = tool.canvas
+
+            # map tool and overlay first, each teardown step guarded
+            # on its own so one failure does not skip the rest
+            from .floating_compass_layout import unregister as unregister_layout_item
+
+            steps = [
+                self._unset_map_tool,
+                self._remove_overlay,
+                unregister_layout_item,
+                tool.gnss.stop,
+                tool.project_state.unload,
+                tool.measurements.close,
+                tool.sweep.unload,
+                tool.drivetest.unload,
+                tool.views.unload,
+                tool.view.disconnect,
+                tool.swaps.cancel,
+                tool.ground.unload,
+                lambda: canvas.extentsChanged.disconnect(tool.nearest.refresh),
+                lambda: canvas.extentsChanged.disconnect(tool.aimed.refresh),
+                lambda: canvas.extentsChanged.disconnect(tool.terrain.schedule),
+                lambda: canvas.scaleChanged.disconnect(
+                    tool.range_rings.on_scale_changed
+                ),
+            ]
+            for step in steps:
+                try:
+                    step()
+                except Exception:
+                    pass
 
-                if hasattr(self.tool, "overlay") and self.tool.overlay:
-                    self.tool.overlay.setVisible(False)
-                    self.tool.overlay.scene().removeItem(self.tool.overlay)
-                    self.tool.overlay = None
+            self.tool = None
 
-            except Exception:
-                pass
+        from .floating_compass_layer_index import release_all
+        release_all()
 
-            self.tool = None
 
+    def _unset_map_tool(self):
+        if self.canvas.mapTool() == self.tool:
+            self.canvas.unsetMapTool(self.tool)
+
+    def _remove_overlay(self):
+        overlay = getattr(self.tool, "overlay", None)
+        if overlay:
+            self.tool.overlay = None
+            overlay.setVisible(False)
+            overlay.scene().removeItem(overlay)
 
     def toggle_tool(self, checked):
         if checked:
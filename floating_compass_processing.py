@@ -0,0 +1,1084 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_processing.py
+#
+# Processing provider (GUI-free, also runs under qgis_process):
+#
+#   qgis_process run floatingcompass:sectorwedges \
+#       --INPUT=sectors.csv --X_FIELD=lon --Y_FIELD=lat \
+#       --AZIMUTH_FIELD=azimuth --OUTPUT=wedges.gpkg
+#
+import os
+
+from qgis.PyQt.QtCore import QCoreApplication, QVariant
+from qgis.PyQt.QtGui import QIcon
+from qgis.core import (
+    NULL,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsFeature,
+    QgsFeatureRequest,
+    QgsFeatureSink,
+    QgsField,
+    QgsFields,
+    QgsGeometry,
+    QgsProcessing,
+    QgsProcessingAlgorithm,
+    QgsProcessingException,
+    QgsProcessingParameterCrs,
+    QgsProcessingParameterDefinition,
+    QgsProcessingParameterEnum,
+    QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterField,
+    QgsProcessingParameterNumber,
+    QgsProcessingProvider,
+    QgsWkbTypes,
+)
+
+
+def _tr(text):
+    return QCoreApplication.translate("FloatingCompass", text)
+
+
+def _float(v, default):
+    try:
+        if v is None or v == "":
+            return default
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+
+# =====================
+# PROVIDER
+# =====================
+class FloatingCompassProvider(QgsProcessingProvider):
+
+    def id(self):
+        return "floatingcompass"
+
+    def name(self):
+        return "Floating Compass"
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), "compass.svg"))
+
+    def loadAlgorithms(self):
+        self.addAlgorithm(SectorWedgesAlgorithm())
+        self.addAlgorithm(SiteTargetBearingAlgorithm())
+        self.addAlgorithm(SectorMembershipAlgorithm())
+        self.addAlgorithm(AzimuthDeviationAlgorithm())
+        self.addAlgorithm(SectorSeparationAlgorithm())
+
+
+# =====================
+# SECTOR WEDGES
+# =====================
+class SectorWedgesAlgorithm(QgsProcessingAlgorithm):
+    """
+    Sector wedge polygons from an azimuth table.
+
+    Rows are read in chunks; each chunk's wedges are built with
+    NumPy (arc templates per beamwidth, rotated / translated in one
+    pass), encoded to WKB in bulk and written with addFeatures().
+    """
+
+    INPUT = "INPUT"
+    X_FIELD = "X_FIELD"
+    Y_FIELD = "Y_FIELD"
+    SOURCE_CRS = "SOURCE_CRS"
+    AZIMUTH_FIELD = "AZIMUTH_FIELD"
+    BEAMWIDTH_FIELD = "BEAMWIDTH_FIELD"
+    BEAMWIDTH = "BEAMWIDTH"
+    RADIUS_FIELD = "RADIUS_FIELD"
+    RADIUS = "RADIUS"
+    SEGMENTS = "SEGMENTS"
+    OUTPUT = "OUTPUT"
+
+    CHUNK = 20000
+
+    def createInstance(self):
+        return SectorWedgesAlgorithm()
+
+    def name(self):
+        return "sectorwedges"
+
+    def displayName(self):
+        return _tr("Sector wedges from azimuth table")
+
+    def group(self):
+        return _tr("Sectors")
+
+    def groupId(self):
+        return "sectors"
+
+    def shortHelpString(self):
+        return _tr(
+            "Builds one wedge polygon per row of a sector layer or table "
+            "(CSV): apex at the site, centred on the azimuth (degrees "
+            "clockwise from north), opening = beamwidth, length = radius.\n\n"
+            "Site position comes from X / Y fields (in Source CRS) or, "
+            "when those are empty, from the point geometry.\n"
+            "Radius is in metres for geographic CRS, map units otherwise. "
+            "Field values override the default beamwidth / radius; "
+            "empty or invalid values fall back to the defaults."
+        )
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.INPUT, _tr("Sector layer / table"),
+            [QgsProcessing.TypeVector],
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.X_FIELD, _tr("Site X / longitude field"),
+            parentLayerParameterName=self.INPUT,
+            type=QgsProcessingParameterField.Any, optional=True,
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.Y_FIELD, _tr("Site Y / latitude field"),
+            parentLayerParameterName=self.INPUT,
+            type=QgsProcessingParameterField.Any, optional=True,
+        ))
+        self.addParameter(QgsProcessingParameterCrs(
+            self.SOURCE_CRS, _tr("CRS of X / Y fields"),
+            defaultValue="EPSG:4326", optional=True,
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.AZIMUTH_FIELD, _tr("Azimuth field"),
+            parentLayerParameterName=self.INPUT,
+            type=QgsProcessingParameterField.Any,
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.BEAMWIDTH_FIELD, _tr("Beamwidth field"),
+            parentLayerParameterName=self.INPUT,
+            type=QgsProcessingParameterField.Any, optional=True,
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.BEAMWIDTH, _tr("Default beamwidth (degrees)"),
+            QgsProcessingParameterNumber.Double, 65.0,
+            minValue=0.1, maxValue=360.0,
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.RADIUS_FIELD, _tr("Radius field"),
+            parentLayerParameterName=self.INPUT,
+            type=QgsProcessingParameterField.Any, optional=True,
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.RADIUS, _tr("Default radius"),
+            QgsProcessingParameterNumber.Double, 500.0, minValue=0.0,
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.SEGMENTS, _tr("Arc segments"),
+            QgsProcessingParameterNumber.Integer, 24,
+            minValue=2, maxValue=360,
+        ))
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, _tr("Sector wedges"),
+            QgsProcessing.TypeVectorPolygon,
+        ))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        import numpy as np
+        from .floating_compass_geometry import polygons_wkb, wedges
+
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(
+                self.invalidSourceError(parameters, self.INPUT)
+            )
+
+        x_field = self.parameterAsString(parameters, self.X_FIELD, context)
+        y_field = self.parameterAsString(parameters, self.Y_FIELD, context)
+        az_field = self.parameterAsString(parameters, self.AZIMUTH_FIELD, context)
+        bw_field = self.parameterAsString(parameters, self.BEAMWIDTH_FIELD, context)
+        r_field = self.parameterAsString(parameters, self.RADIUS_FIELD, context)
+        bw_default = self.parameterAsDouble(parameters, self.BEAMWIDTH, context)
+        r_default = self.parameterAsDouble(parameters, self.RADIUS, context)
+        segments = self.parameterAsInt(parameters, self.SEGMENTS, context)
+
+        use_xy = bool(x_field and y_field)
+        if use_xy:
+            crs = self.parameterAsCrs(parameters, self.SOURCE_CRS, context)
+            if not crs.isValid():
+                crs = QgsCoordinateReferenceSystem("EPSG:4326")
+        else:
+            if QgsWkbTypes.geometryType(source.wkbType()) != QgsWkbTypes.PointGeometry:
+                raise QgsProcessingException(_tr(
+                    "Set X / Y fields, or use a point layer."
+                ))
+            crs = source.sourceCrs()
+
+        geographic = crs.isGeographic()
+
+        fields = QgsFields(source.fields())
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context,
+            fields, QgsWkbTypes.Polygon, crs,
+        )
+        if sink is None:
+            raise QgsProcessingException(
+                self.invalidSinkError(parameters, self.OUTPUT)
+            )
+
+        src_fields = source.fields()
+        idx_x = src_fields.lookupField(x_field) if use_xy else -1
+        idx_y = src_fields.lookupField(y_field) if use_xy else -1
+        idx_az = src_fields.lookupField(az_field)
+        idx_bw = src_fields.lookupField(bw_field) if bw_field else -1
+        idx_r = src_fields.lookupField(r_field) if r_field else -1
+
+        request = QgsFeatureRequest()
+        if use_xy:
+            request.setFlags(QgsFeatureRequest.NoGeometry)
+
+        total = source.featureCount() or 0
+        step = 100.0 / total if total > 0 else 0
+        done = 0
+        skipped = 0
+
+        attrs, xs, ys, az, bw, rad = [], [], [], [], [], []
+
+        def flush():
+            if not attrs:
+                return
+            rings = wedges(
+                np.array(xs), np.array(ys), np.array(az),
+                np.array(bw), np.array(rad),
+                segments, geographic,
+            )
+            out = []
+            for a, wkb in zip(attrs, polygons_wkb(rings)):
+                g = QgsGeometry()
+                g.fromWkb(wkb)
+                f = QgsFeature(fields)
+                f.setAttributes(a)
+                f.setGeometry(g)
+                out.append(f)
+            sink.addFeatures(out, QgsFeatureSink.FastInsert)
+            for lst in (attrs, xs, ys, az, bw, rad):
+                lst.clear()
+
+        for feat in source.getFeatures(request):
+            if feedback.isCanceled():
+                break
+
+            a = feat.attributes()
+            azimuth = _float(a[idx_az], None)
+
+            if use_xy:
+                x = _float(a[idx_x], None)
+                y = _float(a[idx_y], None)
+            else:
+                geom = feat.geometry()
+                if geom.isNull() or geom.isEmpty():
+                    x = y = None
+                else:
+                    pt = geom.vertexAt(0)
+                    x, y = pt.x(), pt.y()
+
+            if azimuth is None or x is None or y is None:
+                skipped += 1
+                continue
+
+            attrs.append(a)
+            xs.append(x)
+            ys.append(y)
+            az.append(azimuth)
+            bw.append(_float(a[idx_bw], bw_default) if idx_bw >= 0 else bw_default)
+            rad.append(_float(a[idx_r], r_default) if idx_r >= 0 else r_default)
+
+            if len(attrs) >= self.CHUNK:
+                flush()
+
+            done += 1
+            if done % 1000 == 0:
+                feedback.setProgress((done + skipped) * step)
+
+        flush()
+
+        if skipped:
+            feedback.pushInfo(_tr(
+                f"{skipped} row(s) skipped (missing site or azimuth)."
+            ))
+
+        return {self.OUTPUT: dest_id}
+
+
+# =====================
+# SECTOR SEPARATION
+# =====================
+class SectorSeparationAlgorithm(QgsProcessingAlgorithm):
+    """
+    Clockwise separation / beam overlap to the next sector of the
+    same site.
+
+    Sectors are grouped per site into a padded (sites, k) table, so
+    one sort per site and a single vectorized neighbour pass cover
+    the whole layer (cgeom.sector_separations).
+    """
+
+    INPUT = "INPUT"
+    SITE_FIELD = "SITE_FIELD"
+    AZIMUTH_FIELD = "AZIMUTH_FIELD"
+    BEAMWIDTH_FIELD = "BEAMWIDTH_FIELD"
+    BEAMWIDTH = "BEAMWIDTH"
+    MIN_SEPARATION = "MIN_SEPARATION"
+    OUTPUT = "OUTPUT"
+
+    def createInstance(self):
+        return SectorSeparationAlgorithm()
+
+    def name(self):
+        return "sectorseparation"
+
+    def displayName(self):
+        return _tr("Sector separation and overlap")
+
+    def group(self):
+        return _tr("Sectors")
+
+    def groupId(self):
+        return "sectors"
+
+    def shortHelpString(self):
+        return _tr(
+            "For every sector, adds the clockwise separation (degrees) to "
+            "the next sector of the same site, that sector's azimuth, the "
+            "beam overlap ((beamwidth + next beamwidth) / 2 - separation, "
+            "0 when the beams do not touch) and too_close = 1 when the "
+            "separation is below the minimum. Rows without an azimuth "
+            "get NULL."
+        )
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.INPUT, _tr("Sector layer / table"),
+            [QgsProcessing.TypeVector],
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.SITE_FIELD, _tr("Site ID field"),
+            parentLayerParameterName=self.INPUT,
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.AZIMUTH_FIELD, _tr("Azimuth field"),
+            parentLayerParameterName=self.INPUT,
+            type=QgsProcessingParameterField.Any,
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.BEAMWIDTH_FIELD, _tr("Beamwidth field"),
+            parentLayerParameterName=self.INPUT,
+            type=QgsProcessingParameterField.Any, optional=True,
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.BEAMWIDTH, _tr("Default beamwidth (degrees)"),
+            QgsProcessingParameterNumber.Double, 65.0,
+            minValue=0.1, maxValue=360.0,
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.MIN_SEPARATION, _tr("Minimum separation (degrees)"),
+            QgsProcessingParameterNumber.Double, 60.0,
+            minValue=0.0, maxValue=360.0,
+        ))
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, _tr("Sector separation"),
+        ))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        import numpy as np
+        from .floating_compass_geometry import sector_separations
+
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(
+                self.invalidSourceError(parameters, self.INPUT)
+            )
+
+        src_fields = source.fields()
+        idx_site = src_fields.lookupField(
+            self.parameterAsString(parameters, self.SITE_FIELD, context)
+        )
+        idx_az = src_fields.lookupField(
+            self.parameterAsString(parameters, self.AZIMUTH_FIELD, context)
+        )
+        bw_field = self.parameterAsString(parameters, self.BEAMWIDTH_FIELD, context)
+        idx_bw = src_fields.lookupField(bw_field) if bw_field else -1
+        bw_default = self.parameterAsDouble(parameters, self.BEAMWIDTH, context)
+        min_sep = self.parameterAsDouble(parameters, self.MIN_SEPARATION, context)
+
+        fields = QgsFields(src_fields)
+        for name in ("separation", "next_azimuth", "overlap"):
+            fields.append(QgsField(name, QVariant.Double))
+        fields.append(QgsField("too_close", QVariant.Int))
+
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context,
+            fields, source.wkbType(), source.sourceCrs(),
+        )
+        if sink is None:
+            raise QgsProcessingException(
+                self.invalidSinkError(parameters, self.OUTPUT)
+            )
+
+        # ---------- read, group by site ----------
+        total = source.featureCount() or 0
+        step = 50.0 / total if total > 0 else 0
+        feats, az, bw, groups = [], [], [], {}
+        nan = float("nan")
+
+        for i, feat in enumerate(source.getFeatures()):
+            if feedback.isCanceled():
+                return {self.OUTPUT: dest_id}
+            a = feat.attributes()
+            feats.append(feat)
+            az.append(_float(a[idx_az], nan))
+            bw.append(_float(a[idx_bw], bw_default) if idx_bw >= 0 else bw_default)
+
+            site = _key(a[idx_site])
+            if site is not None and az[-1] == az[-1]:
+                groups.setdefault(site, []).append(i)
+            if i % 1000 == 0:
+                feedback.setProgress(i * step)
+
+        # ---------- padded (sites, k) table, one vectorized pass ----------
+        n = len(feats)
+        sep_out = np.full(n, np.nan)
+        next_out = np.full(n, np.nan)
+        overlap_out = np.full(n, np.nan)
+
+        if groups:
+            width = max(len(m) for m in groups.values())
+            members = np.full((len(groups), width), -1, dtype=np.int64)
+            for g, rows in enumerate(groups.values()):
+                members[g, :len(rows)] = rows
+
+            az_arr = np.append(np.array(az, dtype=float), np.nan)
+            bw_arr = np.append(np.array(bw, dtype=float), np.nan)
+            site_az = az_arr[members]        # -1 → trailing NaN
+            site_bw = bw_arr[members]
+
+            order, sep, overlap = sector_separations(site_az, site_bw)
+
+            s_members = np.take_along_axis(members, order, axis=1)
+            s_az = np.take_along_axis(site_az % 360.0, order, axis=1)
+            count = np.isfinite(site_az).sum(axis=1)[:, None]
+            j = np.arange(width)[None, :]
+            nxt = np.where(j + 1 < count, j + 1, 0)
+
+            used = np.isfinite(sep)
+            rows = s_members[used]
+            sep_out[rows] = sep[used]
+            overlap_out[rows] = overlap[used]
+            next_out[rows] = np.take_along_axis(s_az, nxt, axis=1)[used]
+
+        too_close = np.where(np.isfinite(sep_out), sep_out < min_sep, False)
+
+        # ---------- write ----------
+        out = []
+        for i, feat in enumerate(feats):
+            nf = QgsFeature(fields)
+            nf.setGeometry(feat.geometry())
+            finite = sep_out[i] == sep_out[i]
+            nf.setAttributes(feat.attributes() + [
+                float(sep_out[i]) if finite else None,
+                float(next_out[i]) if finite else None,
+                float(overlap_out[i]) if finite else None,
+                int(too_close[i]) if finite else None,
+            ])
+            out.append(nf)
+            if len(out) >= 20000:
+                sink.addFeatures(out, QgsFeatureSink.FastInsert)
+                out = []
+            if i % 1000 == 0:
+                feedback.setProgress(50.0 + i * step)
+        sink.addFeatures(out, QgsFeatureSink.FastInsert)
+
+        flagged = int(too_close.sum())
+        if flagged:
+            feedback.pushInfo(_tr(
+                f"{flagged} sector(s) closer than {min_sep:g}° to the next one."
+            ))
+        return {self.OUTPUT: dest_id}
+
+
+# =====================
+# BEARING CHECKS (shared)
+# =====================
+def _key(v):
+    """Join key as text (1 / 1.0 / "1" match), None for NULL."""
+    if v is None or v == NULL:
+        return None
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    return str(v).strip()
+
+
+def _column(values):
+    """NumPy column → attribute list (NaN → NULL)."""
+    return [None if v != v else v for v in values.tolist()]
+
+
+def _bearing_distance(x0, y0, x1, y1, geodesic):
+    from . import floating_compass_geometry as cgeom
+
+    if geodesic:
+        return (
+            cgeom.geodesic_bearings(x0, y0, x1, y1),
+            cgeom.geodesic_distances(x0, y0, x1, y1),
+        )
+    return cgeom.bearings(x0, y0, x1, y1), cgeom.distances(x0, y0, x1, y1)
+
+
+class _TargetCheckAlgorithm(QgsProcessingAlgorithm):
+    """
+    Base for per-target checks against a reference table (sites or
+    sectors) joined by key.
+
+    Targets are read in chunks on the algorithm thread; each chunk's
+    math (compute(), NumPy only) runs on a thread pool while the next
+    chunk is read. Results are written in input order.
+    """
+
+    TARGETS = "TARGETS"
+    TARGET_KEY = "TARGET_KEY"
+    METHOD = "METHOD"
+    THREADS = "THREADS"
+    OUTPUT = "OUTPUT"
+
+    METHODS = ("Planar (target layer CRS units)", "Geodesic (metres)")
+    CHUNK = 50000
+
+    def createInstance(self):
+        return type(self)()
+
+    def group(self):
+        return _tr("Bearings")
+
+    def groupId(self):
+        return "bearings"
+
+    # ---------- parameters ----------
+    def _add_target_params(self, key_label):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.TARGETS, _tr("Targets"),
+            [QgsProcessing.TypeVectorPoint],
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.TARGET_KEY, key_label,
+            parentLayerParameterName=self.TARGETS,
+        ))
+
+    def _add_common_params(self):
+        self.addParameter(QgsProcessingParameterEnum(
+            self.METHOD, _tr("Method"),
+            options=[_tr(m) for m in self.METHODS], defaultValue=0,
+        ))
+        threads = QgsProcessingParameterNumber(
+            self.THREADS, _tr("Worker threads (0 = all cores)"),
+            QgsProcessingParameterNumber.Integer, 0, minValue=0,
+        )
+        threads.setFlags(
+            threads.flags() | QgsProcessingParameterDefinition.FlagAdvanced
+        )
+        self.addParameter(threads)
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, _tr("Output"), QgsProcessing.TypeVectorPoint,
+        ))
+
+    # ---------- subclass hooks ----------
+    def output_fields(self):
+        return []
+
+    def prepare(self, parameters, context, feedback, crs):
+        """Load the reference table in crs (runs before targets)."""
+
+    def compute(self, keys, xs, ys, geodesic):
+        """Per-chunk NumPy math → list of attribute columns."""
+        raise NotImplementedError
+
+    # ---------- reference tables ----------
+    def _read_reference(self, source, key_fields, value_fields, crs,
+                        context, feedback):
+        """
+        Point reference layer in crs →
+        (key columns, xy (n, 2), values (n, k) with NaN for empty).
+        """
+        import numpy as np
+
+        fields = source.fields()
+        key_idx = [fields.lookupField(f) for f in key_fields]
+        val_idx = [fields.lookupField(f) if f else -1 for f in value_fields]
+
+        request = QgsFeatureRequest()
+        request.setDestinationCrs(crs, context.transformContext())
+
+        keys = [[] for _ in key_idx]
+        xy, vals = [], []
+        nan = float("nan")
+
+        for f in source.getFeatures(request):
+            if feedback.isCanceled():
+                break
+            g = f.geometry()
+            if g.isNull() or g.isEmpty():
+                continue
+
+            a = f.attributes()
+            pt = g.vertexAt(0)
+            for col, i in zip(keys, key_idx):
+                col.append(_key(a[i]))
+            xy.append((pt.x(), pt.y()))
+            vals.append([_float(a[i], nan) if i >= 0 else nan for i in val_idx])
+
+        if not xy:
+            raise QgsProcessingException(_tr(
+                f"{source.sourceName()}: no features with a point geometry."
+            ))
+
+        return (
+            keys,
+            np.array(xy, dtype=float).reshape(-1, 2),
+            np.array(vals, dtype=float).reshape(len(xy), len(val_idx)),
+        )
+
+    @staticmethod
+    def _lookup(lut, keys):
+        import numpy as np
+        return np.fromiter(
+            (lut.get(k, -1) for k in keys), dtype=np.int64, count=len(keys)
+        )
+
+    # ---------- run ----------
+    def processAlgorithm(self, parameters, context, feedback):
+        import numpy as np
+        from collections import deque
+        from concurrent.futures import ThreadPoolExecutor
+
+        targets = self.parameterAsSource(parameters, self.TARGETS, context)
+        if targets is None:
+            raise QgsProcessingException(
+                self.invalidSourceError(parameters, self.TARGETS)
+            )
+
+        key_field = self.parameterAsString(parameters, self.TARGET_KEY, context)
+        key_idx = targets.fields().lookupField(key_field)
+        geodesic = self.parameterAsEnum(parameters, self.METHOD, context) == 1
+        threads = (
+            self.parameterAsInt(parameters, self.THREADS, context)
+            or os.cpu_count() or 1
+        )
+
+        src_crs = targets.sourceCrs()
+        work_crs = QgsCoordinateReferenceSystem("EPSG:4326") if geodesic else src_crs
+        xform = None
+        if work_crs != src_crs:
+            xform = QgsCoordinateTransform(
+                src_crs, work_crs, context.transformContext()
+            )
+
+        self.prepare(parameters, context, feedback, work_crs)
+
+        fields = QgsFields(targets.fields())
+        for f in self.output_fields():
+            fields.append(f)
+
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context,
+            fields, targets.wkbType(), src_crs,
+        )
+        if sink is None:
+            raise QgsProcessingException(
+                self.invalidSinkError(parameters, self.OUTPUT)
+            )
+
+        total = targets.featureCount() or 0
+        step = 100.0 / total if total > 0 else 0
+        done = 0
+        nan = float("nan")
+        pending = deque()
+
+        def write(limit):
+            while len(pending) > limit:
+                feats, future = pending.popleft()
+                cols = future.result()
+                out = []
+                for i, feat in enumerate(feats):
+                    nf = QgsFeature(fields)
+                    nf.setGeometry(feat.geometry())
+                    nf.setAttributes(feat.attributes() + [c[i] for c in cols])
+                    out.append(nf)
+                sink.addFeatures(out, QgsFeatureSink.FastInsert)
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            feats, keys, xs, ys = [], [], [], []
+
+            def submit():
+                pending.append((feats, pool.submit(
+                    self.compute, keys, np.array(xs), np.array(ys), geodesic
+                )))
+
+            for feat in targets.getFeatures():
+                if feedback.isCanceled():
+                    break
+
+                g = feat.geometry()
+                if g.isNull() or g.isEmpty():
+                    x = y = nan
+                else:
+                    pt = g.vertexAt(0)
+                    if xform is not None:
+                        pt = xform.transform(pt.x(), pt.y())
+                    x, y = pt.x(), pt.y()
+
+                feats.append(feat)
+                keys.append(_key(feat.attributes()[key_idx]))
+                xs.append(x)
+                ys.append(y)
+
+                if len(feats) >= self.CHUNK:
+                    submit()
+                    feats, keys, xs, ys = [], [], [], []
+                    write(threads * 2)
+
+                done += 1
+                if done % 1000 == 0:
+                    feedback.setProgress(done * step)
+
+            if feats:
+                submit()
+            write(0)
+
+        return {self.OUTPUT: dest_id}
+
+
+class _SectorCheckAlgorithm(_TargetCheckAlgorithm):
+    """Checks against a sector point layer (site position + azimuth)."""
+
+    SECTORS = "SECTORS"
+    SECTOR_ID = "SECTOR_ID"
+    SECTOR_SITE = "SECTOR_SITE"
+    AZIMUTH_FIELD = "AZIMUTH_FIELD"
+    BEAMWIDTH_FIELD = "BEAMWIDTH_FIELD"
+    BEAMWIDTH = "BEAMWIDTH"
+    RADIUS_FIELD = "RADIUS_FIELD"
+
+    def _add_sector_params(self, with_site=False, with_radius=False):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.SECTORS, _tr("Sectors (points at site)"),
+            [QgsProcessing.TypeVectorPoint],
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.SECTOR_ID, _tr("Sector ID field"),
+            parentLayerParameterName=self.SECTORS,
+        ))
+        if with_site:
+            self.addParameter(QgsProcessingParameterField(
+                self.SECTOR_SITE, _tr("Sector site ID field"),
+                parentLayerParameterName=self.SECTORS,
+            ))
+        self.addParameter(QgsProcessingParameterField(
+            self.AZIMUTH_FIELD, _tr("Azimuth field"),
+            parentLayerParameterName=self.SECTORS,
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.BEAMWIDTH_FIELD, _tr("Beamwidth field"),
+            parentLayerParameterName=self.SECTORS, optional=True,
+        ))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.BEAMWIDTH, _tr("Default beamwidth (degrees)"),
+            QgsProcessingParameterNumber.Double, 65.0,
+            minValue=0.1, maxValue=360.0,
+        ))
+        if with_radius:
+            self.addParameter(QgsProcessingParameterField(
+                self.RADIUS_FIELD,
+                _tr("Radius field (metres / map units, empty = unlimited)"),
+                parentLayerParameterName=self.SECTORS, optional=True,
+            ))
+
+    def _read_sectors(self, parameters, context, feedback, crs, with_site):
+        import numpy as np
+
+        source = self.parameterAsSource(parameters, self.SECTORS, context)
+        if source is None:
+            raise QgsProcessingException(
+                self.invalidSourceError(parameters, self.SECTORS)
+            )
+
+        key_fields = [self.parameterAsString(parameters, self.SECTOR_ID, context)]
+        if with_site:
+            key_fields.append(
+                self.parameterAsString(parameters, self.SECTOR_SITE, context)
+            )
+
+        radius_field = ""
+        if self.parameterDefinition(self.RADIUS_FIELD) is not None:
+            radius_field = self.parameterAsString(
+                parameters, self.RADIUS_FIELD, context
+            )
+
+        keys, xy, vals = self._read_reference(
+            source, key_fields,
+            [
+                self.parameterAsString(parameters, self.AZIMUTH_FIELD, context),
+                self.parameterAsString(parameters, self.BEAMWIDTH_FIELD, context),
+                radius_field,
+            ],
+            crs, context, feedback,
+        )
+
+        bw_default = self.parameterAsDouble(parameters, self.BEAMWIDTH, context)
+        vals[:, 1] = np.where(np.isnan(vals[:, 1]), bw_default, vals[:, 1])
+        vals[:, 2] = np.where(np.isnan(vals[:, 2]), np.inf, vals[:, 2])
+
+        # rows without azimuth cannot be checked
+        ok = ~np.isnan(vals[:, 0])
+        if not ok.any():
+            raise QgsProcessingException(_tr("No sector has an azimuth."))
+        keys = [[k for k, keep in zip(col, ok) if keep] for col in keys]
+        return keys, xy[ok], vals[ok]
+
+
+# =====================
+# SITE → TARGET BEARING
+# =====================
+class SiteTargetBearingAlgorithm(_TargetCheckAlgorithm):
+
+    SITES = "SITES"
+    SITE_KEY = "SITE_KEY"
+
+    def name(self):
+        return "sitetargetbearing"
+
+    def displayName(self):
+        return _tr("Site → target bearing")
+
+    def shortHelpString(self):
+        return _tr(
+            "Adds bearing (degrees clockwise from north) and distance "
+            "from the joined site to every target point. Targets are "
+            "joined to sites by ID."
+        )
+
+    def initAlgorithm(self, config=None):
+        self._add_target_params(_tr("Target site ID field"))
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.SITES, _tr("Sites"), [QgsProcessing.TypeVectorPoint],
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.SITE_KEY, _tr("Site ID field"),
+            parentLayerParameterName=self.SITES,
+        ))
+        self._add_common_params()
+
+    def output_fields(self):
+        return [
+            QgsField("site_bearing", QVariant.Double),
+            QgsField("site_dist", QVariant.Double),
+        ]
+
+    def prepare(self, parameters, context, feedback, crs):
+        source = self.parameterAsSource(parameters, self.SITES, context)
+        if source is None:
+            raise QgsProcessingException(
+                self.invalidSourceError(parameters, self.SITES)
+            )
+
+        keys, self._xy, _ = self._read_reference(
+            source,
+            [self.parameterAsString(parameters, self.SITE_KEY, context)],
+            [], crs, context, feedback,
+        )
+        self._lut = {k: i for i, k in enumerate(keys[0]) if k is not None}
+
+    def compute(self, keys, xs, ys, geodesic):
+        import numpy as np
+
+        rows = self._lookup(self._lut, keys)
+        found = rows >= 0
+        sx = np.where(found, self._xy[rows.clip(0), 0], np.nan)
+        sy = np.where(found, self._xy[rows.clip(0), 1], np.nan)
+
+        with np.errstate(invalid="ignore"):
+            b, d = _bearing_distance(sx, sy, xs, ys, geodesic)
+        return [_column(b), _column(d)]
+
+
+# =====================
+# SECTOR MEMBERSHIP
+# =====================
+class SectorMembershipAlgorithm(_SectorCheckAlgorithm):
+
+    def name(self):
+        return "sectormembership"
+
+    def displayName(self):
+        return _tr("Sector membership")
+
+    def shortHelpString(self):
+        return _tr(
+            "For every target, tests the sectors of its site (joined by "
+            "site ID): sector = sector whose beam (azimuth ± beamwidth / 2, "
+            "within radius if given) contains the target, closest to "
+            "boresight; nearest_sector = sector with the smallest angular "
+            "deviation. bearing / deviation refer to sector, or to "
+            "nearest_sector when no beam contains the target."
+        )
+
+    def initAlgorithm(self, config=None):
+        self._add_target_params(_tr("Target site ID field"))
+        self._add_sector_params(with_site=True, with_radius=True)
+        self._add_common_params()
+
+    def output_fields(self):
+        return [
+            QgsField("sector", QVariant.String),
+            QgsField("nearest_sector", QVariant.String),
+            QgsField("bearing", QVariant.Double),
+            QgsField("deviation", QVariant.Double),
+            QgsField("in_sector", QVariant.Int),
+        ]
+
+    def prepare(self, parameters, context, feedback, crs):
+        import numpy as np
+
+        keys, self._xy, self._vals = self._read_sectors(
+            parameters, context, feedback, crs, with_site=True
+        )
+        self._ids = np.array(keys[0] + [None], dtype=object)
+
+        # site → padded row table (n_sites, max sectors per site)
+        groups = {}
+        for row, site in enumerate(keys[1]):
+            if site is not None:
+                groups.setdefault(site, []).append(row)
+
+        width = max((len(r) for r in groups.values()), default=1)
+        self._pad = np.full((len(groups) + 1, width), -1, dtype=np.int64)
+        self._lut = {}
+        for g, (site, rows) in enumerate(groups.items()):
+            self._lut[site] = g
+            self._pad[g, :len(rows)] = rows
+
+    def compute(self, keys, xs, ys, geodesic):
+        import numpy as np
+        from . import floating_compass_geometry as cgeom
+
+        g = self._lookup(self._lut, keys)
+        cand = self._pad[np.where(g >= 0, g, len(self._pad) - 1)]   # (n, m)
+        valid = cand >= 0
+        rows = cand.clip(0)
+
+        with np.errstate(invalid="ignore"):
+            b, d = _bearing_distance(
+                self._xy[rows, 0], self._xy[rows, 1],
+                xs[:, None], ys[:, None], geodesic,
+            )
+            dev = cgeom.angle_diffs(b, self._vals[rows, 0])
+            inside = (
+                valid
+                & cgeom.in_sector(b, self._vals[rows, 0], self._vals[rows, 1])
+                & (d <= self._vals[rows, 2])
+            )
+
+        absdev = np.abs(dev)
+        near = np.argmin(np.where(valid & ~np.isnan(absdev), absdev, np.inf), axis=1)
+        best = np.argmin(np.where(inside, absdev, np.inf), axis=1)
+        has = inside.any(axis=1)
+        any_valid = (valid & ~np.isnan(absdev)).any(axis=1)
+
+        n = np.arange(len(keys))
+        pick = np.where(has, best, near)
+        none = len(self._ids) - 1
+        sector = np.where(has, cand[n, best], none)
+        nearest = np.where(any_valid, cand[n, near], none)
+        sector[sector < 0] = none
+        nearest[nearest < 0] = none
+
+        bearing = np.where(any_valid, b[n, pick], np.nan)
+        deviation = np.where(any_valid, dev[n, pick], np.nan)
+
+        return [
+            self._ids[sector].tolist(),
+            self._ids[nearest].tolist(),
+            _column(bearing),
+            _column(deviation),
+            has.astype(int).tolist(),
+        ]
+
+
+# =====================
+# AZIMUTH DEVIATION
+# =====================
+class AzimuthDeviationAlgorithm(_SectorCheckAlgorithm):
+
+    def name(self):
+        return "azimuthdeviation"
+
+    def displayName(self):
+        return _tr("Azimuth deviation")
+
+    def shortHelpString(self):
+        return _tr(
+            "For every target joined to its serving sector (by sector ID), "
+            "adds the bearing from the sector site, the signed deviation "
+            "from the sector azimuth (-180..180, positive = clockwise) and "
+            "whether the target lies inside the beamwidth."
+        )
+
+    def initAlgorithm(self, config=None):
+        self._add_target_params(_tr("Target serving sector ID field"))
+        self._add_sector_params()
+        self._add_common_params()
+
+    def output_fields(self):
+        return [
+            QgsField("bearing", QVariant.Double),
+            QgsField("distance", QVariant.Double),
+            QgsField("deviation", QVariant.Double),
+            QgsField("abs_deviation", QVariant.Double),
+            QgsField("in_beam", QVariant.Int),
+        ]
+
+    def prepare(self, parameters, context, feedback, crs):
+        keys, self._xy, self._vals = self._read_sectors(
+            parameters, context, feedback, crs, with_site=False
+        )
+        self._lut = {k: i for i, k in enumerate(keys[0]) if k is not None}
+
+    def compute(self, keys, xs, ys, geodesic):
+        import numpy as np
+        from . import floating_compass_geometry as cgeom
+
+        rows = self._lookup(self._lut, keys)
+        found = rows >= 0
+        r = rows.clip(0)
+        sx = np.where(found, self._xy[r, 0], np.nan)
+        sy = np.where(found, self._xy[r, 1], np.nan)
+        az = self._vals[r, 0]
+        bw = self._vals[r, 1]
+
+        with np.errstate(invalid="ignore"):
+            b, d = _bearing_distance(sx, sy, xs, ys, geodesic)
+            dev = cgeom.angle_diffs(b, az)
+            inb = cgeom.in_sector(b, az, bw) & found & ~np.isnan(b)
+
+        return [
+            _column(b),
+            _column(d),
+            _column(dev),
+            _column(np.abs(dev)),
+            inb.astype(int).tolist(),
+        ]
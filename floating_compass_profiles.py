@@ -0,0 +1,178 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_profiles.py
+import json
+import os
+import time
+
+
+class FloatingCompassProfileStore:
+    """
+    Named settings profiles in a single JSON-lines file.
+
+    One record per line, appended on save; the last record for a
+    name wins:
+
+        {"name": "Huawei 3S", "tags": ["huawei", "L1800"], "ts": ...,
+         "settings": {...}}
+        {"name": "Huawei 3S", "deleted": true, "ts": ...}
+
+    The file is read once into an in-memory index (by name and by
+    tag) and re-read only when its mtime changes. Superseded lines
+    are compacted away once they outnumber the live profiles.
+    """
+
+    FILE_NAME = "floating_compass_profiles.jsonl"
+
+    def __init__(self, path=None):
+        self.path = path or self.default_path()
+        self._mtime = None
+        self._by_name = {}
+        self._by_tag = {}
+        self._lines = 0
+
+    @classmethod
+    def default_path(cls):
+        from qgis.core import QgsApplication
+        return os.path.join(QgsApplication.qgisSettingsDirPath(), cls.FILE_NAME)
+
+    # =====================
+    # INDEX
+    # =====================
+    def _ensure_index(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+
+        if mtime is not None and mtime == self._mtime:
+            return
+
+        self._by_name = {}
+        self._by_tag = {}
+        self._lines = 0
+        self._mtime = mtime
+
+        if mtime is None:
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(rec, dict) and rec.get("name"):
+                    self._lines += 1
+                    self._index(rec)
+
+    def _index(self, rec):
+        name = rec["name"]
+        old = self._by_name.pop(name, None)
+        if old is not None:
+            for tag in old.get("tags", []):
+                names = self._by_tag.get(tag)
+                if names:
+                    names.discard(name)
+                    if not names:
+                        del self._by_tag[tag]
+
+        if rec.get("deleted"):
+            return
+
+        self._by_name[name] = rec
+        for tag in rec.get("tags", []):
+            self._by_tag.setdefault(tag, set()).add(name)
+
+    # =====================
+    # QUERY
+    # =====================
+    def names(self, tag=None):
+        self._ensure_index()
+        if tag is None:
+            return sorted(self._by_name)
+        return sorted(self._by_tag.get(tag, ()))
+
+    def tags(self):
+        self._ensure_index()
+        return sorted(self._by_tag)
+
+    def get(self, name):
+        """Settings dict of profile name, or None."""
+        self._ensure_index()
+        rec = self._by_name.get(name)
+        return dict(rec["settings"]) if rec else None
+
+    def record(self, name):
+        self._ensure_index()
+        rec = self._by_name.get(name)
+        return dict(rec) if rec else None
+
+    def __contains__(self, name):
+        self._ensure_index()
+        return name in self._by_name
+
+    # =====================
+    # WRITE
+    # =====================
+    def save(self, name, settings, tags=()):
+        name = str(name).strip()
+        if not name:
+            raise ValueError("Profile name must not be empty.")
+
+        tags = sorted({str(t).strip() for t in tags if str(t).strip()})
+        self._append({
+            "name": name,
+            "tags": tags,
+            "ts": time.time(),
+            "settings": dict(settings),
+        })
+
+    def delete(self, name):
+        if name in self:
+            self._append({"name": name, "deleted": True, "ts": time.time()})
+
+    def _append(self, rec):
+        self._ensure_index()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+
+        self._lines += 1
+        self._index(rec)
+        self._mtime = os.path.getmtime(self.path)
+
+        if self._lines > 2 * max(len(self._by_name), 8):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the file with live profiles only."""
+        self._ensure_index()
+
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for name in sorted(self._by_name):
+                f.write(
+                    json.dumps(self._by_name[name], separators=(",", ":"))
+                    + "\n"
+                )
+        os.replace(tmp, self.path)
+
+        self._lines = len(self._by_name)
+        self._mtime = os.path.getmtime(self.path)
@@ -0,0 +1,358 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_project.py
+import json
+
+from qgis.PyQt.QtCore import QPointF, QTimer
+from qgis.core import (
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsCsException,
+    QgsPointXY,
+    QgsProject,
+)
+
+from .floating_compass_instances import copy_arms
+
+
+class FloatingCompassProjectState:
+    """
+    Compass instances embedded in the project (.qgs / .qgz) as one
+    custom property: scope "FloatingCompass", key "state".
+
+    Format (compact JSON, versioned):
+
+        {
+          "v": 1,
+          "crs": "<authid of the coordinates below>",
+                  (or "wkt": "<WKT>" for CRS without authid)
+          "a": <index of active instance>,
+          "c": [
+            [x, y, ring_radius, [[angle, radius, enabled, color], ...]],
+            ...
+          ]
+        }
+
+    An arm record may carry a 5th element: dict of extra arm keys.
+
+    On readProject only the raw string is fetched; decoding and
+    instance creation happen on first use (tool activation / API),
+    when the canvas extent is valid.
+    """
+
+    SCOPE = "FloatingCompass"
+    KEY = "state"
+    VERSION = 1
+
+    WRITE_DELAY_MS = 300
+
+    # arm keys stored in the optional extras dict
+    ARM_EXTRA_KEYS = ("pattern_file", "beamwidth", "length_m", "label")
+
+    def __init__(self, tool):
+        self.tool = tool
+        self._raw = None
+        self._restoring = False
+
+        self._write_timer = QTimer()
+        self._write_timer.setSingleShot(True)
+        self._write_timer.timeout.connect(self.write)
+
+        project = QgsProject.instance()
+        project.readProject.connect(self._on_read_project)
+        project.writeProject.connect(self._on_write_project)
+        project.cleared.connect(self._on_cleared)
+
+    def unload(self):
+        self._write_timer.stop()
+        project = QgsProject.instance()
+        try:
+            project.readProject.disconnect(self._on_read_project)
+            project.writeProject.disconnect(self._on_write_project)
+            project.cleared.disconnect(self._on_cleared)
+        except Exception:
+            pass
+
+    # =====================
+    # PROJECT SIGNALS
+    # =====================
+    def _on_read_project(self, doc):
+        raw, ok = QgsProject.instance().readEntry(self.SCOPE, self.KEY, "")
+        self._raw = raw if ok and raw else None
+
+        if not self._raw:
+            # compasses of the previous project do not carry over
+            self._clear_instances()
+            return
+
+        # tool already active → restore now, otherwise on activate()
+        if self.tool.canvas.mapTool() == self.tool:
+            self.ensure_loaded()
+
+    def _on_write_project(self, doc):
+        # flush a pending debounced write into the project being saved
+        if self._write_timer.isActive():
+            self.write()
+
+    def _on_cleared(self):
+        self._raw = None
+        self._write_timer.stop()
+        self._clear_instances()
+
+    def _clear_instances(self):
+        t = self.tool
+        if t.center is None:
+            return
+
+        t.remove_all_instances()
+        t.overlay.setVisible(False)
+        t._request_update()
+        t.nearest.refresh()
+        t.aimed.refresh()
+        t.terrain.schedule()
+
+    @property
+    def pending(self):
+        return self._raw is not None
+
+    # =====================
+    # LOAD (LAZY)
+    # =====================
+    def ensure_loaded(self):
+        """Decode pending project state into compass instances."""
+        if self._raw is None:
+            return False
+
+        raw, self._raw = self._raw, None
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return False
+
+        if not isinstance(data, dict) or data.get("v", 0) > self.VERSION:
+            return False
+
+        self._restoring = True
+        try:
+            self._restore(data)
+        finally:
+            self._restoring = False
+        return True
+
+    def _restore(self, data):
+        t = self.tool
+
+        records = data.get("c")
+        if not isinstance(records, list):
+            records = []
+
+        xform = self._transform(data)
+        to_px = t.canvas.getCoordinateTransform()
+
+        # decode everything first; malformed records are skipped
+        decoded = {}
+        for idx, rec in enumerate(records):
+            try:
+                decoded[idx] = self._decode_record(rec, xform, to_px)
+            except (ValueError, TypeError, IndexError, KeyError, QgsCsException):
+                continue
+
+        if not decoded:
+            self._clear_instances()
+            return
+
+        t.remove_all_instances()
+
+        added = {}
+        for idx, (center, ring, arms, ring_m) in decoded.items():
+            added[idx] = t.instances.add(center, ring, arms, ring_m)
+
+        active = data.get("a")
+        active = added.get(active) if isinstance(active, int) else None
+        if active is not None:
+            t.instances.activate(active)
+
+        if not t.arms_initialized:
+            # the project arms stand in for the QSettings defaults, so
+            # later _init_arms_if_needed() calls leave them untouched
+            inst = t.instances.active
+            t._arms = copy_arms(inst.arms)
+            t._ring_radius = inst.ring_radius
+            t.arms_initialized = True
+
+        t.overlay.setVisible(True)
+        t.ground.refresh()
+        t._request_update(geometry=True)
+
+    def _decode_record(self, rec, xform, to_px):
+        """
+        (pixel center, ring radius, arms, ring_m) of one compass
+        record; raises ValueError / TypeError / IndexError if broken.
+        """
+        if not isinstance(rec, (list, tuple)) or len(rec) < 4:
+            raise ValueError("short compass record")
+
+        x, y, ring, arm_recs = rec[:4]
+        ring = int(ring)
+        if not isinstance(arm_recs, (list, tuple)):
+            raise TypeError("arm records must be a list")
+
+        pt = QgsPointXY(float(x), float(y))
+        if xform is not None:
+            pt = xform.transform(pt)
+        px = to_px.transform(pt)
+
+        extras = rec[4] if len(rec) > 4 and isinstance(rec[4], dict) else {}
+        ring_m = extras.get("ring_m")
+        ring_m = float(ring_m) if ring_m is not None else None
+
+        return (
+            QPointF(px.x(), px.y()),
+            ring,
+            self._decode_arms(arm_recs, ring),
+            ring_m,
+        )
+
+    def _decode_arms(self, arm_recs, ring):
+        """
+        Arms from the stored records alone (no QSettings read);
+        missing arms / fields fall back to the preset defaults.
+        """
+        from qgis.PyQt.QtGui import QColor
+
+        t = self.tool
+        radius = t.clamp(ring, t.arm_radius_min, t.arm_radius_max)
+
+        arms = []
+        for idx, aid in enumerate(t.ARM_IDS):
+            arm = {
+                "id": aid,
+                "index": idx,
+                "angle_deg": t.DEFAULT_ARM_ANGLES[idx],
+                "radius_px": radius,
+                "color": QColor(t.DEFAULT_ARM_COLORS[idx]),
+                "enabled": False,
+                "rotatable": True,
+                "initialized": True,
+            }
+
+            if idx < len(arm_recs) and len(arm_recs[idx]) >= 3:
+                rec = arm_recs[idx]
+                arm["angle_deg"] = float(rec[0])
+                arm["radius_px"] = int(rec[1]) or radius
+                arm["enabled"] = bool(rec[2])
+
+                color = QColor(rec[3]) if len(rec) > 3 and rec[3] else None
+                if color is not None and color.isValid():
+                    arm["color"] = color
+                if len(rec) > 4 and isinstance(rec[4], dict):
+                    arm.update(
+                        (k, v) for k, v in rec[4].items()
+                        if k in self.ARM_EXTRA_KEYS
+                    )
+            arms.append(arm)
+        return arms
+
+    def _transform(self, data):
+        if data.get("crs"):
+            src = QgsCoordinateReferenceSystem(data["crs"])
+        elif data.get("wkt"):
+            src = QgsCoordinateReferenceSystem.fromWkt(data["wkt"])
+        else:
+            return None
+
+        dest = self.tool.canvas.mapSettings().destinationCrs()
+        if not src.isValid() or src == dest:
+            return None
+        return QgsCoordinateTransform(src, dest, QgsProject.instance())
+
+    # =====================
+    # SAVE
+    # =====================
+    def mark_dirty(self):
+        """Schedule a (debounced) write of all instances."""
+        if self._restoring or self._raw is not None:
+            # never overwrite state that has not been restored yet
+            return
+        self._write_timer.start(self.WRITE_DELAY_MS)
+
+    def encode(self):
+        t = self.tool
+        to_map = t.canvas.getCoordinateTransform()
+        crs = t.canvas.mapSettings().destinationCrs()
+
+        records = []
+        active = None
+        for idx, inst in enumerate(t.instances):
+            if inst is t.instances.active:
+                active = idx
+
+            pt = to_map.toMapCoordinates(
+                int(round(inst.center.x())), int(round(inst.center.y()))
+            )
+            rec = [
+                round(pt.x(), 6),
+                round(pt.y(), 6),
+                int(inst.ring_radius),
+                [self._encode_arm(arm) for arm in inst.arms],
+            ]
+            if inst.ring_m is not None:
+                rec.append({"ring_m": round(inst.ring_m, 2)})
+            records.append(rec)
+
+        data = {"v": self.VERSION}
+        if crs.authid():
+            data["crs"] = crs.authid()
+        else:
+            data["wkt"] = crs.toWkt()
+        data["a"] = active
+        data["c"] = records
+
+        return json.dumps(data, separators=(",", ":"))
+
+    def _encode_arm(self, arm):
+        col = arm.get("color")
+        rec = [
+            round(float(arm.get("angle_deg", 0.0)), 2),
+            int(arm.get("radius_px") or 0),
+            1 if arm.get("enabled") else 0,
+            col.name() if col is not None else None,
+        ]
+
+        extras = {
+            k: arm[k] for k in self.ARM_EXTRA_KEYS
+            if arm.get(k) is not None
+        }
+        if extras:
+            rec.append(extras)
+        return rec
+
+    def write(self):
+        self._write_timer.stop()
+        if self._raw is not None:
+            return
+
+        project = QgsProject.instance()
+        old, ok = project.readEntry(self.SCOPE, self.KEY, "")
+
+        if not len(self.tool.instances):
+            if ok:
+                project.removeEntry(self.SCOPE, self.KEY)
+            return
+
+        encoded = self.encode()
+        if ok and old == encoded:
+            return
+        project.writeEntry(self.SCOPE, self.KEY, encoded)
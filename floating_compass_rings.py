@@ -0,0 +1,161 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_rings.py
+from qgis.PyQt.QtCore import QSettings
+
+from .floating_compass_ground import format_length
+
+
+def parse_distances(value):
+    """"250, 500, 1000" or an iterable → sorted tuple of positive floats."""
+    if isinstance(value, str):
+        value = value.replace(";", ",").split(",")
+    out = set()
+    for v in value or ():
+        try:
+            d = float(v)
+        except (TypeError, ValueError):
+            continue
+        if d > 0:
+            out.add(d)
+    return tuple(sorted(out))
+
+
+class FloatingCompassRangeRings:
+    """
+    Concentric range rings around each compass, in ground distance
+    (m / km, via the ground-length meters-per-pixel factor) or fixed
+    pixels, each labelled.
+
+    radii(inst) is cached per compass on the factor, so it only
+    changes on scale / CRS change or when the compass moved; the
+    overlay turns the radius set into one QPainterPath through the
+    render cache and reuses it every frame (e.g. while an arm is
+    dragged).
+    """
+
+    SETTINGS_GROUP = "FloatingCompass"
+    UNITS = ("m", "km", "px")
+    MAX_RINGS = 10
+
+    # label position on the ring (azimuth, deg)
+    LABEL_DEG = 45.0
+
+    DEFAULTS = {
+        "enabled": False,
+        "distances": (250.0, 500.0, 1000.0),
+        "unit": "m",
+    }
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.params = dict(self.DEFAULTS)
+        self._radii = {}        # instance uid → (mpp, rings)
+        self._load()
+
+        tool.canvas.scaleChanged.connect(self.on_scale_changed)
+
+    def _load(self):
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        self.params["enabled"] = s.value(
+            "range_rings_enabled", self.DEFAULTS["enabled"], type=bool
+        )
+        self.params["distances"] = parse_distances(
+            s.value("range_rings_distances", "")
+        ) or self.DEFAULTS["distances"]
+        unit = s.value("range_rings_unit", self.DEFAULTS["unit"])
+        self.params["unit"] = unit if unit in self.UNITS else self.DEFAULTS["unit"]
+        s.endGroup()
+
+    def configure(self, enabled=None, distances=None, unit=None):
+        """Update and persist; None keeps the current value."""
+        if unit is not None and unit not in self.UNITS:
+            raise ValueError(f"unit must be one of {self.UNITS}")
+
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        if enabled is not None:
+            self.params["enabled"] = bool(enabled)
+            s.setValue("range_rings_enabled", self.params["enabled"])
+        if distances is not None:
+            values = parse_distances(distances)[: self.MAX_RINGS]
+            if not values:
+                s.endGroup()
+                raise ValueError("no valid ring distance")
+            self.params["distances"] = values
+            s.setValue(
+                "range_rings_distances", ",".join(f"{d:g}" for d in values)
+            )
+        if unit is not None:
+            self.params["unit"] = unit
+            s.setValue("range_rings_unit", unit)
+        s.endGroup()
+
+        self._radii = {}
+        self.tool.overlay.prepareGeometryChange()
+        self.tool._request_update(geometry=True)
+
+    @property
+    def enabled(self):
+        return self.params["enabled"]
+
+    def on_scale_changed(self, *args):
+        # ground rings change pixel size (the factor itself is
+        # re-measured by the ground lengths handler)
+        if self.enabled and self.params["unit"] != "px":
+            self.tool.overlay.prepareGeometryChange()
+            self.tool._request_update(geometry=True)
+
+    # =====================
+    # RADII
+    # =====================
+    def radii(self, inst):
+        """((pixel radius, label), ...) of inst, ascending."""
+        unit = self.params["unit"]
+        mpp = None
+        if unit != "px":
+            mpp = self.tool.ground.meters_per_pixel(inst)
+            if not mpp:
+                return ()
+
+        hit = self._radii.get(inst.uid)
+        if hit is not None and hit[0] == mpp:
+            return hit[1]
+
+        ground = self.tool.ground
+        rings = []
+        for d in self.params["distances"]:
+            if unit == "px":
+                px, label = int(round(d)), f"{d:g} px"
+            else:
+                m = d * 1000.0 if unit == "km" else d
+                px, label = int(round(m / mpp)), format_length(m, unit)
+            if ground.MIN_PX <= px <= ground.MAX_PX:
+                rings.append((px, label))
+
+        rings = tuple(rings)
+        self._radii[inst.uid] = (mpp, rings)
+        return rings
+
+    def max_radius(self, inst):
+        rings = self.radii(inst) if self.enabled else ()
+        return rings[-1][0] if rings else 0
+
+    def forget(self, inst_uid=None):
+        if inst_uid is None:
+            self._radii = {}
+        else:
+            self._radii.pop(inst_uid, None)
@@ -0,0 +1,178 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_separation.py
+from bisect import bisect_left, insort
+
+from qgis.PyQt.QtCore import QSettings
+
+
+class SortedArms:
+    """
+    Enabled arms of one compass kept sorted by azimuth.
+
+    sync() moves only the arms whose angle changed (bisect remove +
+    insort), so a drag costs O(log n) searches instead of a re-sort;
+    the set of enabled arms changing triggers a rebuild.
+    """
+
+    def __init__(self):
+        self.items = []         # sorted [(azimuth, arm index)]
+        self.angles = {}        # arm index → azimuth in items
+
+    def sync(self, arms):
+        current = {
+            i: float(a.get("angle_deg", 0.0)) % 360.0
+            for i, a in enumerate(arms or []) if a.get("enabled")
+        }
+        if current.keys() != self.angles.keys():
+            self.items = sorted((az, i) for i, az in current.items())
+            self.angles = current
+            return True
+
+        changed = False
+        for i, az in current.items():
+            old = self.angles[i]
+            if old == az:
+                continue
+            del self.items[bisect_left(self.items, (old, i))]
+            insort(self.items, (az, i))
+            self.angles[i] = az
+            changed = True
+        return changed
+
+    def neighbours(self):
+        """[(arm index, next arm index clockwise, separation deg)]."""
+        items = self.items
+        n = len(items)
+        if n < 2:
+            return []
+        out = []
+        for k, (az, i) in enumerate(items):
+            next_az, j = items[(k + 1) % n]
+            out.append((i, j, (next_az - az) % 360.0))
+        return out
+
+
+class FloatingCompassSeparation:
+    """
+    Angular separation and beam overlap between neighbouring arms,
+    drawn as colored arc segments outside the ring: green when the
+    beams do not overlap, orange when they overlap, red when the
+    separation is below min_separation_deg.
+
+    Beamwidth is per arm ("beamwidth" key) with beamwidth_deg as the
+    default. The sorted order is kept per compass (SortedArms), so
+    each drag step only repositions the dragged arm.
+    """
+
+    SETTINGS_GROUP = "FloatingCompass"
+
+    OK = "ok"
+    OVERLAP = "overlap"
+    TOO_CLOSE = "too close"
+
+    COLORS = {
+        OK: (60, 190, 90),
+        OVERLAP: (245, 160, 40),
+        TOO_CLOSE: (220, 40, 40),
+    }
+
+    DEFAULTS = {
+        "enabled": False,
+        "min_separation_deg": 60.0,
+        "beamwidth_deg": 65.0,
+    }
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.params = dict(self.DEFAULTS)
+        self._sorted = {}       # instance uid → SortedArms
+        self._load()
+
+    def _load(self):
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        self.params["enabled"] = s.value(
+            "separation_enabled", self.DEFAULTS["enabled"], type=bool
+        )
+        for key in ("min_separation_deg", "beamwidth_deg"):
+            self.params[key] = float(
+                s.value(f"separation_{key}", self.DEFAULTS[key])
+            )
+        s.endGroup()
+
+    def configure(self, enabled=None, min_separation_deg=None, beamwidth_deg=None):
+        """Update and persist; None keeps the current value."""
+        values = {
+            "enabled": enabled,
+            "min_separation_deg": min_separation_deg,
+            "beamwidth_deg": beamwidth_deg,
+        }
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        for key, value in values.items():
+            if value is None:
+                continue
+            self.params[key] = bool(value) if key == "enabled" else float(value)
+            s.setValue(f"separation_{key}", self.params[key])
+        s.endGroup()
+        self.tool._request_update()
+
+    @property
+    def enabled(self):
+        return self.params["enabled"]
+
+    def beamwidth(self, arm):
+        bw = arm.get("beamwidth")
+        return float(bw) if bw else self.params["beamwidth_deg"]
+
+    def result(self, inst):
+        """
+        Gaps of inst clockwise from north: list of dicts with
+        arm / next_arm (indices), start (azimuth), separation,
+        overlap (deg, ≥ 0) and state (ok / overlap / too close).
+        """
+        arms = inst.arms or []
+        order = self._sorted.get(inst.uid)
+        if order is None:
+            order = self._sorted[inst.uid] = SortedArms()
+        order.sync(arms)
+
+        out = []
+        for i, j, sep in order.neighbours():
+            overlap = max(
+                0.0, (self.beamwidth(arms[i]) + self.beamwidth(arms[j])) / 2.0 - sep
+            )
+            if sep < self.params["min_separation_deg"]:
+                state = self.TOO_CLOSE
+            elif overlap > 0.0:
+                state = self.OVERLAP
+            else:
+                state = self.OK
+            out.append({
+                "arm": i,
+                "next_arm": j,
+                "start": order.angles[i],
+                "separation": sep,
+                "overlap": overlap,
+                "state": state,
+            })
+        return out
+
+    def forget(self, inst_uid=None):
+        if inst_uid is None:
+            self._sorted = {}
+        else:
+            self._sorted.pop(inst_uid, None)
@@ -0,0 +1,470 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_swaps.py
+#
+# Swapped / misaligned sector detection from drive-test samples.
+#
+# Per sector: dominant bearing of the samples it served, seen from
+# its site. Per site: the permutation of measured bearings onto the
+# configured azimuths with the least total deviation; a non-identity
+# winner that beats the configured mapping by swap_margin_deg means
+# swapped feeders.
+#
+# The math is Qt-free (analyze_sites() also runs in a process pool,
+# see detect_swaps()); FloatingCompassSwapDetector fans site chunks
+# out as QgsTasks inside QGIS.
+#
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+
+import numpy as np
+
+try:
+    from . import floating_compass_geometry as cgeom
+except ImportError:
+    import floating_compass_geometry as cgeom
+
+
+# sites with more measured sectors are checked for misalignment only
+MAX_PERMUTED = 8
+
+DEFAULTS = {
+    "min_samples": 30,
+    "misalign_deg": 30.0,
+    "swap_margin_deg": 20.0,
+    "window_deg": 30.0,
+}
+
+OK = "ok"
+MISALIGNED = "misaligned"
+SWAPPED = "swapped"
+NO_DATA = "no data"
+
+
+def normalize_key(value):
+    """Join key as text: 1 / 1.0 / " 1" all become "1"; None for empty."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text or text.upper() == "NULL":
+        return None
+    try:
+        f = float(text)
+    except ValueError:
+        return text
+    return str(int(f)) if f.is_integer() else text
+
+
+# =====================
+# PER SITE
+# =====================
+def analyze_site(azimuths, bearing_groups, min_samples=30, misalign_deg=30.0,
+                 swap_margin_deg=20.0, window_deg=30.0):
+    """
+    Check one site.
+
+    azimuths: configured azimuth per sector; bearing_groups: array of
+    sample bearings (from the site) per sector. Returns one dict per
+    sector: measured, share, samples, deviation, status (ok /
+    misaligned / swapped / no data), swapped_with (sector index or
+    None) and confidence 0..1.
+    """
+    az = np.asarray(azimuths, dtype=float) % 360.0
+    n = len(az)
+
+    measured = np.full(n, np.nan)
+    share = np.zeros(n)
+    counts = np.array([len(b) for b in bearing_groups], dtype=np.int64)
+    for i, b in enumerate(bearing_groups):
+        if counts[i] >= min_samples:
+            measured[i], share[i] = cgeom.dominant_bearing(b, window_deg=window_deg)
+
+    deviation = cgeom.angle_diffs(measured, az)
+    valid = np.isfinite(measured)
+
+    # confidence factors: lobe concentration and sample support
+    support = share * (1.0 - np.exp(-counts / float(max(1, min_samples))))
+
+    status = np.where(valid, OK, NO_DATA).astype(object)
+    swapped_with = [None] * n
+    confidence = np.zeros(n)
+
+    idx = np.nonzero(valid)[0]
+    best = None
+    if 2 <= len(idx) <= MAX_PERMUTED:
+        perms = np.array(list(permutations(range(len(idx)))))       # (P, k)
+        cost = np.abs(
+            cgeom.angle_diffs(measured[idx][None, :], az[idx][perms])
+        )                                                           # (P, k)
+        total = cost.sum(axis=1)
+        winner = int(np.argmin(total))
+        identity = 0        # permutations() yields identity first
+        if total[identity] - total[winner] >= swap_margin_deg:
+            best = (perms[winner], cost[identity], cost[winner])
+
+    if best is not None:
+        perm, cost_now, cost_swap = best
+        for j, i in enumerate(idx):
+            target = idx[perm[j]]
+            if target == i:
+                continue
+            status[i] = SWAPPED
+            swapped_with[i] = int(target)
+            gain = np.clip((cost_now[j] - cost_swap[j]) / 90.0, 0.0, 1.0)
+            confidence[i] = support[i] * gain
+
+    for i in idx:
+        if status[i] != OK:
+            continue
+        off = abs(deviation[i])
+        if off > misalign_deg:
+            status[i] = MISALIGNED
+            confidence[i] = support[i] * np.clip(off / 90.0, 0.0, 1.0)
+        else:
+            confidence[i] = support[i] * (1.0 - off / max(misalign_deg, 1e-9))
+
+    return [
+        {
+            "measured": None if not valid[i] else float(measured[i]),
+            "share": float(share[i]),
+            "samples": int(counts[i]),
+            "deviation": None if not valid[i] else float(deviation[i]),
+            "status": status[i],
+            "swapped_with": swapped_with[i],
+            "confidence": float(confidence[i]),
+        }
+        for i in range(n)
+    ]
+
+
+def analyze_sites(sites, **params):
+    """
+    analyze_site() over a list of site dicts (site, x, y, sectors,
+    azimuths, bearings) → list of sector rows (site, sector, x, y,
+    azimuth + analyze_site() keys; swapped_with as sector id).
+    Module-level and NumPy-only, so it pickles for process pools.
+    """
+    opts = dict(DEFAULTS, **params)
+    rows = []
+    for site in sites:
+        result = analyze_site(site["azimuths"], site["bearings"], **opts)
+        for i, r in enumerate(result):
+            if r["swapped_with"] is not None:
+                r["swapped_with"] = site["sectors"][r["swapped_with"]]
+            r.update(
+                site=site["site"], sector=site["sectors"][i],
+                x=site["x"], y=site["y"],
+                azimuth=float(site["azimuths"][i]) % 360.0,
+            )
+            rows.append(r)
+    return rows
+
+
+def detect_swaps(sites, workers=None, chunk_sites=200, **params):
+    """
+    analyze_sites() fanned out over a process pool (headless runs);
+    workers=1 runs inline. Rows keep the input site order.
+    """
+    chunks = [sites[i:i + chunk_sites] for i in range(0, len(sites), chunk_sites)]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(chunks) <= 1:
+        return [row for c in chunks for row in analyze_sites(c, **params)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(analyze_sites, c, **params) for c in chunks]
+        return [row for f in futures for row in f.result()]
+
+
+def flagged_sites(rows, min_confidence=0.0):
+    """Site keys with a swapped / misaligned sector, most confident first."""
+    best = {}
+    for r in rows:
+        if r["status"] in (SWAPPED, MISALIGNED) and r["confidence"] >= min_confidence:
+            best[r["site"]] = max(best.get(r["site"], 0.0), r["confidence"])
+    return sorted(best, key=best.get, reverse=True)
+
+
+# =====================
+# SITES FROM A STORE
+# =====================
+def build_sites(sectors, store):
+    """
+    Site dicts for analyze_sites() from sector records (site, sector,
+    x, y, azimuth; x / y in the store CRS) and a DriveTestStore whose
+    cell column holds the serving sector id.
+
+    Bearings of all served samples are computed in one vectorized
+    pass, then split per sector with a single argsort.
+    """
+    cols = store.columns
+    code_of = {}
+    for code, name in enumerate(store.cells):
+        key = normalize_key(name)
+        if key is not None:
+            code_of.setdefault(key, []).append(code)
+
+    # store cell code → sector row; the extra last slot maps code -1
+    # (sample without a cell) to -1
+    lut = np.full(len(store.cells) + 1, -1, dtype=np.int64)
+    for row, s in enumerate(sectors):
+        for code in code_of.get(normalize_key(s["sector"]), ()):
+            lut[code] = row
+
+    sample_row = lut[cols["cell"]] if len(cols["cell"]) else np.empty(0, np.int64)
+    served = np.nonzero(sample_row >= 0)[0]
+    rows_of = sample_row[served]
+
+    sx = np.array([s["x"] for s in sectors], dtype=float)
+    sy = np.array([s["y"] for s in sectors], dtype=float)
+    b = store.bearings_from(
+        sx[rows_of], sy[rows_of], cols["x"][served], cols["y"][served]
+    )
+
+    order = np.argsort(rows_of, kind="stable")
+    b, rows_of = b[order], rows_of[order]
+    bounds = np.searchsorted(rows_of, np.arange(len(sectors) + 1))
+
+    sites = {}
+    for row, s in enumerate(sectors):
+        site = sites.setdefault(s["site"], {
+            "site": s["site"], "x": s["x"], "y": s["y"],
+            "sectors": [], "azimuths": [], "bearings": [],
+        })
+        site["sectors"].append(s["sector"])
+        site["azimuths"].append(s["azimuth"])
+        site["bearings"].append(b[bounds[row]:bounds[row + 1]])
+    return list(sites.values())
+
+
+# =====================
+# QGIS
+# =====================
+class FloatingCompassSwapDetector:
+    """
+    Runs the swap check of a sector point layer against the drive
+    test store: sites are split into CHUNK_SITES chunks, each run as
+    its own QgsTask (the task manager spreads them over its threads),
+    results are merged on the GUI thread when the last one finishes.
+    """
+
+    CHUNK_SITES = 200
+
+    FIELD_GUESSES = {
+        "site": ("site", "site_id", "siteid", "site id", "site_name", "enodeb", "bts"),
+        "sector": ("cell", "cell_id", "cellid", "cell id", "sector", "sector_id", "pci", "eci", "nci"),
+        "azimuth": ("azimuth", "azi", "az", "bearing", "dir"),
+    }
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.rows = []
+        self.crs_authid = None
+        self.params = dict(DEFAULTS)
+        self._tasks = []
+        self._partial = {}
+        self._run = 0
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def guess_fields(self, layer):
+        names = {f.name().lower(): f.name() for f in layer.fields()}
+        out = {}
+        for role, guesses in self.FIELD_GUESSES.items():
+            for g in guesses:
+                if g in names:
+                    out[role] = names[g]
+                    break
+        return out
+
+    def read_sectors(self, layer, site_field, sector_field, azimuth_field):
+        """Sector records with positions in the drive-test store CRS."""
+        from qgis.core import (
+            QgsCoordinateReferenceSystem,
+            QgsFeatureRequest,
+            QgsProject,
+        )
+
+        store = self.tool.drivetest.store
+        request = QgsFeatureRequest()
+        request.setDestinationCrs(
+            QgsCoordinateReferenceSystem(store.crs_authid),
+            QgsProject.instance().transformContext(),
+        )
+        request.setSubsetOfAttributes(
+            [site_field, sector_field, azimuth_field], layer.fields()
+        )
+
+        sectors = []
+        for f in layer.getFeatures(request):
+            g = f.geometry()
+            if g.isNull() or g.isEmpty():
+                continue
+            try:
+                azimuth = float(f[azimuth_field])
+            except (TypeError, ValueError):
+                continue
+            sector = normalize_key(f[sector_field])
+            if sector is None:
+                continue
+            pt = g.vertexAt(0)
+            sectors.append({
+                "site": normalize_key(f[site_field]) or sector,
+                "sector": sector,
+                "x": pt.x(),
+                "y": pt.y(),
+                "azimuth": azimuth,
+            })
+        return sectors
+
+    def run(self, layer, site_field=None, sector_field=None,
+            azimuth_field=None, **params):
+        """
+        Start the check; fields default to guess_fields(). Returns the
+        number of sites queued (0 when there is nothing to check).
+        """
+        from qgis.core import QgsApplication, QgsTask
+
+        unknown = set(params) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown swap check parameters: {sorted(unknown)}")
+
+        store = self.tool.drivetest.store
+        if not len(store) or not store.cells:
+            raise ValueError("import drive test samples with a serving cell column first")
+
+        guess = self.guess_fields(layer)
+        fields = {
+            "site": site_field or guess.get("site"),
+            "sector": sector_field or guess.get("sector"),
+            "azimuth": azimuth_field or guess.get("azimuth"),
+        }
+        missing = [role for role, name in fields.items() if not name]
+        if missing:
+            raise ValueError(
+                f"{layer.name()}: set the {', '.join(missing)} field(s)"
+            )
+
+        self.cancel()
+        self.params = dict(DEFAULTS, **params)
+        self.crs_authid = store.crs_authid
+
+        sectors = self.read_sectors(
+            layer, fields["site"], fields["sector"], fields["azimuth"]
+        )
+        sites = build_sites(sectors, store)
+        if not sites:
+            return 0
+
+        self._run += 1
+        run = self._run
+        self._partial = {}
+        chunks = [
+            sites[i:i + self.CHUNK_SITES]
+            for i in range(0, len(sites), self.CHUNK_SITES)
+        ]
+        for n, chunk in enumerate(chunks):
+            task = QgsTask.fromFunction(
+                f"Floating Compass: sector check {n + 1}/{len(chunks)}",
+                self._work,
+                chunk,
+                on_finished=lambda exc, result=None, n=n, total=len(chunks):
+                    self._chunk_done(run, n, total, exc, result),
+            )
+            self._tasks.append(task)
+            QgsApplication.taskManager().addTask(task)
+        return len(sites)
+
+    def _work(self, task, chunk):
+        return analyze_sites(chunk, **self.params)
+
+    def _chunk_done(self, run, n, total, exc, result):
+        if run != self._run:
+            return      # superseded by a newer run
+        if exc is not None:
+            self.cancel()
+            self.tool.iface.messageBar().pushWarning(
+                "Floating Compass", f"Sector check failed: {exc}"
+            )
+            return
+
+        self._partial[n] = result or []
+        if len(self._partial) < total:
+            return
+
+        self._tasks = []
+        self.rows = [row for i in range(total) for row in self._partial[i]]
+        self._partial = {}
+
+        counts = {}
+        for r in self.rows:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        self.tool.iface.statusBarIface().showMessage(
+            "Sector check: "
+            f"{counts.get(SWAPPED, 0)} swapped, "
+            f"{counts.get(MISALIGNED, 0)} misaligned, "
+            f"{counts.get(OK, 0)} ok, "
+            f"{counts.get(NO_DATA, 0)} without samples",
+            6000,
+        )
+
+    def cancel(self):
+        self._run += 1
+        for task in self._tasks:
+            try:
+                task.cancel()
+            except RuntimeError:
+                pass    # already finished and deleted
+        self._tasks = []
+        self._partial = {}
+
+    def flagged(self, min_confidence=0.0):
+        return flagged_sites(self.rows, min_confidence)
+
+    def site_rows(self, site):
+        site = normalize_key(site)
+        return [r for r in self.rows if r["site"] == site]
+
+    def open_site(self, site):
+        """
+        Add a compass at site with one arm per measured sector, at the
+        measured bearing and labelled "<sector> (<status>)". Sectors
+        without samples keep their configured azimuth, disabled. The
+        labels live on this compass' arms only; the tool-wide arm
+        labels of the other compasses are left alone.
+        """
+        rows = self.site_rows(site)
+        if not rows:
+            raise ValueError(f"no sector check result for site {site}")
+
+        max_arms = len(self.tool.arms or []) or 6
+        arms = []
+        for r in rows[:max_arms]:
+            measured = r["measured"] is not None
+            arms.append({
+                "angle": r["measured"] if measured else r["azimuth"],
+                "enabled": measured,
+            })
+
+        api = self.tool.api
+        api.add_compass(rows[0]["x"], rows[0]["y"], self.crs_authid, arms)
+
+        inst = self.tool.instances.active
+        for arm, r in zip(inst.arms, rows):
+            arm["label"] = f"{r['sector']} ({r['status']})"
+        self.tool._request_update()
+        api.set_site(rows[0]["site"])
@@ -0,0 +1,344 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_sweep.py
+from concurrent.futures import ThreadPoolExecutor
+
+from qgis.PyQt.QtCore import QObject, QSettings, QTimer, pyqtSignal
+from qgis.PyQt.QtGui import QColor
+from qgis.core import QgsGeometry, QgsRectangle, QgsWkbTypes
+from qgis.gui import QgsRubberBand
+
+from .floating_compass_layer_index import (
+    CanvasLayerTransforms,
+    LayerWatch,
+    layer_index,
+    saved_layer,
+)
+
+
+class _Signals(QObject):
+    # (generation, fids); emitted from the worker, delivered queued
+    done = pyqtSignal(int, object)
+
+
+class FloatingCompassRaySweep:
+    """
+    Highlights features of one layer crossed by the arm being
+    rotated / resized (center → arm end, within radius_px).
+
+    - ray updates are coalesced to one lookup per frame
+    - candidates: shared layer index, ray bounding box
+    - exact test: NumPy segment intersection against cached vertex
+      arrays (points: distance to the ray within a pixel tolerance)
+    - more than INLINE_MAX candidates → worker thread; one job in
+      flight, newer rays replace the pending one (latest wins) and
+      a job stops early once the interaction ends
+    - one reusable QgsRubberBand, set once per result
+    """
+
+    SETTINGS_GROUP = "FloatingCompass"
+    FRAME_MS = 16
+    INLINE_MAX = 200
+    POINT_TOLERANCE_PX = 4
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.layer = None
+        self.hits = []
+
+        self._index = None
+        self._arrays = {}
+        self._band = None
+        self._gen = 0
+        self._shown_gen = 0
+        self._cancelled = 0
+        self._ray = None
+        self._busy = False
+        self._pending = None
+        self._xforms = CanvasLayerTransforms(tool.canvas)
+        self._watch = LayerWatch(lambda: self.set_layer(None))
+
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._signals = _Signals()
+        self._signals.done.connect(self._on_done)
+
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._dispatch)
+
+    # =====================
+    # LAYER
+    # =====================
+    def set_layer(self, layer):
+        """Highlight features of vector layer (None = off)."""
+        if self._index is not None:
+            try:
+                self._index.changed.disconnect(self._on_index_changed)
+            except (TypeError, RuntimeError):
+                pass
+
+        self.finish()
+        self.layer = layer
+        self._arrays = {}
+        self._index = None
+        self._watch.watch(layer)
+
+        if self._band is not None:
+            self.tool.canvas.scene().removeItem(self._band)
+            self._band = None
+
+        if layer is not None:
+            self._index = layer_index(layer)
+            self._index.changed.connect(self._on_index_changed)
+
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        s.setValue("sweep_layer_id", layer.id() if layer else "")
+        s.endGroup()
+
+    def restore(self):
+        if self.layer is not None:
+            return
+
+        layer = saved_layer("sweep_layer_id")
+        if layer is not None:
+            self.set_layer(layer)
+
+    def _on_index_changed(self):
+        # rebind, never mutate: a worker may be reading the old dict
+        self._arrays = {}
+
+    @property
+    def enabled(self):
+        return self.layer is not None
+
+    def unload(self):
+        # keep the saved layer choice; just drop the band and worker
+        self.finish()
+        if self._index is not None:
+            try:
+                self._index.changed.disconnect(self._on_index_changed)
+            except (TypeError, RuntimeError):
+                pass
+        if self._band is not None:
+            self.tool.canvas.scene().removeItem(self._band)
+            self._band = None
+        self._watch.release()
+        self.layer = None
+        self._index = None
+        self._pool.shutdown(wait=False)
+
+    # =====================
+    # RAY UPDATES (GUI THREAD)
+    # =====================
+    def schedule(self, center, end):
+        """New ray in pixels (QPointF); looked up at most once per frame."""
+        if not self.enabled:
+            return
+        self._ray = (center, end)
+        if not self._timer.isActive():
+            self._timer.start(self.FRAME_MS)
+
+    def finish(self):
+        """Interaction ended: drop pending work and the highlight."""
+        self._timer.stop()
+        self._ray = None
+        self._pending = None
+        self._gen += 1
+        self._shown_gen = self._cancelled = self._gen
+        self.hits = []
+        if self._band is not None:
+            self._band.reset(self._band_type())
+
+    def _dispatch(self):
+        ray, self._ray = self._ray, None
+        if ray is None or self._index is None or not self._index.is_ready:
+            return
+
+        to_map = self.tool.canvas.getCoordinateTransform()
+        a = to_map.toMapCoordinates(int(round(ray[0].x())), int(round(ray[0].y())))
+        b = to_map.toMapCoordinates(int(round(ray[1].x())), int(round(ray[1].y())))
+        try:
+            xform = self._xforms.get(self.layer)[0]
+            a = xform.transform(a)
+            b = xform.transform(b)
+        except Exception:
+            return
+
+        tol = 0.0
+        if self._band_type() == QgsWkbTypes.PointGeometry:
+            # pixel tolerance in layer units, measured at the center
+            c = to_map.toMapCoordinates(int(round(ray[0].x())), int(round(ray[0].y())))
+            half = self.POINT_TOLERANCE_PX * self.tool.canvas.mapUnitsPerPixel()
+            try:
+                probe = xform.transformBoundingBox(QgsRectangle(
+                    c.x() - half, c.y() - half, c.x() + half, c.y() + half
+                ))
+            except Exception:
+                return
+            tol = max(probe.width(), probe.height()) / 2.0
+
+        self._gen += 1
+        job = (self._gen, (a.x(), a.y(), b.x(), b.y()), tol)
+
+        rect = QgsRectangle(a.x(), a.y(), b.x(), b.y())
+        rect.normalize()
+        rect.grow(tol)
+        candidates = self._index.intersects(rect)
+
+        if len(candidates) <= self.INLINE_MAX:
+            self._apply(job[0], self._compute(job, candidates))
+            return
+
+        if self._busy:
+            self._pending = (job, candidates)
+            return
+        self._submit(job, candidates)
+
+    def _submit(self, job, candidates):
+        self._busy = True
+        self._pool.submit(self._run, job, candidates)
+
+    # =====================
+    # WORKER
+    # =====================
+    def _run(self, job, candidates):
+        try:
+            fids = self._compute(job, candidates)
+        except Exception:
+            fids = None
+        self._signals.done.emit(job[0], fids)
+
+    def _stale(self, gen):
+        # a running job is finished unless the interaction ended;
+        # superseded rays never start (pending slot holds only the latest)
+        return gen <= self._cancelled
+
+    def _compute(self, job, candidates):
+        """Fids of candidates crossed by the ray (None if superseded)."""
+        import numpy as np
+        from . import floating_compass_geometry as cgeom
+
+        gen, (ax, ay, bx, by), tol = job
+        arrays = self._arrays
+
+        seg_parts, seg_owner = [], []
+        pt_parts, pt_owner = [], []
+
+        for n, fid in enumerate(candidates):
+            if n % 512 == 0 and self._stale(gen):
+                return None
+
+            arr = arrays.get(fid)
+            if arr is None:
+                arr = self._vertex_array(fid)
+                arrays[fid] = arr
+            kind, data = arr
+            if data is None or not len(data):
+                continue
+
+            if kind == "p":
+                pt_parts.append(data)
+                pt_owner.append(np.full(len(data), fid, dtype=np.int64))
+            else:
+                seg_parts.append(data)
+                seg_owner.append(np.full(len(data), fid, dtype=np.int64))
+
+        hit = []
+        if seg_parts:
+            segs = np.concatenate(seg_parts)
+            owner = np.concatenate(seg_owner)
+            mask = cgeom.segments_intersect(
+                ax, ay, bx, by, segs[:, 0], segs[:, 1], segs[:, 2], segs[:, 3]
+            )
+            hit.append(owner[mask])
+
+        if pt_parts:
+            pts = np.concatenate(pt_parts)
+            owner = np.concatenate(pt_owner)
+            d = cgeom.point_segment_distances(
+                pts[:, 0], pts[:, 1], ax, ay, bx, by
+            )
+            hit.append(owner[d <= tol])
+
+        if self._stale(gen):
+            return None
+        if not hit:
+            return []
+        return np.unique(np.concatenate(hit)).tolist()
+
+    def _vertex_array(self, fid):
+        """('s', (n, 4) segments) or ('p', (n, 2) points) of fid."""
+        import numpy as np
+
+        geom = self._index.geometry(fid)
+        if geom is None or geom.isNull():
+            return ("s", None)
+
+        gtype = QgsWkbTypes.geometryType(geom.wkbType())
+        if gtype == QgsWkbTypes.PointGeometry:
+            pts = [(v.x(), v.y()) for v in geom.vertices()]
+            return ("p", np.array(pts, dtype=float).reshape(-1, 2))
+
+        if gtype == QgsWkbTypes.PolygonGeometry:
+            geom = QgsGeometry(geom.constGet().boundary())
+
+        segs = []
+        for part in geom.constParts():
+            xy = np.array([(v.x(), v.y()) for v in part.vertices()], dtype=float)
+            if len(xy) >= 2:
+                segs.append(np.hstack((xy[:-1], xy[1:])))
+        if not segs:
+            return ("s", None)
+        return ("s", np.concatenate(segs))
+
+    # =====================
+    # RESULT (GUI THREAD)
+    # =====================
+    def _on_done(self, gen, fids):
+        self._busy = False
+        if self._pending is not None:
+            job, candidates = self._pending
+            self._pending = None
+            self._submit(job, candidates)
+        self._apply(gen, fids)
+
+    def _apply(self, gen, fids):
+        # older results than the one on screen are dropped (latest wins)
+        if fids is None or gen <= self._shown_gen or self.layer is None:
+            return
+        self._shown_gen = gen
+        self.hits = fids
+        self._show(fids)
+
+    def _band_type(self):
+        return QgsWkbTypes.geometryType(self.layer.wkbType()) if self.layer else (
+            QgsWkbTypes.LineGeometry
+        )
+
+    def _show(self, fids):
+        if self._band is None:
+            self._band = QgsRubberBand(self.tool.canvas, self._band_type())
+            self._band.setColor(QColor(255, 215, 0, 200))
+            self._band.setFillColor(QColor(255, 215, 0, 70))
+            self._band.setWidth(3)
+            self._band.setIconSize(10)
+
+        geoms = [self._index.geometry(fid) for fid in fids]
+        geoms = [g for g in geoms if g is not None and not g.isNull()]
+        if not geoms:
+            self._band.reset(self._band_type())
+            return
+        self._band.setToGeometry(QgsGeometry.collectGeometry(geoms), self.layer)
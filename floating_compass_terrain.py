@@ -0,0 +1,457 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_terrain.py
+from collections import OrderedDict
+
+import numpy as np
+
+from qgis.PyQt.QtCore import QSettings, QTimer
+from qgis.core import Qgis, QgsRectangle
+
+from . import floating_compass_geometry as cgeom
+from .floating_compass_layer_index import (
+    CanvasLayerTransforms,
+    LayerWatch,
+    canvas_distance_area,
+    saved_layer,
+)
+
+
+# raster data type → NumPy dtype (types missing in older QGIS skipped)
+_DTYPES = (
+    ("Byte", np.uint8),
+    ("Int8", np.int8),
+    ("UInt16", np.uint16),
+    ("Int16", np.int16),
+    ("UInt32", np.uint32),
+    ("Int32", np.int32),
+    ("Float32", np.float32),
+    ("Float64", np.float64),
+)
+
+
+def _numpy_dtype(data_type):
+    for name, dtype in _DTYPES:
+        value = getattr(Qgis, name, None)
+        if value is not None and value == data_type:
+            return dtype
+    return None
+
+
+def block_array(block, data_type):
+    """QgsRasterBlock → float (rows, cols) array, no data as NaN."""
+    h, w = block.height(), block.width()
+    dtype = _numpy_dtype(data_type)
+
+    if dtype is not None:
+        arr = np.frombuffer(bytes(block.data()), dtype=dtype)
+        arr = arr[: w * h].reshape(h, w).astype(float)
+    else:
+        # complex / ARGB types: slow path, never hit for DEMs
+        arr = np.array(
+            [[block.value(r, c) for c in range(w)] for r in range(h)],
+            dtype=float,
+        )
+
+    if block.hasNoDataValue():
+        arr[arr == block.noDataValue()] = np.nan
+    if block.hasNoData() and not block.hasNoDataValue():
+        for r in range(h):
+            for c in range(w):
+                if block.isNoData(r, c):
+                    arr[r, c] = np.nan
+    return arr
+
+
+class DemTileCache:
+    """
+    Fixed-size raster tiles of one DEM band, read with
+    QgsRasterDataProvider.block() and kept in an LRU cache.
+
+    sample() does nearest-pixel lookups for whole arrays of points
+    (layer CRS), reading each missing tile once.
+    """
+
+    TILE = 256
+    MAX_TILES = 64
+
+    def __init__(self, layer, band=1, max_tiles=None):
+        self.layer = layer
+        self.band = band
+        self.max_tiles = max_tiles or self.MAX_TILES
+
+        self.provider = layer.dataProvider()
+        self.data_type = self.provider.dataType(band)
+
+        ext = layer.extent()
+        self.width = layer.width()
+        self.height = layer.height()
+        self.x_min = ext.xMinimum()
+        self.y_max = ext.yMaximum()
+        self.x_res = ext.width() / self.width
+        self.y_res = ext.height() / self.height
+        self.tiles_x = -(-self.width // self.TILE)
+
+        self._tiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self._tiles.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def _tile(self, tx, ty):
+        key = (tx, ty)
+        arr = self._tiles.get(key)
+        if arr is not None:
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return arr
+
+        self.misses += 1
+        c0, r0 = tx * self.TILE, ty * self.TILE
+        w = min(self.TILE, self.width - c0)
+        h = min(self.TILE, self.height - r0)
+
+        x0 = self.x_min + c0 * self.x_res
+        y1 = self.y_max - r0 * self.y_res
+        rect = QgsRectangle(x0, y1 - h * self.y_res, x0 + w * self.x_res, y1)
+
+        block = self.provider.block(self.band, rect, w, h)
+        if block is None or not block.isValid():
+            arr = np.full((h, w), np.nan)
+        else:
+            arr = block_array(block, self.data_type)
+
+        self._tiles[key] = arr
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return arr
+
+    def sample(self, xs, ys):
+        """Elevations at points (layer CRS), NaN outside / no data."""
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        out = np.full(xs.shape, np.nan)
+
+        col = np.floor((xs - self.x_min) / self.x_res).astype(np.int64)
+        row = np.floor((self.y_max - ys) / self.y_res).astype(np.int64)
+        valid = (col >= 0) & (col < self.width) & (row >= 0) & (row < self.height)
+        if not valid.any():
+            return out
+
+        tx = col // self.TILE
+        ty = row // self.TILE
+        keys = np.where(valid, ty * self.tiles_x + tx, -1)
+
+        for key in np.unique(keys[valid]):
+            sel = keys == key
+            kx, ky = int(key % self.tiles_x), int(key // self.tiles_x)
+            tile = self._tile(kx, ky)
+            out[sel] = tile[
+                row[sel] - ky * self.TILE, col[sel] - kx * self.TILE
+            ]
+        return out
+
+
+class FloatingCompassTerrainProfile:
+    """
+    Terrain profile along one arm (center → arm end) for RF line of
+    sight checks: DEM elevations, LOS line between the antenna
+    heights, first Fresnel zone and clearance (earth bulge, k = 4/3).
+
+    The selected arm follows the last arm grabbed with the mouse.
+    Updates are coalesced to one per frame; DEM reads go through a
+    DemTileCache, so rotating an arm re-samples from memory.
+    """
+
+    SETTINGS_GROUP = "FloatingCompass"
+    FRAME_MS = 16
+    MIN_SAMPLES = 16
+    MAX_SAMPLES = 256
+
+    DEFAULT_FREQ_MHZ = 1800.0
+    DEFAULT_TX_HEIGHT_M = 30.0
+    DEFAULT_RX_HEIGHT_M = 1.5
+
+    # clearance below this share of the Fresnel radius is flagged
+    CLEARANCE_RATIO = 0.6
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.dem = None
+        self.band = 1
+        self.freq_mhz = self.DEFAULT_FREQ_MHZ
+        self.tx_height_m = self.DEFAULT_TX_HEIGHT_M
+        self.rx_height_m = self.DEFAULT_RX_HEIGHT_M
+
+        self.cache = None
+        self.profile = None
+        self.target = None      # (instance uid, arm index)
+
+        self._xforms = CanvasLayerTransforms(tool.canvas)
+        self._watch = LayerWatch(
+            lambda: self.set_dem(None), self._on_dem_changed
+        )
+
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.update)
+
+        tool.canvas.destinationCrsChanged.connect(self.schedule)
+
+    # =====================
+    # DEM
+    # =====================
+    def set_dem(self, layer, band=1, freq_mhz=None, tx_height_m=None,
+                rx_height_m=None):
+        """Use raster layer band as DEM (None = off)."""
+        self.dem = layer
+        self.band = int(band or 1)
+        if freq_mhz is not None:
+            self.freq_mhz = float(freq_mhz)
+        if tx_height_m is not None:
+            self.tx_height_m = float(tx_height_m)
+        if rx_height_m is not None:
+            self.rx_height_m = float(rx_height_m)
+
+        self.cache = DemTileCache(layer, self.band) if layer is not None else None
+        self._watch.watch(layer)
+
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        s.setValue("terrain_layer_id", layer.id() if layer else "")
+        s.setValue("terrain_band", self.band)
+        s.setValue("terrain_freq_mhz", self.freq_mhz)
+        s.setValue("terrain_tx_height_m", self.tx_height_m)
+        s.setValue("terrain_rx_height_m", self.rx_height_m)
+        s.endGroup()
+
+        self.update()
+
+    def restore(self):
+        if self.dem is not None:
+            return
+
+        layer = saved_layer("terrain_layer_id")
+        if layer is None:
+            return
+
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+        band = s.value("terrain_band", 1, int)
+        freq = s.value("terrain_freq_mhz", self.DEFAULT_FREQ_MHZ, float)
+        tx = s.value("terrain_tx_height_m", self.DEFAULT_TX_HEIGHT_M, float)
+        rx = s.value("terrain_rx_height_m", self.DEFAULT_RX_HEIGHT_M, float)
+        s.endGroup()
+        self.set_dem(layer, band, freq, tx, rx)
+
+    def _on_dem_changed(self):
+        if self.dem is not None:
+            self.cache = DemTileCache(self.dem, self.band)
+            # path-loss results are memoised per (dem id, band) only
+            pathloss = getattr(self.tool, "pathloss", None)
+            if pathloss is not None:
+                pathloss.forget()
+            self.schedule()
+
+    @property
+    def enabled(self):
+        return self.dem is not None
+
+    def _transform(self):
+        """Canvas CRS → DEM CRS."""
+        return self._xforms.get(self.dem)[0]
+
+    # =====================
+    # TARGET / UPDATES
+    # =====================
+    def select(self, inst, arm_index):
+        """Profile arm arm_index of compass instance inst."""
+        self.target = (inst.uid, arm_index)
+        self.schedule()
+
+    def schedule(self):
+        if not self.enabled:
+            return
+        if not self._timer.isActive():
+            self._timer.start(self.FRAME_MS)
+
+    def _target_arm(self):
+        if self.target is None:
+            return None, None
+        inst = self.tool.instances.get(self.target[0])
+        if inst is None or inst.center is None:
+            return None, None
+        idx = self.target[1]
+        if idx is None or idx >= len(inst.arms or []):
+            return None, None
+        arm = inst.arms[idx]
+        if not arm.get("enabled"):
+            return None, None
+        return inst, arm
+
+    def update(self):
+        old = self.profile
+        inst, arm = self._target_arm()
+        self.profile = (
+            self.compute(inst, arm)
+            if self.enabled and inst is not None else None
+        )
+        if old is not None or self.profile is not None:
+            self.tool._request_update(geometry=True)
+
+    # =====================
+    # PROFILE
+    # =====================
+    def compute(self, inst, arm, samples=None):
+        """
+        Profile dict of arm on inst: distance_m, elevation, los,
+        fresnel_m, clearance_m (arrays), flagged (clearance below
+        CLEARANCE_RATIO × Fresnel radius), blocked (below terrain),
+        length_m. None if the arm is off the DEM.
+        """
+        c = inst.center
+        radius = arm.get("radius_px") or inst.ring_radius
+        end = self.tool._endpoint_at(c, arm.get("angle_deg", 0.0), radius)
+
+        to_map = self.tool.canvas.getCoordinateTransform()
+        a = to_map.toMapCoordinates(int(round(c.x())), int(round(c.y())))
+        b = to_map.toMapCoordinates(int(round(end.x())), int(round(end.y())))
+
+        try:
+            xform = self._transform()
+            da_ = xform.transform(a)
+            db_ = xform.transform(b)
+        except Exception:
+            return None
+
+        n = samples or int(min(max(radius, self.MIN_SAMPLES), self.MAX_SAMPLES))
+        t = np.linspace(0.0, 1.0, n)
+        xs = da_.x() + (db_.x() - da_.x()) * t
+        ys = da_.y() + (db_.y() - da_.y()) * t
+
+        z = self.cache.sample(xs, ys)
+        if np.isnan(z).all():
+            return None
+
+        length_m = canvas_distance_area(self.tool.canvas).measureLine(a, b)
+        d = t * length_m
+
+        # endpoints without data: use nearest valid sample for the LOS
+        z_los = z.copy()
+        valid = ~np.isnan(z_los)
+        z_los[~valid] = np.interp(d[~valid], d[valid], z_los[valid])
+
+        los, radius_m, clearance = cgeom.los_clearance(
+            d, z_los, self.tx_height_m, self.rx_height_m, self.freq_mhz
+        )
+        flagged = valid & (clearance < self.CLEARANCE_RATIO * radius_m)
+        blocked = valid & (clearance < 0.0)
+
+        return {
+            "uid": inst.uid,
+            "arm_id": arm.get("id", ""),
+            "azimuth": float(arm.get("angle_deg", 0.0)) % 360.0,
+            "length_m": length_m,
+            "distance_m": d,
+            "elevation": z,
+            "los": los,
+            "fresnel_m": radius_m,
+            "clearance_m": clearance,
+            "flagged": flagged,
+            "blocked": blocked,
+            "clear": not flagged.any(),
+        }
+
+    # =====================
+    # MINI CHART
+    # =====================
+    CHART_W = 150
+    CHART_H = 64
+
+    def chart_polygons(self):
+        """
+        Chart-local (0..CHART_W, 0..CHART_H) QPolygonF for terrain
+        (closed), LOS, Fresnel lower edge, plus flagged QPointF list.
+        Cached on the profile dict.
+        """
+        p = self.profile
+        if p is None:
+            return None
+        cached = p.get("_chart")
+        if cached is not None:
+            return cached
+
+        from qgis.PyQt.QtCore import QPointF
+        from qgis.PyQt.QtGui import QPolygonF
+
+        d = p["distance_m"]
+        z = np.nan_to_num(p["elevation"], nan=np.nanmin(p["elevation"]))
+        los = p["los"]
+        lower = los - self.CLEARANCE_RATIO * p["fresnel_m"]
+
+        lo = float(min(z.min(), lower.min()))
+        hi = float(max(z.max(), los.max()))
+        span = max(hi - lo, 1.0)
+        w, h = self.CHART_W, self.CHART_H
+
+        x = d / (d[-1] or 1.0) * w
+
+        def y(v):
+            return h - (v - lo) / span * (h - 4) - 2
+
+        def poly(vx, vy):
+            return QPolygonF([QPointF(a, b) for a, b in zip(vx, vy)])
+
+        zy = y(z)
+        terrain = poly(
+            np.concatenate(([0.0], x, [w])),
+            np.concatenate(([h], zy, [h])),
+        )
+        flagged = [QPointF(a, b) for a, b in zip(x[p["flagged"]], zy[p["flagged"]])]
+
+        cached = {
+            "terrain": terrain,
+            "los": poly(x, y(los)),
+            "fresnel": poly(x, y(lower)),
+            "flagged": flagged,
+        }
+        p["_chart"] = cached
+        return cached
+
+    def chart_origin(self, inst, arm):
+        """Top-left (x, y) of the chart, beside the arm label."""
+        c = inst.center
+        radius = arm.get("radius_px") or inst.ring_radius
+        # screen angle: the chart sits left / right on the screen
+        ang = self.tool.view.screen_angle(float(arm.get("angle_deg", 0.0))) % 360.0
+        ax, ay = cgeom.screen_endpoint(c.x(), c.y(), ang, radius + 34)
+
+        x = ax - self.CHART_W - 6 if ang >= 180.0 else ax + 6
+        return x, ay - self.CHART_H / 2.0
+
+    def chart_target(self):
+        """(inst, arm, profile) to draw, or None."""
+        if self.profile is None:
+            return None
+        inst, arm = self._target_arm()
+        if inst is None or inst.uid != self.profile["uid"]:
+            return None
+        return inst, arm, self.profile
@@ -15,10 +15,79 @@
 from qgis.PyQt.QtCore import Qt, QPointF, QSettings, QTimer
 from qgis.PyQt.QtGui import QGuiApplication
 from qgis.gui import QgsMapTool
-import math
+from contextlib import contextmanager
+import os
 
-from .floating_compass_overlay import FloatingCompassOverlay
+from .floating_compass_overlay import (
+    FloatingCompassOverlay,
+    FloatingCompassRenderCache,
+)
 from .floating_compass_settings_dialog import FloatingCompassSettingsDialog
+from .floating_compass_api import FloatingCompassApi
+from .floating_compass_instances import CompassInstanceManager, copy_arms
+from .floating_compass_project import FloatingCompassProjectState
+from .floating_compass_profiles import FloatingCompassProfileStore
+from .floating_compass_history import CompassHistory, capture
+from . import floating_compass_geometry as cgeom
+from . import floating_compass_antenna as antenna
+from .floating_compass_nearest import FloatingCompassNearestSites
+from .floating_compass_aimed import FloatingCompassAimedSectors
+from .floating_compass_hover import FloatingCompassHoverReadout
+from .floating_compass_sweep import FloatingCompassRaySweep
+from .floating_compass_terrain import FloatingCompassTerrainProfile
+from .floating_compass_pathloss import FloatingCompassPathLoss
+from .floating_compass_gnss import FloatingCompassGnssFollow
+from .floating_compass_drivetest_cloud import FloatingCompassDriveTest
+from .floating_compass_swaps import FloatingCompassSwapDetector
+from .floating_compass_separation import FloatingCompassSeparation
+from .floating_compass_ground import FloatingCompassGroundLengths, format_length
+from .floating_compass_rings import FloatingCompassRangeRings
+from .floating_compass_views import CanvasView, FloatingCompassViews
+from .floating_compass_layout import add_to_layout
+from .floating_compass_measurements import (
+    FloatingCompassMeasurementLog,
+    measurement_record,
+)
+
+
+# =====================
+# SETTINGS COERCERS
+# =====================
+# (value, current) -> new value; invalid input keeps current
+def _as_int(v, cur):
+    try:
+        return int(v)
+    except Exception:
+        return cur
+
+
+def _as_bool(v, cur):
+    if isinstance(v, str):
+        return v.strip().lower() in ("1", "true", "yes", "on")
+    try:
+        return bool(v)
+    except Exception:
+        return cur
+
+
+def _as_lower(v, cur):
+    return str(v).lower() if v is not None else cur
+
+
+def _as_color(v, cur):
+    from qgis.PyQt.QtGui import QColor
+    try:
+        c = QColor(v)
+        return c if c.isValid() else cur
+    except Exception:
+        return cur
+
+
+_STYLE = FloatingCompassRenderCache.STYLE
+_DIAL = FloatingCompassRenderCache.DIAL
+_GEOMETRY = FloatingCompassRenderCache.GEOMETRY
+_TEXT = FloatingCompassRenderCache.TEXT
+_TEXT_FX = frozenset((_STYLE, _DIAL, _TEXT))
 
 
 class FloatingCompassMapTool(QgsMapTool):
@@ -38,11 +107,106 @@ class FloatingCompassMapTool(QgsMapTool):
     RING_RADIUS_MIN = 40
     RING_RADIUS_MAX = 250
 
+    # =====================
+    # SETTINGS DISPATCH TABLE
+    # =====================
+    # key -> (attribute, coercer, dependent render caches)
+    # caches None = not visual (no repaint needed)
+    SETTINGS_DISPATCH = {
+        # behaviour
+        "snap_enabled": ("snap_enabled", _as_bool, None),
+        "snap_step_deg": ("snap_step", _as_int, None),
+        "hold_to_open_settings_ms": ("hold_to_open_settings_ms", _as_int, None),
+        "hold_cancel_threshold_px": ("hold_cancel_threshold_px", _as_int, None),
+
+        # hit test
+        "hit_center_px": ("hit_center", _as_int, None),
+        "hit_endpoint_px": ("hit_endpoint", _as_int, None),
+        "hit_arm_line_px": ("hit_arm_line", _as_int, None),
+        "hit_ring_px": ("hit_ring", _as_int, None),
+
+        # visibility (drawn live)
+        "show_arms": ("show_arms", _as_bool, frozenset()),
+        "show_arc": ("show_arc", _as_bool, frozenset()),
+        "show_angle_text": ("show_angle_text", _as_bool, frozenset()),
+        "outline_enabled": ("outline_enabled", _as_bool, _TEXT_FX),
+        "shadow_enabled": ("shadow_enabled", _as_bool, _TEXT_FX),
+
+        # cardinal directions
+        "show_cardinal": ("show_cardinal", _as_bool, frozenset((_DIAL,))),
+        "show_north_triangle": ("show_north_triangle", _as_bool, frozenset((_DIAL,))),
+        "north_triangle_size_px": ("north_triangle_size_px", _as_int, frozenset((_DIAL,))),
+        "cardinal_font_size": ("cardinal_font_size", _as_int, frozenset((_DIAL,))),
+        "cardinal_offset_px": ("cardinal_offset_px", _as_int, frozenset((_DIAL,))),
+
+        # advanced visual
+        "center_dot_radius_px": ("center_dot_radius_px", _as_int, frozenset()),
+        "arm_endpoint_radius_px": ("arm_endpoint_radius_px", _as_int, frozenset()),
+        "ring_radius": ("ring_radius", _as_int, frozenset((_GEOMETRY,))),
+        "ring_tick_step_deg": ("ring_tick_step_deg", _as_int, frozenset((_DIAL,))),
+        "ring_major_tick_deg": ("ring_major_tick_deg", _as_int, frozenset((_DIAL,))),
+        "ring_label_step_deg": ("ring_label_step_deg", _as_int, frozenset((_DIAL,))),
+        "angle_font_size": ("angle_font_size", _as_int, frozenset((_STYLE, _TEXT))),
+        "label_font_size": ("label_font_size", _as_int, _TEXT_FX),
+        "arm_radius_min": ("arm_radius_min", _as_int, frozenset((_GEOMETRY,))),
+        "arm_radius_max": ("arm_radius_max", _as_int, frozenset((_GEOMETRY,))),
+        "ring_radius_min": ("ring_radius_min", _as_int, None),
+        "ring_radius_max": ("ring_radius_max", _as_int, None),
+        "arc_line_width": ("arc_line_width", _as_int, frozenset((_STYLE,))),
+        "arm_line_width": ("arm_line_width", _as_int, frozenset()),
+        "ring_line_width": ("ring_line_width", _as_int, frozenset((_STYLE, _DIAL))),
+        "angle_text_distance_px": ("angle_text_distance_px", _as_int, frozenset()),
+
+        # colors
+        "color_ring": ("color_ring", _as_color, frozenset((_STYLE, _DIAL))),
+        "color_arc": ("color_arc", _as_color, frozenset((_STYLE,))),
+        "color_text": ("color_text", _as_color, frozenset((_STYLE,))),
+        "color_outline": ("color_outline", _as_color, _TEXT_FX),
+        "color_shadow": ("color_shadow", _as_color, _TEXT_FX),
+        "ring_glow_alpha": ("ring_glow_alpha", _as_int, frozenset((_STYLE, _GEOMETRY))),
+        "text_shadow_alpha": ("text_shadow_alpha", _as_int, frozenset((_STYLE, _TEXT))),
+
+        # crosshair
+        "show_crosshair": ("show_crosshair", _as_bool, frozenset()),
+        "crosshair_style": ("crosshair_style", _as_lower, frozenset()),
+        "crosshair_size_px": ("crosshair_size_px", _as_int, frozenset()),
+        "crosshair_thickness": ("crosshair_thickness", _as_int, frozenset((_STYLE,))),
+        "crosshair_color": ("crosshair_color", _as_color, frozenset((_STYLE,))),
+    }
+
+    ARM_COLOR_KEYS = [
+        "color_arm_a",
+        "color_arm_b",
+        "color_arm_c",
+        "color_arm_d",
+        "color_arm_e",
+        "color_arm_f",
+    ]
+
+    # preset arm defaults (angle & color only), before QSettings
+    ARM_IDS = "ABCDEF"
+    DEFAULT_ARM_ANGLES = (0.0, 120.0, 240.0, 60.0, 180.0, 300.0)
+    DEFAULT_ARM_COLORS = (
+        "#FF0000", "#FFFF00", "#00FF00", "#FF007F", "#FFA500", "#0000FF",
+    )
+
     def __init__(self, iface):
         super().__init__(iface.mapCanvas())
         self.canvas = iface.mapCanvas()
         self.iface = iface
 
+        # =====================
+        # COMPASS INSTANCES
+        # =====================
+        # center / arms / ring_radius are properties that delegate
+        # to the active instance (see INSTANCE STATE below)
+        self.instances = CompassInstanceManager()
+        self.hover_instance = None
+        self._placing_new = False
+        self._arms = []
+        self._ring_radius = 200
+        self._ring_m = None
+
         # =====================
         # LOAD SETTINGS
         # =====================
@@ -222,7 +386,6 @@ class FloatingCompassMapTool(QgsMapTool):
         # =====================
         # STATE
         # =====================
-        self.center = None
         self.arm_a_angle = 0.0
         self.arm_b_angle = 90.0
 
@@ -238,6 +401,15 @@ class FloatingCompassMapTool(QgsMapTool):
         self.hold_timer.setSingleShot(True)
         self.hold_timer.timeout.connect(self.open_settings_dialog)
 
+        # =====================
+        # BATCH STATE (see batch())
+        # =====================
+        self._batch_depth = 0
+        self._batch_update = False
+        self._batch_geometry = False
+        self._batch_arms = set()
+        self._batch_ring = False
+
         # =====================
         # ARM MODEL
         # =====================
@@ -247,8 +419,99 @@ class FloatingCompassMapTool(QgsMapTool):
         # =====================
         # OVERLAY
         # =====================
-        self.overlay = FloatingCompassOverlay(self.canvas, self)
+        # canvas rotation (cached, arm angles stay true azimuths)
+        self.view = CanvasView(self.canvas, self._on_rotation_changed)
+
+        self.render_cache = FloatingCompassRenderCache(self)
+        self.overlay = FloatingCompassOverlay(
+            self.canvas, self, self.render_cache
+        )
         self.overlay.setVisible(False)
+
+        # additional 2D map views: one overlay + proxy tool each
+        self.views = FloatingCompassViews(self)
+
+        # =====================
+        # SCRIPTING API
+        # =====================
+        self.api = FloatingCompassApi(self)
+
+        # =====================
+        # PROJECT-EMBEDDED STATE
+        # =====================
+        self.project_state = FloatingCompassProjectState(self)
+
+        # =====================
+        # NAMED PROFILES (read on first use)
+        # =====================
+        self.profiles = FloatingCompassProfileStore()
+
+        # =====================
+        # UNDO / REDO (geometry, per press → release)
+        # =====================
+        self.history = CompassHistory()
+        self._history_before = None
+
+        # =====================
+        # MEASUREMENT LOG (GeoPackage, background writer)
+        # =====================
+        self.site_name = ""
+        self.measurements = FloatingCompassMeasurementLog()
+
+        # =====================
+        # NEAREST SITES (ghost rays, shared layer index)
+        # =====================
+        self.nearest = FloatingCompassNearestSites(self)
+        self.canvas.extentsChanged.connect(self.nearest.refresh)
+
+        # =====================
+        # AIMED SECTORS (reverse bearing to the center)
+        # =====================
+        self.aimed = FloatingCompassAimedSectors(self)
+        self.canvas.extentsChanged.connect(self.aimed.refresh)
+
+        # =====================
+        # GROUND LENGTHS (arm / ring radii in metres)
+        # =====================
+        self.ground = FloatingCompassGroundLengths(self)
+        self.range_rings = FloatingCompassRangeRings(self)
+
+        # =====================
+        # HOVER READOUT (feature under cursor, throttled)
+        # =====================
+        self.hover_readout = FloatingCompassHoverReadout(self)
+
+        # =====================
+        # RAY SWEEP (features crossed by the dragged arm)
+        # =====================
+        self.sweep = FloatingCompassRaySweep(self)
+
+        # =====================
+        # TERRAIN PROFILE (selected arm, block-cached DEM)
+        # =====================
+        self.terrain = FloatingCompassTerrainProfile(self)
+        self.canvas.extentsChanged.connect(self.terrain.schedule)
+
+        # =====================
+        # PATH LOSS (graded arms, memoized per compass)
+        # =====================
+        self.pathloss = FloatingCompassPathLoss(self)
+
+        # =====================
+        # GNSS FOLLOW (NMEA feed / replay)
+        # =====================
+        self.gnss = FloatingCompassGnssFollow(self)
+
+        # =====================
+        # DRIVE TEST (columnar samples, offset-colored cloud)
+        # =====================
+        self.drivetest = FloatingCompassDriveTest(self)
+        self.swaps = FloatingCompassSwapDetector(self)
+
+        # =====================
+        # SECTOR SEPARATION (arcs between neighbouring arms)
+        # =====================
+        self.separation = FloatingCompassSeparation(self)
         
         # =================================================
         # FORCE LOAD CURRENT SETTINGS ON INIT
@@ -256,6 +519,158 @@ class FloatingCompassMapTool(QgsMapTool):
         self._load_settings_from_qsettings()
     
     
+    # =====================
+    # INSTANCE STATE
+    # =====================
+    # Without an active instance these fall back to the template
+    # state that the next placed compass starts from.
+    @property
+    def center(self):
+        inst = self.instances.active
+        return inst.center if inst is not None else None
+
+    @center.setter
+    def center(self, pos):
+        inst = self.instances.active
+
+        if pos is None:
+            # remove active compass, keep its arms as template
+            if inst is not None:
+                self._arms = inst.arms
+                self._ring_radius = inst.ring_radius
+                self._ring_m = inst.ring_m
+                self.instances.remove(inst)
+                if self.hover_instance is inst:
+                    self.hover_instance = None
+            return
+
+        if inst is None:
+            self.instances.add(
+                pos, self._ring_radius, self._arms, ring_m=self._ring_m
+            )
+        else:
+            inst.center = pos
+
+    @property
+    def arms(self):
+        inst = self.instances.active
+        return inst.arms if inst is not None else self._arms
+
+    @arms.setter
+    def arms(self, arms):
+        inst = self.instances.active
+        if inst is not None:
+            inst.arms = arms
+        else:
+            self._arms = arms
+
+    @property
+    def ring_radius(self):
+        inst = self.instances.active
+        return inst.ring_radius if inst is not None else self._ring_radius
+
+    @ring_radius.setter
+    def ring_radius(self, radius):
+        self._ring_radius = radius
+        inst = self.instances.active
+        if inst is not None:
+            inst.ring_radius = radius
+
+    def arm_label(self, idx, arm=None):
+        """Label of arm idx: its own "label" key, else the tool-wide one."""
+        own = arm.get("label") if arm is not None else None
+        if own:
+            return own
+        return self.arm_labels[idx] if idx < len(self.arm_labels) else ""
+
+    def add_instance(self, pos):
+        """
+        Add another compass at pixel pos, copying the active
+        compass arms. Becomes the active instance.
+        """
+        if self.center is None:
+            self._place_compass(pos)
+            return self.instances.active
+
+        self._init_arms_if_needed()
+        arms = copy_arms(self.arms)
+        for arm in arms:
+            arm.pop("label", None)      # per-compass, not inherited
+        inst = self.instances.add(
+            QPointF(pos), self.ring_radius, arms,
+            ring_m=self.instances.active.ring_m,
+        )
+        self.ground.refresh([inst])
+        self.project_state.mark_dirty()
+        self._request_update(geometry=True)
+        return inst
+
+    def remove_instance(self, inst=None):
+        """Remove inst (default: active). Hides overlay if none left."""
+        inst = inst or self.instances.active
+        if inst is None:
+            return
+
+        self.overlay.prepareGeometryChange()
+        if inst is self.instances.active:
+            self.center = None
+        else:
+            self.instances.remove(inst)
+            if self.hover_instance is inst:
+                self.hover_instance = None
+
+        if not len(self.instances):
+            self.overlay.setVisible(False)
+        self.separation.forget(inst.uid)
+        self.ground.forget(inst.uid)
+        self.range_rings.forget(inst.uid)
+        self.project_state.mark_dirty()
+        self._request_update()
+        self.nearest.refresh()
+        self.aimed.refresh()
+        self.terrain.schedule()
+
+    def remove_all_instances(self):
+        """
+        Remove every compass at once. The active compass arms and
+        ring become the template for the next placed compass.
+        """
+        inst = self.instances.active
+        if inst is None:
+            return
+
+        self.overlay.prepareGeometryChange()
+        self._arms = inst.arms
+        self._ring_radius = inst.ring_radius
+        self._ring_m = inst.ring_m
+        self.instances.clear()
+        self.hover_instance = None
+
+        self.separation.forget()
+        self.ground.forget()
+        self.range_rings.forget()
+
+    def _instance_hit(self, inst, pos):
+        c = inst.center
+        d = self.dist(pos, c)
+
+        if d <= self.hit_center:
+            return True
+        if abs(d - inst.ring_radius) <= self.hit_ring:
+            return True
+
+        for arm in inst.arms:
+            if not arm.get("enabled") or not arm.get("rotatable"):
+                continue
+            radius = arm.get("radius_px") or inst.ring_radius
+            end = self._endpoint_at(c, arm["angle_deg"], radius)
+            if self.dist(pos, end) <= self.hit_endpoint:
+                return True
+            if self.point_to_line_dist(pos, c, end) <= self.hit_arm_line:
+                return True
+
+        return False
+
     def _init_arms_if_needed(self):
         if self.arms_initialized:
             return
@@ -264,11 +679,11 @@ class FloatingCompassMapTool(QgsMapTool):
         from qgis.PyQt.QtCore import QSettings
 
         self.arms = []
-        arm_ids = "ABCDEF"
+        arm_ids = self.ARM_IDS
 
         # Preset Defaults (ANGLE & COLOR ONLY)
-        default_angles = [0.0, 120.0, 240.0, 60.0, 180.0, 300.0]
-        default_colors = ["#FF0000", "#FFFF00", "#00FF00", "#FF007F", "#FFA500", "#0000FF"]
+        default_angles = self.DEFAULT_ARM_ANGLES
+        default_colors = self.DEFAULT_ARM_COLORS
 
         s = QSettings()
         s.beginGroup(self.SETTINGS_GROUP)
@@ -333,9 +748,10 @@ class FloatingCompassMapTool(QgsMapTool):
 
 
     
-    def apply_mode_preset(self, mode, sector_count=None):
+    def apply_mode_preset(self, mode, sector_count=None, arms=None):
         self._init_arms_if_needed()
         mode = (mode or "NORMAL").upper()
+        arms = self.arms if arms is None else arms
         
         # Hitung berapa arm yang aktif
         if mode == "NORMAL":
@@ -347,7 +763,7 @@ class FloatingCompassMapTool(QgsMapTool):
 
         default_angles = [0.0, 120.0, 240.0, 60.0, 180.0, 300.0]
 
-        for idx, arm in enumerate(self.arms):
+        for idx, arm in enumerate(arms):
             if idx < active_limit:
                 arm["enabled"] = True
                 # Jika di mode MULTI dan arm baru saja diaktifkan, gunakan preset
@@ -372,10 +788,13 @@ class FloatingCompassMapTool(QgsMapTool):
         self.hold_timer.stop()
         self._holding_center = False
         self._hold_start_pos = None
+        self.hover_readout.stop()
+        self.sweep.finish()
 
         self.active_handle = self.HANDLE_NONE
         self.last_mouse = None
         self.is_free_mode = False
+        self.views.deactivate()
 
         super().deactivate()
 
@@ -399,10 +818,116 @@ class FloatingCompassMapTool(QgsMapTool):
         # Apply mode preset (does NOT change visuals in Phase 1)
         # self.apply_mode_preset(self.mode, self.multi_sector_count)
 
+        # compasses saved in the project (decoded lazily, once)
+        self.project_state.ensure_loaded()
+        self.nearest.restore()
+        self.aimed.restore()
+        self.hover_readout.restore()
+        self.sweep.restore()
+        self.terrain.restore()
+
         if self.center is not None:
             self.overlay.prepareGeometryChange()
             self.overlay.setVisible(True)
             self.overlay.update()
+        self.views.activate()
+
+
+    # =====================
+    # PLACEMENT
+    # =====================
+    def _place_compass(self, pos):
+        """
+        Create the protractor at pixel position pos
+        (first click, or api.set_center_* while hidden).
+        """
+        self.center = QPointF(pos)
+
+        from qgis.PyQt.QtCore import QSettings
+        s = QSettings()
+        s.beginGroup(self.SETTINGS_GROUP)
+
+        # =====================
+        # RESTORE RING
+        # =====================
+        self.ring_radius = s.value("ring_radius", self.ring_radius, int)
+
+        # =====================
+        # RESTORE ARM SNAPSHOT
+        # =====================
+        arm_snapshot = []
+        for i in range(6):
+            arm_snapshot.append({
+                "angle": s.value(f"arm_{i}_angle", None),
+                "radius": s.value(f"arm_{i}_radius", None),
+                "enabled": s.value(f"arm_{i}_enabled", None),
+                "color": s.value(f"arm_{i}_color", None),
+            })
+
+        s.endGroup()
+
+        # =====================
+        # INIT ARM MODEL (ONCE)
+        # =====================
+        self._init_arms_if_needed()
+        
+        # =====================
+        # APPLY MODE PRESET (FIX NORMAL ARM NOT SHOWING)
+        # =====================
+        self.apply_mode_preset(self.mode, self.multi_sector_count)
+
+        # =====================
+        # APPLY SNAPSHOT (SAFE)
+        # =====================
+        for idx, arm in enumerate(self.arms):
+            snap = arm_snapshot[idx]
+
+            # enabled
+            if snap["enabled"] is not None:
+                arm["enabled"] = str(snap["enabled"]).lower() == "true"
+
+            # angle
+            if snap["angle"] is not None:
+                try:
+                    arm["angle_deg"] = float(snap["angle"])
+                except Exception:
+                    pass
+
+            # radius (🔥 FIX UTAMA)
+            raw_radius = None
+            if snap["radius"] is not None:
+                try:
+                    raw_radius = int(snap["radius"])
+                except Exception:
+                    raw_radius = None
+
+            if raw_radius is None:
+                raw_radius = self.ring_radius
+
+            arm["radius_px"] = self.clamp(
+                raw_radius,
+                self.arm_radius_min,
+                self.arm_radius_max
+            )
+
+            # color
+            if snap["color"] is not None:
+                try:
+                    from qgis.PyQt.QtGui import QColor
+                    arm["color"] = QColor(snap["color"])
+                except Exception:
+                    pass
+
+        # sync helper fields
+        if len(self.arms) >= 2:
+            self.arm_a_angle = self.arms[0]["angle_deg"]
+            self.arm_b_angle = self.arms[1]["angle_deg"]
+
+        self.overlay.setVisible(True)
+        self.ground.refresh([self.instances.active])
+        self._request_update(geometry=True)
+        self.nearest.refresh()
+        self.aimed.refresh()
 
 
     # =====================
@@ -411,94 +936,34 @@ class FloatingCompassMapTool(QgsMapTool):
     def canvasPressEvent(self, event):
         pos = QPointF(event.pos())
 
-        # First click → create protractor
+        # First click → create protractor (GNSS follow places it itself)
         if self.center is None:
-            self.center = pos
-
-            from qgis.PyQt.QtCore import QSettings
-            s = QSettings()
-            s.beginGroup(self.SETTINGS_GROUP)
-
-            # =====================
-            # RESTORE RING
-            # =====================
-            self.ring_radius = s.value("ring_radius", self.ring_radius, int)
-
-            # =====================
-            # RESTORE ARM SNAPSHOT
-            # =====================
-            arm_snapshot = []
-            for i in range(6):
-                arm_snapshot.append({
-                    "angle": s.value(f"arm_{i}_angle", None),
-                    "radius": s.value(f"arm_{i}_radius", None),
-                    "enabled": s.value(f"arm_{i}_enabled", None),
-                    "color": s.value(f"arm_{i}_color", None),
-                })
-
-            s.endGroup()
-
-            # =====================
-            # INIT ARM MODEL (ONCE)
-            # =====================
-            self._init_arms_if_needed()
-            
-            # =====================
-            # APPLY MODE PRESET (FIX NORMAL ARM NOT SHOWING)
-            # =====================
-            self.apply_mode_preset(self.mode, self.multi_sector_count)
-
-            # =====================
-            # APPLY SNAPSHOT (SAFE)
-            # =====================
-            for idx, arm in enumerate(self.arms):
-                snap = arm_snapshot[idx]
-
-                # enabled
-                if snap["enabled"] is not None:
-                    arm["enabled"] = str(snap["enabled"]).lower() == "true"
-
-                # angle
-                if snap["angle"] is not None:
-                    try:
-                        arm["angle_deg"] = float(snap["angle"])
-                    except Exception:
-                        pass
-
-                # radius (🔥 FIX UTAMA)
-                raw_radius = None
-                if snap["radius"] is not None:
-                    try:
-                        raw_radius = int(snap["radius"])
-                    except Exception:
-                        raw_radius = None
-
-                if raw_radius is None:
-                    raw_radius = self.ring_radius
-
-                arm["radius_px"] = self.clamp(
-                    raw_radius,
-                    self.arm_radius_min,
-                    self.arm_radius_max
-                )
+            if not self.gnss.active:
+                self._place_compass(pos)
+            return
 
-                # color
-                if snap["color"] is not None:
-                    try:
-                        from qgis.PyQt.QtGui import QColor
-                        arm["color"] = QColor(snap["color"])
-                    except Exception:
-                        pass
+        # =====================
+        # PICK TOPMOST INSTANCE
+        # =====================
+        hit = self.instances.hit_test(pos, self._instance_hit)
 
-            # sync helper fields
-            if len(self.arms) >= 2:
-                self.arm_a_angle = self.arms[0]["angle_deg"]
-                self.arm_b_angle = self.arms[1]["angle_deg"]
+        # "Add compass" armed from context menu → click on empty area
+        if self._placing_new and event.button() == Qt.LeftButton:
+            self._placing_new = False
+            if hit is None:
+                self.add_instance(pos)
+                return
 
+        if hit is not None and hit is not self.instances.active:
             self.overlay.prepareGeometryChange()
-            self.overlay.setVisible(True)
+            self.instances.activate(hit)
             self.overlay.update()
-            return
+            self.nearest.refresh()
+            self.aimed.refresh()
+
+        # geometry before this interaction (diffed on release)
+        inst = self.instances.active
+        self._history_before = (inst.uid, capture(inst))
         
         # =====================
         # RIGHT CLICK HANDLING (FIXED)→ CONTEXT MENU (STEP 1)
@@ -556,13 +1021,7 @@ class FloatingCompassMapTool(QgsMapTool):
             if radius is None:
                 continue  # 🔒 HARD GUARD
 
-            ang = arm["angle_deg"]
-            rad = math.radians(ang)
-
-            end = QPointF(
-                self.center.x() + radius * math.sin(rad),
-                self.center.y() - radius * math.cos(rad)
-            )
+            end = self.endpoint(arm["angle_deg"], radius)
 
             d_ep = self.dist(pos, end)
             if d_ep <= self.hit_endpoint:
@@ -581,6 +1040,7 @@ class FloatingCompassMapTool(QgsMapTool):
 
         if best_arm is not None:
             self.active_arm_index = best_arm
+            self.terrain.select(self.instances.active, best_arm)
             self.last_mouse = pos
             self.active_handle = (
                 self.HANDLE_ARM_A_RESIZE if best_mode == "endpoint"
@@ -609,59 +1069,28 @@ class FloatingCompassMapTool(QgsMapTool):
         # =====================
         # HOVER DETECTION
         # =====================
-        self.hover_handle = self.HANDLE_NONE
-        tooltip = ""
-        cursor = Qt.ArrowCursor
-
-        if self.dist(pos, self.center) <= self.hit_center:
-            self.hover_handle = self.HANDLE_CENTER_MOVE
-            tooltip = "Move Protractor (Hold = Settings)"
-            cursor = Qt.SizeAllCursor
+        if self.active_handle == self.HANDLE_NONE:
+            hover_inst = (
+                self.instances.hit_test(pos, self._instance_hit)
+                or self.instances.active
+            )
         else:
-            for idx, arm in enumerate(getattr(self, "arms", [])):
-                if not arm.get("enabled") or not arm.get("rotatable"):
-                    continue
-
-                ang = arm.get("angle_deg", 0.0)
-                rad = math.radians(ang)
-
-                # ===============================
-                # 🔒 SAFETY GUARD: radius valid
-                # ===============================
-                radius = arm.get("radius_px")
-                if radius is None:
-                    radius = self.ring_radius
-
-                if radius is None:
-                    continue  # hard guard, jangan crash
-
-                end = QPointF(
-                    self.center.x() + radius * math.sin(rad),
-                    self.center.y() - radius * math.cos(rad)
-                )
+            hover_inst = self.instances.active
 
-                if self.dist(pos, end) <= self.hit_endpoint:
-                    self.hover_handle = self.HANDLE_ARM_A_RESIZE
-                    tooltip = f"Resize Arm {arm.get('id', '')}"
-                    cursor = Qt.SizeVerCursor
-                    break
+        self.hover_instance = hover_inst
+        self.hover_handle, tooltip, cursor = self._hover_test(hover_inst, pos)
 
-                if self.point_to_line_dist(pos, self.center, end) <= self.hit_arm_line:
-                    self.hover_handle = self.HANDLE_ARM_A_ROTATE
-                    tooltip = f"Rotate Arm {arm.get('id', '')} (Shift = Free)"
-                    cursor = Qt.CrossCursor
-                    break
+        self.canvas.setCursor(cursor)
 
-            if self.hover_handle == self.HANDLE_NONE:
-                if (
-                    self.ring_radius is not None and
-                    abs(self.dist(pos, self.center) - self.ring_radius) <= self.hit_ring
-                ):
-                    self.hover_handle = self.HANDLE_ROTATE_BOTH
-                    tooltip = "Rotate Both Arms / Resize Ring (RMB)"
-                    cursor = Qt.OpenHandCursor
+        # nothing under the cursor → bearing readout of hovered feature
+        if (
+            not tooltip
+            and self.active_handle == self.HANDLE_NONE
+            and self.hover_readout.enabled
+        ):
+            tooltip = self.hover_readout.text
+            self.hover_readout.schedule(pos)
 
-        self.canvas.setCursor(cursor)
         self.iface.mainWindow().statusBar().showMessage(tooltip)
 
         if self.active_handle == self.HANDLE_NONE:
@@ -687,7 +1116,11 @@ class FloatingCompassMapTool(QgsMapTool):
         # MOVE / ROTATE / RESIZE
         # =====================
         if self.active_handle == self.HANDLE_CENTER_MOVE:
-            self.center = pos
+            # a compass driven by the GNSS feed is not dragged
+            if not self.gnss.follows(self.instances.active):
+                self.center = pos
+                self.nearest.refresh()
+                self.aimed.refresh()
 
         elif self.active_handle == self.HANDLE_RING_RESIZE:
             dy = self.last_mouse.y() - pos.y()
@@ -704,6 +1137,7 @@ class FloatingCompassMapTool(QgsMapTool):
             arm = self.arms[self.active_arm_index]
             ang = self.bearing(self.center, pos)
             arm["angle_deg"] = ang if self.is_free_mode else self.snap(ang)
+            self._schedule_sweep(arm)
 
         elif self.active_handle == self.HANDLE_ROTATE_BOTH:
             a1 = self.bearing(self.center, self.last_mouse)
@@ -724,11 +1158,77 @@ class FloatingCompassMapTool(QgsMapTool):
                 self.arm_radius_min,
                 self.arm_radius_max
             )
+            self._schedule_sweep(arm)
+
+        # center / ring / arms moved: profile follows (once per frame)
+        self.terrain.schedule()
+        self.drivetest.refresh()
 
         self.overlay.update()
+        self.views.update()
+
+    def _schedule_sweep(self, arm):
+        if not self.sweep.enabled:
+            return
+        radius = arm.get("radius_px") or self.ring_radius
+        end = self._endpoint_at(self.center, arm.get("angle_deg", 0.0), radius)
+        self.sweep.schedule(QPointF(self.center), end)
+
+
+
+
+    def _hover_test(self, inst, pos):
+        """(handle, tooltip, cursor) for pos over compass instance inst."""
+        c = inst.center
+
+        if self.dist(pos, c) <= self.hit_center:
+            return (
+                self.HANDLE_CENTER_MOVE,
+                "Move Protractor (Hold = Settings)",
+                Qt.SizeAllCursor
+            )
+
+        for arm in inst.arms:
+            if not arm.get("enabled") or not arm.get("rotatable"):
+                continue
 
+            # ===============================
+            # 🔒 SAFETY GUARD: radius valid
+            # ===============================
+            radius = arm.get("radius_px")
+            if radius is None:
+                radius = inst.ring_radius
+
+            if radius is None:
+                continue  # hard guard, jangan crash
+
+            end = self._endpoint_at(c, arm.get("angle_deg", 0.0), radius)
+
+            if self.dist(pos, end) <= self.hit_endpoint:
+                return (
+                    self.HANDLE_ARM_A_RESIZE,
+                    f"Resize Arm {arm.get('id', '')}",
+                    Qt.SizeVerCursor
+                )
+
+            if self.point_to_line_dist(pos, c, end) <= self.hit_arm_line:
+                return (
+                    self.HANDLE_ARM_A_ROTATE,
+                    f"Rotate Arm {arm.get('id', '')} (Shift = Free)",
+                    Qt.CrossCursor
+                )
 
+        if (
+            inst.ring_radius is not None and
+            abs(self.dist(pos, c) - inst.ring_radius) <= self.hit_ring
+        ):
+            return (
+                self.HANDLE_ROTATE_BOTH,
+                "Rotate Both Arms / Resize Ring (RMB)",
+                Qt.OpenHandCursor
+            )
 
+        return self.HANDLE_NONE, "", Qt.ArrowCursor
 
     def canvasReleaseEvent(self, event):
         # stop long-press
@@ -737,6 +1237,7 @@ class FloatingCompassMapTool(QgsMapTool):
         self._hold_start_pos = None
 
         # reset interaction state
+        self.sweep.finish()
         self.active_handle = self.HANDLE_NONE
         self.last_mouse = None
         self.is_free_mode = False
@@ -749,28 +1250,155 @@ class FloatingCompassMapTool(QgsMapTool):
 
         if hasattr(self, "active_arm_index"):
             self.active_arm_index = None
+
+        # locked ground lengths follow the dragged pixel radii
+        self.ground.sync_from_pixels(self.instances.active)
+        self._record_history()
         
         # =====================
         # AUTO PERSIST GEOMETRY
         # =====================
-        from qgis.PyQt.QtCore import QSettings
-        s = QSettings()
-        s.beginGroup(self.SETTINGS_GROUP)
+        self._persist_ring()
+        self._persist_arms([
+            idx for idx, arm in enumerate(getattr(self, "arms", []))
+            if arm.get("enabled")
+        ])
 
-        # persist ring radius
-        s.setValue("ring_radius", int(self.ring_radius))
+        self._request_update()
 
-        # persist arm radius & angle
-        for idx, arm in enumerate(getattr(self, "arms", [])):
-            if arm.get("enabled"):
-                if arm.get("radius_px") is not None:
-                    s.setValue(f"arm_{idx}_radius", int(arm["radius_px"]))
-                s.setValue(f"arm_{idx}_angle", float(arm.get("angle_deg", 0.0)))
 
-        s.endGroup()
+    # =====================
+    # UNDO / REDO
+    # =====================
+    def _record_history(self):
+        before, self._history_before = self._history_before, None
+        if before is None:
+            return
 
-        self.overlay.update()
+        uid, state = before
+        inst = self.instances.get(uid)
+        if inst is not None:
+            self.history.record(uid, state, capture(inst))
+
+    def undo(self):
+        self._step_history(self.history.undo)
+
+    def redo(self):
+        self._step_history(self.history.redo)
+
+    def _step_history(self, step):
+        self.overlay.prepareGeometryChange()
+        inst = step(self.instances.get)
+        if inst is None:
+            return
+        self.ground.sync_from_pixels(inst)
+
+        if inst is self.instances.active:
+            self._ring_radius = inst.ring_radius
+            if len(inst.arms) >= 2:
+                self.arm_a_angle = inst.arms[0]["angle_deg"]
+                self.arm_b_angle = inst.arms[1]["angle_deg"]
+
+            self._persist_ring()
+            self._persist_arms()
+        else:
+            self.project_state.mark_dirty()
+
+        self._request_update(geometry=True)
+
+    def reset_geometry(self):
+        """
+        Reset arms of the active compass to the preset azimuths of
+        the current mode, arm length = ring radius. Undoable.
+        """
+        inst = self.instances.active
+        if inst is None:
+            return
+
+        self._init_arms_if_needed()
+        before = capture(inst)
+
+        default_angles = [0.0, 120.0, 240.0, 60.0, 180.0, 300.0]
+        radius = self.clamp(
+            inst.ring_radius, self.arm_radius_min, self.arm_radius_max
+        )
+        for idx, arm in enumerate(inst.arms):
+            arm["angle_deg"] = default_angles[idx]
+            arm["radius_px"] = radius
+        self.apply_mode_preset(self.mode, self.multi_sector_count, inst.arms)
+        self.ground.sync_from_pixels(inst)
+
+        self.history.record(inst.uid, before, capture(inst))
+
+        self.overlay.prepareGeometryChange()
+        self.arm_a_angle = inst.arms[0]["angle_deg"]
+        self.arm_b_angle = inst.arms[1]["angle_deg"]
+        self._persist_arms()
+        self._request_update(geometry=True)
+
+    # =====================
+    # MEASUREMENT LOG
+    # =====================
+    def record_measurement(self, inst=None):
+        """Queue the active compass (or inst) for the measurement log."""
+        rec = measurement_record(self, inst)
+        if rec is None:
+            return None
+
+        self.measurements.record(rec)
+
+        try:
+            site = f" [{rec['site']}]" if rec["site"] else ""
+            self.iface.statusBarIface().showMessage(
+                f"Measurement recorded{site}: "
+                + ", ".join(f"{a[1]} {a[2]:.1f}°" for a in rec["arms"]),
+                2000
+            )
+        except Exception:
+            pass
+        return rec
+
+    # =====================
+    # ANTENNA PATTERNS
+    # =====================
+    def set_arm_pattern(self, arm_index, path, inst=None):
+        """Draw the MSI / Planet pattern file around arm (None = off)."""
+        inst = inst or self.instances.active
+        if inst is None or not 0 <= arm_index < len(inst.arms or []):
+            return False
+
+        arm = inst.arms[arm_index]
+        if path:
+            antenna.forget(path)            # pick up edits on disk
+            if antenna.load_pattern(path) is None:
+                return False
+            arm["pattern_file"] = path
+        else:
+            arm.pop("pattern_file", None)
+
+        self.project_state.mark_dirty()
+        self._request_update()
+        return True
+
+    def _choose_arm_pattern(self, arm_index):
+        from qgis.PyQt.QtWidgets import QFileDialog
+
+        s = QSettings()
+        last_dir = s.value("FloatingCompass/pattern_dir", "")
+        path, _ = QFileDialog.getOpenFileName(
+            self.canvas,
+            "Antenna Pattern",
+            last_dir,
+            "Antenna patterns (*.msi *.pln *.txt);;All files (*)",
+        )
+        if not path:
+            return
+        s.setValue("FloatingCompass/pattern_dir", os.path.dirname(path))
 
+        if not self.set_arm_pattern(arm_index, path):
+            self.iface.messageBar().pushWarning(
+                "Floating Compass", f"Not a valid MSI / Planet pattern: {path}"
+            )
 
     # =====================
     # SETTINGS
@@ -886,293 +1514,838 @@ class FloatingCompassMapTool(QgsMapTool):
             menu_multi.addAction(act)
             
         menu.addMenu(menu_multi)
-        
-        # tampilkan menu
-        menu.exec_(self.canvas.mapToGlobal(event.pos()))
+
+        # -----------------
+        # Profiles
+        # -----------------
+        menu.addMenu(self._build_profiles_menu(menu))
+
+        # -----------------
+        # Compass instances
+        # -----------------
+        menu.addSeparator()
+
+        act_add = QAction(
+            QIcon(os.path.join(icon_dir, "compass.svg")),
+            "Add Compass (click to place)",
+            self.canvas
+        )
+        act_add.triggered.connect(self._arm_place_new)
+        menu.addAction(act_add)
+
+        if len(self.instances) > 1:
+            act_remove = QAction("Remove This Compass", self.canvas)
+            act_remove.triggered.connect(lambda: self.remove_instance())
+            menu.addAction(act_remove)
+
+        # -----------------
+        # Nearest sites
+        # -----------------
+        menu.addMenu(self._layer_picker_menu(
+            menu, "Nearest Sites", self.nearest.layer,
+            self._point_layer, self.nearest.set_layer,
+        ))
+        menu.addMenu(self._build_aimed_menu(menu))
+        menu.addMenu(self._layer_picker_menu(
+            menu, "Hover Readout", self.hover_readout.layer,
+            self._spatial_layer, self.hover_readout.set_layer,
+        ))
+        menu.addMenu(self._layer_picker_menu(
+            menu, "Sweep Highlight", self.sweep.layer,
+            self._spatial_layer, self.sweep.set_layer,
+        ))
+        menu.addMenu(self._layer_picker_menu(
+            menu, "Terrain Profile (DEM)", self.terrain.dem,
+            self._dem_layer, self.terrain.set_dem,
+        ))
+        menu.addMenu(self._build_pattern_menu(menu))
+        menu.addMenu(self._build_pathloss_menu(menu))
+        menu.addMenu(self._build_separation_menu(menu))
+        menu.addMenu(self._build_ground_menu(menu))
+        menu.addMenu(self._build_range_rings_menu(menu))
+        menu.addMenu(self._build_gnss_menu(menu))
+        menu.addMenu(self._build_drivetest_menu(menu))
+        menu.addMenu(self._build_layout_menu(menu))
+
+        # -----------------
+        # Measurement log
+        # -----------------
+        menu.addSeparator()
+
+        act_record = QAction("Record Measurement (M)", self.canvas)
+        act_record.triggered.connect(lambda: self.record_measurement())
+        menu.addAction(act_record)
+        
+        # tampilkan menu
+        # global position: the event may come from another map view
+        menu.exec_(event.globalPos())
 
 
     
     
-    # =====================
-    # APPLY SETTINGS (LIVE)
-    # =====================
-    def apply_settings(self, s):
-        from qgis.PyQt.QtGui import QColor
-        from qgis.PyQt.QtCore import QSettings
+    @staticmethod
+    def _point_layer(layer):
+        from qgis.core import QgsVectorLayer, QgsWkbTypes
 
-        # =====================
-        # MODE STATE (TRACK OLD)
-        # =====================
-        old_mode = getattr(self, "mode", "NORMAL")
-        old_sector_count = getattr(self, "multi_sector_count", 3)
+        return (
+            isinstance(layer, QgsVectorLayer)
+            and layer.geometryType() == QgsWkbTypes.PointGeometry
+        )
 
-        if "mode" in s:
-            self.mode = s["mode"]
+    @staticmethod
+    def _spatial_layer(layer):
+        from qgis.core import QgsVectorLayer
 
-        if "multi_sector_count" in s:
-            self.multi_sector_count = int(s["multi_sector_count"])
+        return isinstance(layer, QgsVectorLayer) and layer.isSpatial()
 
-        # =====================
-        # ARM LABELS
-        # =====================
-        if not hasattr(self, "arm_labels"):
-            self.arm_labels = ["A", "B", "C", "D", "E", "F"]
+    @staticmethod
+    def _dem_layer(layer):
+        from qgis.core import QgsRasterLayer
 
-        for idx, key in enumerate([f"label_{l}" for l in "ABCDEF"]):
-            if key in s:
-                val = str(s[key]).strip()
-                self.arm_labels[idx] = val if val else self.arm_labels[idx]
+        return isinstance(layer, QgsRasterLayer) and layer.bandCount() >= 1
 
-        def to_int(v, default=0):
-            try:
-                return int(v)
-            except Exception:
-                return default
+    def _layer_picker_menu(self, parent, title, current, accept, setter):
+        """
+        "Off" plus one checkable action per project layer passing
+        accept(layer); picking an action calls setter(layer or None).
+        """
+        from qgis.PyQt.QtWidgets import QMenu
+        from qgis.core import QgsProject
 
-        # =====================
-        # BEHAVIOUR
-        # =====================
-        if "snap_enabled" in s:
-            self.snap_enabled = bool(s["snap_enabled"])
+        menu = QMenu(title, parent)
 
-        if "snap_step_deg" in s:
-            self.snap_step = to_int(s["snap_step_deg"], self.snap_step)
+        act_off = menu.addAction("Off")
+        act_off.setCheckable(True)
+        act_off.setChecked(current is None)
+        act_off.triggered.connect(lambda: setter(None))
+        menu.addSeparator()
+
+        for layer in QgsProject.instance().mapLayers().values():
+            if not accept(layer):
+                continue
 
-        if "hold_to_open_settings_ms" in s:
-            self.hold_to_open_settings_ms = to_int(
-                s["hold_to_open_settings_ms"],
-                self.hold_to_open_settings_ms
+            act = menu.addAction(layer.name())
+            act.setCheckable(True)
+            act.setChecked(current is not None and current.id() == layer.id())
+            act.triggered.connect(
+                lambda checked=False, lyr=layer: setter(lyr)
             )
 
-        if "hold_cancel_threshold_px" in s:
-            self.hold_cancel_threshold_px = to_int(
-                s["hold_cancel_threshold_px"],
-                self.hold_cancel_threshold_px
+        return menu
+
+    def _build_aimed_menu(self, parent):
+        aimed = self.aimed
+        menu = self._layer_picker_menu(
+            parent, "Sectors Aimed Here", aimed.layer,
+            self._point_layer, self._set_aimed_layer,
+        )
+
+        menu.addSeparator()
+        for km in (1, 2, 5, 10, 20):
+            act = menu.addAction(f"Within {km} km")
+            act.setCheckable(True)
+            act.setChecked(abs(aimed.radius_m - km * 1000.0) < 1e-6)
+            act.triggered.connect(
+                lambda checked=False, m=km * 1000.0: aimed.set_radius(m)
             )
 
-        # =====================
-        # VISIBILITY
-        # =====================
-        if "show_arms" in s:
-            self.show_arms = bool(s["show_arms"])
+        return menu
+
+    def _set_aimed_layer(self, layer):
+        try:
+            self.aimed.set_layer(layer)
+        except ValueError as e:
+            self.iface.messageBar().pushWarning("Floating Compass", str(e))
 
-        if "show_arc" in s:
-            self.show_arc = bool(s["show_arc"])
+    def _build_pattern_menu(self, parent):
+        from qgis.PyQt.QtWidgets import QMenu
 
-        if "show_angle_text" in s:
-            self.show_angle_text = bool(s["show_angle_text"])
+        menu = QMenu("Antenna Pattern", parent)
 
-        if "outline_enabled" in s:
-            self.outline_enabled = bool(s["outline_enabled"])
+        for idx, arm in enumerate(self.arms or []):
+            if not arm.get("enabled"):
+                continue
 
-        if "shadow_enabled" in s:
-            self.shadow_enabled = bool(s["shadow_enabled"])
-        
-        # =====================
-        # CARDINAL DIRECTIONS (STEP 3)
-        # =====================
-        if "show_cardinal" in s:
-            self.show_cardinal = bool(s["show_cardinal"])
+            label = self.arm_label(idx, arm) or arm.get("id", idx)
+            current = arm.get("pattern_file")
+            name = ""
+            if current:
+                pattern = antenna.load_pattern(current)
+                name = f" ({pattern['name'] if pattern else 'invalid'})"
 
-        if "show_north_triangle" in s:
-            self.show_north_triangle = bool(s["show_north_triangle"])
-        
-        if "north_triangle_size_px" in s:
-            self.north_triangle_size_px = int(s["north_triangle_size_px"])
+            act = menu.addAction(f"Arm {label}{name}…")
+            act.triggered.connect(
+                lambda checked=False, i=idx: self._choose_arm_pattern(i)
+            )
+            if current:
+                act_clear = menu.addAction(f"Clear Arm {label}")
+                act_clear.triggered.connect(
+                    lambda checked=False, i=idx: self.set_arm_pattern(i, None)
+                )
 
-        if "cardinal_font_size" in s:
-            self.cardinal_font_size = int(s["cardinal_font_size"])
+        if menu.isEmpty():
+            menu.setEnabled(False)
+        return menu
 
-        if "cardinal_offset_px" in s:
-            self.cardinal_offset_px = int(s["cardinal_offset_px"])
+    def _build_gnss_menu(self, parent):
+        from qgis.PyQt.QtWidgets import QMenu
 
+        menu = QMenu("GNSS Follow", parent)
+        gnss = self.gnss
 
-        # =====================
-        # HIT TEST
-        # =====================
-        if "hit_center_px" in s:
-            self.hit_center = to_int(s["hit_center_px"], self.hit_center)
+        if gnss.active:
+            act_stop = menu.addAction("Stop Following")
+            act_stop.triggered.connect(gnss.stop)
+        else:
+            act_live = menu.addAction("Follow Receiver…")
+            act_live.triggered.connect(self._start_gnss_live)
+            act_replay = menu.addAction("Replay NMEA Log…")
+            act_replay.triggered.connect(self._start_gnss_replay)
 
-        if "hit_endpoint_px" in s:
-            self.hit_endpoint = to_int(s["hit_endpoint_px"], self.hit_endpoint)
+        menu.addSeparator()
+        act_rotate = menu.addAction("Rotate by Heading")
+        act_rotate.setCheckable(True)
+        act_rotate.setChecked(gnss.rotate)
+        act_rotate.toggled.connect(lambda on: setattr(gnss, "rotate", on))
 
-        if "hit_arm_line_px" in s:
-            self.hit_arm_line = to_int(s["hit_arm_line_px"], self.hit_arm_line)
+        return menu
 
-        if "hit_ring_px" in s:
-            self.hit_ring = to_int(s["hit_ring_px"], self.hit_ring)
+    def _start_gnss_live(self):
+        from qgis.PyQt.QtWidgets import QInputDialog
 
-        # =====================
-        # ADVANCED VISUAL
-        # =====================
-        if "center_dot_radius_px" in s:
-            self.center_dot_radius_px = to_int(
-                s["center_dot_radius_px"], self.center_dot_radius_px
+        s = QSettings()
+        last = s.value("FloatingCompass/gnss_source", "tcp:localhost:10110")
+        source, ok = QInputDialog.getText(
+            self.canvas,
+            "GNSS Follow",
+            "NMEA source (tcp:host:port or serial:/dev/ttyUSB0:4800):",
+            text=last,
+        )
+        if not ok or not source.strip():
+            return
+        s.setValue("FloatingCompass/gnss_source", source.strip())
+        self.gnss.start(source.strip(), rotate=self.gnss.rotate)
+
+    def _start_gnss_replay(self):
+        from qgis.PyQt.QtWidgets import QFileDialog, QInputDialog
+
+        s = QSettings()
+        path, _ = QFileDialog.getOpenFileName(
+            self.canvas,
+            "Replay NMEA Log",
+            s.value("FloatingCompass/gnss_log_dir", ""),
+            "NMEA logs (*.nmea *.nma *.log *.txt);;All files (*)",
+        )
+        if not path:
+            return
+        s.setValue("FloatingCompass/gnss_log_dir", os.path.dirname(path))
+
+        speed, ok = QInputDialog.getDouble(
+            self.canvas, "Replay NMEA Log", "Speed (× real time):",
+            1.0, 0.1, 1000.0, 1,
+        )
+        if ok:
+            self.gnss.start("file:" + path, speed, rotate=self.gnss.rotate)
+
+    def _build_drivetest_menu(self, parent):
+        from qgis.PyQt.QtWidgets import QMenu
+
+        menu = QMenu("Drive Test", parent)
+        dt = self.drivetest
+
+        act_import = menu.addAction("Import CSV…")
+        act_import.triggered.connect(self._import_drive_test)
+
+        if dt.enabled or dt.task is not None:
+            act_clear = menu.addAction(
+                f"Clear ({len(dt.store)} samples)"
             )
+            act_clear.triggered.connect(dt.clear)
+
+        if dt.enabled and dt.store.cells:
+            menu.addSeparator()
+            menu.addMenu(self._build_swaps_menu(menu))
+
+        return menu
+
+    def _build_swaps_menu(self, parent):
+        from qgis.PyQt.QtWidgets import QMenu
+        from qgis.core import QgsProject, QgsVectorLayer, QgsWkbTypes
+
+        menu = QMenu("Swapped Sectors", parent)
+        swaps = self.swaps
+
+        if swaps.running:
+            act_cancel = menu.addAction("Cancel Check")
+            act_cancel.triggered.connect(swaps.cancel)
+        else:
+            for layer in QgsProject.instance().mapLayers().values():
+                if (
+                    not isinstance(layer, QgsVectorLayer)
+                    or layer.geometryType() != QgsWkbTypes.PointGeometry
+                ):
+                    continue
+                act = menu.addAction(f"Check {layer.name()}")
+                act.triggered.connect(
+                    lambda checked=False, lyr=layer: self._check_swaps(lyr)
+                )
+
+        flagged = swaps.flagged()
+        if flagged:
+            menu.addSeparator()
+            sub = menu.addMenu(f"Open Flagged Site ({len(flagged)})")
+            for site in flagged[:20]:
+                act = sub.addAction(str(site))
+                act.triggered.connect(
+                    lambda checked=False, s=site: self.swaps.open_site(s)
+                )
 
-        if "arm_endpoint_radius_px" in s:
-            self.arm_endpoint_radius_px = to_int(
-                s["arm_endpoint_radius_px"], self.arm_endpoint_radius_px
+        return menu
+
+    def _check_swaps(self, layer):
+        from qgis.PyQt.QtWidgets import QInputDialog
+
+        names = [f.name() for f in layer.fields()]
+        fields = self.swaps.guess_fields(layer)
+        for role in ("site", "sector", "azimuth"):
+            if role in fields:
+                continue
+            name, ok = QInputDialog.getItem(
+                self.canvas, "Swapped Sectors",
+                f"{layer.name()}: {role} field", names, 0, False,
             )
-        
-        if "ring_radius" in s:
-            self.ring_radius = to_int(
-                s["ring_radius"], self.ring_radius
+            if not ok:
+                return
+            fields[role] = name
+
+        try:
+            self.swaps.run(
+                layer, fields["site"], fields["sector"], fields["azimuth"]
             )
-        
-        if "ring_tick_step_deg" in s:
-            self.ring_tick_step_deg = to_int(
-                s["ring_tick_step_deg"], self.ring_tick_step_deg
+        except ValueError as e:
+            self.iface.messageBar().pushWarning("Floating Compass", str(e))
+
+    def _import_drive_test(self):
+        from qgis.PyQt.QtWidgets import QFileDialog
+        from qgis.core import QgsCoordinateReferenceSystem
+        from qgis.gui import QgsProjectionSelectionDialog
+
+        s = QSettings()
+        path, _ = QFileDialog.getOpenFileName(
+            self.canvas,
+            "Import Drive Test",
+            s.value("FloatingCompass/drivetest_dir", ""),
+            "Drive test exports (*.csv *.txt *.tsv *.fmt);;All files (*)",
+        )
+        if not path:
+            return
+        s.setValue("FloatingCompass/drivetest_dir", os.path.dirname(path))
+
+        dlg = QgsProjectionSelectionDialog(self.canvas)
+        dlg.setWindowTitle("Drive Test Coordinates CRS")
+        dlg.setCrs(QgsCoordinateReferenceSystem(
+            s.value("FloatingCompass/drivetest_crs", "EPSG:4326")
+        ))
+        if not dlg.exec_():
+            return
+        crs = dlg.crs().authid()
+        s.setValue("FloatingCompass/drivetest_crs", crs)
+
+        try:
+            self.drivetest.import_file(path, crs=crs)
+        except (OSError, ValueError) as e:
+            self.iface.messageBar().pushWarning("Floating Compass", str(e))
+
+    def _build_separation_menu(self, parent):
+        from qgis.PyQt.QtWidgets import QMenu
+
+        menu = QMenu("Sector Separation", parent)
+        sep = self.separation
+        params = sep.params
+
+        act_show = menu.addAction("Show")
+        act_show.setCheckable(True)
+        act_show.setChecked(sep.enabled)
+        act_show.toggled.connect(lambda on: sep.configure(enabled=on))
+
+        menu.addSeparator()
+        for deg in (30, 45, 60, 90):
+            act = menu.addAction(f"Flag Below {deg}°")
+            act.setCheckable(True)
+            act.setChecked(params["min_separation_deg"] == deg)
+            act.triggered.connect(
+                lambda checked=False, d=deg: sep.configure(min_separation_deg=d)
             )
 
-        if "ring_major_tick_deg" in s:
-            self.ring_major_tick_deg = to_int(
-                s["ring_major_tick_deg"], self.ring_major_tick_deg
+        menu.addSeparator()
+        for deg in (33, 45, 65, 90):
+            act = menu.addAction(f"Default Beamwidth {deg}°")
+            act.setCheckable(True)
+            act.setChecked(params["beamwidth_deg"] == deg)
+            act.triggered.connect(
+                lambda checked=False, d=deg: sep.configure(beamwidth_deg=d)
             )
 
-        if "ring_label_step_deg" in s:
-            self.ring_label_step_deg = to_int(
-                s["ring_label_step_deg"], self.ring_label_step_deg
+        return menu
+
+    def _build_ground_menu(self, parent):
+        from qgis.PyQt.QtWidgets import QMenu
+
+        menu = QMenu("Ground Lengths", parent)
+        ground = self.ground
+        inst = self.instances.active
+
+        act_lock = menu.addAction("Lock Lengths to Ground")
+        act_lock.setCheckable(True)
+        act_lock.setEnabled(inst is not None)
+        act_lock.setChecked(inst is not None and ground.is_locked(inst))
+        act_lock.toggled.connect(
+            lambda on: ground.lock(inst) if on else ground.unlock(inst)
+        )
+
+        act_ring = menu.addAction("Set Ring Distance…")
+        act_ring.setEnabled(inst is not None)
+        act_ring.triggered.connect(self._prompt_ring_distance)
+
+        for idx, arm in enumerate(inst.arms if inst is not None else []):
+            if not arm.get("enabled"):
+                continue
+            label = self.arm_label(idx, arm) or arm.get("id", idx)
+            length = arm.get("length_m")
+            text = f" ({format_length(length, ground.unit)})" if length else ""
+            act = menu.addAction(f"Arm {label} Length{text}…")
+            act.triggered.connect(
+                lambda checked=False, i=idx: self._prompt_arm_length(i)
             )
 
-        if "angle_font_size" in s:
-            self.angle_font_size = to_int(
-                s["angle_font_size"], self.angle_font_size
+        menu.addSeparator()
+        for unit in ground.UNITS:
+            act = menu.addAction(f"Unit: {unit}")
+            act.setCheckable(True)
+            act.setChecked(ground.unit == unit)
+            act.triggered.connect(
+                lambda checked=False, u=unit: ground.set_unit(u)
             )
 
-        if "label_font_size" in s:
-            self.label_font_size = to_int(
-                s["label_font_size"], self.label_font_size
+        return menu
+
+    def _build_layout_menu(self, parent):
+        from qgis.PyQt.QtWidgets import QMenu
+        from qgis.core import QgsProject
+
+        menu = QMenu("Add to Print Layout", parent)
+        for layout in QgsProject.instance().layoutManager().printLayouts():
+            act = menu.addAction(layout.name())
+            act.triggered.connect(
+                lambda checked=False, lay=layout: self._add_to_layout(lay)
             )
 
-        if "arm_radius_min" in s:
-            self.arm_radius_min = to_int(
-                s["arm_radius_min"], self.arm_radius_min
+        if menu.isEmpty():
+            menu.setEnabled(False)
+        return menu
+
+    def _add_to_layout(self, layout):
+        from qgis.PyQt.QtWidgets import QInputDialog
+
+        fields = ""
+        atlas = layout.atlas()
+        if atlas.enabled() and atlas.coverageLayer() is not None:
+            fields, ok = QInputDialog.getText(
+                self.canvas,
+                "Add to Print Layout",
+                "Atlas azimuth fields (comma separated, empty = current arms):",
             )
-        
-        if "arm_radius_max" in s:
-            self.arm_radius_max = to_int(
-                s["arm_radius_max"], self.arm_radius_max
+            if not ok:
+                return
+        add_to_layout(self, layout, fields)
+        self.iface.messageBar().pushInfo(
+            "Floating Compass", f"Compass added to layout '{layout.name()}'"
+        )
+
+    def _build_range_rings_menu(self, parent):
+        from qgis.PyQt.QtWidgets import QMenu
+
+        menu = QMenu("Range Rings", parent)
+        rings = self.range_rings
+        params = rings.params
+
+        act_show = menu.addAction("Show")
+        act_show.setCheckable(True)
+        act_show.setChecked(rings.enabled)
+        act_show.toggled.connect(lambda on: rings.configure(enabled=on))
+
+        menu.addSeparator()
+        presets = (
+            ((250, 500, 1000), "m"),
+            ((500, 1000, 2000), "m"),
+            ((1, 2, 5), "km"),
+            ((100, 200, 300), "px"),
+        )
+        for distances, unit in presets:
+            text = " / ".join(f"{d:g}" for d in distances) + f" {unit}"
+            act = menu.addAction(text)
+            act.setCheckable(True)
+            act.setChecked(
+                params["unit"] == unit
+                and params["distances"] == tuple(float(d) for d in distances)
             )
-        
-        if "ring_radius_min" in s:
-            self.ring_radius_min = to_int(
-                s["ring_radius_min"], self.ring_radius_min
+            act.triggered.connect(
+                lambda checked=False, d=distances, u=unit:
+                    rings.configure(enabled=True, distances=d, unit=u)
             )
 
-        if "ring_radius_max" in s:
-            self.ring_radius_max = to_int(
-                s["ring_radius_max"], self.ring_radius_max
+        act_custom = menu.addAction("Custom…")
+        act_custom.triggered.connect(self._prompt_range_rings)
+        return menu
+
+    def _prompt_range_rings(self):
+        from qgis.PyQt.QtWidgets import QInputDialog
+
+        rings = self.range_rings
+        unit, ok = QInputDialog.getItem(
+            self.canvas, "Range Rings", "Unit:",
+            list(rings.UNITS), rings.UNITS.index(rings.params["unit"]), False
+        )
+        if not ok:
+            return
+        text, ok = QInputDialog.getText(
+            self.canvas, "Range Rings", f"Distances ({unit}, comma separated):",
+            text=", ".join(f"{d:g}" for d in rings.params["distances"])
+        )
+        if not ok:
+            return
+        try:
+            rings.configure(enabled=True, distances=text, unit=unit)
+        except ValueError as e:
+            self.iface.messageBar().pushWarning("Floating Compass", str(e))
+
+    def _prompt_length(self, title, current_m):
+        from qgis.PyQt.QtWidgets import QInputDialog
+
+        ground = self.ground
+        factor = ground.to_meters(1.0)
+        value, ok = QInputDialog.getDouble(
+            self.canvas,
+            title,
+            f"Length ({ground.unit}, 0 = pixel length):",
+            (current_m or 0.0) / factor,
+            0.0,
+            1000000.0 / factor,
+            3 if ground.unit == "km" else 1,
+        )
+        return value if ok else None
+
+    def _prompt_ring_distance(self):
+        inst = self.instances.active
+        if inst is None:
+            return
+        value = self._prompt_length("Ring Distance", inst.ring_m)
+        if value is not None:
+            self.ground.set_ring_distance(inst, value)
+
+    def _prompt_arm_length(self, arm_index):
+        inst = self.instances.active
+        if inst is None or arm_index is None:
+            return
+        value = self._prompt_length(
+            "Arm Length", inst.arms[arm_index].get("length_m")
+        )
+        if value is not None:
+            self.ground.set_arm_length(inst, arm_index, value)
+
+    def _build_pathloss_menu(self, parent):
+        from qgis.PyQt.QtWidgets import QMenu
+
+        menu = QMenu("Path Loss", parent)
+        params = self.pathloss.params
+
+        choices = (
+            ("Off", {"model": "off"}),
+            ("Free Space", {"model": "fspl"}),
+            ("Okumura-Hata (Urban)", {"model": "hata", "environment": "urban"}),
+            ("Okumura-Hata (Suburban)", {"model": "hata", "environment": "suburban"}),
+            ("Okumura-Hata (Open)", {"model": "hata", "environment": "open"}),
+        )
+        for text, values in choices:
+            act = menu.addAction(text)
+            act.setCheckable(True)
+            act.setChecked(all(params.get(k) == v for k, v in values.items()))
+            act.triggered.connect(
+                lambda checked=False, v=values: self.pathloss.configure(**v)
             )
 
-        if "arc_line_width" in s:
-            self.arc_line_width = int(s["arc_line_width"])
-            
-        if "arm_line_width" in s:
-            self.arm_line_width = int(s["arm_line_width"])
-            
-        if "ring_line_width" in s:
-            self.ring_line_width = int(s["ring_line_width"])
-            
+        return menu
 
-        if "angle_text_distance_px" in s:
-            self.angle_text_distance_px = int(s["angle_text_distance_px"])
+    def _build_profiles_menu(self, parent):
+        from qgis.PyQt.QtWidgets import QMenu
 
-        # =====================
-        # COLORS
-        # =====================
-        if "color_ring" in s:
-            self.color_ring = QColor(s["color_ring"])
+        menu = QMenu("Profiles", parent)
+
+        def add_profile_actions(target, names):
+            for name in names:
+                act = target.addAction(name)
+                act.triggered.connect(
+                    lambda checked=False, n=name: self.apply_profile(n)
+                )
+
+        try:
+            names = self.profiles.names()
+            tags = self.profiles.tags()
+        except Exception:
+            names, tags = [], []
+
+        # tagged profiles grouped per tag, untagged at top level
+        for tag in tags:
+            add_profile_actions(menu.addMenu(tag), self.profiles.names(tag))
+
+        untagged = [
+            n for n in names
+            if not self.profiles.record(n).get("tags")
+        ]
+        if tags and untagged:
+            menu.addSeparator()
+        add_profile_actions(menu, untagged)
+
+        if names:
+            menu.addSeparator()
+
+        act_save = menu.addAction("Save Current as Profile…")
+        act_save.triggered.connect(self._prompt_save_profile)
+
+        if names:
+            menu_del = menu.addMenu("Delete Profile")
+            for name in names:
+                act = menu_del.addAction(name)
+                act.triggered.connect(
+                    lambda checked=False, n=name: self.profiles.delete(n)
+                )
+
+        return menu
+
+    def _prompt_save_profile(self):
+        from qgis.PyQt.QtWidgets import QInputDialog
+
+        name, ok = QInputDialog.getText(
+            self.iface.mainWindow(), "Save Profile", "Profile name:"
+        )
+        if not ok or not name.strip():
+            return
+
+        tags, ok = QInputDialog.getText(
+            self.iface.mainWindow(),
+            "Save Profile",
+            "Tags (comma separated, optional):"
+        )
+        if not ok:
+            return
+
+        self.save_profile(name, [t for t in tags.split(",")])
+
+    # =====================
+    # PROFILES
+    # =====================
+    def settings_snapshot(self):
+        """Current settings as a plain dict (same keys as apply_settings)."""
+        from qgis.PyQt.QtGui import QColor
+
+        out = {}
+        for key, (attr, coerce, deps) in self.SETTINGS_DISPATCH.items():
+            v = getattr(self, attr, None)
+            out[key] = v.name() if isinstance(v, QColor) else v
 
-        if "color_arc" in s:
-            self.color_arc = QColor(s["color_arc"])
+        for idx, l in enumerate("ABCDEF"):
+            out[f"label_{l}"] = self.arm_labels[idx]
 
-        if "color_text" in s:
-            self.color_text = QColor(s["color_text"])
+        self._init_arms_if_needed()
+        for idx, key in enumerate(self.ARM_COLOR_KEYS):
+            out[key] = self.arms[idx]["color"].name()
 
-        if "color_outline" in s:
-            self.color_outline = QColor(s["color_outline"])
+        out["mode"] = self.mode
+        out["multi_sector_count"] = self.multi_sector_count
+        return out
 
-        if "color_shadow" in s:
-            self.color_shadow = QColor(s["color_shadow"])
+    def save_profile(self, name, tags=()):
+        self.profiles.save(name, self.settings_snapshot(), tags)
 
-        if "ring_glow_alpha" in s:
-            self.ring_glow_alpha = to_int(
-                s["ring_glow_alpha"], self.ring_glow_alpha
+    def apply_profile(self, name):
+        """
+        Switch to profile name. Only fields that differ from the
+        current settings are applied and written to QSettings.
+        Returns the set of changed keys.
+        """
+        profile = self.profiles.get(name)
+        if profile is None:
+            return set()
+
+        current = self.settings_snapshot()
+        diff = {
+            k: v for k, v in profile.items()
+            if k not in current or current[k] != v
+        }
+
+        changed = self.apply_settings(diff)
+        self._persist_settings({k: diff[k] for k in changed})
+
+        try:
+            self.iface.statusBarIface().showMessage(
+                f"Profile '{name}': {len(changed)} setting(s) changed", 3000
             )
+        except Exception:
+            pass
+        return changed
+
+    def _persist_settings(self, values):
+        if not values:
+            return
+
+        qs = QSettings()
+        qs.beginGroup(self.SETTINGS_GROUP)
+        for k, v in values.items():
+            qs.setValue(k, v)
+        qs.endGroup()
 
-        if "text_shadow_alpha" in s:
-            self.text_shadow_alpha = to_int(
-                s["text_shadow_alpha"], self.text_shadow_alpha
+    def _arm_place_new(self):
+        self._placing_new = True
+        try:
+            self.iface.statusBarIface().showMessage(
+                "Click on an empty map area to place a new compass", 3000
             )
+        except Exception:
+            pass
+
+    # =====================
+    # APPLY SETTINGS (LIVE)
+    # =====================
+    def apply_settings(self, s):
+        """
+        Apply a (partial) settings dict to the runtime state.
+
+        Only fields whose value actually differs are applied; their
+        dependent render caches are invalidated, arm state is persisted
+        only when it changed, and the overlay is repainted only when a
+        visual field changed.
+
+        Returns the set of changed setting keys.
+        """
+        changed = set()
+        caches = set()
+        visual = False
 
         # =====================
-        # CROSSHAIR
+        # DISPATCH TABLE
         # =====================
-        if "show_crosshair" in s:
-            self.show_crosshair = bool(s["show_crosshair"])
+        for key, (attr, coerce, deps) in self.SETTINGS_DISPATCH.items():
+            if key not in s:
+                continue
 
-        if "crosshair_style" in s:
-            self.crosshair_style = str(s["crosshair_style"]).lower()
+            cur = getattr(self, attr, None)
+            val = coerce(s[key], cur)
+            if val == cur:
+                continue
 
-        if "crosshair_size_px" in s:
-            self.crosshair_size_px = to_int(
-                s["crosshair_size_px"], self.crosshair_size_px
-            )
+            setattr(self, attr, val)
+            changed.add(key)
 
-        if "crosshair_thickness" in s:
-            self.crosshair_thickness = to_int(
-                s["crosshair_thickness"], self.crosshair_thickness
-            )
+            if deps is not None:
+                visual = True
+                caches.update(deps)
 
-        if "crosshair_color" in s:
-            try:
-                self.crosshair_color = QColor(s["crosshair_color"])
-            except Exception:
-                pass
+        # =====================
+        # ARM LABELS
+        # =====================
+        if not hasattr(self, "arm_labels"):
+            self.arm_labels = ["A", "B", "C", "D", "E", "F"]
+
+        for idx, key in enumerate([f"label_{l}" for l in "ABCDEF"]):
+            if key in s:
+                val = str(s[key]).strip() or self.arm_labels[idx]
+                if val != self.arm_labels[idx]:
+                    self.arm_labels[idx] = val
+                    changed.add(key)
+                    visual = True
 
         # =====================
         # ARM MODEL + COLORS
         # =====================
         self._init_arms_if_needed()
+        dirty_arms = set()
 
-        arm_color_keys = [
-            "color_arm_a",
-            "color_arm_b",
-            "color_arm_c",
-            "color_arm_d",
-            "color_arm_e",
-            "color_arm_f",
-        ]
-
-        for idx, key in enumerate(arm_color_keys):
+        for idx, key in enumerate(self.ARM_COLOR_KEYS):
             if key in s and idx < len(self.arms):
-                try:
-                    self.arms[idx]["color"] = QColor(s[key])
-                except Exception:
-                    pass
+                cur = self.arms[idx]["color"]
+                val = _as_color(s[key], cur)
+                if val != cur:
+                    self.arms[idx]["color"] = val
+                    changed.add(key)
+                    dirty_arms.add(idx)
+                    visual = True
 
         # =====================
         # MODE PRESET
         # =====================
         need_apply_preset = False
 
-        if old_mode != self.mode:
+        if "mode" in s and s["mode"] != self.mode:
+            self.mode = s["mode"]
+            changed.add("mode")
             need_apply_preset = True
 
-        if self.mode == "MULTI" and old_sector_count != self.multi_sector_count:
-            need_apply_preset = True
+        if "multi_sector_count" in s:
+            n = _as_int(s["multi_sector_count"], self.multi_sector_count)
+            if n != self.multi_sector_count:
+                self.multi_sector_count = n
+                changed.add("multi_sector_count")
+                if self.mode == "MULTI":
+                    need_apply_preset = True
 
         if need_apply_preset:
             self.apply_mode_preset(self.mode, self.multi_sector_count)
+            for inst in self.instances:
+                if inst is not self.instances.active:
+                    self.apply_mode_preset(
+                        self.mode, self.multi_sector_count, inst.arms
+                    )
+            dirty_arms.update(range(len(self.arms)))
+            caches.add(_GEOMETRY)
+            visual = True
+
+        # =====================
+        # PERSIST ARM STATE (ONLY WHAT CHANGED)
+        # =====================
+        if dirty_arms:
+            self._persist_arms(sorted(dirty_arms))
 
         # =====================
-        # PERSIST ARM STATE (SAFE)
+        # INVALIDATE + REDRAW
         # =====================
+        if caches:
+            self.render_cache.invalidate(caches)
+
+        if visual:
+            self._request_update(geometry=_GEOMETRY in caches)
+
+        return changed
+
+    def _persist_arms(self, indices=None):
+        """
+        Write arm state (angle / radius / enabled / color) to QSettings.
+        indices None = all arms.
+        """
+        from qgis.PyQt.QtCore import QSettings
+
+        arms = getattr(self, "arms", [])
+        if indices is None:
+            indices = range(len(arms))
+
+        if self._batch_depth:
+            self._batch_arms.update(indices)
+            return
+
         qs = QSettings()
         qs.beginGroup(self.SETTINGS_GROUP)
 
-        for idx, arm in enumerate(getattr(self, "arms", [])):
+        for idx in indices:
+            arm = arms[idx]
             qs.setValue(f"arm_{idx}_angle", float(arm.get("angle_deg", 0.0)))
 
             raw_radius = arm.get("radius_px")
@@ -1196,12 +2369,77 @@ class FloatingCompassMapTool(QgsMapTool):
                 qs.setValue(f"arm_{idx}_color", col.name())
 
         qs.endGroup()
+        self.project_state.mark_dirty()
 
-        # =====================
-        # REDRAW
-        # =====================
-        if self.overlay:
-            self.overlay.update()
+    def _persist_ring(self):
+        if self._batch_depth:
+            self._batch_ring = True
+            return
+
+        qs = QSettings()
+        qs.beginGroup(self.SETTINGS_GROUP)
+        qs.setValue("ring_radius", int(self.ring_radius))
+        qs.endGroup()
+        self.project_state.mark_dirty()
+
+    def _request_update(self, geometry=False):
+        """
+        Repaint overlay (deferred while inside batch()).
+        geometry=True → bounding rect may change.
+        """
+        if self._batch_depth:
+            self._batch_update = True
+            self._batch_geometry = self._batch_geometry or geometry
+            return
+
+        if not self.overlay:
+            return
+
+        if geometry:
+            self.overlay.prepareGeometryChange()
+        self.overlay.update()
+        self.views.update(geometry)
+        self.drivetest.refresh()
+
+    # =====================
+    # BATCH (TRANSACTIONAL UPDATES)
+    # =====================
+    @contextmanager
+    def batch(self):
+        """
+        Suppress repaints and QSettings writes until the outermost
+        batch exits, then flush them once:
+
+            with tool.batch():
+                for x, y, azimuths in sites:
+                    tool.api.set_center_map(x, y)
+                    tool.api.set_arms(azimuths)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush_batch()
+
+    def _flush_batch(self):
+        arms = sorted(self._batch_arms)
+        ring = self._batch_ring
+        update = self._batch_update
+        geometry = self._batch_geometry
+
+        self._batch_arms = set()
+        self._batch_ring = False
+        self._batch_update = False
+        self._batch_geometry = False
+
+        if ring:
+            self._persist_ring()
+        if arms:
+            self._persist_arms(arms)
+        if update:
+            self._request_update(geometry=geometry)
 
     
     def _load_settings_from_qsettings(self):
@@ -1276,7 +2514,7 @@ class FloatingCompassMapTool(QgsMapTool):
     def snap(self, angle):
         if not self.snap_enabled:
             return angle
-        return round(angle / self.snap_step) * self.snap_step
+        return cgeom.snap(angle, self.snap_step)
 
     def arm_a_endpoint(self):
         return self.endpoint(self.arm_a_angle, self.arm_a_radius)
@@ -1285,41 +2523,59 @@ class FloatingCompassMapTool(QgsMapTool):
         return self.endpoint(self.arm_b_angle, self.arm_b_radius)
 
     def endpoint(self, angle, radius):
-        rad = math.radians(angle)
-        return QPointF(
-            self.center.x() + radius * math.sin(rad),
-            self.center.y() - radius * math.cos(rad)
-        )
+        return self._endpoint_at(self.center, angle, radius)
+
+    def _endpoint_at(self, c, angle, radius):
+        """Pixel end of azimuth angle at radius (canvas rotation applied)."""
+        return QPointF(*cgeom.screen_endpoint(
+            c.x(), c.y(), self.view.screen_angle(angle), radius
+        ))
 
     def bearing(self, p1, p2):
-        dx = p2.x() - p1.x()
-        dy = p1.y() - p2.y()
-        return (math.degrees(math.atan2(dx, dy)) + 360) % 360
+        # screen y points down → negate; minus canvas rotation → azimuth
+        return self.view.azimuth(
+            cgeom.bearing(p1.x(), -p1.y(), p2.x(), -p2.y())
+        )
+
+    def _on_rotation_changed(self):
+        """Canvas rotated: dial / arms are redrawn, profiles follow."""
+        if not self.overlay:
+            return
+        self._request_update(geometry=True)
+        self.terrain.schedule()
 
     def dist(self, p1, p2):
-        return math.hypot(p1.x() - p2.x() - 0, p1.y() - p2.y() - 0)
+        return cgeom.distance(p1.x(), p1.y(), p2.x(), p2.y())
 
     def clamp(self, v, vmin, vmax):
         return max(vmin, min(vmax, v))
 
     def point_to_line_dist(self, p, a, b):
-        px, py = p.x(), p.y()
-        ax, ay = a.x(), a.y()
-        bx, by = b.x(), b.y()
-        dx, dy = bx - ax, by - ay
-        if dx == 0 and dy == 0:
-            return self.dist(p, a)
-        t = ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)
-        t = max(0, min(1, t))
-        proj = QPointF(ax + t * dx, ay + t * dy)
-        return self.dist(p, proj)
+        return cgeom.point_segment_distance(
+            p.x(), p.y(), a.x(), a.y(), b.x(), b.y()
+        )
 
     def keyPressEvent(self, event):
         # =====================
-        # RESET CEPAT (Shortcut: R) → Reset ke default settings
-        # TOGGLE SNAP (Shortcut: S) → Menampilkan Snap degrees      
+        # RESET CEPAT (Shortcut: R) → Reset arm ke preset mode
+        # TOGGLE SNAP (Shortcut: S) → Menampilkan Snap degrees
+        # RECORD MEASUREMENT (Shortcut: M)
+        # UNDO / REDO (Ctrl+Z / Ctrl+Y, Ctrl+Shift+Z)
         # =====================
 
+        if event.modifiers() & Qt.ControlModifier:
+            if event.key() == Qt.Key_Z:
+                if event.modifiers() & Qt.ShiftModifier:
+                    self.redo()
+                else:
+                    self.undo()
+                event.accept()
+                return
+            if event.key() == Qt.Key_Y:
+                self.redo()
+                event.accept()
+                return
+
         if event.key() == Qt.Key_S:
             self.snap_enabled = not self.snap_enabled
 
@@ -1335,32 +2591,28 @@ class FloatingCompassMapTool(QgsMapTool):
             self.overlay.update()
             return
             
-        if event.key() == Qt.Key_R and self.center is not None:
-            s = QSettings()
-            s.beginGroup(self.SETTINGS_GROUP)
-
-            self.ring_radius = s.value("ring_radius", 100, int)
-            self.arm_a_radius = s.value("arm_a_radius", 90, int)
-            self.arm_b_radius = s.value("arm_b_radius", 120, int)
-
-            self.arm_a_angle = 0.0
-            self.arm_b_angle = 90.0
-
-            s.endGroup()
+        if event.key() == Qt.Key_M and self.center is not None:
+            self.record_measurement()
+            return
 
-            # bounding berubah → wajib
-            self.overlay.prepareGeometryChange()
-            self.overlay.update()
+        if event.key() == Qt.Key_R and self.center is not None:
+            self.reset_geometry()
             return
 
         # =====================
         # CLEAR PROTRACTOR (ESC)
         # =====================
         if event.key() == Qt.Key_Escape and self.center is not None:
+            # more compasses left → remove only the active one
+            if len(self.instances) > 1:
+                self.remove_instance()
+                return
+
             self.overlay.prepareGeometryChange()
             self.center = None
             self.overlay.setVisible(False)
             self.overlay.update()
+            self.project_state.mark_dirty()
 
             # 🔥 switch back to Pan tool
             self.iface.actionPan().trigger()
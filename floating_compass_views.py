@@ -0,0 +1,338 @@
+# ============================================================
+# Floating Compass - QGIS Plugin
+#
+# Author   : Achmad Amrulloh
+# Email    : achmad.amrulloh@gmail.com
+# LinkedIn : https://www.linkedin.com/in/achmad-amrulloh/
+#
+# © 2026 Dinzo. All rights reserved.
+#
+# This software is provided as freeware.
+# Redistribution, modification, or reuse without
+# proper attribution is not permitted.
+# ============================================================
+
+# floating_compass_views.py
+import math
+
+from qgis.PyQt.QtCore import QPoint, QPointF, QTimer
+from qgis.core import QgsCoordinateTransform, QgsProject
+from qgis.gui import QgsMapTool
+
+from .floating_compass_overlay import FloatingCompassOverlay
+
+
+class CanvasView:
+    """
+    Screen ↔ azimuth mapping of one map canvas.
+
+    Arm angles are true azimuths; on a rotated canvas north points
+    rotation degrees clockwise from screen up. The rotation is cached
+    and only re-read on rotationChanged.
+    """
+
+    def __init__(self, canvas, on_change=None):
+        self.canvas = canvas
+        self._on_change = on_change
+        self.rotation = float(canvas.rotation() or 0.0) % 360.0
+        canvas.rotationChanged.connect(self._on_rotation_changed)
+
+    def _on_rotation_changed(self, deg):
+        self.rotation = float(deg or 0.0) % 360.0
+        if self._on_change is not None:
+            self._on_change()
+
+    def disconnect(self):
+        try:
+            self.canvas.rotationChanged.disconnect(self._on_rotation_changed)
+        except (TypeError, RuntimeError):
+            pass
+
+    def screen_angle(self, azimuth):
+        """Clockwise-from-screen-up angle of azimuth."""
+        return azimuth + self.rotation
+
+    def azimuth(self, screen_angle):
+        return (screen_angle - self.rotation) % 360.0
+
+    def center(self, inst):
+        """Pixel center of inst on this canvas."""
+        return inst.center
+
+
+class MirrorView(CanvasView):
+    """
+    View of the shared compasses on an additional map canvas.
+
+    Compass centers are pixels of the main canvas; they are placed
+    here at the same map location (main pixel → map → this canvas,
+    with a cached CRS transform). Radii stay in pixels.
+    """
+
+    def __init__(self, canvas, tool, on_change=None):
+        super().__init__(canvas, on_change)
+        self.tool = tool
+        self._xform_key = None
+        self._xform = None
+
+    def _transform(self):
+        src = self.tool.canvas.mapSettings().destinationCrs()
+        dst = self.canvas.mapSettings().destinationCrs()
+        key = (src.authid() or src.toWkt(), dst.authid() or dst.toWkt())
+        if key != self._xform_key:
+            self._xform = (
+                None if src == dst
+                else QgsCoordinateTransform(
+                    src, dst, QgsProject.instance().transformContext()
+                )
+            )
+            self._xform_key = key
+        return self._xform
+
+    def to_local(self, main_px):
+        """Main canvas pixel → pixel on this canvas (QPointF)."""
+        pt = self.tool.canvas.getCoordinateTransform().toMapCoordinates(
+            int(round(main_px.x())), int(round(main_px.y()))
+        )
+        xform = self._transform()
+        if xform is not None:
+            try:
+                pt = xform.transform(pt)
+            except Exception:
+                return None
+        p = self.canvas.getCoordinateTransform().transform(pt)
+        return QPointF(p.x(), p.y())
+
+    def to_main(self, local_px):
+        """Pixel on this canvas → main canvas pixel (QPointF)."""
+        pt = self.canvas.getCoordinateTransform().toMapCoordinates(
+            int(round(local_px.x())), int(round(local_px.y()))
+        )
+        xform = self._transform()
+        if xform is not None:
+            try:
+                pt = xform.transform(pt, QgsCoordinateTransform.ReverseTransform)
+            except Exception:
+                return None
+        p = self.tool.canvas.getCoordinateTransform().transform(pt)
+        return QPointF(p.x(), p.y())
+
+    def center(self, inst):
+        return self.to_local(inst.center) if inst.center is not None else None
+
+    def offset_to_main(self, dx, dy):
+        """Pixel offset here → main canvas offset with the same azimuth."""
+        main = self.tool.view
+        rad = math.radians(main.rotation - self.rotation)
+        cos, sin = math.cos(rad), math.sin(rad)
+        return dx * cos - dy * sin, dx * sin + dy * cos
+
+
+class _ProxyEvent:
+    """Mouse event of an additional canvas, moved into main pixels."""
+
+    def __init__(self, event, pos):
+        self._event = event
+        self._pos = QPoint(int(round(pos.x())), int(round(pos.y())))
+
+    def pos(self):
+        return self._pos
+
+    def globalPos(self):
+        return self._event.globalPos()
+
+    def button(self):
+        return self._event.button()
+
+    def buttons(self):
+        return self._event.buttons()
+
+    def modifiers(self):
+        return self._event.modifiers()
+
+
+class FloatingCompassProxyTool(QgsMapTool):
+    """
+    Map tool of an additional canvas: hit-tests against the compasses
+    as drawn there and forwards the events to the main tool.
+
+    Positions are translated relative to the compass under the cursor
+    (the active one while dragging): the offset from its local center
+    is rotated by the rotation difference and added to its main
+    center, so arm azimuths and pixel lengths read the same on both
+    canvases. With no compass placed yet the map location is used.
+    """
+
+    def __init__(self, canvas, tool, view):
+        super().__init__(canvas)
+        self.tool = tool
+        self.view = view
+
+    def _instance_at(self, pos):
+        t = self.tool
+        if t.active_handle != t.HANDLE_NONE:
+            return t.instances.active
+
+        best, best_d = None, None
+        for inst in t.instances:
+            c = self.view.center(inst)
+            if c is None:
+                continue
+            d = math.hypot(pos.x() - c.x(), pos.y() - c.y())
+            reach = max(
+                [inst.ring_radius]
+                + [a.get("radius_px") or 0 for a in inst.arms if a.get("enabled")]
+            ) + t.hit_ring
+            if d <= reach and (best_d is None or d < best_d):
+                best, best_d = inst, d
+        return best or t.instances.active
+
+    def _translate(self, event):
+        pos = QPointF(event.pos())
+        inst = None if self.tool._placing_new else self._instance_at(pos)
+        c = self.view.center(inst) if inst is not None else None
+        if c is None:
+            main = self.view.to_main(pos)
+        else:
+            dx, dy = self.view.offset_to_main(pos.x() - c.x(), pos.y() - c.y())
+            main = QPointF(inst.center.x() + dx, inst.center.y() + dy)
+        return _ProxyEvent(event, main) if main is not None else None
+
+    def canvasPressEvent(self, event):
+        e = self._translate(event)
+        if e is not None:
+            self.tool.canvasPressEvent(e)
+            self.tool.views.update()
+
+    def canvasMoveEvent(self, event):
+        e = self._translate(event)
+        if e is not None:
+            self.tool.canvasMoveEvent(e)
+            self.canvas().setCursor(self.tool.canvas.cursor())
+            self.tool.views.update()
+
+    def canvasReleaseEvent(self, event):
+        e = self._translate(event)
+        if e is not None:
+            self.tool.canvasReleaseEvent(e)
+            self.tool.views.update(geometry=True)
+
+    def keyPressEvent(self, event):
+        self.tool.keyPressEvent(event)
+
+
+class FloatingCompassViews:
+    """
+    The shared compass model on QGIS' additional 2D map views: one
+    lightweight overlay (shared render cache, compasses only) and one
+    proxy map tool per extra canvas. Map-anchored layers (nearest
+    sites, aimed sectors, terrain, drive test) stay on the main canvas.
+
+    QGIS has no signal for map views being opened, so the canvas list is
+    re-synced on activate and then every SYNC_MS while the tool is active
+    (one cheap comparison when unchanged), never per drag frame.
+    """
+
+    SYNC_MS = 1000
+
+    def __init__(self, tool):
+        self.tool = tool
+        self._views = {}        # canvas → (view, overlay, proxy tool, slots)
+        self._active = False
+        self._sync_timer = QTimer()
+        self._sync_timer.timeout.connect(self.sync)
+
+    def sync(self):
+        """Pick up map views opened / closed since the last call."""
+        t = self.tool
+        try:
+            canvases = [c for c in t.iface.mapCanvases() if c is not t.canvas]
+        except (AttributeError, RuntimeError):
+            canvases = []
+
+        if len(canvases) == len(self._views) and all(
+            c in self._views for c in canvases
+        ):
+            return
+
+        for canvas in list(self._views):
+            if canvas not in canvases:
+                self._drop(canvas)
+
+        for canvas in canvases:
+            if canvas in self._views:
+                continue
+            view = MirrorView(
+                canvas, t, lambda c=canvas: self._update_one(c, True)
+            )
+            overlay = FloatingCompassOverlay(canvas, t, t.render_cache, view)
+            overlay.setVisible(t.overlay is not None and t.overlay.isVisible())
+            proxy = FloatingCompassProxyTool(canvas, t, view)
+            slots = (
+                (canvas.extentsChanged,
+                 lambda c=canvas: self._update_one(c, True)),
+                (canvas.destroyed, lambda *a, c=canvas: self._forget(c)),
+            )
+            for signal, slot in slots:
+                signal.connect(slot)
+            self._views[canvas] = (view, overlay, proxy, slots)
+            if self._active:
+                canvas.setMapTool(proxy)
+            self._update_one(canvas, True)
+
+    def _forget(self, canvas):
+        self._views.pop(canvas, None)
+
+    def _drop(self, canvas):
+        view, overlay, proxy, slots = self._views.pop(canvas)
+        view.disconnect()
+        for signal, slot in slots:
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass
+        try:
+            if canvas.mapTool() is proxy:
+                canvas.unsetMapTool(proxy)
+            overlay.scene().removeItem(overlay)
+        except RuntimeError:
+            pass
+
+    def _update_one(self, canvas, geometry=False):
+        hit = self._views.get(canvas)
+        if hit is None:
+            return
+        overlay = hit[1]
+        overlay.setVisible(self.tool.center is not None)
+        if geometry:
+            overlay.prepareGeometryChange()
+        overlay.update()
+
+    def update(self, geometry=False):
+        for canvas in self._views:
+            self._update_one(canvas, geometry)
+
+    def activate(self):
+        self._active = True
+        self.sync()
+        self._sync_timer.start(self.SYNC_MS)
+        for canvas, (_, _, proxy, _) in self._views.items():
+            if canvas.mapTool() is not proxy:
+                canvas.setMapTool(proxy)
+        self.update(geometry=True)
+
+    def deactivate(self):
+        self._active = False
+        self._sync_timer.stop()
+        for canvas, (_, _, proxy, _) in self._views.items():
+            if canvas.mapTool() is proxy:
+                canvas.unsetMapTool(proxy)
+
+    def unload(self):
+        self._active = False
+        self._sync_timer.stop()
+        for canvas in list(self._views):
+            self._drop(canvas)
+
+    def overlays(self):
+        return [hit[1] for hit in self._views.values()]
@@ -0,0 +1,6 @@
+# Qt-free plugin modules are importable without QGIS: put the plugin
+# directory itself on sys.path and import them as top-level modules.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,46 @@
+import math
+
+import numpy as np
+import pytest
+
+import floating_compass_geometry as cgeom
+
+
+# =====================
+# TERRAIN DIFFRACTION
+# =====================
+def _knife_edge(h, d1, d2, freq_mhz):
+    """Single knife-edge loss by hand (ITU-R P.526 J(v))."""
+    wavelength = cgeom.SPEED_OF_LIGHT / (freq_mhz * 1e6)
+    v = h * math.sqrt(2.0 * (d1 + d2) / (wavelength * d1 * d2))
+    return 6.9 + 20.0 * math.log10(math.sqrt((v - 0.1) ** 2 + 1.0) + v - 0.1)
+
+
+def test_single_knife_edge_matches_hand_computation():
+    # flat ground, 50 m spike at 300 m, 10 m masts, no earth bulge
+    d = np.arange(0.0, 1001.0, 100.0)
+    z = np.zeros_like(d)
+    z[3] = 50.0
+    loss = cgeom.terrain_diffraction_db(d, z, 10.0, 10.0, 900.0, k=1e12)
+
+    assert np.all(loss[:4] == 0.0)
+    for i in range(4, len(d)):
+        expected = _knife_edge(40.0, 300.0, d[i] - 300.0, 900.0)
+        assert loss[i] == pytest.approx(expected, abs=1e-6)
+
+
+def test_sample_right_behind_obstacle_is_diffracted():
+    d = np.arange(0.0, 1001.0, 100.0)
+    z = np.zeros_like(d)
+    z[3] = 50.0
+    loss = cgeom.terrain_diffraction_db(d, z, 10.0, 10.0, 900.0)
+    assert loss[4] > 30.0
+
+
+# =====================
+# CIRCULAR STATISTICS
+# =====================
+def test_circular_mean_across_north_is_zero():
+    mean, r = cgeom.circular_mean([350.0, 10.0])
+    assert mean == 0.0
+    assert r == pytest.approx(math.cos(math.radians(10.0)))
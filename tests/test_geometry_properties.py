@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+import pytest
+
+# property tests need hypothesis (pip install hypothesis); skip without it
+pytest.importorskip("hypothesis")
+
+from hypothesis import assume, given, strategies as st
+
+import floating_compass_geometry as cgeom
+
+
+# =====================
+# PROPERTIES
+# =====================
+coords = st.floats(-1e6, 1e6, allow_nan=False)
+angles = st.floats(-1e4, 1e4, allow_nan=False)
+azimuths = st.floats(0.0, 360.0, allow_nan=False, exclude_max=True)
+
+
+@given(coords, coords, coords, coords)
+def test_bearing_matches_bearings(x0, y0, x1, y1):
+    b = cgeom.bearing(x0, y0, x1, y1)
+    assert 0.0 <= b < 360.0
+    assert cgeom.bearings(x0, y0, x1, y1) == pytest.approx(b, abs=1e-9)
+    assert cgeom.bearings([x0], [y0], [x1], [y1])[0] == pytest.approx(b, abs=1e-9)
+
+
+@given(st.lists(angles, min_size=1, max_size=20), angles)
+def test_angle_diffs_in_half_open_range(a, b):
+    d = cgeom.angle_diffs(a, b)
+    assert np.all((d > -180.0) & (d <= 180.0))
+    for ai, di in zip(a, d):
+        assert cgeom.angle_diff(ai, b) == pytest.approx(di, abs=1e-9)
+        # a - b and the wrapped difference are the same direction
+        assert math.cos(math.radians(ai - b - di)) == pytest.approx(1.0)
+
+
+@given(coords, coords, azimuths, st.floats(1.0, 1e5))
+def test_endpoint_bearing_round_trip(x, y, az, radius):
+    ex, ey = cgeom.endpoint(x, y, az, radius)
+    back = cgeom.bearing(x, y, ex, ey)
+    assert abs(cgeom.angle_diff(back, az)) < 1e-6 * max(1.0, abs(x), abs(y))
+
+    sx, sy = cgeom.screen_endpoint(x, y, az, radius)
+    # pixel y points down: mirror it back before taking the bearing
+    assert abs(cgeom.angle_diff(cgeom.bearing(x, -y, sx, -sy), az)) < (
+        1e-6 * max(1.0, abs(x), abs(y))
+    )
+
+
+@given(st.floats(0.0, 179.0), st.floats(0.5, 90.0))
+def test_in_sector_wraps_at_north(offset, half):
+    # sector centred on north: ±offset is inside iff offset <= half
+    # (off the exact edge, where rounding of 360 - offset decides)
+    assume(abs(offset - half) > 1e-9)
+    inside = offset <= half
+    for az in (0.0, 360.0):
+        hits = cgeom.in_sector([offset, 360.0 - offset], az, 2.0 * half)
+        assert list(hits) == [inside, inside]
+
+
+@given(angles, angles, st.floats(0.0, 360.0))
+def test_arc_span_and_mid_angle(a_start, a_end, min_span):
+    span = cgeom.arc_span(a_start, a_end)
+    assert 0.0 <= span < 360.0
+    assert cgeom.arc_spans(a_start, a_end) == pytest.approx(span, abs=1e-9)
+    assert abs(cgeom.angle_diff(a_start + span, a_end)) < 1e-6
+
+    mid = cgeom.mid_angle(a_start, a_end)
+    assert 0.0 <= mid < 360.0
+    assert cgeom.arc_span(a_start, mid) == pytest.approx(span / 2.0, abs=1e-6)
+
+    wide = cgeom.mid_angle(a_start, a_end, min_span)
+    half = max(span, min_span) / 2.0
+    assert abs(cgeom.angle_diff(wide, a_start + half)) < 1e-6
+
+
+@given(st.lists(azimuths, min_size=1, max_size=20))
+def test_circular_mean_range(a):
+    mean, r = cgeom.circular_mean(a)
+    assert 0.0 <= mean < 360.0
+    assert 0.0 <= r <= 1.0 + 1e-12
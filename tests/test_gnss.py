@@ -0,0 +1,24 @@
+import socket
+import threading
+
+from floating_compass_gnss import _socket_lines
+
+
+def test_socket_lines_survive_read_timeouts():
+    a, b = socket.socketpair()
+    a.settimeout(0.05)
+    halt = threading.Event()
+
+    def send():
+        b.sendall(b"$GPGGA,1*00\r\n$GPR")
+        threading.Event().wait(0.2)     # several timeouts on the reader
+        b.sendall(b"MC,2*00\r\n$GPVTG")
+        b.close()
+
+    sender = threading.Thread(target=send)
+    sender.start()
+    lines = list(_socket_lines(a, halt))
+    sender.join()
+    a.close()
+
+    assert lines == ["$GPGGA,1*00\r\n", "$GPRMC,2*00\r\n", "$GPVTG"]